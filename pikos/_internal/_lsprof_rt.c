@@ -10,9 +10,11 @@
 /* #include "nanopb/pb_encode.h" */
 
 static const int profiler_rt_num_fields = 8;
+static const int profiler_rt_num_cpu_fields = 10;
 static const char *profiler_rt_field_names[] = {
     "id", "filename", "line_number", "function_name",
-    "callcount", "non-recursive callcount", "total_time", "cumulative_time"};
+    "callcount", "non-recursive callcount", "total_time", "cumulative_time",
+    "total_cpu_time", "cumulative_cpu_time"};
 
 /*** cPickle functions ***/
 
@@ -143,6 +145,77 @@ hpTimerUnit(void)
 
 #endif  /* MS_WINDOWS */
 
+/*** Selection of a per-thread cpu timer ***/
+
+#ifdef MS_WINDOWS
+
+#define HAVE_CPU_TIMER
+
+static PY_LONG_LONG
+cpuTimer(void)
+{
+    FILETIME creation, exit, kernel, user;
+    ULARGE_INTEGER kernel_time, user_time;
+    if (!GetThreadTimes(GetCurrentThread(),
+                        &creation, &exit, &kernel, &user))
+        return 0;
+    kernel_time.LowPart = kernel.dwLowDateTime;
+    kernel_time.HighPart = kernel.dwHighDateTime;
+    user_time.LowPart = user.dwLowDateTime;
+    user_time.HighPart = user.dwHighDateTime;
+    return kernel_time.QuadPart + user_time.QuadPart;
+}
+
+static double
+cpuTimerUnit(void)
+{
+    return 0.0000001;  /* FILETIME values are in units of 100 ns */
+}
+
+#else  /* !MS_WINDOWS */
+
+#include <time.h>
+
+#ifdef CLOCK_THREAD_CPUTIME_ID
+
+#define HAVE_CPU_TIMER
+
+static PY_LONG_LONG
+cpuTimer(void)
+{
+    struct timespec ts;
+    PY_LONG_LONG ret;
+    if (clock_gettime(CLOCK_THREAD_CPUTIME_ID, &ts) != 0)
+        return 0;
+    ret = ts.tv_sec;
+    ret = ret * 1000000000 + ts.tv_nsec;
+    return ret;
+}
+
+static double
+cpuTimerUnit(void)
+{
+    return 0.000000001;
+}
+
+#else  /* !CLOCK_THREAD_CPUTIME_ID */
+
+static PY_LONG_LONG
+cpuTimer(void)
+{
+    return 0;
+}
+
+static double
+cpuTimerUnit(void)
+{
+    return 0.0;
+}
+
+#endif  /* CLOCK_THREAD_CPUTIME_ID */
+
+#endif  /* MS_WINDOWS */
+
 /************************************************************/
 /* Written by Brett Rosen and Ted Czotter */
 
@@ -153,6 +226,8 @@ typedef struct _ProfilerSubEntry {
     rotating_node_t header;
     PY_LONG_LONG tt;
     PY_LONG_LONG it;
+    PY_LONG_LONG ctt;
+    PY_LONG_LONG cit;
     long callcount;
     long recursivecallcount;
     long recursionLevel;
@@ -164,6 +239,8 @@ typedef struct _ProfilerEntry {
     PyObject *userObj; /* PyCodeObject, or a descriptive str for builtins */
     PY_LONG_LONG tt; /* total time in this entry */
     PY_LONG_LONG it; /* inline time in this entry (not in subcalls) */
+    PY_LONG_LONG ctt; /* total cpu time in this entry */
+    PY_LONG_LONG cit; /* inline cpu time in this entry (not in subcalls) */
     long callcount; /* how many times this was called */
     long recursivecallcount; /* how many times called recursively */
     long recursionLevel;
@@ -173,6 +250,8 @@ typedef struct _ProfilerEntry {
 typedef struct _ProfilerContext {
     PY_LONG_LONG t0;
     PY_LONG_LONG subt;
+    PY_LONG_LONG ct0;
+    PY_LONG_LONG csubt;
     struct _ProfilerContext *previous;
     ProfilerEntry *ctxEntry;
 } ProfilerContext;
@@ -194,6 +273,7 @@ typedef struct {
 #define POF_ENABLED     0x001
 #define POF_SUBCALLS    0x002
 #define POF_BUILTINS    0x004
+#define POF_CPUTIME     0x008
 #define POF_NOMEMORY    0x100
 
 staticforward PyTypeObject PyProfiler_Type;
@@ -322,6 +402,8 @@ newProfilerEntry(ProfilerObject *pObj, void *key, PyObject *userObj)
     self->userObj = userObj;
     self->tt = 0;
     self->it = 0;
+    self->ctt = 0;
+    self->cit = 0;
     self->callcount = 0;
     self->recursivecallcount = 0;
     self->recursionLevel = 0;
@@ -355,6 +437,8 @@ newSubEntry(ProfilerObject *pObj,  ProfilerEntry *caller, ProfilerEntry* entry)
     self->header.key = (void *)entry;
     self->tt = 0;
     self->it = 0;
+    self->ctt = 0;
+    self->cit = 0;
     self->callcount = 0;
     self->recursivecallcount = 0;
     self->recursionLevel = 0;
@@ -400,6 +484,7 @@ initContext(ProfilerObject *pObj, ProfilerContext *self, ProfilerEntry *entry)
 {
     self->ctxEntry = entry;
     self->subt = 0;
+    self->csubt = 0;
     self->previous = pObj->currentProfilerContext;
     pObj->currentProfilerContext = self;
     ++entry->recursionLevel;
@@ -412,6 +497,8 @@ initContext(ProfilerObject *pObj, ProfilerContext *self, ProfilerEntry *entry)
         if (subentry)
             ++subentry->recursionLevel;
     }
+    if (pObj->flags & POF_CPUTIME)
+        self->ct0 = cpuTimer();
     self->t0 = CALL_TIMER(pObj);
 }
 
@@ -420,25 +507,39 @@ Stop(ProfilerObject *pObj, ProfilerContext *self, ProfilerEntry *entry)
 {
     PY_LONG_LONG tt = CALL_TIMER(pObj) - self->t0;
     PY_LONG_LONG it = tt - self->subt;
-    if (self->previous)
+    PY_LONG_LONG ctt = 0;
+    PY_LONG_LONG cit = 0;
+    if (pObj->flags & POF_CPUTIME) {
+        ctt = cpuTimer() - self->ct0;
+        cit = ctt - self->csubt;
+    }
+    if (self->previous) {
         self->previous->subt += tt;
+        self->previous->csubt += ctt;
+    }
     pObj->currentProfilerContext = self->previous;
-    if (--entry->recursionLevel == 0)
+    if (--entry->recursionLevel == 0) {
         entry->tt += tt;
+        entry->ctt += ctt;
+    }
     else
         ++entry->recursivecallcount;
     entry->it += it;
+    entry->cit += cit;
     entry->callcount++;
     if ((pObj->flags & POF_SUBCALLS) && self->previous) {
         /* find or create an entry for me in my caller's entry */
         ProfilerEntry *caller = self->previous->ctxEntry;
         ProfilerSubEntry *subentry = getSubEntry(pObj, caller, entry);
         if (subentry) {
-            if (--subentry->recursionLevel == 0)
+            if (--subentry->recursionLevel == 0) {
                 subentry->tt += tt;
+                subentry->ctt += ctt;
+            }
             else
                 ++subentry->recursivecallcount;
             subentry->it += it;
+            subentry->cit += cit;
             ++subentry->callcount;
         }
     }
@@ -591,6 +692,8 @@ static PyStructSequence_Field profiler_entry_fields[] = {
     {"totaltime",    "total time in this entry"},
     {"inlinetime",   "inline time in this entry (not in subcalls)"},
     {"calls",        "details of the calls"},
+    {"totalcputime", "total cpu time in this entry (None if not measured)"},
+    {"inlinecputime", "inline cpu time in this entry (None if not measured)"},
     {0}
 };
 
@@ -600,6 +703,8 @@ static PyStructSequence_Field profiler_subentry_fields[] = {
     {"reccallcount", "how many times this is called recursively"},
     {"totaltime",    "total time spent in this call"},
     {"inlinetime",   "inline time (not in further subcalls)"},
+    {"totalcputime", "total cpu time spent in this call (None if not measured)"},
+    {"inlinecputime", "inline cpu time (None if not measured)"},
     {0}
 };
 
@@ -626,8 +731,19 @@ typedef struct {
     PyObject *list;
     PyObject *sublist;
     double factor;
+    double cpu_factor; /* 0.0 when the cpu time is not measured */
 } statscollector_t;
 
+/* Return the cpu time as a python float or None if it is not measured */
+static PyObject *
+cpuTimeObject(statscollector_t *collect, PY_LONG_LONG value)
+{
+    if (collect->cpu_factor > 0.0)
+        return PyFloat_FromDouble(collect->cpu_factor * value);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
 static int statsForSubEntry(rotating_node_t *node, void *arg)
 {
     ProfilerSubEntry *sentry = (ProfilerSubEntry*) node;
@@ -635,13 +751,23 @@ static int statsForSubEntry(rotating_node_t *node, void *arg)
     ProfilerEntry *entry = (ProfilerEntry*) sentry->header.key;
     int err;
     PyObject *sinfo;
+    PyObject *ctt = cpuTimeObject(collect, sentry->ctt);
+    PyObject *cit = cpuTimeObject(collect, sentry->cit);
+    if (ctt == NULL || cit == NULL) {
+        Py_XDECREF(ctt);
+        Py_XDECREF(cit);
+        return -1;
+    }
     sinfo = PyObject_CallFunction((PyObject*) &StatsSubEntryType,
-                                  "((Olldd))",
+                                  "((OllddOO))",
                                   entry->userObj,
                                   sentry->callcount,
                                   sentry->recursivecallcount,
                                   collect->factor * sentry->tt,
-                                  collect->factor * sentry->it);
+                                  collect->factor * sentry->it,
+                                  ctt, cit);
+    Py_DECREF(ctt);
+    Py_DECREF(cit);
     if (sinfo == NULL)
         return -1;
     err = PyList_Append(collect->sublist, sinfo);
@@ -654,6 +780,8 @@ static int statsForEntry(rotating_node_t *node, void *arg)
     ProfilerEntry *entry = (ProfilerEntry*) node;
     statscollector_t *collect = (statscollector_t*) arg;
     PyObject *info;
+    PyObject *ctt;
+    PyObject *cit;
     int err;
     if (entry->callcount == 0)
         return 0;   /* skip */
@@ -673,14 +801,25 @@ static int statsForEntry(rotating_node_t *node, void *arg)
         collect->sublist = Py_None;
     }
 
+    ctt = cpuTimeObject(collect, entry->ctt);
+    cit = cpuTimeObject(collect, entry->cit);
+    if (ctt == NULL || cit == NULL) {
+        Py_XDECREF(ctt);
+        Py_XDECREF(cit);
+        Py_DECREF(collect->sublist);
+        return -1;
+    }
     info = PyObject_CallFunction((PyObject*) &StatsEntryType,
-                                 "((OllddO))",
+                                 "((OllddOOO))",
                                  entry->userObj,
                                  entry->callcount,
                                  entry->recursivecallcount,
                                  collect->factor * entry->tt,
                                  collect->factor * entry->it,
-                                 collect->sublist);
+                                 collect->sublist,
+                                 ctt, cit);
+    Py_DECREF(ctt);
+    Py_DECREF(cit);
     Py_DECREF(collect->sublist);
     if (info == NULL)
         return -1;
@@ -700,11 +839,30 @@ profiler_get_factor(ProfilerObject *pObj)
         return 1.0 / DOUBLE_TIMER_PRECISION;
 }
 
+static double
+profiler_get_cpu_factor(ProfilerObject *pObj)
+{
+    if (pObj->flags & POF_CPUTIME)
+        return cpuTimerUnit();
+    else
+        return 0.0;
+}
+
+static int
+profiler_rt_fields(ProfilerObject *pObj)
+{
+    if (pObj->flags & POF_CPUTIME)
+        return profiler_rt_num_cpu_fields;
+    else
+        return profiler_rt_num_fields;
+}
+
 static void
 rt_profile_send_record(ProfilerObject *pObj, ProfilerContext *pContext,
                        ProfilerEntry *profEntry)
 {
     double factor;
+    double cpu_factor;
     PyObject *record;
     PyObject *filename;
     PyObject *line_number;
@@ -718,8 +876,9 @@ rt_profile_send_record(ProfilerObject *pObj, ProfilerContext *pContext,
         return;
 
     factor = profiler_get_factor(pObj);
+    cpu_factor = profiler_get_cpu_factor(pObj);
 
-    record = PyTuple_New(profiler_rt_num_fields);
+    record = PyTuple_New(profiler_rt_fields(pObj));
     if (record == NULL)
         return;
 
@@ -748,6 +907,10 @@ rt_profile_send_record(ProfilerObject *pObj, ProfilerContext *pContext,
     PyTuple_SetItem(record, 5, PyInt_FromLong(profEntry->callcount - profEntry->recursivecallcount)); /* cc1? */
     PyTuple_SetItem(record, 6, PyFloat_FromDouble(factor * profEntry->tt)); /* total_time */
     PyTuple_SetItem(record, 7, PyFloat_FromDouble(factor * profEntry->it)); /* cumulative_time */
+    if (pObj->flags & POF_CPUTIME) {
+        PyTuple_SetItem(record, 8, PyFloat_FromDouble(cpu_factor * profEntry->ctt)); /* total_cpu_time */
+        PyTuple_SetItem(record, 9, PyFloat_FromDouble(cpu_factor * profEntry->cit)); /* cumulative_cpu_time */
+    }
 
     message = PyTuple_New(2);
     if (!message) {
@@ -778,6 +941,8 @@ following attributes:\n\
     totaltime     total time in this entry\n\
     inlinetime    inline time in this entry (not in subcalls)\n\
     calls         details of the calls\n\
+    totalcputime  total cpu time in this entry (or None)\n\
+    inlinecputime inline cpu time in this entry (or None)\n\
 \n\
 The calls attribute is either None or a list of\n\
 profiler_subentry objects:\n\
@@ -787,6 +952,11 @@ profiler_subentry objects:\n\
     reccallcount  how many times this is called recursively\n\
     totaltime     total time spent in this call\n\
     inlinetime    inline time (not in further subcalls)\n\
+    totalcputime  total cpu time spent in this call (or None)\n\
+    inlinecputime inline cpu time (or None)\n\
+\n\
+The cpu times are only measured when the profiler is created\n\
+with cputime=True.\n\
 ");
 
 static PyObject*
@@ -796,6 +966,7 @@ profiler_getstats(ProfilerObject *pObj, PyObject* noarg)
     if (pending_exception(pObj))
         return NULL;
     collect.factor = profiler_get_factor(pObj);
+    collect.cpu_factor = profiler_get_cpu_factor(pObj);
     collect.list = PyList_New(0);
     if (collect.list == NULL)
         return NULL;
@@ -817,6 +988,23 @@ setSubcalls(ProfilerObject *pObj, int nvalue)
     return 0;
 }
 
+static int
+setCputime(ProfilerObject *pObj, int nvalue)
+{
+    if (nvalue == 0)
+        pObj->flags &= ~POF_CPUTIME;
+    else if (nvalue > 0) {
+#ifndef HAVE_CPU_TIMER
+        PyErr_SetString(PyExc_ValueError,
+                        "cputime=True requires a per-thread cpu clock");
+        return -1;
+#else
+        pObj->flags |=  POF_CPUTIME;
+#endif
+    }
+    return 0;
+}
+
 static int
 setBuiltins(ProfilerObject *pObj, int nvalue)
 {
@@ -936,22 +1124,25 @@ profiler_init(ProfilerObject *pObj, PyObject *args, PyObject *kw)
 #else
     int builtins = 0;
 #endif
+    int cputime = 0;
     static char *kwlist[] = {"timer", "timeunit",
-                                   "subcalls", "builtins", 0};
+                                   "subcalls", "builtins", "cputime", 0};
 
     PyObject *fields;
     char *string;
     int ix;
+    int num_fields;
     int string_len;
     PyObject *handshake;
     PyObject *my_pid;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kw, "|Odii:Profiler", kwlist,
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "|Odiii:Profiler", kwlist,
                                      &timer, &timeunit,
-                                     &subcalls, &builtins))
+                                     &subcalls, &builtins, &cputime))
         return -1;
 
-    if (setSubcalls(pObj, subcalls) < 0 || setBuiltins(pObj, builtins) < 0)
+    if (setSubcalls(pObj, subcalls) < 0 || setBuiltins(pObj, builtins) < 0
+        || setCputime(pObj, cputime) < 0)
         return -1;
     o = pObj->externalTimer;
     pObj->externalTimer = timer;
@@ -971,10 +1162,11 @@ profiler_init(ProfilerObject *pObj, PyObject *args, PyObject *kw)
         return -1;
     zmq_connect(pObj->prepare_socket, "tcp://127.0.0.1:9002");
 
-    fields = PyTuple_New(profiler_rt_num_fields);
+    num_fields = profiler_rt_fields(pObj);
+    fields = PyTuple_New(num_fields);
     if (fields == NULL)
         return -1;
-    for (ix = 0; ix < profiler_rt_num_fields; ix++) {
+    for (ix = 0; ix < num_fields; ix++) {
         string_len = strlen(profiler_rt_field_names[ix]);
         string = malloc(sizeof(char) * (string_len + 1));
         memcpy(string, profiler_rt_field_names[ix], string_len);
@@ -1016,13 +1208,16 @@ static PyMethodDef profiler_methods[] = {
 };
 
 PyDoc_STRVAR(profiler_doc, "\
-Profiler(custom_timer=None, time_unit=None, subcalls=True, builtins=True)\n\
+Profiler(custom_timer=None, time_unit=None, subcalls=True, builtins=True,\n\
+         cputime=False)\n\
 \n\
     Builds a profiler object using the specified timer function.\n\
     The default timer is a fast built-in one based on real time.\n\
     For custom timer functions returning integers, time_unit can\n\
     be a float specifying a scale (i.e. how long each integer unit\n\
     is, in seconds).\n\
+    If cputime is True the cpu time of the current thread is also\n\
+    measured so that the time spent off-cpu can be computed.\n\
 ");
 
 statichere PyTypeObject PyProfiler_Type = {
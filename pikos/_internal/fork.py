@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: _internal/fork.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Fork handlers for the active monitors and recorders.
+
+A process that is forked while a monitor is enabled inherits the profile
+hook, the record counters and the open files and sockets of the recorders.
+Monitors and recorders register themselves while they are active and their
+optional ``_before_fork`` and ``_after_fork`` methods are called in the
+parent before the fork and in the child after the fork respectively. The
+handlers are hooked on :func:`os.register_at_fork` when available and on a
+wrapper of :func:`os.fork` otherwise.
+
+The handlers are held through weak references, so an object that is not
+used any more (e.g. a recorder that has been prepared but never finalized)
+is dropped from the handlers instead of being kept alive and notified on
+every later fork. The :mod:`subprocess` module of python 2 forks with
+:func:`os.fork` and the child calls ``exec`` right away, the wrapper does
+not call the handlers for these forks (like :func:`os.register_at_fork`
+for the subprocesses of python 3).
+
+"""
+import os
+import sys
+import warnings
+import weakref
+
+#: The weak references to the registered handlers in registration order.
+_handlers = []
+
+#: Set when the fork hooks have been installed.
+_installed = False
+
+
+def register_fork_handler(handler):
+    """ Register an object to be notified when the process forks.
+
+    Registering the same object more than once has no effect.
+
+    """
+    _install()
+    if not any(reference() is handler for reference in _handlers):
+        _handlers.append(weakref.ref(handler, _remove))
+
+
+def unregister_fork_handler(handler):
+    """ Remove an object from the fork handlers if it is registered.
+
+    """
+    for index, reference in enumerate(_handlers):
+        if reference() is handler:
+            del _handlers[index]
+            break
+
+
+def pid_filename(filename, pid=None):
+    """ Return the filename with the process id inserted before the
+    extension (e.g. ``records.log`` -> ``records.1234.log``).
+
+    """
+    if pid is None:
+        pid = os.getpid()
+    root, extension = os.path.splitext(filename)
+    return '{0}.{1}{2}'.format(root, pid, extension)
+
+
+class DeferredFile(object):
+    """ A write only file that is created on the first write.
+
+    The file recorders use it in a forked child so that no file is created
+    for children that do not record anything (e.g. a child that calls
+    ``exec`` right after the fork).
+
+    """
+
+    def __init__(self, filename, mode='w', header=''):
+        """ Initialize the deferred file.
+
+        Parameters
+        ----------
+        filename : string
+            The path of the file.
+
+        mode : string
+            The mode to open the file with.
+
+        header : string
+            Text to write at the start of the file when it is created.
+
+        """
+        self.name = filename
+        self.mode = mode
+        self._header = header
+        self._file = None
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, data):
+        if self._file is None:
+            self._file = open(self.name, self.mode)
+            self._file.write(self._header)
+        self._file.write(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def tell(self):
+        if self._file is None:
+            return 0
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._closed = True
+
+
+def before_fork():
+    """ Call the ``_before_fork`` method of the handlers in reverse
+    registration order.
+
+    """
+    for reference in reversed(list(_handlers)):
+        _call(reference(), '_before_fork')
+
+
+def after_fork_in_child():
+    """ Call the ``_after_fork`` method of the handlers in registration
+    order.
+
+    """
+    for reference in list(_handlers):
+        _call(reference(), '_after_fork')
+
+
+def _remove(reference):
+    """ Drop the reference of a handler that has been garbage collected.
+
+    """
+    for index, item in enumerate(_handlers):
+        if item is reference:
+            del _handlers[index]
+            break
+
+
+def _call(handler, name):
+    method = getattr(handler, name, None)
+    if method is None:
+        return
+    try:
+        method()
+    except Exception as exception:
+        # The fork should not fail because of a misbehaving handler.
+        warnings.warn(
+            'Fork handler {0}.{1} failed: {2!r}'.format(
+                type(handler).__name__, name, exception))
+
+
+def _install():
+    global _installed
+    if _installed:
+        return
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(
+            before=before_fork, after_in_child=after_fork_in_child)
+    elif hasattr(os, 'fork'):
+        original_fork = os.fork
+
+        def fork():
+            caller = sys._getframe(1).f_globals.get('__name__')
+            if caller == 'subprocess':
+                return original_fork()
+            before_fork()
+            pid = original_fork()
+            if pid == 0:
+                after_fork_in_child()
+            return pid
+
+        fork.__doc__ = original_fork.__doc__
+        os.fork = fork
+    _installed = True
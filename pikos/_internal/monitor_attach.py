@@ -8,9 +8,8 @@
 #  All rights reserved.
 #------------------------------------------------------------------------------
 import functools
-import inspect
 
-from pikos._internal.util import is_context_manager
+from pikos._internal.util import is_context_manager, is_generator_function
 
 
 class MonitorAttach(object):
@@ -95,7 +94,7 @@ class MonitorAttach(object):
             generator.
 
         """
-        if inspect.isgeneratorfunction(function):
+        if is_generator_function(function):
             fn = self._wrap_generator(function)
         else:
             fn = self._wrap_function(function)
@@ -7,6 +7,13 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
+import getpass
+import os
+import stat
+import tempfile
+
+#: The code object flag of generator functions (see :mod:`inspect`).
+CO_GENERATOR = 0x20
 
 
 def is_context_manager(obj):
@@ -15,6 +22,17 @@ def is_context_manager(obj):
     return hasattr(obj, '__enter__') and hasattr(obj, '__exit__')
 
 
+def is_generator_function(obj):
+    """ Check if the obj is a generator function.
+
+    Equivalent to :func:`inspect.isgeneratorfunction` but avoids importing
+    the (slow to import) :mod:`inspect` module.
+
+    """
+    code = getattr(obj, 'func_code', None)
+    return code is not None and bool(code.co_flags & CO_GENERATOR)
+
+
 def trim_left(value, max_length):
     """ Trim the left side of the string so that the length is at most
     max_length.
@@ -22,3 +40,44 @@ def trim_left(value, max_length):
     """
     str_value = str(value)
     return str_value[-max_length:len(str_value)]
+
+
+def user_directory():
+    """ Return the private directory of the current user in the temporary
+    directory (e.g. ``/tmp/pikos-<user>``).
+
+    The directory holds the sockets of the collector and of the monitor
+    controllers, see :func:`make_user_directory`.
+
+    """
+    return os.path.join(
+        tempfile.gettempdir(), 'pikos-{0}'.format(getpass.getuser()))
+
+
+def make_user_directory(path=None):
+    """ Create the directory accessible only by the current user or check
+    that an existing one is, and return its path.
+
+    Raises
+    ------
+    OSError :
+        Raised if the path exists and is not a directory of the current
+        user (e.g. it has been created by another user of the host).
+
+    """
+    if path is None:
+        path = user_directory()
+    try:
+        os.mkdir(path, 0o700)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or (
+            hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+        raise OSError(
+            'The directory {0} is not a directory of the current '
+            'user'.format(path))
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
@@ -70,6 +70,37 @@ def csvfile(filename=None, filter_=None):
         filename, filter_=filter_)
 
 
+def flightrecorder(filename=None, size=10000, filter_=None, rss_limit=None):
+    """ Factory function that returns a recorder that keeps the last records
+    in memory and writes them to file on an uncaught exception, SIGUSR2 or
+    when the process memory exceeds a limit.
+
+    Parameters
+    ----------
+    filename : string
+        The name and path of the dump files. Default name is
+        "monitor_records_{pid}_{index}.log".
+
+    size : int
+        The number of records to keep in memory. Default is 10000.
+
+    filter_ : callable
+        A callable function that accepts a data tuple and returns True
+        if the input sould be recorded. Default is None.
+
+    rss_limit : int
+        The process RSS in bytes above which the records are dumped. Default
+        is None (disabled).
+
+    """
+    if filename is None:
+        filename = 'monitor_records_{pid}_{index}.log'
+    from pikos.recorders.flight_recorder import FlightRecorder
+    return FlightRecorder(
+        filename, size=size, filter_=filter_, rss_limit=rss_limit,
+        dump_on_exception=True)
+
+
 def monitor_functions(recorder=None, focus_on=None):
     """ Factory function that returns a basic function monitor.
 
@@ -86,9 +117,9 @@ def monitor_functions(recorder=None, focus_on=None):
         recorder = screen()
     if focus_on is None:
         try:
-            from pikos.cymonitors.api import FunctionMonitor
+            from pikos.cymonitors.function_monitor import FunctionMonitor
         except ImportError:
-            from pikos.monitors.api import FunctionMonitor
+            from pikos.monitors.function_monitor import FunctionMonitor
             warnings.warn(
                 'Cython monitors are not available '
                 'falling back to pure python')
@@ -116,9 +147,9 @@ def monitor_lines(recorder=None, focus_on=None):
         recorder = screen()
     if focus_on is None:
         try:
-            from pikos.cymonitors.api import LineMonitor
+            from pikos.cymonitors.line_monitor import LineMonitor
         except ImportError:
-            from pikos.monitors.api import LineMonitor
+            from pikos.monitors.line_monitor import LineMonitor
             warnings.warn(
                 'Cython monitors are not available '
                 'falling back to pure python')
@@ -162,7 +193,7 @@ def memory_on_functions(recorder=None, focus_on=None):
     return MonitorAttach(monitor)
 
 
-def memory_on_lines(recorder=None, focus_on=None):
+def memory_on_lines(recorder=None, focus_on=None, threshold=None):
     """ Factory function that returns a basic line memory monitor.
 
     Parameters
@@ -174,14 +205,19 @@ def memory_on_lines(recorder=None, focus_on=None):
     focus_on : list
         The list of function where to focus monitoring.
 
+    threshold : int
+        Record only the lines that change the process memory by more than
+        `threshold` bytes. Default is None, record all the lines.
+
     """
     if recorder is None:
         recorder = screen()
     if focus_on is None:
         from pikos.monitors.line_memory_monitor import LineMemoryMonitor
-        monitor = LineMemoryMonitor(recorder)
+        monitor = LineMemoryMonitor(recorder, threshold=threshold)
     else:
         from pikos.monitors.focused_line_memory_monitor import (
             FocusedLineMemoryMonitor)
-        monitor = FocusedLineMemoryMonitor(recorder, functions=focus_on)
+        monitor = FocusedLineMemoryMonitor(
+            recorder, functions=focus_on, threshold=threshold)
     return MonitorAttach(monitor)
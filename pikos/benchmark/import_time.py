@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: benchmark/import_time.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Estimate the startup cost of importing pikos.
+
+The benchmark imports the pikos entry point modules in a fresh interpreter
+and reports the time spent and the optional heavy dependencies that have
+been imported as a side effect. The optional dependencies should only be
+imported when a monitor or recorder that needs them is used, which is why
+the monitors and recorders import psutil, zmq and cPickle inside the
+methods that use them instead of at the top of their modules.
+
+"""
+import json
+import subprocess
+import sys
+
+#: The pikos modules to time.
+MODULES = ['pikos.api', 'pikos.runner', 'pikos.monitors.api',
+           'pikos.recorders.api', 'pikos.filters.api']
+
+#: Optional dependencies that should not be imported by the entry points.
+HEAVY_MODULES = ['psutil', 'zmq', 'cPickle', 'numpy', 'yappi', 'line_profiler']
+
+SCRIPT = """
+import json, sys, timeit
+start = timeit.default_timer()
+import {module}
+elapsed = timeit.default_timer() - start
+heavy = [name for name in {heavy!r} if sys.modules.get(name) is not None]
+sys.stdout.write(json.dumps((elapsed, heavy)))
+"""
+
+
+def time_import(module, repeat=7):
+    """ Time the import of a module in a new interpreter.
+
+    Parameters
+    ----------
+    module : string
+        The dotted name of the module to import.
+
+    repeat : int
+        The number of fresh interpreters to use. The best time is reported.
+
+    Returns
+    -------
+    result : tuple
+        The best import time in seconds and the list of heavy modules that
+        were imported.
+
+    """
+    script = SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    timings = []
+    for _ in range(repeat):
+        process = subprocess.Popen(
+            [sys.executable, '-c', script], stdout=subprocess.PIPE)
+        output, _ = process.communicate()
+        elapsed, heavy = json.loads(output)
+        timings.append(elapsed)
+    return min(timings), heavy
+
+
+def main(modules=MODULES, repeat=7):
+    header = "Import time (ms) | {0:<20} | Heavy modules".format('Module')
+    line = '{time:>16} | {module:<20} | {heavy}'
+    print header
+    print len(header) * '-'
+    for module in modules:
+        elapsed, heavy = time_import(module, repeat)
+        print line.format(
+            time='{0:.2f}'.format(elapsed * 1000),
+            module=module,
+            heavy=', '.join(heavy) if heavy else '-')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: benchmark/recorders.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Estimate the throughput of the pikos recorders.
+
+The benchmark feeds a synthetic stream of records into each recorder and
+reports the number of records and bytes that are processed per second. The
+record streams have the same shape as the ones created by the function and
+line memory monitors so that the cost of recording can be compared with the
+monitor overhead reported by :mod:`pikos.benchmark.monitors`.
+
+"""
+import itertools
+import os
+import shutil
+import tempfile
+import timeit
+
+from pikos.filters.on_value import OnValue
+from pikos.monitors.records import FunctionRecord, LineMemoryRecord
+
+
+class ByteCounter(object):
+    """ A file-like object that only counts the bytes written to it.
+
+    """
+
+    def __init__(self):
+        self.bytes = 0
+
+    def write(self, data):
+        self.bytes += len(data)
+
+    def flush(self):
+        pass
+
+
+class SocketByteCounter(object):
+    """ Wrap a zmq socket and count the bytes that are sent through it.
+
+    """
+
+    def __init__(self, socket):
+        self.bytes = 0
+        self._socket = socket
+
+    def send(self, data, *args, **kwargs):
+        self.bytes += len(data)
+        return self._socket.send(data, *args, **kwargs)
+
+    def close(self, *args, **kwargs):
+        return self._socket.close(*args, **kwargs)
+
+
+def function_records(number):
+    """ Create a synthetic stream of function records.
+
+    The stream cycles through python and c function events on a small set of
+    functions with realistic name and filename lengths.
+
+    """
+    filenames = [
+        '/usr/lib/python2.7/site-packages/application/{0}.py'.format(name)
+        for name in ('model', 'view', 'controller')]
+    functions = ['_update_cache', 'get_value', '__init__', 'on_trait_change']
+    events = [
+        ('call', functions), ('c_call', ['len', 'isinstance']),
+        ('c_return', ['len', 'isinstance']), ('return', functions)]
+    records = []
+    for index in xrange(number):
+        event, names = events[index % len(events)]
+        records.append(FunctionRecord(
+            index, event, names[index % len(names)],
+            index % 500 + 1, filenames[index % len(filenames)]))
+    return records
+
+
+def line_memory_records(number):
+    """ Create a synthetic stream of line memory records.
+
+    The stream simulates a tight loop with a slowly growing memory footprint.
+
+    """
+    filename = '/usr/lib/python2.7/site-packages/application/model.py'
+    lines = [
+        (120, 'for item in self.items:'),
+        (121, 'value = self.compute(item)'),
+        (122, 'if value is not None:'),
+        (123, 'results.append(value)')]
+    rss, vms = 45 * 1024 ** 2, 380 * 1024 ** 2
+    records = []
+    for index in xrange(number):
+        lineno, line = lines[index % len(lines)]
+        rss += 4096 * (index % 7 == 0)
+        records.append(LineMemoryRecord(
+            index, 'update', lineno, rss, vms, line, filename))
+    return records
+
+
+def recorders(directory):
+    """ Return the recorder factories to benchmark.
+
+    Each factory accepts a filter and returns the recorder and a callable
+    that will report the number of bytes written after the recorder has been
+    finalized (or None if the recorder does not write a byte stream).
+
+    """
+    def text_stream(filter_):
+        from pikos.recorders.text_stream_recorder import TextStreamRecorder
+        stream = ByteCounter()
+        recorder = TextStreamRecorder(stream, filter_=filter_, formatted=True)
+        return recorder, lambda: stream.bytes
+
+    def csv_stream(filter_):
+        from pikos.recorders.csv_recorder import CSVRecorder
+        stream = ByteCounter()
+        recorder = CSVRecorder(stream, filter_=filter_)
+        return recorder, lambda: stream.bytes
+
+    def csv_file(filter_):
+        from pikos.recorders.csv_file_recorder import CSVFileRecorder
+        filename = os.path.join(directory, 'records.csv')
+        recorder = CSVFileRecorder(filename, filter_=filter_)
+        return recorder, lambda: os.path.getsize(filename)
+
+    def list_recorder(filter_):
+        from pikos.recorders.list_recorder import ListRecorder
+        return ListRecorder(filter_=filter_), lambda: None
+
+    factories = {
+        'TextStreamRecorder': text_stream,
+        'CSVRecorder': csv_stream,
+        'CSVFileRecorder': csv_file,
+        'ListRecorder': list_recorder}
+
+    try:
+        import zmq  # noqa
+    except ImportError:
+        pass
+    else:
+        ports = itertools.count(9101, 2)
+
+        def zeromq(filter_):
+            from pikos.recorders.zeromq_recorder import ZeroMQRecorder
+            recorder = ZeroMQRecorder(
+                zmq_port=next(ports), filter_=filter_, wait_for_ready=False)
+            socket = recorder._socket = SocketByteCounter(recorder._socket)
+            return recorder, lambda: socket.bytes
+
+        factories['ZeroMQRecorder'] = zeromq
+
+    return factories
+
+
+def run(factories, records, filter_=None):
+    """ Time the recorders throughput on a stream of records.
+
+    Parameters
+    ----------
+    factories : dict
+        The recorder factories to time.
+
+    records : list
+        The records to pass to the recorder.
+
+    filter_ : callable
+        The filter to use in the recorder. Default is to record everything.
+
+    """
+    header = (
+        "   Records/s |      Bytes/s | {:^8} | {:^{length}}".format(
+            'Time', 'Name',
+            length=max(len(key) for key in factories)))
+    line = '{records:>12} | {bytes:>12} | {time:>8} | {name}'
+    print header
+    print len(header) * '-'
+    record_type = type(records[0])
+    for name in sorted(factories):
+        recorder, written = factories[name](filter_)
+        start = timeit.default_timer()
+        recorder.prepare(record_type)
+        record = recorder.record
+        for data in records:
+            record(data)
+        recorder.finalize()
+        time = timeit.default_timer() - start
+        bytes_ = written()
+        print line.format(
+            name=name,
+            time='{0:2.3f}'.format(time),
+            records='{0:12.0f}'.format(len(records) / time),
+            bytes='n/a' if bytes_ is None else '{0:12.0f}'.format(
+                bytes_ / time))
+
+
+def main(number=100000):
+    directory = tempfile.mkdtemp()
+    try:
+        factories = recorders(directory)
+        for title, records, filter_ in (
+                ('Function records', function_records(number), None),
+                ('Function records filtered on call/return',
+                 function_records(number), OnValue('type', 'call', 'return')),
+                ('Line memory records', line_memory_records(number), None),
+                ('Line memory records filtered on line number',
+                 line_memory_records(number), OnValue('lineNo', 121))):
+            print title
+            run(factories, records, filter_=filter_)
+            print
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: collector.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" A local collector of the record streams of many processes.
+
+The collector is a standalone process that binds a 0MQ PULL socket (by
+default on an ``ipc://`` endpoint in a private directory of the user in the
+temporary directory). Monitored
+processes connect to it with the
+:class:`~pikos.recorders.collector_recorder.CollectorRecorder`, so any
+number of processes on the host can stream their records at the same time
+without reserving a port each. The collector writes the records of every
+process to a rotating binary file and optionally re-publishes them on a
+PUB socket for the viewers::
+
+    $ pikos-collector --directory /var/tmp/pikos --publish tcp://127.0.0.1:9001
+
+The files have the format of the
+:class:`~pikos.recorders.pickle_file_recorder.PickleFileRecorder` and are
+loaded with :func:`~pikos.recorders.pickle_file_recorder.read_records`.
+The viewers receive the records as pickled ``(pid, record)`` tuples (the
+format of the :class:`~pikos.recorders.zeromq_recorder.ZeroMQRecorder`) and
+a :class:`StreamStarted` or :class:`StreamStopped` object when a process
+starts or stops recording.
+
+The wire format between the recorders and the collector is a
+:mod:`marshal`-ed ``(kind, pid, payload)`` tuple where kind is one of:
+
+=========== ============================================================
+Kind        Payload
+=========== ============================================================
+``header``  The field names of the records (or None).
+``records`` A list of records as plain tuples.
+``stop``    None.
+=========== ============================================================
+
+Unlike a pickle a marshal-ed message can only create plain values, so a
+message never runs code in the collector. Malformed messages are counted in
+:attr:`Collector.rejected` and dropped. Any process that can connect to the
+endpoint can still add records, so the collector creates the directory of
+the default endpoint (and every ``ipc://`` socket that it binds) accessible
+only by its user. A ``tcp://`` endpoint should only be bound on a trusted
+interface.
+
+"""
+import argparse
+import os
+import warnings
+
+from pikos._internal.util import make_user_directory, user_directory
+
+#: The name of the record file of a process in the collector directory.
+STREAM_FILENAME = 'collector.{pid}.pikos'
+
+
+#: The message kinds of the wire format.
+MESSAGE_KINDS = ('header', 'records', 'stop')
+
+
+def default_endpoint():
+    """ Return the default endpoint of the collector.
+
+    """
+    return 'ipc://' + os.path.join(user_directory(), 'collector.ipc')
+
+
+class StreamStarted(object):
+    """ Published when a process starts recording.
+
+    """
+
+    def __init__(self, pid, fields):
+        self.pid = pid
+        self.fields = fields
+
+
+class StreamStopped(object):
+    """ Published when a process stops recording.
+
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+
+
+class _RotatingStream(object):
+    """ The record file of one process.
+
+    The file is rotated when it grows above ``max_bytes``. The rotated
+    files get the suffixes ``.1`` to ``.<backup_count>`` and each one
+    starts with the header of the stream.
+
+    """
+
+    def __init__(self, filename, pid, fields, max_bytes, backup_count):
+        self.filename = filename
+        self.header = (pid, fields)
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._handle = None
+        self._pickler = None
+        self._open()
+
+    def write(self, records):
+        dump = self._pickler.dump
+        for record in records:
+            dump(record)
+        if self._max_bytes > 0 and self._handle.tell() >= self._max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        self._handle.close()
+        if self._backup_count > 0:
+            for index in range(self._backup_count - 1, 0, -1):
+                source = '{0}.{1}'.format(self.filename, index)
+                target = '{0}.{1}'.format(self.filename, index + 1)
+                if os.path.exists(source):
+                    os.rename(source, target)
+            os.rename(self.filename, self.filename + '.1')
+        self._open()
+
+    def close(self):
+        self._handle.close()
+
+    def _open(self):
+        import cPickle
+        self._handle = open(self.filename, 'wb')
+        self._pickler = cPickle.Pickler(self._handle, 2)
+        # Do not keep a reference to every object that has been written.
+        self._pickler.fast = True
+        self._pickler.dump(self.header)
+
+
+class Collector(object):
+    """ Collect the records of many processes, store them in rotating
+    files and re-publish them to the viewers.
+
+    Public
+    ------
+    endpoint : string
+        The endpoint of the PULL socket.
+
+    publish : string
+        The endpoint of the PUB socket or None.
+
+    directory : string
+        The directory of the record files.
+
+    streams : dict
+        The open record files by pid.
+
+    count : int
+        The number of records that have been collected.
+
+    rejected : int
+        The number of malformed messages that have been dropped.
+
+    """
+
+    def __init__(self, endpoint=None, directory='.', publish=None,
+                 max_bytes=64 * 1024 * 1024, backup_count=5):
+        """ Initialize the collector.
+
+        Parameters
+        ----------
+        endpoint : string
+            The 0MQ endpoint where the recorders push their records. Default
+            is ``ipc://<tempdir>/pikos-<user>/collector.ipc``.
+
+        directory : string
+            The directory of the record files.
+
+        publish : string
+            The 0MQ endpoint to re-publish the records to the viewers.
+            Default is None (do not publish).
+
+        max_bytes : int
+            The size of a record file before it is rotated. Zero disables
+            the rotation.
+
+        backup_count : int
+            The number of rotated files to keep for every process.
+
+        """
+        self.endpoint = default_endpoint() if endpoint is None else endpoint
+        self.directory = directory
+        self.publish = publish
+        self.streams = {}
+        self.count = 0
+        self.rejected = 0
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._running = False
+        self._context = None
+        self._pull_socket = None
+        self._pub_socket = None
+
+    def start(self):
+        """ Bind the sockets.
+
+        """
+        import cPickle
+        import marshal
+        import zmq
+        self._loads = marshal.loads
+        self._dumps = cPickle.dumps
+        path = None
+        if self.endpoint.startswith('ipc://'):
+            path = self.endpoint[len('ipc://'):]
+            if self.endpoint == default_endpoint():
+                make_user_directory(os.path.dirname(path))
+            if os.path.exists(path):
+                os.remove(path)
+        self._context = zmq.Context()
+        self._pull_socket = self._context.socket(zmq.PULL)
+        self._pull_socket.bind(self.endpoint)
+        if path is not None:
+            os.chmod(path, 0o600)
+        if self.publish is not None:
+            self._pub_socket = self._context.socket(zmq.PUB)
+            self._pub_socket.bind(self.publish)
+        self._running = True
+
+    def stop(self):
+        """ Ask :meth:`serve_forever` to return.
+
+        The method can be called from any thread.
+
+        """
+        self._running = False
+
+    def close(self):
+        """ Close the record files and the sockets.
+
+        """
+        for stream in self.streams.itervalues():
+            stream.close()
+        self.streams = {}
+        if self._context is not None:
+            self._pull_socket.close(linger=0)
+            if self._pub_socket is not None:
+                self._pub_socket.close(linger=0)
+            self._context.term()
+            self._context = None
+            self._pull_socket = self._pub_socket = None
+            if self.endpoint.startswith('ipc://'):
+                path = self.endpoint[len('ipc://'):]
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def serve_forever(self, poll_timeout=200):
+        """ Collect records until :meth:`stop` is called.
+
+        The sockets are bound if necessary and closed before returning.
+
+        """
+        if self._context is None:
+            self.start()
+        try:
+            while self._running:
+                self.poll(poll_timeout)
+        finally:
+            self.close()
+
+    def poll(self, timeout=0):
+        """ Handle the pending messages.
+
+        Parameters
+        ----------
+        timeout : int
+            The time in milliseconds to wait for the first message.
+
+        Returns
+        -------
+        count : int
+            The number of messages that have been handled.
+
+        """
+        import zmq
+        socket = self._pull_socket
+        count = 0
+        if not socket.poll(timeout):
+            return count
+        while True:
+            try:
+                message = socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            try:
+                self.handle(self._loads(message))
+            except (EOFError, TypeError, ValueError) as exception:
+                self.rejected += 1
+                warnings.warn(
+                    'Dropped a malformed collector message: {0!r}'.format(
+                        exception))
+            count += 1
+        return count
+
+    def handle(self, message):
+        """ Store and publish a message of a recorder.
+
+        Raises
+        ------
+        ValueError :
+            Raised if the message does not follow the wire format.
+
+        """
+        kind, pid, payload = _check_message(message)
+        if kind == 'records':
+            stream = self.streams.get(pid)
+            if stream is None:
+                # The header has been lost (e.g. the collector was started
+                # after the process).
+                stream = self._open_stream(pid, None)
+            stream.write(payload)
+            self.count += len(payload)
+            if self._pub_socket is not None:
+                dumps = self._dumps
+                send = self._pub_socket.send
+                for record in payload:
+                    send(dumps((pid, record), 2))
+        elif kind == 'header':
+            stream = self.streams.pop(pid, None)
+            if stream is not None:
+                # A new stream of the same process (e.g. the pid was reused).
+                stream.rotate()
+                stream.close()
+            self._open_stream(pid, payload)
+            self._publish(StreamStarted(pid, payload))
+        elif kind == 'stop':
+            stream = self.streams.pop(pid, None)
+            if stream is not None:
+                stream.close()
+            self._publish(StreamStopped(pid))
+
+    def _open_stream(self, pid, fields):
+        # The pid has been checked to be an int so the filename stays in
+        # the directory.
+        filename = os.path.join(
+            self.directory, STREAM_FILENAME.format(pid=pid))
+        stream = _RotatingStream(
+            filename, pid, fields, self._max_bytes, self._backup_count)
+        self.streams[pid] = stream
+        return stream
+
+    def _publish(self, message):
+        if self._pub_socket is not None:
+            self._pub_socket.send(self._dumps(message, 2))
+
+
+def _check_message(message):
+    """ Check that a message follows the wire format and return it.
+
+    """
+    if not isinstance(message, tuple) or len(message) != 3:
+        raise ValueError('The message is not a (kind, pid, payload) tuple')
+    kind, pid, payload = message
+    if kind not in MESSAGE_KINDS:
+        raise ValueError('Unknown message kind {0!r}'.format(kind))
+    if not isinstance(pid, (int, long)) or isinstance(pid, bool) or pid < 0:
+        raise ValueError('Invalid pid {0!r}'.format(pid))
+    if kind == 'records':
+        if not isinstance(payload, list) or not all(
+                isinstance(record, tuple) for record in payload):
+            raise ValueError('The records are not a list of tuples')
+    elif kind == 'header':
+        if payload is not None and not (
+                isinstance(payload, tuple) and
+                all(isinstance(field, basestring) for field in payload)):
+            raise ValueError('The fields are not a tuple of names')
+    return message
+
+
+def main(arguments=None):
+    description = "Collect the records of the pikos collector recorders " \
+                  "of many processes."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '-e', '--endpoint', default=None,
+        help='The endpoint to receive the records on. Default is '
+             '{0}.'.format(default_endpoint()))
+    parser.add_argument(
+        '-d', '--directory', default='.',
+        help='The directory of the record files.')
+    parser.add_argument(
+        '-p', '--publish', default=None,
+        help='The endpoint to re-publish the records on (e.g. '
+             'tcp://127.0.0.1:9001).')
+    parser.add_argument(
+        '--max-bytes', type=int, default=64 * 1024 * 1024,
+        help='The size of a record file before it is rotated.')
+    parser.add_argument(
+        '--backup-count', type=int, default=5,
+        help='The number of rotated files to keep for every process.')
+    args = parser.parse_args(arguments)
+    collector = Collector(
+        endpoint=args.endpoint, directory=args.directory,
+        publish=args.publish, max_bytes=args.max_bytes,
+        backup_count=args.backup_count)
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
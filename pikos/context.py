@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: context.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Tag the records of the monitors with the context of the current thread.
+
+A server can tag the work of every request (or endpoint) so that the records
+of the monitors can be grouped by request::
+
+    from pikos import context
+    from pikos.cymonitors.api import FunctionTimeMonitor
+
+    monitor = FunctionTimeMonitor(recorder, context=True)
+
+    def handle(request):
+        with context.tag(request_id=request.id, endpoint=request.path):
+            ...
+
+The monitors that are created with ``context=True`` add the integer id of
+the current context as the last field of their records. The id is looked up
+from a thread local, so tagging is cheap enough to leave on. The tags of an
+id are retrieved with :func:`lookup` (or all of them with
+:func:`contexts`). Nested tags are merged with the tags of the outer
+context. Identical tags get the same id, and the id ``0`` is the empty
+context that is active outside of any :class:`tag`.
+
+Only the most recent ``max_contexts`` contexts are remembered. The tags of
+older ids are dropped and :func:`lookup` returns an empty dict for them.
+
+"""
+import threading
+from collections import OrderedDict
+
+#: The number of contexts to remember.
+max_contexts = 100000
+
+
+class _State(threading.local):
+    """ The current context id of a thread.
+
+    """
+    id = 0
+
+
+_state = _State()
+_lock = threading.Lock()
+_ids = {(): 0}
+_contexts = OrderedDict([(0, ())])
+_next_id = [1]
+
+
+def current():
+    """ Return the context id of the current thread.
+
+    """
+    return _state.id
+
+
+def context_id(**tags):
+    """ Return the context id of the tags.
+
+    The same tags always get the same id while they are remembered.
+
+    Parameters
+    ----------
+    **tags :
+        The tags of the context. The values need to be hashable.
+
+    """
+    key = tuple(sorted(tags.items()))
+    try:
+        return _ids[key]
+    except KeyError:
+        pass
+    with _lock:
+        identifier = _ids.get(key)
+        if identifier is None:
+            identifier = _next_id[0]
+            _next_id[0] += 1
+            _ids[key] = identifier
+            _contexts[identifier] = key
+            while len(_contexts) > max_contexts + 1:
+                old_id, old_key = _contexts.popitem(last=False)
+                if old_id == 0:
+                    # The empty context is always remembered.
+                    _contexts[0] = ()
+                    continue
+                del _ids[old_key]
+    return identifier
+
+
+def lookup(context_id):
+    """ Return the tags of a context id as a dict.
+
+    """
+    return dict(_contexts.get(context_id, ()))
+
+
+def contexts():
+    """ Return a dict of the remembered context ids and their tags.
+
+    """
+    with _lock:
+        return dict(
+            (identifier, dict(key))
+            for identifier, key in _contexts.iteritems())
+
+
+def activate(context_id):
+    """ Set the context id of the current thread and return the previous
+    one.
+
+    Useful when the work of a request is spread across callbacks and a
+    ``with`` block does not fit.
+
+    """
+    previous = _state.id
+    _state.id = context_id
+    return previous
+
+
+class tag(object):
+    """ A context manager that sets the context of the current thread.
+
+    The tags are merged with the tags of the enclosing context and the
+    context id is returned by ``__enter__``. The instance can be reused and
+    nested within the same thread.
+
+    """
+
+    def __init__(self, **tags):
+        self._tags = tags
+        self._previous = []
+
+    def __enter__(self):
+        previous = _state.id
+        if previous == 0:
+            identifier = context_id(**self._tags)
+        else:
+            tags = lookup(previous)
+            tags.update(self._tags)
+            identifier = context_id(**tags)
+        self._previous.append(previous)
+        _state.id = identifier
+        return identifier
+
+    def __exit__(self, type, value, traceback):
+        _state.id = self._previous.pop()
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: control.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Runtime control of a pikos monitor in a long-running process.
+
+The :class:`MonitorController` listens on a unix domain socket for simple
+line based commands and applies them on a preconfigured monitor. The
+commands are executed in the server thread when it is safe to do so:
+
+- ``status`` only reads the state of the controller.
+- ``enable`` and ``disable`` of the cython monitors use their
+  ``all_threads`` support to install (and remove) the hooks in the running
+  threads; the hooks of the server thread itself are removed again.
+
+The other commands (and ``enable``/``disable`` of the python monitors,
+whose hooks can only be set by the thread that they monitor) are forwarded
+to the main thread through a signal (SIGUSR1 by default) and executed in
+the signal handler. The signal is installed with ``siginterrupt`` disabled,
+but the blocking calls that do not restart (e.g. ``time.sleep`` or
+``select``) can still return early or fail with EINTR in the main thread
+when such a command is received. The monitor does not add any hook overhead
+until it is enabled from the command line::
+
+    $ pikos-control <pid> enable
+    $ pikos-control <pid> snapshot
+    $ pikos-control <pid> focus add mypackage.module.function
+    $ pikos-control <pid> disable
+
+Available commands:
+
+==================== ===================================================
+Command              Description
+==================== ===================================================
+``status``           Report if the monitor is enabled.
+``enable``           Enable the monitor.
+``disable``          Disable the monitor.
+``snapshot``         Call the snapshot callable (by default the
+                     ``snapshot`` method of the monitor or the ``dump``
+                     method of the recorder when available).
+``focus list``       List the functions of a focused monitor.
+``focus add <f>``    Add an importable function to the focus set.
+``focus remove <f>`` Remove an importable function from the focus set.
+==================== ===================================================
+
+Anyone who can connect to the socket controls the monitor, and ``focus
+add`` imports any module that is given to it. The controller trusts only
+the user that runs the process: the default socket is created in a
+directory of the temporary directory that only the user can access, and
+every socket is made readable and writable only by the user before the
+controller listens on it. A custom ``path`` should be in a directory that
+other users cannot write to.
+
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+from Queue import Queue, Empty
+
+from pikos._internal.util import make_user_directory, user_directory
+
+
+def default_path(pid=None):
+    """ Return the default path of the control socket for a process.
+
+    """
+    if pid is None:
+        pid = os.getpid()
+    return os.path.join(user_directory(), 'control-{0}.sock'.format(pid))
+
+
+class _Request(object):
+    """ A command waiting to be executed in the main thread.
+
+    """
+
+    def __init__(self, arguments):
+        self.arguments = arguments
+        self.reply = None
+        self.done = threading.Event()
+
+
+class MonitorController(object):
+    """ Enable, disable, snapshot and change the focus of a monitor at
+    runtime through a unix domain socket.
+
+    Public
+    ------
+    monitor : Monitor
+        The monitor to control.
+
+    path : string
+        The path of the control socket.
+
+    enabled : bool
+        True if the monitor has been enabled by the controller.
+
+    Private
+    -------
+    _requests : Queue
+        The commands waiting to be executed in the main thread.
+
+    """
+
+    def __init__(self, monitor, path=None,
+                 signum=getattr(signal, 'SIGUSR1', None), snapshot=None,
+                 timeout=5.0, all_threads=True):
+        """ Initialize the controller.
+
+        Parameters
+        ----------
+        monitor : Monitor
+            The monitor (or the :class:`~.MonitorAttach` decorator returned
+            by the :mod:`pikos.api` factories) to control.
+
+        path : string
+            The path of the unix domain socket. Default is
+            ``<tempdir>/pikos-<user>/control-<pid>.sock``.
+
+        signum : int
+            The signal used to run the commands in the main thread. Default
+            is SIGUSR1.
+
+        snapshot : callable
+            The callable to execute on the ``snapshot`` command. The return
+            value is sent back to the client. Default is to call the
+            ``snapshot`` method of the monitor or the ``dump`` method of the
+            monitor's recorder when available.
+
+        timeout : float
+            The time in seconds to wait for the main thread to execute a
+            command.
+
+        all_threads : bool
+            When True (default) and the monitor supports it (i.e. the cython
+            monitors), the ``all_threads`` attribute of the monitor is set so
+            that it can be enabled and disabled from the server thread
+            without a signal. The monitor then follows all the running
+            threads instead of only the main thread.
+
+        """
+        self.monitor = getattr(monitor, '_monitor_object', monitor)
+        if all_threads and hasattr(self.monitor, 'all_threads'):
+            self.monitor.all_threads = True
+        self.path = default_path() if path is None else path
+        self.enabled = False
+        self._signum = signum
+        self._snapshot = snapshot
+        self._timeout = timeout
+        self._requests = Queue()
+        self._socket = None
+        self._thread = None
+        self._previous_handler = None
+
+    def start(self):
+        """ Install the signal handler and start listening for commands.
+
+        The method needs to be called from the main thread.
+
+        """
+        self._previous_handler = signal.signal(self._signum, self._on_signal)
+        # Restart the system calls that are interrupted by the signal so
+        # that the monitored code is not affected by the control commands.
+        signal.siginterrupt(self._signum, False)
+        if self.path == default_path():
+            make_user_directory(os.path.dirname(self.path))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen(1)
+        self._socket = server
+        self._thread = threading.Thread(
+            target=self._serve, name='pikos-control')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stop listening for commands, restore the signal handler and
+        disable the monitor if necessary.
+
+        """
+        if self._socket is None:
+            return
+        server, self._socket = self._socket, None
+        # Wake up the server thread that is blocked in accept.
+        try:
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.connect(self.path)
+            client.close()
+        except socket.error:
+            pass
+        self._thread.join()
+        server.close()
+        os.remove(self.path)
+        signal.signal(self._signum, self._previous_handler or signal.SIG_DFL)
+        self._previous_handler = None
+        if self.enabled:
+            self.monitor.disable()
+            self.enabled = False
+
+    def execute(self, arguments):
+        """ Execute a command and return the reply.
+
+        The method should be called from the main thread unless
+        :meth:`in_server` returns True for the command.
+
+        """
+        if len(arguments) == 0:
+            return 'error: empty command'
+        command = arguments[0]
+        try:
+            if command == 'status':
+                return 'enabled' if self.enabled else 'disabled'
+            elif command == 'enable':
+                if not self.enabled:
+                    self.monitor.enable()
+                    self.enabled = True
+                    self._release_server_hooks()
+                return 'enabled'
+            elif command == 'disable':
+                if self.enabled:
+                    self.monitor.disable()
+                    self.enabled = False
+                return 'disabled'
+            elif command == 'snapshot':
+                return 'snapshot: {0}'.format(self._take_snapshot())
+            elif command == 'focus':
+                return self._focus(arguments[1:])
+            else:
+                return 'error: unknown command {0!r}'.format(command)
+        except Exception as exception:
+            return 'error: {0}'.format(exception)
+
+    def in_server(self, arguments):
+        """ Return True if the command can be executed in the server thread.
+
+        """
+        if len(arguments) == 0 or arguments[0] == 'status':
+            return True
+        if arguments[0] in ('enable', 'disable'):
+            return bool(getattr(self.monitor, 'all_threads', False))
+        return arguments[0] not in ('snapshot', 'focus')
+
+    def _release_server_hooks(self):
+        """ Remove the hooks that an all threads monitor has installed in
+        the server thread.
+
+        """
+        if threading.current_thread() is self._thread:
+            sys.setprofile(None)
+            sys.settrace(None)
+
+    def _take_snapshot(self):
+        if self._snapshot is not None:
+            return self._snapshot()
+        snapshot = getattr(self.monitor, 'snapshot', None)
+        if snapshot is not None:
+            return snapshot()
+        recorder = getattr(self.monitor, '_recorder', None)
+        dump = getattr(recorder, 'dump', None)
+        if dump is None:
+            raise ValueError('the recorder does not support snapshots')
+        return dump('snapshot')
+
+    def _focus(self, arguments):
+        functions = getattr(self.monitor, 'functions', None)
+        if functions is None:
+            raise ValueError('the monitor is not a focused monitor')
+        if arguments == ['list']:
+            return ' '.join(
+                '{0}.{1}'.format(function.__module__, function.__name__)
+                for function in functions)
+        if len(arguments) != 2 or arguments[0] not in ('add', 'remove'):
+            raise ValueError('usage: focus list|add <f>|remove <f>')
+        from pikos.runner import get_function
+        function = get_function(arguments[1])
+        if arguments[0] == 'add':
+            functions.add(function)
+        else:
+            functions.discard(function)
+        return 'ok'
+
+    def _on_signal(self, signum, frame):
+        """ Execute the pending commands in the main thread.
+
+        """
+        while True:
+            try:
+                request = self._requests.get_nowait()
+            except Empty:
+                break
+            request.reply = self.execute(request.arguments)
+            request.done.set()
+
+    def _serve(self):
+        """ Accept connections and execute the commands, forwarding them to
+        the main thread when necessary.
+
+        """
+        while True:
+            # Keep a local reference since stop() resets the attribute.
+            server = self._socket
+            if server is None:
+                break
+            try:
+                connection, _ = server.accept()
+            except socket.error:
+                break
+            try:
+                line = connection.makefile('rb').readline()
+                if self._socket is None:
+                    break
+                arguments = line.split()
+                if self.in_server(arguments):
+                    reply = self.execute(arguments)
+                else:
+                    reply = self._forward(arguments)
+                connection.sendall(reply + '\n')
+            except socket.error:
+                pass
+            finally:
+                connection.close()
+
+    def _forward(self, arguments):
+        """ Execute a command in the main thread and return the reply.
+
+        """
+        request = _Request(arguments)
+        self._requests.put(request)
+        os.kill(os.getpid(), self._signum)
+        request.done.wait(self._timeout)
+        if request.done.is_set():
+            return request.reply
+        else:
+            return 'error: timeout, the command is still pending'
+
+
+def send_command(path, arguments):
+    """ Send a command to a monitor controller and return the reply.
+
+    Parameters
+    ----------
+    path : string
+        The path of the control socket.
+
+    arguments : list
+        The command and its arguments.
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        client.sendall(' '.join(arguments) + '\n')
+        return client.makefile('rb').readline().rstrip('\n')
+    finally:
+        client.close()
+
+
+def main(arguments=None):
+    description = "Send a command to the pikos monitor controller of a " \
+                  "running process."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        'target', help='The pid of the process or the path of the socket.')
+    parser.add_argument(
+        'command', nargs='+',
+        help='The command (status, enable, disable, snapshot or focus).')
+    args = parser.parse_args(arguments)
+    if args.target.isdigit():
+        path = default_path(int(args.target))
+    else:
+        path = args.target
+    reply = send_command(path, args.command)
+    print reply
+    if reply.startswith('error'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,27 @@
 __all__ = [
     'Monitor',
+    'BlockingMonitor',
+    'CallCountMonitor',
     'FocusedFunctionMonitor',
     'FunctionMonitor',
     'FunctionMemoryMonitor',
-    'LineMonitor']
+    'FunctionMemoryStatsMonitor',
+    'FunctionTimeMonitor',
+    'LineMonitor',
+    'LineStatsMonitor',
+    'MonitorMultiplexer',
+    'SlowCallMonitor']
 
 from pikos.cymonitors.monitor import Monitor
+from pikos.cymonitors.blocking_monitor import BlockingMonitor
+from pikos.cymonitors.call_count_monitor import CallCountMonitor
 from pikos.cymonitors.focused_function_monitor import FocusedFunctionMonitor
 from pikos.cymonitors.function_monitor import FunctionMonitor
 from pikos.cymonitors.function_memory_monitor import FunctionMemoryMonitor
+from pikos.cymonitors.function_memory_stats_monitor import (
+    FunctionMemoryStatsMonitor)
+from pikos.cymonitors.function_time_monitor import FunctionTimeMonitor
 from pikos.cymonitors.line_monitor import LineMonitor
+from pikos.cymonitors.line_stats_monitor import LineStatsMonitor
+from pikos.cymonitors.multiplexer import MonitorMultiplexer
+from pikos.cymonitors.slow_call_monitor import SlowCallMonitor
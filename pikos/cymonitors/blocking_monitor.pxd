@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/blocking_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .function_monitor cimport FunctionMonitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport pikos_thread_stacks
+
+
+ctypedef struct BlockingStats:
+    long long calls
+    double blocked_time
+
+
+ctypedef struct BlockingCallEntry:
+    void *function
+    Py_ssize_t stats
+    double start
+
+
+cdef class BlockingMonitor(FunctionMonitor):
+    cdef dict _table
+    cdef dict _categories
+    cdef dict _stats_map
+    cdef list _keys
+    cdef BlockingStats *_stats
+    cdef Py_ssize_t _stats_size
+    cdef pikos_thread_stacks _stacks
+
+    cdef object _category(self, object function)
+    cdef Py_ssize_t _stats_index(self, object key) except -1
+    cdef int _push(self, PyFrameObject *_frame, object function) except -1
+    cdef int _pop(self, object function) except -1
+    cdef int _record_stats(self) except -1
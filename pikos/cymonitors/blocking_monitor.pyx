@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/blocking_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.mem cimport PyMem_Free, PyMem_Realloc
+from cpython.pystate cimport (
+    PyTrace_C_CALL, PyTrace_C_EXCEPTION, PyTrace_C_RETURN, Py_tracefunc)
+
+from .function_monitor cimport FunctionMonitor
+from .hooks cimport pikos_set_profile, pikos_unset_profile
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_top,
+    pikos_stack_push, pikos_stack_pop)
+from .timers cimport pikos_wall_time
+
+from types import ModuleType
+
+from pikos._internal.fork import unregister_fork_handler
+from pikos.monitors.records import BlockingStatsRecord
+
+
+cdef extern from "Python.h":
+
+    ctypedef struct PyMethodDef:
+        pass
+
+    ctypedef struct PyCFunctionObject:
+        PyMethodDef *m_ml
+
+    bint PyCFunction_Check(object op)
+
+
+#: The default classification of the blocking builtin calls. The keys are
+#: ``<module>.<function>`` for builtin functions and
+#: ``<module>.<type>.<method>`` for builtin methods.
+BLOCKING_CALLS = {
+    'time.sleep': 'sleep',
+    'select.select': 'io',
+    'select.poll.poll': 'io',
+    'select.epoll.poll': 'io',
+    'posix.read': 'io',
+    'posix.write': 'io',
+    'posix.waitpid': 'wait',
+    'posix.wait': 'wait',
+    '__builtin__.file.read': 'io',
+    '__builtin__.file.readline': 'io',
+    '__builtin__.file.readlines': 'io',
+    '__builtin__.file.write': 'io',
+    '_socket.socket.accept': 'io',
+    '_socket.socket.connect': 'io',
+    '_socket.socket.recv': 'io',
+    '_socket.socket.recv_into': 'io',
+    '_socket.socket.recvfrom': 'io',
+    '_socket.socket.recvfrom_into': 'io',
+    '_socket.socket.send': 'io',
+    '_socket.socket.sendall': 'io',
+    '_socket.socket.sendto': 'io',
+    '_ssl._SSLSocket.read': 'io',
+    '_ssl._SSLSocket.write': 'io',
+    'thread.lock.acquire': 'lock',
+}
+
+
+def builtin_name(function):
+    """ Return the name of a builtin function as used in the classification
+    table of the :class:`BlockingMonitor`.
+
+    """
+    self_ = function.__self__
+    if self_ is None or isinstance(self_, ModuleType):
+        return '{0}.{1}'.format(function.__module__, function.__name__)
+    cls = type(self_)
+    return '{0}.{1}.{2}'.format(
+        cls.__module__, cls.__name__, function.__name__)
+
+
+cdef class BlockingMonitor(FunctionMonitor):
+    """ A Cython based monitor aggregating the time spent in blocking builtin
+    calls per calling python function.
+
+    The class hooks on the setprofile function and times the builtin calls
+    (e.g. ``time.sleep``, ``select.select``, socket ``recv`` or
+    ``Lock.acquire``) that are found in the classification table. The wall
+    time between the ``c_call`` and the ``c_return`` events is accumulated
+    per calling python function and category. A single record per
+    (function, category) pair is sent to the recorder when the monitor is
+    disabled.
+
+    Private
+    -------
+    _table : dict
+        Map of the builtin names to their category.
+
+    _categories : dict
+        Cache of the category (or None) of the builtins that have been
+        called so far, keyed by the address of their method definition.
+
+    _stats_map : dict
+        Map of the (code, category) pairs to their index in the statistics
+        array.
+
+    _keys : list
+        The (code, category) pairs in the order that they were first seen.
+
+    _stats : BlockingStats *
+        The C array of the per (code, category) statistics.
+
+    _stacks : pikos_thread_stacks
+        The C stacks of the currently executing blocking calls of the
+        threads.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_thread_stacks_init(&self._stacks, sizeof(BlockingCallEntry))
+
+    def __init__(self, recorder, record_type=None, table=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a BlockingStatsRecord.
+
+        table : dict
+            The classification table mapping builtin names to categories.
+            Default is to use :data:`BLOCKING_CALLS`.
+
+        """
+        if record_type is None:
+            record_type = BlockingStatsRecord
+        super(BlockingMonitor, self).__init__(recorder, record_type)
+        if table is None:
+            table = BLOCKING_CALLS
+        self._table = dict(table)
+        self._categories = {}
+        self._stats_map = {}
+        self._keys = []
+
+    def __dealloc__(self):
+        PyMem_Free(self._stats)
+        pikos_thread_stacks_free(&self._stacks)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the setprofile hooks, record the collected statistics and
+        finalize the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
+            self._record_stats()
+            self._recorder.finalize()
+
+    def _after_fork(self):
+        """ Reset the statistics in the forked child process.
+
+        The calls that are active at the time of the fork remain on the
+        stack and are accounted to the child when they return.
+
+        """
+        cdef:
+            Py_ssize_t index
+
+        FunctionMonitor._after_fork(self)
+        for index in range(len(self._keys)):
+            self._stats[index].calls = 0
+            self._stats[index].blocked_time = 0.0
+
+    cdef int on_function_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Time the blocking builtin calls.
+
+        """
+        self._events += 1
+        if event == PyTrace_C_CALL:
+            self._push(_frame, arg)
+        elif event == PyTrace_C_RETURN or event == PyTrace_C_EXCEPTION:
+            self._pop(arg)
+        return 0
+
+    cdef object _category(self, object function):
+        """ Return the category of the builtin function or None.
+
+        """
+        cdef size_t key
+
+        if not PyCFunction_Check(function):
+            return None
+        key = <size_t>(<PyCFunctionObject *>function).m_ml
+        try:
+            return self._categories[key]
+        except KeyError:
+            category = self._table.get(builtin_name(function))
+            self._categories[key] = category
+            return category
+
+    cdef Py_ssize_t _stats_index(self, object key) except -1:
+        """ Return the statistics index of the (code, category) pair.
+
+        """
+        cdef:
+            Py_ssize_t index
+            Py_ssize_t size
+            BlockingStats *stats
+
+        value = self._stats_map.get(key)
+        if value is not None:
+            return value
+        index = len(self._keys)
+        if index == self._stats_size:
+            size = 2 * self._stats_size if self._stats_size > 0 else 64
+            stats = <BlockingStats *>PyMem_Realloc(
+                self._stats, size * sizeof(BlockingStats))
+            if stats == NULL:
+                raise MemoryError()
+            self._stats = stats
+            self._stats_size = size
+        self._stats[index].calls = 0
+        self._stats[index].blocked_time = 0.0
+        self._stats_map[key] = index
+        self._keys.append(key)
+        return index
+
+    cdef int _push(self, PyFrameObject *_frame, object function) except -1:
+        """ Push a new blocking call in the stack of the thread.
+
+        """
+        cdef:
+            Py_ssize_t stats
+            BlockingCallEntry *entry
+
+        category = self._category(function)
+        if category is None:
+            return 0
+        stats = self._stats_index(((<object>_frame).f_code, category))
+        entry = <BlockingCallEntry *>pikos_stack_push(
+            pikos_thread_stack(&self._stacks))
+        entry.function = <void *>function
+        entry.stats = stats
+        entry.start = pikos_wall_time()
+        return 0
+
+    cdef int _pop(self, object function) except -1:
+        """ Pop the returning blocking call from the stack of the thread
+        and update the statistics.
+
+        """
+        cdef:
+            double end = pikos_wall_time()
+            pikos_stack *calls = pikos_thread_stack(&self._stacks)
+            BlockingCallEntry *entry = <BlockingCallEntry *>pikos_stack_top(
+                calls)
+            BlockingStats *stats
+
+        if entry == NULL or entry.function != <void *>function:
+            return 0
+        pikos_stack_pop(calls)
+        stats = &self._stats[entry.stats]
+        stats.calls += 1
+        stats.blocked_time += end - entry.start
+        return 0
+
+    cdef int _record_stats(self) except -1:
+        """ Send a record for each (function, category) pair to the recorder
+        and reset the statistics.
+
+        """
+        cdef:
+            Py_ssize_t index
+            BlockingStats *stats
+            object record
+
+        for index, (code, category) in enumerate(self._keys):
+            stats = &self._stats[index]
+            if stats.calls == 0:
+                continue
+            record = (
+                self._index, code.co_name, category, stats.calls,
+                stats.blocked_time, code.co_firstlineno, code.co_filename)
+            if not self._use_tuple:
+                record = self.record_type(*record)
+            self._recorder.record(record)
+            self._index += 1
+        self._stats_map.clear()
+        self._keys = []
+        pikos_thread_stacks_clear(&self._stacks)
+        return 0
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/call_count_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .code_map cimport pikos_map
+from .function_monitor cimport FunctionMonitor
+from .pytrace cimport PyFrameObject
+
+
+cdef class CallCountMonitor(FunctionMonitor):
+    cdef pikos_map _map
+    cdef list _codes
+    cdef long long *_counts
+    cdef Py_ssize_t _counts_size
+
+    cdef Py_ssize_t _add_code(self, PyFrameObject *_frame) except -1
+    cdef int _record_counts(self, bint reset) except -1
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/call_count_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.mem cimport PyMem_Free, PyMem_Realloc
+from cpython.pystate cimport PyTrace_CALL
+
+from .code_map cimport (
+    pikos_map_clear, pikos_map_free, pikos_map_get, pikos_map_init,
+    pikos_map_set)
+from .function_monitor cimport FunctionMonitor
+from .hooks cimport pikos_unset_profile
+from .pytrace cimport PyFrameObject
+
+from pikos._internal.fork import unregister_fork_handler
+from pikos.monitors.records import CallCountRecord
+
+
+cdef class CallCountMonitor(FunctionMonitor):
+    """ A Cython based monitor counting the calls of each python function.
+
+    The class hooks on the setprofile function and on every python call
+    increments a C counter that is found through a hash map keyed by the
+    address of the code object. No python object is created after the first
+    call of a function. A single record per function is sent to the
+    recorder when the monitor is disabled or a snapshot is taken.
+
+    Private
+    -------
+    _map : pikos_map
+        The C map of the code object addresses to their counter index.
+
+    _codes : list
+        The code objects in the order that they were first called. The list
+        keeps the code objects (and their addresses) alive.
+
+    _counts : long long *
+        The C array of the call counters.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_map_init(&self._map)
+
+    def __init__(self, recorder, record_type=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a CallCountRecord.
+
+        """
+        if record_type is None:
+            record_type = CallCountRecord
+        super(CallCountMonitor, self).__init__(recorder, record_type)
+        self._codes = []
+
+    def __dealloc__(self):
+        pikos_map_free(&self._map)
+        PyMem_Free(self._counts)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the setprofile hooks, record the call counts and finalize the
+        recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
+            self._record_counts(True)
+            self._recorder.finalize()
+
+    def snapshot(self, reset=False):
+        """ Send the current call counts to the recorder.
+
+        Parameters
+        ----------
+        reset : bool
+            Restart the counting after the snapshot. Default is False.
+
+        Returns
+        -------
+        count : int
+            The number of records.
+
+        """
+        cdef:
+            int start = self._index
+
+        self._record_counts(reset)
+        return self._index - start
+
+    def _after_fork(self):
+        """ Restart the counting in the forked child process.
+
+        """
+        cdef:
+            Py_ssize_t index
+
+        FunctionMonitor._after_fork(self)
+        for index in range(len(self._codes)):
+            self._counts[index] = 0
+
+    cdef int on_function_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Count the python call events.
+
+        """
+        cdef:
+            Py_ssize_t index
+
+        self._events += 1
+        if event == PyTrace_CALL:
+            index = pikos_map_get(&self._map, <void *>_frame.f_code, 0)
+            if index < 0:
+                index = self._add_code(_frame)
+            self._counts[index] += 1
+        return 0
+
+    cdef Py_ssize_t _add_code(self, PyFrameObject *_frame) except -1:
+        """ Add a counter for the code object of the frame.
+
+        """
+        cdef:
+            Py_ssize_t index = len(self._codes)
+            Py_ssize_t size
+            long long *counts
+
+        if index == self._counts_size:
+            size = 2 * self._counts_size if self._counts_size > 0 else 64
+            counts = <long long *>PyMem_Realloc(
+                self._counts, size * sizeof(long long))
+            if counts == NULL:
+                raise MemoryError()
+            self._counts = counts
+            self._counts_size = size
+        pikos_map_set(&self._map, <void *>_frame.f_code, 0, index)
+        self._codes.append((<object>_frame).f_code)
+        self._counts[index] = 0
+        return index
+
+    cdef int _record_counts(self, bint reset) except -1:
+        """ Send a record for each called function to the recorder.
+
+        """
+        cdef:
+            Py_ssize_t index
+            long long calls
+            object record
+
+        for index, code in enumerate(self._codes):
+            calls = self._counts[index]
+            if calls == 0:
+                continue
+            record = (
+                self._index, code.co_name, calls, code.co_firstlineno,
+                code.co_filename)
+            if not self._use_tuple:
+                record = self.record_type(*record)
+            self._recorder.record(record)
+            self._index += 1
+        if reset:
+            pikos_map_clear(&self._map)
+            self._codes = []
+        return 0
@@ -0,0 +1,133 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/code_map.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * An open addressing hash map from a (pointer, long) key to an index. The
+ * aggregating cython monitors use it to find the C counters of a code object
+ * (or of a line of a code object) without creating python objects. The
+ * python 2 code objects do not have a co_extra slot so the address of the
+ * code object is hashed. The owner of the map must keep the code objects
+ * alive while they are in the map.
+ */
+#ifndef PIKOS_CODE_MAP_H
+#define PIKOS_CODE_MAP_H
+
+#include <Python.h>
+
+typedef struct {
+    void *key;
+    long extra;
+    Py_ssize_t value;
+} pikos_map_entry;
+
+typedef struct {
+    pikos_map_entry *entries;
+    Py_ssize_t size;
+    Py_ssize_t used;
+} pikos_map;
+
+/* The helpers that a module does not use are fine, see hooks.h. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+Py_LOCAL_INLINE(void)
+pikos_map_init(pikos_map *map)
+{
+    map->entries = NULL;
+    map->size = 0;
+    map->used = 0;
+}
+
+Py_LOCAL_INLINE(void)
+pikos_map_free(pikos_map *map)
+{
+    PyMem_Free(map->entries);
+    pikos_map_init(map);
+}
+
+Py_LOCAL_INLINE(void)
+pikos_map_clear(pikos_map *map)
+{
+    Py_ssize_t index;
+    for (index = 0; index < map->size; index++)
+        map->entries[index].key = NULL;
+    map->used = 0;
+}
+
+Py_LOCAL_INLINE(Py_ssize_t)
+pikos_map_slot(pikos_map_entry *entries, Py_ssize_t size, void *key,
+               long extra)
+{
+    /* Fibonacci hashing of the address (the low bits are always zero). */
+    size_t hash = ((size_t)key >> 3) ^ ((size_t)extra * 0x9E3779B1u);
+    size_t mask = (size_t)size - 1;
+    size_t slot = (hash * 0x9E3779B1u) & mask;
+    while (entries[slot].key != NULL &&
+           (entries[slot].key != key || entries[slot].extra != extra))
+        slot = (slot + 1) & mask;
+    return (Py_ssize_t)slot;
+}
+
+/* Return the value of the key or -1 if the key is not in the map. */
+Py_LOCAL_INLINE(Py_ssize_t)
+pikos_map_get(pikos_map *map, void *key, long extra)
+{
+    Py_ssize_t slot;
+    if (map->size == 0)
+        return -1;
+    slot = pikos_map_slot(map->entries, map->size, key, extra);
+    if (map->entries[slot].key == NULL)
+        return -1;
+    return map->entries[slot].value;
+}
+
+/* Set the value of a key. Returns -1 and sets MemoryError on failure. */
+Py_LOCAL_INLINE(int)
+pikos_map_set(pikos_map *map, void *key, long extra, Py_ssize_t value)
+{
+    Py_ssize_t slot, index, size;
+    pikos_map_entry *entries;
+
+    if (3 * (map->used + 1) > 2 * map->size) {
+        size = map->size > 0 ? 2 * map->size : 64;
+        entries = PyMem_New(pikos_map_entry, size);
+        if (entries == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        for (index = 0; index < size; index++)
+            entries[index].key = NULL;
+        for (index = 0; index < map->size; index++) {
+            if (map->entries[index].key != NULL) {
+                slot = pikos_map_slot(
+                    entries, size, map->entries[index].key,
+                    map->entries[index].extra);
+                entries[slot] = map->entries[index];
+            }
+        }
+        PyMem_Free(map->entries);
+        map->entries = entries;
+        map->size = size;
+    }
+    slot = pikos_map_slot(map->entries, map->size, key, extra);
+    if (map->entries[slot].key == NULL) {
+        map->entries[slot].key = key;
+        map->entries[slot].extra = extra;
+        map->used += 1;
+    }
+    map->entries[slot].value = value;
+    return 0;
+}
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif /* PIKOS_CODE_MAP_H */
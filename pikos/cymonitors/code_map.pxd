@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/code_map.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+cdef extern from "code_map.h":
+
+    ctypedef struct pikos_map:
+        Py_ssize_t used
+
+    # Initialize, release or empty a map.
+    void pikos_map_init(pikos_map *map)
+    void pikos_map_free(pikos_map *map)
+    void pikos_map_clear(pikos_map *map)
+
+    # Return the value of a (pointer, long) key or -1 if it is missing.
+    Py_ssize_t pikos_map_get(pikos_map *map, void *key, long extra)
+
+    # Set the value of a key.
+    int pikos_map_set(
+        pikos_map *map, void *key, long extra, Py_ssize_t value) except -1
@@ -7,6 +7,7 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
+from cpython.pythread cimport PyThread_get_thread_ident
 from cpython.pystate cimport PyTrace_CALL
 
 from .function_memory_monitor cimport FunctionMemoryMonitor
@@ -22,7 +23,8 @@ cdef class FocusedFunctionMemoryMonitor(FunctionMemoryMonitor):
     functions.
 
     The class hooks on the setprofile function to receive function events and
-    record them if they take place inside the provided functions.
+    record them if they take place inside the provided functions (in the
+    same thread).
 
     Attributes
     ----------
@@ -59,24 +61,34 @@ cdef class FocusedFunctionMemoryMonitor(FunctionMemoryMonitor):
         """
         if self._tracker_check(_frame, event):
             FunctionMemoryMonitor.on_function_event(self, _frame, event, arg)
+        else:
+            self._events += 1
 
     cdef bint _tracker_check(self, PyFrameObject *_frame, int event):
-        """ Check if any function tracker is currently active.
+        """ Check if any function tracker of the current thread is
+        currently active.
 
         """
         cdef:
             object frame = <object>_frame
+            long thread = PyThread_get_thread_ident()
+        trackers = self._code_trackers.get(thread)
         code = frame.f_code
         if code in self.functions:
-            tracker = self._code_trackers.setdefault(code, KeepTrack())
+            if trackers is None:
+                trackers = self._code_trackers[thread] = {}
+            tracker = trackers.setdefault(code, KeepTrack())
             if event == PyTrace_CALL:
                 tracker('ping')
             else:
                 tracker('pong')
             if not tracker:
-                del self._code_trackers[code]
+                del trackers[code]
+                if not trackers:
+                    del self._code_trackers[thread]
             return True
-        return any(self._code_trackers.itervalues())
+        # Only the active trackers are kept.
+        return trackers is not None
 
     # Override the default attach method to support arguments.
     attach = advanced_attach
@@ -7,10 +7,15 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
-from cpython.pystate cimport PyTrace_CALL
+from cpython.pythread cimport PyThread_get_thread_ident
+from cpython.pystate cimport PyTrace_CALL, PyTrace_C_CALL
 
 from .function_monitor cimport FunctionMonitor
 from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks, pikos_thread_stacks_init,
+    pikos_thread_stacks_free, pikos_thread_stacks_clear, pikos_thread_stack,
+    pikos_stack_push, pikos_stack_pop)
 
 from pikos._internal.keep_track import KeepTrack
 from pikos._internal.function_set import FunctionSet
@@ -37,10 +42,18 @@ cdef class FocusedFunctionMonitor(FunctionMonitor):
         :meth:`__exit__` methods.
 
     _code_trackers : dictionary
-        A dictionary of KeepTrack instances associated with the code object
-        of each function in `functions`. It is used to keep track and check
-        that we are inside the execution of one these functions when we
-        record data.
+        A dictionary for every thread of the KeepTrack instances associated
+        with the code object of each function in `functions`. It is used to
+        keep track and check that the thread is inside the execution of one
+        these functions when we record data.
+
+    _calls : pikos_thread_stacks
+        The calls of every thread that are open since the outermost call of
+        a function in `functions`. Only tracked when `_max_depth` is set.
+
+    _max_depth : int
+        The number of call levels below the functions to record or -1 to
+        record all the calls.
 
     _index : int
         The current zero based record index. Each function event will increase
@@ -58,8 +71,14 @@ cdef class FocusedFunctionMonitor(FunctionMonitor):
 
     cdef public object functions
     cdef public dict _code_trackers
+    cdef int _max_depth
+    cdef pikos_thread_stacks _calls
 
-    def __init__(self, functions, recorder, record_type=None):
+    def __cinit__(self, *arguments, **keywords):
+        pikos_thread_stacks_init(&self._calls, sizeof(PyFrameObject *))
+
+    def __init__(self, functions, recorder, record_type=None, sample=1,
+                 per_code=False, max_depth=None):
         """ Constructor
 
         Parameters
@@ -70,36 +89,95 @@ cdef class FocusedFunctionMonitor(FunctionMonitor):
         record_type :
             The record type to use. Default is to use a FunctionRecord.
 
+        sample : int
+            Record one in every `sample` calls inside the functions (see
+            :class:`~.FunctionMonitor`).
+
+        per_code : bool
+            Count the calls of every code object separately when sampling.
+
+        max_depth : int
+            Record only the calls up to `max_depth` levels below the
+            outermost call of one of the functions (0 records only the
+            functions themselves). Builtin calls are one level below their
+            caller. Default is None (no limit).
+
         """
-        super(FocusedFunctionMonitor, self).__init__(recorder, record_type)
+        super(FocusedFunctionMonitor, self).__init__(
+            recorder, record_type, sample=sample, per_code=per_code)
         self.functions = FunctionSet(functions)
         self._code_trackers = {}
+        if max_depth is None:
+            self._max_depth = -1
+        elif max_depth < 0:
+            raise ValueError('The max_depth should not be negative')
+        else:
+            self._max_depth = max_depth
+
+    def __dealloc__(self):
+        pikos_thread_stacks_free(&self._calls)
+
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        FunctionMonitor._after_fork(self)
+        pikos_thread_stacks_clear(&self._calls)
 
     cdef int on_function_event(
             self, PyFrameObject *_frame, int event, object arg) except -1:
         """ Record the function event if we are inside one of the functions.
 
         """
-        if self._tracker_check(_frame, event):
+        if self._tracker_check(_frame, event) and (
+                self._max_depth < 0 or self._depth_check(_frame, event)):
             FunctionMonitor.on_function_event(self, _frame, event, arg)
+        else:
+            self._events += 1
+
+    cdef int _depth_check(
+            self, PyFrameObject *_frame, int event) except -1:
+        """ Update the depth of the current thread below the outermost call
+        of the functions and check that it is within `_max_depth`.
+
+        """
+        cdef:
+            pikos_stack *calls = pikos_thread_stack(&self._calls)
+            bint inside
+
+        if event == PyTrace_CALL or event == PyTrace_C_CALL:
+            (<PyFrameObject **>pikos_stack_push(calls))[0] = _frame
+            return calls.depth <= self._max_depth + 1
+        inside = calls.depth <= self._max_depth + 1
+        if calls.depth > 0:
+            pikos_stack_pop(calls)
+        return inside
 
     cdef bint _tracker_check(self, PyFrameObject *_frame, int event):
-        """ Check if any function tracker is currently active.
+        """ Check if any function tracker of the current thread is
+        currently active.
 
         """
         cdef:
             object frame = <object>_frame
+            long thread = PyThread_get_thread_ident()
+        trackers = self._code_trackers.get(thread)
         code = frame.f_code
         if code in self.functions:
-            tracker = self._code_trackers.setdefault(code, KeepTrack())
+            if trackers is None:
+                trackers = self._code_trackers[thread] = {}
+            tracker = trackers.setdefault(code, KeepTrack())
             if event == PyTrace_CALL:
                 tracker('ping')
             else:
                 tracker('pong')
             if not tracker:
-                del self._code_trackers[code]
+                del trackers[code]
+                if not trackers:
+                    del self._code_trackers[thread]
             return True
-        return any(self._code_trackers.itervalues())
+        # Only the active trackers are kept.
+        return trackers is not None
 
     # Override the default attach method to support arguments.
     attach = advanced_attach
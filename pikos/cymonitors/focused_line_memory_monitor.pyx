@@ -7,7 +7,10 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
+from cpython.pystate cimport PyTrace_RETURN
+
 from .line_memory_monitor cimport LineMemoryMonitor
+from .pytrace cimport PyFrameObject
 
 from pikos._internal.function_set import FunctionSet
 from pikos._internal.attach_decorators import advanced_attach
@@ -23,9 +26,13 @@ cdef class FocusedLineMemoryMonitor(LineMemoryMonitor):
         A set of function or method objects inside which recording will
         take place.
 
+    When a `threshold` is set the memory change of the last line of a
+    function is measured up to its return, so the memory allocated by a
+    caller outside of the functions is not attributed to it.
+
     """
 
-    def __init__(self, functions, recorder, record_type=None):
+    def __init__(self, functions, recorder, record_type=None, threshold=None):
         """ Constructor
 
         Parameters
@@ -36,9 +43,35 @@ cdef class FocusedLineMemoryMonitor(LineMemoryMonitor):
         record_type : type
             The record type to use. Default is to use a LineRecord.
 
+        threshold : int
+            The change in bytes of the RSS or VMS counters above which a
+            line is recorded. Default is None, record all the lines.
+
         """
-        super(FocusedLineMemoryMonitor, self).__init__(recorder, record_type)
+        super(FocusedLineMemoryMonitor, self).__init__(
+            recorder, record_type, threshold)
         self.functions = FunctionSet(functions)
+        self.track_calls = self.use_threshold
+
+    cdef int call_event(self, PyFrameObject *_frame, int event) except -1:
+        """ Record the last line of a function when it returns.
+
+        """
+        cdef:
+            object frame = <object>_frame
+            long long rss, vms
+
+        if (event == PyTrace_RETURN and self.has_previous and
+                frame.f_code in self.functions):
+            rss, vms = self.process.memory_info()
+            self.record_delta(rss, vms)
+            caller = frame.f_back
+            if caller is not None and caller.f_code in self.functions:
+                # The rest of the line of the caller is executed next.
+                self.set_previous(caller, rss, vms)
+            else:
+                self.has_previous = False
+        return LineMemoryMonitor.call_event(self, _frame, event)
 
     cdef record_info(self, _frame):
         """ Record the current info.
@@ -8,6 +8,9 @@
 #  All rights reserved.
 #----------------------------------------------------------------------------
 from .line_monitor cimport LineMonitor
+from .thread_stacks cimport pikos_thread_stacks
 
 cdef class FocusedLineMonitor(LineMonitor):
     cdef public object functions
+    cdef int max_depth
+    cdef pikos_thread_stacks calls
@@ -7,7 +7,14 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
+from cpython.pystate cimport PyTrace_CALL, PyTrace_RETURN
+
 from .line_monitor cimport LineMonitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_push,
+    pikos_stack_pop)
 
 from pikos._internal.function_set import FunctionSet
 from pikos._internal.attach_decorators import advanced_attach
@@ -26,6 +33,15 @@ cdef class FocusedLineMonitor(LineMonitor):
     Private
     -------
 
+    calls : pikos_thread_stacks
+        The python calls of every thread that are open since the outermost
+        call of a function in `functions` (empty outside the functions).
+        Only tracked when `max_depth` is set.
+
+    max_depth : int
+        The number of call levels below the functions to record or -1 to
+        record only the lines of the functions.
+
     _record_type: class object
         A class object to be used for records. Default is
         :class:`~pikos.monitors.records.LineRecord`
@@ -36,7 +52,11 @@ cdef class FocusedLineMonitor(LineMonitor):
 
     """
 
-    def __init__(self, functions, recorder, record_type=None):
+    def __cinit__(self, *arguments, **keywords):
+        pikos_thread_stacks_init(&self.calls, sizeof(PyFrameObject *))
+
+    def __init__(self, functions, recorder, record_type=None, sample=1,
+                 per_code=False, max_depth=None):
         """ Constructor
 
         Parameters
@@ -47,16 +67,71 @@ cdef class FocusedLineMonitor(LineMonitor):
         record_type : type
             The record type to use. Default is to use a LineRecord.
 
+        sample : int
+            Record one in every `sample` line events inside the functions
+            (see :class:`~.LineMonitor`).
+
+        per_code : bool
+            Sample the calls of every code object separately.
+
+        max_depth : int
+            Also record the lines of the functions that are called from the
+            functions, up to `max_depth` levels below the outermost call of
+            one of them. Default is None (record only the lines of the
+            functions).
+
         """
-        super(FocusedLineMonitor, self).__init__(recorder, record_type)
+        super(FocusedLineMonitor, self).__init__(
+            recorder, record_type, sample=sample, per_code=per_code)
         self.functions = FunctionSet(functions)
+        if max_depth is None:
+            self.max_depth = -1
+        elif max_depth < 0:
+            raise ValueError('The max_depth should not be negative')
+        else:
+            self.max_depth = max_depth
+            self.track_calls = True
+
+    def __dealloc__(self):
+        pikos_thread_stacks_free(&self.calls)
+
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        LineMonitor._after_fork(self)
+        pikos_thread_stacks_clear(&self.calls)
+
+    cdef int call_event(self, PyFrameObject *_frame, int event) except -1:
+        """ Keep track of the depth below the outermost call of the
+        functions.
+
+        """
+        cdef:
+            pikos_stack *calls
+
+        if self.max_depth >= 0:
+            calls = pikos_thread_stack(&self.calls)
+            if event == PyTrace_CALL:
+                if (calls.depth > 0 or
+                        (<object>_frame).f_code in self.functions):
+                    (<PyFrameObject **>pikos_stack_push(calls))[0] = _frame
+            elif event == PyTrace_RETURN and calls.depth > 0:
+                pikos_stack_pop(calls)
+        return LineMonitor.call_event(self, _frame, event)
 
     cdef record_info(self, frame):
         """ Record the current info.
 
         """
-        code = frame.f_code
-        if code in self.functions:
+        cdef:
+            Py_ssize_t depth
+
+        if self.max_depth >= 0:
+            depth = pikos_thread_stack(&self.calls).depth
+            if 0 < depth <= self.max_depth + 1:
+                LineMonitor.record_info(self, frame)
+        elif frame.f_code in self.functions:
             LineMonitor.record_info(self, frame)
 
     # Override the default attach method to support arguments.
@@ -7,28 +7,30 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
-from cpython.pystate cimport (
-    PyTrace_CALL, PyTrace_EXCEPTION, PyTrace_RETURN,  Py_tracefunc,
-    PyTrace_C_CALL, PyTrace_C_EXCEPTION, PyTrace_C_RETURN)
+from cpython.pystate cimport Py_tracefunc
 
-from .function_monitor cimport FunctionMonitor
-from .pytrace cimport PyEval_SetProfile, PyFrameObject
+from .function_monitor cimport FunctionMonitor, event_info
+from .hooks cimport pikos_set_profile, pikos_unset_profile
+from .pytrace cimport PyFrameObject
 
 import os
-import psutil
 
-from pikos.monitors.records import FunctionMemoryRecord
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.monitors.records import (
+    FunctionMemoryRecord, FunctionMemoryWeightRecord)
 
 
 cdef class FunctionMemoryMonitor(FunctionMonitor):
     """ Record process memory on python function events.
 
     The class hooks on the setprofile function to receive function events and
-    record the current process memory when they happen.
+    record the current process memory when they happen. The calls can be
+    sampled as in :class:`~.FunctionMonitor`.
 
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __init__(self, recorder, record_type=None, sample=1, per_code=False):
         """ Constructor
 
         Parameters
@@ -37,12 +39,25 @@ cdef class FunctionMemoryMonitor(FunctionMonitor):
             The recorder inctance to use.
 
         record_type :
-            The record type to use. Default is to use a FunctionRecord.
+            The record type to use. Default is to use a FunctionMemoryRecord
+            (a FunctionMemoryWeightRecord when the calls are sampled).
+
+        sample : int
+            Record one in every `sample` calls. Default is 1 (record every
+            call).
+
+        per_code : bool
+            Count the calls of every code object separately when sampling.
+            Default is False (count all the calls together).
 
         """
         if record_type is None:
-            record_type = FunctionMemoryRecord
-        super(FunctionMemoryMonitor, self).__init__(recorder, record_type)
+            if sample > 1:
+                record_type = FunctionMemoryWeightRecord
+            else:
+                record_type = FunctionMemoryRecord
+        super(FunctionMemoryMonitor, self).__init__(
+            recorder, record_type, sample=sample, per_code=per_code)
         self._process = None
 
     def enable(self):
@@ -53,9 +68,12 @@ cdef class FunctionMemoryMonitor(FunctionMonitor):
 
         """
         if self._call_tracker('ping'):
+            import psutil
             self._process = psutil.Process(os.getpid())
             self._recorder.prepare(self.record_type)
-            PyEval_SetProfile(<Py_tracefunc>self.on_function_event, self)
+            register_fork_handler(self)
+            pikos_set_profile(
+                <Py_tracefunc>self.on_function_event, self, self.all_threads)
 
     def disable(self):
         """ Disable the monitor.
@@ -65,41 +83,31 @@ cdef class FunctionMemoryMonitor(FunctionMonitor):
 
         """
         if self._call_tracker('pong'):
-            PyEval_SetProfile(NULL, None)
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
             self._recorder.finalize()
             self._process = None
 
+    def _after_fork(self):
+        """ Restart the record index and monitor the memory of the forked
+        child process.
+
+        """
+        FunctionMonitor._after_fork(self)
+        import psutil
+        self._process = psutil.Process(os.getpid())
+
     cdef object _gather_info(
             self, PyFrameObject *_frame, int event, object arg):
         """ Record the current info.
 
         """
         cdef:
-            object frame = <object>_frame
             object record
 
-        if event < PyTrace_C_CALL:
-            function = frame.f_code.co_name
-        else:
-            function = arg.__name__
-
-        if event == PyTrace_CALL:
-            event_str = 'call'
-        elif event == PyTrace_RETURN:
-            event_str = 'return'
-        elif event == PyTrace_C_CALL:
-            event_str = 'c_call'
-        elif event == PyTrace_C_RETURN:
-            event_str = 'c_return'
-        elif event == PyTrace_EXCEPTION:
-            event_str = 'exception'
-        elif event == PyTrace_C_EXCEPTION:
-            event_str = 'c_exception'
-        else:
-            raise RuntimeError('Unknown profile event %s' % event)
-
+        event_str, function, lineno, filename = event_info(
+            _frame, event, arg)
         rss, vms = self._process.memory_info()
         record = (
-            self._index, event_str, function, rss, vms, frame.f_lineno,
-            frame.f_code.co_filename)
+            self._index, event_str, function, rss, vms, lineno, filename)
         return record
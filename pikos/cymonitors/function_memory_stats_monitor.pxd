@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/function_memory_stats_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .code_map cimport pikos_map
+from .function_monitor cimport FunctionMonitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport pikos_thread_stacks
+
+
+ctypedef struct FunctionMemoryStats:
+    long long calls
+    long long net_rss
+    long long peak_rss
+
+
+ctypedef struct MemoryCallEntry:
+    PyFrameObject *frame
+    Py_ssize_t function
+    long long start_rss
+    long long peak_rss
+    bint outermost
+
+
+cdef class FunctionMemoryStatsMonitor(FunctionMonitor):
+    cdef object _process
+    cdef int _rss_file
+    cdef pikos_map _map
+    cdef list _codes
+    cdef FunctionMemoryStats *_stats
+    cdef Py_ssize_t _stats_size
+    cdef pikos_thread_stacks _stacks
+
+    cdef int _open_process(self) except -1
+    cdef long long _read_rss(self) except -1
+    cdef Py_ssize_t _function_index(self, PyFrameObject *_frame) except -1
+    cdef int _push(
+        self, PyFrameObject *_frame, long long rss) except -1
+    cdef int _pop(self, PyFrameObject *_frame, long long rss) except -1
+    cdef int _record_stats(self) except -1
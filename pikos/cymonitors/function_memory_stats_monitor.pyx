@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/function_memory_stats_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.mem cimport PyMem_Free, PyMem_Realloc
+from cpython.pystate cimport PyTrace_CALL, PyTrace_RETURN, Py_tracefunc
+
+from .code_map cimport (
+    pikos_map_clear, pikos_map_free, pikos_map_get, pikos_map_init,
+    pikos_map_set)
+from .function_monitor cimport FunctionMonitor
+from .hooks cimport pikos_set_profile, pikos_unset_profile
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_entry,
+    pikos_stack_top, pikos_stack_push, pikos_stack_pop)
+
+import os
+
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.monitors.records import FunctionMemoryStatsRecord
+
+
+cdef extern from "rss.h":
+
+    int PIKOS_RSS_AVAILABLE
+
+    int pikos_rss_open() except -1
+    void pikos_rss_close(int fd)
+    long long pikos_rss_read(int fd) except -1
+
+
+cdef class FunctionMemoryStatsMonitor(FunctionMonitor):
+    """ A Cython based monitor aggregating the process memory changes of each
+    python function.
+
+    The class hooks on the setprofile function and samples the process RSS
+    on every function event. On linux the RSS is read in C from the statm
+    file of the process, elsewhere psutil is used. For each code object it
+    keeps (in C) the number of calls, the total RSS change between call and
+    return and the largest RSS increase observed while the function was
+    executing. The RSS change of a recursive function is only accounted
+    for its outermost call in the thread. A single record per function is
+    sent to the recorder when the monitor is disabled.
+
+    Private
+    -------
+    _rss_file : int
+        The file descriptor of the statm file of the process or -1 when
+        the RSS is read with psutil.
+
+    _map : pikos_map
+        The C map of the code object addresses to their index in the
+        statistics array. The code objects are kept alive by `_codes`.
+
+    _codes : list
+        The code objects in the order that they were first called.
+
+    _stats : FunctionMemoryStats *
+        The C array of the per code object statistics.
+
+    _stacks : pikos_thread_stacks
+        The C stacks of the currently executing function calls of the
+        threads.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_map_init(&self._map)
+        pikos_thread_stacks_init(&self._stacks, sizeof(MemoryCallEntry))
+        self._rss_file = -1
+
+    def __init__(self, recorder, record_type=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a
+            FunctionMemoryStatsRecord.
+
+        """
+        if record_type is None:
+            record_type = FunctionMemoryStatsRecord
+        super(FunctionMemoryStatsMonitor, self).__init__(recorder, record_type)
+        self._process = None
+        self._codes = []
+
+    def __dealloc__(self):
+        pikos_rss_close(self._rss_file)
+        pikos_map_free(&self._map)
+        PyMem_Free(self._stats)
+        pikos_thread_stacks_free(&self._stacks)
+
+    def enable(self):
+        """ Enable the monitor.
+
+        The first time the method is called (the context is entered) it will
+        set the setprofile hooks and initialize the recorder.
+
+        """
+        if self._call_tracker('ping'):
+            self._open_process()
+            self._recorder.prepare(self.record_type)
+            register_fork_handler(self)
+            pikos_set_profile(
+                <Py_tracefunc>self.on_function_event, self, self.all_threads)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the setprofile hooks, record the collected statistics and
+        finalize the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
+            self._record_stats()
+            self._recorder.finalize()
+            pikos_rss_close(self._rss_file)
+            self._rss_file = -1
+            self._process = None
+
+    def _after_fork(self):
+        """ Reset the statistics and monitor the memory of the forked child
+        process.
+
+        The calls that are active at the time of the fork remain on the
+        stack and are accounted to the child when they return.
+
+        """
+        cdef:
+            Py_ssize_t index
+
+        FunctionMonitor._after_fork(self)
+        for index in range(len(self._codes)):
+            self._stats[index].calls = 0
+            self._stats[index].net_rss = 0
+            self._stats[index].peak_rss = 0
+        self._open_process()
+
+    cdef int _open_process(self) except -1:
+        """ Prepare to read the RSS of the current process.
+
+        """
+        pikos_rss_close(self._rss_file)
+        self._rss_file = -1
+        if PIKOS_RSS_AVAILABLE:
+            self._rss_file = pikos_rss_open()
+        else:
+            import psutil
+            self._process = psutil.Process(os.getpid())
+        return 0
+
+    cdef long long _read_rss(self) except -1:
+        """ Return the current RSS of the process in bytes.
+
+        """
+        if self._rss_file >= 0:
+            return pikos_rss_read(self._rss_file)
+        return self._process.memory_info()[0]
+
+    cdef int on_function_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Update the statistics on the current function event.
+
+        """
+        cdef:
+            long long rss = self._read_rss()
+            MemoryCallEntry *entry
+
+        self._events += 1
+        if event == PyTrace_CALL:
+            self._push(_frame, rss)
+        elif event == PyTrace_RETURN:
+            self._pop(_frame, rss)
+        else:
+            entry = <MemoryCallEntry *>pikos_stack_top(
+                pikos_thread_stack(&self._stacks))
+            if entry != NULL and rss > entry.peak_rss:
+                entry.peak_rss = rss
+        return 0
+
+    cdef Py_ssize_t _function_index(self, PyFrameObject *_frame) except -1:
+        """ Return the statistics index of the code object of the frame.
+
+        """
+        cdef:
+            Py_ssize_t index
+            Py_ssize_t size
+            FunctionMemoryStats *stats
+
+        index = pikos_map_get(&self._map, <void *>_frame.f_code, 0)
+        if index >= 0:
+            return index
+        index = len(self._codes)
+        if index == self._stats_size:
+            size = 2 * self._stats_size if self._stats_size > 0 else 64
+            stats = <FunctionMemoryStats *>PyMem_Realloc(
+                self._stats, size * sizeof(FunctionMemoryStats))
+            if stats == NULL:
+                raise MemoryError()
+            self._stats = stats
+            self._stats_size = size
+        self._stats[index].calls = 0
+        self._stats[index].net_rss = 0
+        self._stats[index].peak_rss = 0
+        pikos_map_set(&self._map, <void *>_frame.f_code, 0, index)
+        self._codes.append((<object>_frame).f_code)
+        return index
+
+    cdef int _push(
+            self, PyFrameObject *_frame, long long rss) except -1:
+        """ Push a new function call in the stack of the thread.
+
+        """
+        cdef:
+            pikos_stack *calls = pikos_thread_stack(&self._stacks)
+            Py_ssize_t function, index
+            MemoryCallEntry *entry
+
+        function = self._function_index(_frame)
+        entry = <MemoryCallEntry *>pikos_stack_push(calls)
+        entry.frame = _frame
+        entry.function = function
+        entry.start_rss = rss
+        entry.peak_rss = rss
+        entry.outermost = True
+        for index in range(calls.depth - 1):
+            if (<MemoryCallEntry *>pikos_stack_entry(
+                    calls, index)).function == function:
+                entry.outermost = False
+                break
+        return 0
+
+    cdef int _pop(self, PyFrameObject *_frame, long long rss) except -1:
+        """ Pop the returning function call from the stack of the thread and
+        update the function statistics.
+
+        Returns from functions that were called before the monitor was
+        enabled are ignored.
+
+        """
+        cdef:
+            pikos_stack *calls = pikos_thread_stack(&self._stacks)
+            MemoryCallEntry *entry = <MemoryCallEntry *>pikos_stack_top(calls)
+            FunctionMemoryStats *stats
+            long long peak
+
+        if entry == NULL or entry.frame != _frame:
+            return 0
+        pikos_stack_pop(calls)
+        peak = entry.peak_rss if entry.peak_rss > rss else rss
+        stats = &self._stats[entry.function]
+        stats.calls += 1
+        if entry.outermost:
+            stats.net_rss += rss - entry.start_rss
+        if peak - entry.start_rss > stats.peak_rss:
+            stats.peak_rss = peak - entry.start_rss
+        entry = <MemoryCallEntry *>pikos_stack_top(calls)
+        if entry != NULL and peak > entry.peak_rss:
+            entry.peak_rss = peak
+        return 0
+
+    cdef int _record_stats(self) except -1:
+        """ Send a record for each function to the recorder and reset the
+        statistics.
+
+        """
+        cdef:
+            Py_ssize_t index
+            FunctionMemoryStats *stats
+            object record
+
+        for index, code in enumerate(self._codes):
+            stats = &self._stats[index]
+            if stats.calls == 0:
+                continue
+            record = (
+                self._index, code.co_name, stats.calls, stats.net_rss,
+                stats.peak_rss, code.co_firstlineno, code.co_filename)
+            if not self._use_tuple:
+                record = self.record_type(*record)
+            self._recorder.record(record)
+            self._index += 1
+        pikos_map_clear(&self._map)
+        self._codes = []
+        pikos_thread_stacks_clear(&self._stacks)
+        return 0
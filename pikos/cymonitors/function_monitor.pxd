@@ -9,15 +9,27 @@
 #----------------------------------------------------------------------------
 from .monitor cimport Monitor
 from .pytrace cimport PyFrameObject
+from .sampler cimport pikos_sampler
 
 cdef class FunctionMonitor(Monitor):
     cdef public object _recorder
     cdef public object record_type
     cdef object _call_tracker
     cdef int _index
+    cdef long _events
     cdef bint _use_tuple
+    cdef bint _context
+    cdef long _sample
+    cdef pikos_sampler _sampler
+    cdef list _sampled_codes
 
     cdef int on_function_event(
         self, PyFrameObject *_frame, int event, object arg) except -1
+    cdef int _sample_event(
+        self, PyFrameObject *_frame, int event, object arg) except -1
     cdef object _gather_info(
         self, PyFrameObject *_frame, int event, object arg)
+
+cdef tuple event_info(PyFrameObject *_frame, int event, object arg)
+cdef void begin_shared_event(PyFrameObject *_frame, int event)
+cdef void end_shared_event()
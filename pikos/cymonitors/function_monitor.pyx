@@ -12,18 +12,41 @@ from cpython.pystate cimport (
     PyTrace_C_CALL, PyTrace_C_EXCEPTION, PyTrace_LINE, PyTrace_C_RETURN)
 
 from .monitor cimport Monitor
-from .pytrace cimport PyEval_SetProfile, PyFrameObject
+from .hooks cimport pikos_set_profile, pikos_unset_profile
+from .pytrace cimport PyFrameObject, PyCFunctionObject
+from .sampler cimport (
+    pikos_sampler_init, pikos_sampler_free, pikos_sampler_reset,
+    pikos_sampler_call, pikos_sampler_return)
 
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos._internal.keep_track import KeepTrack
+from pikos.context import _state as _context_state
 from pikos.monitors.function_monitor import FunctionRecord
+from pikos.monitors.records import (
+    FunctionContextRecord, FunctionWeightRecord)
 
 
 cdef class FunctionMonitor(Monitor):
     """ A Cython based monitor for function events.
 
+    When `sample` is larger than one only one in every `sample` calls is
+    recorded (together with its return event) and the records get the
+    sample rate as their ``weight`` field. The calls are counted in C
+    before any python object is created, either all together or separately
+    for every code object (and builtin function) when `per_code` is True.
+    The counted code objects (builtin functions) are kept alive in a list
+    so that their addresses are not reused while they are counted. The
+    sampled calls are kept in a stack for every thread.
+
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __cinit__(self, *arguments, **keywords):
+        pikos_sampler_init(&self._sampler, 1, False)
+        self._sampled_codes = []
+
+    def __init__(self, recorder, record_type=None, context=False, sample=1,
+                 per_code=False):
         """ Constructor
 
         Parameters
@@ -32,18 +55,49 @@ cdef class FunctionMonitor(Monitor):
             The recorder inctance to use.
 
         record_type :
-            The record type to use. Default is to use a FunctionRecord.
+            The record type to use. Default is to use a FunctionRecord (a
+            FunctionContextRecord when `context` is True).
+
+        context : bool
+            Add the context id of the thread (see :mod:`pikos.context`) as
+            the last field of the records. Default is False.
+
+        sample : int
+            Record one in every `sample` calls. Default is 1 (record every
+            call). The default record type is a FunctionWeightRecord when
+            calls are sampled.
+
+        per_code : bool
+            Count the calls of every code object separately when sampling.
+            Default is False (count all the calls together).
 
         """
+        if sample < 1:
+            raise ValueError('The sample rate should be a positive integer')
         self._recorder = recorder
         self._call_tracker = KeepTrack()
+        self._context = context
+        self._sample = sample
+        pikos_sampler_init(&self._sampler, sample, per_code)
         if record_type is None:
-            self.record_type = FunctionRecord
+            if context and sample > 1:
+                raise ValueError(
+                    'A record_type is required to sample the calls with '
+                    'the context')
+            elif context:
+                self.record_type = FunctionContextRecord
+            elif sample > 1:
+                self.record_type = FunctionWeightRecord
+            else:
+                self.record_type = FunctionRecord
         else:
             self.record_type = record_type
         if self.record_type is tuple:
             self._use_tuple = True
 
+    def __dealloc__(self):
+        pikos_sampler_free(&self._sampler)
+
     def enable(self):
         """ Enable the monitor.
 
@@ -53,7 +107,11 @@ cdef class FunctionMonitor(Monitor):
         """
         if self._call_tracker('ping'):
             self._recorder.prepare(self.record_type)
-            PyEval_SetProfile(<Py_tracefunc>self.on_function_event, self)
+            pikos_sampler_reset(&self._sampler)
+            self._sampled_codes = []
+            register_fork_handler(self)
+            pikos_set_profile(
+                <Py_tracefunc>self.on_function_event, self, self.all_threads)
 
     def disable(self):
         """ Disable the monitor.
@@ -63,9 +121,31 @@ cdef class FunctionMonitor(Monitor):
 
         """
         if self._call_tracker('pong'):
-            PyEval_SetProfile(NULL, None)
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
             self._recorder.finalize()
 
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        self._index = 0
+        self._events = 0
+        pikos_sampler_reset(&self._sampler)
+        self._sampled_codes = []
+
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        Returns
+        -------
+        stats : dict
+            The number of profile ``events`` that have been received and of
+            the records that have been sent to the recorder (``recorded``).
+
+        """
+        return {'events': self._events, 'recorded': self._index}
+
     cdef int on_function_event(
             self, PyFrameObject *_frame, int event, object arg) except -1:
         """ Record the current function event.
@@ -78,43 +158,126 @@ cdef class FunctionMonitor(Monitor):
         cdef:
             object record
 
+        self._events += 1
+        if self._sample > 1:
+            if not self._sample_event(_frame, event, arg):
+                return 0
         record = self._gather_info(_frame, event, arg)
+        if self._context:
+            record += (_context_state.id,)
+        if self._sample > 1:
+            record += (self._sample,)
         if not self._use_tuple:
-            record = self.record_type(*self._gather_info(_frame, event, arg))
+            record = self.record_type(*record)
         self._recorder.record(record)
         self._index += 1
         return 0
 
-    cdef object _gather_info(
-            self, PyFrameObject *_frame, int event, object arg):
-        """ Record the current info.
+    cdef int _sample_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Return 1 if the event belongs to a sampled call.
+
+        The python calls are counted by their code object and the builtin
+        calls by the method definition of the builtin function. The first
+        time that a code is counted its object is kept in `_sampled_codes`.
 
         """
         cdef:
-            object frame = <object>_frame
-            object record
-
-        if event < PyTrace_C_CALL:
-            function = frame.f_code.co_name
-        else:
-            function = arg.__name__
+            Py_ssize_t used = self._sampler.counts_used
+            int sampled
 
         if event == PyTrace_CALL:
-            event_str = 'call'
-        elif event == PyTrace_RETURN:
-            event_str = 'return'
+            sampled = pikos_sampler_call(
+                &self._sampler, _frame, NULL, _frame.f_code, 0)
+            if self._sampler.counts_used > used:
+                self._sampled_codes.append((<object>_frame).f_code)
+            return sampled
         elif event == PyTrace_C_CALL:
-            event_str = 'c_call'
-        elif event == PyTrace_C_RETURN:
-            event_str = 'c_return'
-        elif event == PyTrace_EXCEPTION:
-            event_str = 'exception'
-        elif event == PyTrace_C_EXCEPTION:
-            event_str = 'c_exception'
+            sampled = pikos_sampler_call(
+                &self._sampler, _frame, <void *>arg,
+                (<PyCFunctionObject *>arg).m_ml, 1)
+            if self._sampler.counts_used > used:
+                self._sampled_codes.append(arg)
+            return sampled
+        elif event == PyTrace_RETURN:
+            return pikos_sampler_return(&self._sampler, _frame, NULL)
         else:
-            raise RuntimeError('Unknown profile event %s' % event)
+            return pikos_sampler_return(&self._sampler, _frame, <void *>arg)
+
+    cdef object _gather_info(
+            self, PyFrameObject *_frame, int event, object arg):
+        """ Record the current info.
+
+        """
+        event_str, function, lineno, filename = event_info(_frame, event, arg)
+        return (self._index, event_str, function, lineno, filename)
+
+
+# The profile event that is currently dispatched by a MonitorMultiplexer.
+cdef PyFrameObject *_shared_frame = NULL
+cdef int _shared_event = -1
+cdef tuple _shared_info = None
+
+
+cdef tuple event_info(PyFrameObject *_frame, int event, object arg):
+    """ Return the (event, function, lineno, filename) of a profile event.
+
+    While a :class:`~.MonitorMultiplexer` dispatches an event to its
+    monitors the information is gathered from the frame only once and
+    shared between them.
+
+    """
+    global _shared_info
+    cdef:
+        object frame = <object>_frame
+        tuple info
+
+    if _frame == _shared_frame and event == _shared_event:
+        if _shared_info is not None:
+            return _shared_info
+
+    if event < PyTrace_C_CALL:
+        function = frame.f_code.co_name
+    else:
+        function = arg.__name__
+
+    if event == PyTrace_CALL:
+        event_str = 'call'
+    elif event == PyTrace_RETURN:
+        event_str = 'return'
+    elif event == PyTrace_C_CALL:
+        event_str = 'c_call'
+    elif event == PyTrace_C_RETURN:
+        event_str = 'c_return'
+    elif event == PyTrace_EXCEPTION:
+        event_str = 'exception'
+    elif event == PyTrace_C_EXCEPTION:
+        event_str = 'c_exception'
+    else:
+        raise RuntimeError('Unknown profile event %s' % event)
+
+    info = (event_str, function, frame.f_lineno, frame.f_code.co_filename)
+    if _frame == _shared_frame and event == _shared_event:
+        _shared_info = info
+    return info
+
+
+cdef void begin_shared_event(PyFrameObject *_frame, int event):
+    """ Share the information of the event between the calls to
+    :func:`event_info` until :func:`end_shared_event` is called.
+
+    The frame and event are compared on every lookup, so an event that is
+    dispatched by another thread in between is not confused with this one.
+
+    """
+    global _shared_frame, _shared_event, _shared_info
+    _shared_frame = _frame
+    _shared_event = event
+    _shared_info = None
+
 
-        record = (
-            self._index, event_str, function, frame.f_lineno,
-            frame.f_code.co_filename)
-        return record
+cdef void end_shared_event():
+    global _shared_frame, _shared_event, _shared_info
+    _shared_frame = NULL
+    _shared_event = -1
+    _shared_info = None
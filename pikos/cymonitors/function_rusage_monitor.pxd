@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/function_rusage_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .function_monitor cimport FunctionMonitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport pikos_thread_stacks
+
+
+ctypedef struct RusageCounters:
+    long long minor_faults
+    long long major_faults
+    long long voluntary_switches
+    long long involuntary_switches
+    long long block_input
+    long long block_output
+
+
+ctypedef struct FunctionRusageStats:
+    long long calls
+    RusageCounters counters
+
+
+ctypedef struct RusageCallEntry:
+    PyFrameObject *frame
+    Py_ssize_t function
+    bint outermost
+    RusageCounters start
+
+
+cdef class FunctionRusageMonitor(FunctionMonitor):
+    cdef dict _code_map
+    cdef list _codes
+    cdef FunctionRusageStats *_stats
+    cdef Py_ssize_t _stats_size
+    cdef pikos_thread_stacks _stacks
+
+    cdef Py_ssize_t _function_index(self, object code) except -1
+    cdef int _push(self, PyFrameObject *_frame) except -1
+    cdef int _pop(self, PyFrameObject *_frame) except -1
+    cdef int _record_stats(self) except -1
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/function_rusage_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.exc cimport PyErr_SetFromErrno
+from cpython.mem cimport PyMem_Free, PyMem_Realloc
+from cpython.pystate cimport PyTrace_CALL, PyTrace_RETURN
+
+from .function_monitor cimport FunctionMonitor
+from .hooks cimport pikos_unset_profile
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_entry,
+    pikos_stack_top, pikos_stack_push, pikos_stack_pop)
+
+from pikos._internal.fork import unregister_fork_handler
+from pikos.monitors.records import FunctionRusageRecord
+
+
+cdef extern from "rusage.h":
+
+    struct rusage:
+        long ru_minflt
+        long ru_majflt
+        long ru_nvcsw
+        long ru_nivcsw
+        long ru_inblock
+        long ru_oublock
+
+    int getrusage(int who, rusage *usage) nogil
+
+    int PIKOS_RUSAGE_WHO
+    int PIKOS_RUSAGE_PER_THREAD
+
+
+#: True if the counters are collected for the current thread only. On
+#: platforms without ``RUSAGE_THREAD`` the counters of the whole process are
+#: used.
+PER_THREAD = bool(PIKOS_RUSAGE_PER_THREAD)
+
+
+cdef int read_counters(RusageCounters *counters) except -1:
+    """ Read the current resource usage counters.
+
+    """
+    cdef rusage usage
+
+    if getrusage(PIKOS_RUSAGE_WHO, &usage) != 0:
+        PyErr_SetFromErrno(OSError)
+        return -1
+    counters.minor_faults = usage.ru_minflt
+    counters.major_faults = usage.ru_majflt
+    counters.voluntary_switches = usage.ru_nvcsw
+    counters.involuntary_switches = usage.ru_nivcsw
+    counters.block_input = usage.ru_inblock
+    counters.block_output = usage.ru_oublock
+    return 0
+
+
+cdef class FunctionRusageMonitor(FunctionMonitor):
+    """ A Cython based monitor aggregating the resource usage counters of
+    each python function.
+
+    The class hooks on the setprofile function and reads the
+    ``getrusage(RUSAGE_THREAD)`` counters (page faults, context switches and
+    block io operations) on the call and return events of python functions.
+    The change of the counters is accumulated per code object and a single
+    record per function is sent to the recorder when the monitor is disabled.
+    The counters of recursive calls are only accumulated once (at the
+    outermost call of the thread). When the monitor is installed on all the
+    threads the counters of each thread are accumulated separately, so the
+    calls of a function that overlap in several threads are all counted.
+
+    Private
+    -------
+    _code_map : dict
+        Map of the code objects to their index in the statistics array.
+
+    _codes : list
+        The code objects in the order that they were first called.
+
+    _stats : FunctionRusageStats *
+        The C array of the per code object statistics.
+
+    _stacks : pikos_thread_stacks
+        The C stacks of the currently executing function calls of the
+        threads.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_thread_stacks_init(&self._stacks, sizeof(RusageCallEntry))
+
+    def __init__(self, recorder, record_type=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a FunctionRusageRecord.
+
+        """
+        if record_type is None:
+            record_type = FunctionRusageRecord
+        super(FunctionRusageMonitor, self).__init__(recorder, record_type)
+        self._code_map = {}
+        self._codes = []
+
+    def __dealloc__(self):
+        PyMem_Free(self._stats)
+        pikos_thread_stacks_free(&self._stacks)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the setprofile hooks, record the collected statistics and
+        finalize the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
+            self._record_stats()
+            self._recorder.finalize()
+
+    def _after_fork(self):
+        """ Reset the statistics in the forked child process.
+
+        The calls that are active at the time of the fork remain on the
+        stack and are accounted to the child when they return.
+
+        """
+        cdef:
+            Py_ssize_t index
+            FunctionRusageStats *stats
+
+        FunctionMonitor._after_fork(self)
+        for index in range(len(self._codes)):
+            stats = &self._stats[index]
+            stats.calls = 0
+            stats.counters.minor_faults = 0
+            stats.counters.major_faults = 0
+            stats.counters.voluntary_switches = 0
+            stats.counters.involuntary_switches = 0
+            stats.counters.block_input = 0
+            stats.counters.block_output = 0
+
+    cdef int on_function_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Update the statistics on the python call and return events.
+
+        """
+        self._events += 1
+        if event == PyTrace_CALL:
+            self._push(_frame)
+        elif event == PyTrace_RETURN:
+            self._pop(_frame)
+        return 0
+
+    cdef Py_ssize_t _function_index(self, object code) except -1:
+        """ Return the statistics index of the code object.
+
+        """
+        cdef:
+            Py_ssize_t index
+            Py_ssize_t size
+            FunctionRusageStats *stats
+
+        value = self._code_map.get(code)
+        if value is not None:
+            return value
+        index = len(self._codes)
+        if index == self._stats_size:
+            size = 2 * self._stats_size if self._stats_size > 0 else 64
+            stats = <FunctionRusageStats *>PyMem_Realloc(
+                self._stats, size * sizeof(FunctionRusageStats))
+            if stats == NULL:
+                raise MemoryError()
+            self._stats = stats
+            self._stats_size = size
+        stats = &self._stats[index]
+        stats.calls = 0
+        stats.counters.minor_faults = 0
+        stats.counters.major_faults = 0
+        stats.counters.voluntary_switches = 0
+        stats.counters.involuntary_switches = 0
+        stats.counters.block_input = 0
+        stats.counters.block_output = 0
+        self._code_map[code] = index
+        self._codes.append(code)
+        return index
+
+    cdef int _push(self, PyFrameObject *_frame) except -1:
+        """ Push a new function call in the stack of the thread.
+
+        """
+        cdef:
+            Py_ssize_t function
+            Py_ssize_t index
+            pikos_stack *calls
+            RusageCallEntry *entry
+
+        function = self._function_index((<object>_frame).f_code)
+        calls = pikos_thread_stack(&self._stacks)
+        entry = <RusageCallEntry *>pikos_stack_push(calls)
+        entry.frame = _frame
+        entry.function = function
+        entry.outermost = True
+        # Recursion is checked on the stack of the thread, since the
+        # counters are per thread.
+        for index in range(calls.depth - 1):
+            if (<RusageCallEntry *>pikos_stack_entry(
+                    calls, index)).function == function:
+                entry.outermost = False
+                break
+        read_counters(&entry.start)
+        return 0
+
+    cdef int _pop(self, PyFrameObject *_frame) except -1:
+        """ Pop the returning function call from the stack of the thread and
+        update the function statistics.
+
+        Returns from functions that were called before the monitor was
+        enabled are ignored.
+
+        """
+        cdef:
+            RusageCounters end
+            pikos_stack *calls = pikos_thread_stack(&self._stacks)
+            RusageCallEntry *entry = <RusageCallEntry *>pikos_stack_top(calls)
+            FunctionRusageStats *stats
+
+        read_counters(&end)
+        if entry == NULL or entry.frame != _frame:
+            return 0
+        pikos_stack_pop(calls)
+        stats = &self._stats[entry.function]
+        stats.calls += 1
+        if not entry.outermost:
+            return 0
+        stats.counters.minor_faults += (
+            end.minor_faults - entry.start.minor_faults)
+        stats.counters.major_faults += (
+            end.major_faults - entry.start.major_faults)
+        stats.counters.voluntary_switches += (
+            end.voluntary_switches - entry.start.voluntary_switches)
+        stats.counters.involuntary_switches += (
+            end.involuntary_switches - entry.start.involuntary_switches)
+        stats.counters.block_input += (
+            end.block_input - entry.start.block_input)
+        stats.counters.block_output += (
+            end.block_output - entry.start.block_output)
+        return 0
+
+    cdef int _record_stats(self) except -1:
+        """ Send a record for each function to the recorder and reset the
+        statistics.
+
+        """
+        cdef:
+            Py_ssize_t index
+            FunctionRusageStats *stats
+            object record
+
+        for index, code in enumerate(self._codes):
+            stats = &self._stats[index]
+            if stats.calls == 0:
+                continue
+            record = (
+                self._index, code.co_name, stats.calls,
+                stats.counters.minor_faults, stats.counters.major_faults,
+                stats.counters.voluntary_switches,
+                stats.counters.involuntary_switches,
+                stats.counters.block_input, stats.counters.block_output,
+                code.co_firstlineno, code.co_filename)
+            if not self._use_tuple:
+                record = self.record_type(*record)
+            self._recorder.record(record)
+            self._index += 1
+        self._code_map.clear()
+        self._codes = []
+        pikos_thread_stacks_clear(&self._stacks)
+        return 0
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/function_time_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .function_monitor cimport FunctionMonitor, event_info
+from .pytrace cimport PyFrameObject
+from .timers cimport pikos_cpu_time, pikos_wall_time
+
+from pikos.monitors.records import (
+    FunctionTimeContextRecord, FunctionTimeRecord, FunctionTimeWeightRecord)
+
+
+cdef class FunctionTimeMonitor(FunctionMonitor):
+    """ Record the wall and cpu time on python function events.
+
+    The class hooks on the setprofile function to receive function events and
+    record the current wall clock time and the cpu time used by the current
+    thread (``CLOCK_THREAD_CPUTIME_ID`` on posix systems). The difference
+    between the two over a function call is the time that the function spent
+    off-cpu (e.g. waiting on io or locks).
+
+    """
+
+    def __init__(self, recorder, record_type=None, context=False, sample=1,
+                 per_code=False):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a FunctionTimeRecord (a
+            FunctionTimeContextRecord when `context` is True and a
+            FunctionTimeWeightRecord when the calls are sampled).
+
+        context : bool
+            Add the context id of the thread (see :mod:`pikos.context`) as
+            the last field of the records. Default is False.
+
+        sample : int
+            Record one in every `sample` calls (see
+            :class:`~.FunctionMonitor`). Default is 1 (record every call).
+
+        per_code : bool
+            Count the calls of every code object separately when sampling.
+            Default is False (count all the calls together).
+
+        """
+        if record_type is None:
+            if context and sample > 1:
+                raise ValueError(
+                    'A record_type is required to sample the calls with '
+                    'the context')
+            elif context:
+                record_type = FunctionTimeContextRecord
+            elif sample > 1:
+                record_type = FunctionTimeWeightRecord
+            else:
+                record_type = FunctionTimeRecord
+        super(FunctionTimeMonitor, self).__init__(
+            recorder, record_type, context, sample, per_code)
+
+    cdef object _gather_info(
+            self, PyFrameObject *_frame, int event, object arg):
+        """ Record the current info.
+
+        """
+        cdef:
+            double wall_time = pikos_wall_time()
+            double cpu_time = pikos_cpu_time()
+            object record
+
+        event_str, function, lineno, filename = event_info(
+            _frame, event, arg)
+
+        record = (
+            self._index, event_str, function, wall_time, cpu_time, lineno,
+            filename)
+        return record
@@ -0,0 +1,146 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/hooks.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * Install and remove the profile and trace functions of the cython
+ * monitors. PyEval_SetProfile and PyEval_SetTrace only affect the calling
+ * thread, so when `all_threads` is set the hooks are also written to the
+ * state of every other thread of the interpreter (e.g. the workers of a
+ * thread pool that is already running). The other thread states are
+ * updated the same way as PyEval_SetProfile/SetTrace update the current
+ * one; this is safe since the GIL is held by the caller. A hook is only
+ * removed from a thread when it still belongs to the monitor, so the hooks
+ * that have been installed by others (e.g. a debugger or coverage) after
+ * the monitor was enabled are left in place.
+ */
+#ifndef PIKOS_HOOKS_H
+#define PIKOS_HOOKS_H
+
+#include "Python.h"
+#include "frameobject.h"
+
+/* Py_LOCAL_INLINE is ``static __inline`` for MSVC but only ``static`` for
+ * gcc with the python 2 headers (pyport.h undefines USE_INLINE), so gcc
+ * warns about the helpers that an extension does not use. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+Py_LOCAL_INLINE(void)
+pikos_thread_set_profile(PyThreadState *tstate, Py_tracefunc func,
+                         PyObject *arg)
+{
+    PyObject *temp = tstate->c_profileobj;
+    Py_XINCREF(arg);
+    tstate->c_profilefunc = NULL;
+    tstate->c_profileobj = NULL;
+    /* Must make sure that profiling is not ignored if 'temp' is freed */
+    tstate->use_tracing = tstate->c_tracefunc != NULL;
+    Py_XDECREF(temp);
+    tstate->c_profilefunc = func;
+    tstate->c_profileobj = arg;
+    tstate->use_tracing = (func != NULL) || (tstate->c_tracefunc != NULL);
+}
+
+Py_LOCAL_INLINE(void)
+pikos_thread_set_trace(PyThreadState *tstate, Py_tracefunc func,
+                       PyObject *arg)
+{
+    PyObject *temp = tstate->c_traceobj;
+    Py_XINCREF(arg);
+    tstate->c_tracefunc = NULL;
+    tstate->c_traceobj = NULL;
+    /* Must make sure that tracing is not ignored if 'temp' is freed */
+    tstate->use_tracing = tstate->c_profilefunc != NULL;
+    Py_XDECREF(temp);
+    tstate->c_tracefunc = func;
+    tstate->c_traceobj = arg;
+    tstate->use_tracing = (func != NULL) || (tstate->c_profilefunc != NULL);
+}
+
+/* Install the profile function on the current thread and, when
+ * `all_threads` is set, on every other thread. */
+Py_LOCAL_INLINE(void)
+pikos_set_profile(Py_tracefunc func, PyObject *arg, int all_threads)
+{
+    PyThreadState *current = PyThreadState_GET();
+    PyThreadState *tstate;
+
+    PyEval_SetProfile(func, arg);
+    if (!all_threads)
+        return;
+    tstate = PyInterpreterState_ThreadHead(current->interp);
+    for (; tstate != NULL; tstate = PyThreadState_Next(tstate)) {
+        if (tstate != current)
+            pikos_thread_set_profile(tstate, func, arg);
+    }
+}
+
+/* Remove the profile function of the current thread and, when
+ * `all_threads` is set, of the other threads, if they are profiled by
+ * `arg`. */
+Py_LOCAL_INLINE(void)
+pikos_unset_profile(PyObject *arg, int all_threads)
+{
+    PyThreadState *current = PyThreadState_GET();
+    PyThreadState *tstate;
+
+    if (current->c_profileobj == arg)
+        PyEval_SetProfile(NULL, NULL);
+    if (!all_threads)
+        return;
+    tstate = PyInterpreterState_ThreadHead(current->interp);
+    for (; tstate != NULL; tstate = PyThreadState_Next(tstate)) {
+        if (tstate != current && tstate->c_profileobj == arg)
+            pikos_thread_set_profile(tstate, NULL, NULL);
+    }
+}
+
+/* Install the trace function on the current thread and, when
+ * `all_threads` is set, on every other thread. */
+Py_LOCAL_INLINE(void)
+pikos_set_trace(Py_tracefunc func, PyObject *arg, int all_threads)
+{
+    PyThreadState *current = PyThreadState_GET();
+    PyThreadState *tstate;
+
+    PyEval_SetTrace(func, arg);
+    if (!all_threads)
+        return;
+    tstate = PyInterpreterState_ThreadHead(current->interp);
+    for (; tstate != NULL; tstate = PyThreadState_Next(tstate)) {
+        if (tstate != current)
+            pikos_thread_set_trace(tstate, func, arg);
+    }
+}
+
+/* Remove the trace function of the current thread and, when `all_threads`
+ * is set, of the other threads, if they are traced by `arg`. */
+Py_LOCAL_INLINE(void)
+pikos_unset_trace(PyObject *arg, int all_threads)
+{
+    PyThreadState *current = PyThreadState_GET();
+    PyThreadState *tstate;
+
+    if (current->c_traceobj == arg)
+        PyEval_SetTrace(NULL, NULL);
+    if (!all_threads)
+        return;
+    tstate = PyInterpreterState_ThreadHead(current->interp);
+    for (; tstate != NULL; tstate = PyThreadState_Next(tstate)) {
+        if (tstate != current && tstate->c_traceobj == arg)
+            pikos_thread_set_trace(tstate, NULL, NULL);
+    }
+}
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif  /* PIKOS_HOOKS_H */
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/hooks.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.pystate cimport Py_tracefunc
+
+cdef extern from "hooks.h":
+
+    # Install the profile (trace) function on the current thread and, when
+    # all_threads is true, on every other thread of the interpreter.
+    void pikos_set_profile(Py_tracefunc func, object arg, bint all_threads)
+    void pikos_set_trace(Py_tracefunc func, object arg, bint all_threads)
+
+    # Remove the profile (trace) function of the current thread and, when
+    # all_threads is true, of the other threads, if it is still `arg`.
+    void pikos_unset_profile(object arg, bint all_threads)
+    void pikos_unset_trace(object arg, bint all_threads)
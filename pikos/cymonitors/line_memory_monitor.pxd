@@ -12,3 +12,14 @@ from .line_monitor cimport LineMonitor
 
 cdef class LineMemoryMonitor(LineMonitor):
     cdef object process
+    cdef public object threshold
+    cdef bint use_threshold
+    cdef long long limit
+    cdef bint has_previous
+    cdef int previous_index
+    cdef object previous_code
+    cdef int previous_lineno
+    cdef long long previous_rss
+    cdef long long previous_vms
+    cdef set_previous(self, frame, long long rss, long long vms)
+    cdef record_delta(self, long long rss, long long vms)
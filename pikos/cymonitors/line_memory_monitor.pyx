@@ -8,23 +8,33 @@
 #  All rights reserved.
 #----------------------------------------------------------------------------
 from cpython.pystate cimport Py_tracefunc, PyTrace_LINE
+from libc.stdlib cimport llabs
 
 from .line_monitor cimport LineMonitor
-from .pytrace cimport PyEval_SetTrace, PyFrameObject
+from .hooks cimport pikos_set_trace, pikos_unset_trace
+from .pytrace cimport PyFrameObject
 
 import os
-import psutil
 from linecache import getline
 
-from pikos.monitors.records import LineMemoryRecord
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.monitors.records import LineMemoryRecord, LineMemoryDeltaRecord
 
 
 cdef class LineMemoryMonitor(LineMonitor):
     """ A Cython based monitor recording memory info on line events.
 
+    When a `threshold` is provided the monitor records only the lines that
+    changed the RSS or VMS counters by more than `threshold` bytes. The
+    memory change between two line events is attributed to the first of the
+    two lines (i.e. the line that was executed in between). The memory
+    counters belong to the whole process, so a `threshold` can not be used
+    when the monitor is installed on all the threads.
+
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __init__(self, recorder, record_type=None, threshold=None):
         """ Constructor
 
         Parameters
@@ -33,13 +43,26 @@ cdef class LineMemoryMonitor(LineMonitor):
             The recorder inctance to use.
 
         record_type :
-            The record type to use. Default is to use a FunctionRecord.
+            The record type to use. Default is to use a LineMemoryRecord or
+            a LineMemoryDeltaRecord when a `threshold` is set.
+
+        threshold : int
+            The change in bytes of the RSS or VMS counters above which a
+            line is recorded. Default is None, record all the lines.
 
         """
         if record_type is None:
-            record_type = LineMemoryRecord
+            if threshold is None:
+                record_type = LineMemoryRecord
+            else:
+                record_type = LineMemoryDeltaRecord
         super(LineMemoryMonitor, self).__init__(recorder, record_type)
         self.process = None
+        self.threshold = threshold
+        self.use_threshold = threshold is not None
+        if self.use_threshold:
+            self.limit = threshold
+        self.has_previous = False
 
     def enable(self):
         """ Enable the monitor.
@@ -48,10 +71,18 @@ cdef class LineMemoryMonitor(LineMonitor):
         set the setprofile hooks and initialize the recorder.
 
         """
+        if self.use_threshold and self.all_threads:
+            raise ValueError(
+                'The memory changes of the lines of different threads can '
+                'not be told apart, a threshold requires all_threads=False')
         if self.call_tracker('ping'):
+            import psutil
             self.process = psutil.Process(os.getpid())
+            self.has_previous = False
             self._recorder.prepare(self.record_type)
-            PyEval_SetTrace(<Py_tracefunc>on_line_event, self)
+            register_fork_handler(self)
+            pikos_set_trace(
+                <Py_tracefunc>on_line_event, self, self.all_threads)
 
     def disable(self):
         """ Disable the monitor.
@@ -61,10 +92,81 @@ cdef class LineMemoryMonitor(LineMonitor):
 
         """
         if self.call_tracker('pong'):
-            PyEval_SetTrace(NULL, None)
+            pikos_unset_trace(self, self.all_threads)
+            unregister_fork_handler(self)
+            if self.has_previous:
+                rss, vms = self.process.memory_info()
+                self.record_delta(rss, vms)
+                self.has_previous = False
             self._recorder.finalize()
+            self.previous_code = None
             self.process = None
 
+    def _after_fork(self):
+        """ Restart the record index and monitor the memory of the forked
+        child process.
+
+        """
+        LineMonitor._after_fork(self)
+        import psutil
+        self.process = psutil.Process(os.getpid())
+
+    cdef record_info(self, frame):
+        """ Record the current info.
+
+        When a `threshold` is set the memory change since the previous line
+        event is checked and the previous line is recorded if necessary.
+
+        """
+        cdef:
+            long long rss, vms
+
+        if not self.use_threshold:
+            LineMonitor.record_info(self, frame)
+            return
+        rss, vms = self.process.memory_info()
+        if self.has_previous:
+            self.record_delta(rss, vms)
+        self.set_previous(frame, rss, vms)
+
+    cdef set_previous(self, frame, long long rss, long long vms):
+        """ Start measuring the memory change of the current line of the
+        frame.
+
+        """
+        self.has_previous = True
+        self.previous_index = self.index
+        self.previous_code = frame.f_code
+        self.previous_lineno = frame.f_lineno
+        self.previous_rss = rss
+        self.previous_vms = vms
+        self.index += 1
+
+    cdef record_delta(self, long long rss, long long vms):
+        """ Record the previous line if it has changed the memory counters
+        more than the threshold.
+
+        """
+        cdef:
+            long long delta_rss = rss - self.previous_rss
+            long long delta_vms = vms - self.previous_vms
+            object record
+
+        if llabs(delta_rss) <= self.limit and llabs(delta_vms) <= self.limit:
+            return
+        code = self.previous_code
+        filename = code.co_filename
+        line = getline(filename, self.previous_lineno)
+        if len(line) == 0:
+            line = '<compiled string>'
+        record = (
+            self.previous_index, code.co_name, self.previous_lineno, rss, vms,
+            delta_rss, delta_vms, line.rstrip(), filename)
+        if not self.use_tuple:
+            record = self.record_type(*record)
+        self._recorder.record(record)
+        self.recorded += 1
+
     cdef object gather_info(self, frame):
         """ Record the current info.
 
@@ -98,5 +200,8 @@ cdef int on_line_event(
     # Make the frame right in case settrace(gettrace()) happens
     frame.f_trace = monitor
     if event == PyTrace_LINE:
+        monitor.events += 1
         monitor.record_info(frame)
+    elif monitor.track_calls:
+        monitor.call_event(_frame, event)
     return 0
@@ -9,14 +9,23 @@
 #----------------------------------------------------------------------------
 from .monitor cimport Monitor
 from .pytrace cimport PyFrameObject
+from .sampler cimport pikos_sampler
 
 cdef class LineMonitor(Monitor):
     cdef public object _recorder
     cdef public object record_type
     cdef int index
+    cdef long events
+    cdef long recorded
     cdef object call_tracker
     cdef bint use_tuple
+    cdef long sample
+    cdef pikos_sampler sampler
+    cdef list sampled_codes
+    cdef bint track_calls
     cdef object record_info(self, frame)
+    cdef int call_event(self, PyFrameObject *_frame, int event) except -1
+    cdef int sample_line(self, PyFrameObject *_frame) except -1
     cdef object gather_info(self, frame)
 
 cdef int on_line_event(
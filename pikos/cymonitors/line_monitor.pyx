@@ -7,22 +7,42 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 #----------------------------------------------------------------------------
-from cpython.pystate cimport Py_tracefunc, PyTrace_LINE
+from cpython.pystate cimport (
+    Py_tracefunc, PyTrace_CALL, PyTrace_LINE, PyTrace_RETURN)
 
 from .monitor cimport Monitor
-from .pytrace cimport PyEval_SetTrace, PyFrameObject
+from .hooks cimport pikos_set_trace, pikos_unset_trace
+from .pytrace cimport PyFrameObject
+from .sampler cimport (
+    pikos_sampler_init, pikos_sampler_free, pikos_sampler_reset,
+    pikos_sampler_tick, pikos_sampler_call, pikos_sampler_return,
+    pikos_sampler_active)
 
 from linecache import getline
 
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos._internal.keep_track import KeepTrack
-from pikos.monitors.records import LineRecord
+from pikos.monitors.records import LineRecord, LineWeightRecord
 
 
 cdef class LineMonitor(Monitor):
     """ A Cython based monitor for line events.
+
+    When `sample` is larger than one only one in every `sample` line events
+    is recorded and the records get the sample rate as their ``weight``
+    field. With `per_code` the calls of every code object are counted
+    separately instead and all the lines of one in every `sample` calls
+    are recorded. The counting is done in C before any python object is
+    created and the counted code objects are kept alive in a list.
+
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __cinit__(self, *arguments, **keywords):
+        pikos_sampler_init(&self.sampler, 1, False)
+        self.sampled_codes = []
+
+    def __init__(self, recorder, record_type=None, sample=1, per_code=False):
         """ Constructor
 
         Parameters
@@ -31,17 +51,37 @@ cdef class LineMonitor(Monitor):
             The recorder inctance to use.
 
         record_type :
-            The record type to use. Default is to use a FunctionRecord.
+            The record type to use. Default is to use a LineRecord (a
+            LineWeightRecord when the events are sampled).
+
+        sample : int
+            Record one in every `sample` line events (or calls when
+            `per_code` is True). Default is 1 (record every line).
+
+        per_code : bool
+            Sample the calls of every code object separately. Default is
+            False (sample the line events).
 
         """
+        if sample < 1:
+            raise ValueError('The sample rate should be a positive integer')
         self._recorder = recorder
         self.call_tracker = KeepTrack()
+        self.sample = sample
+        pikos_sampler_init(&self.sampler, sample, per_code)
+        self.track_calls = sample > 1 and per_code
         if record_type is None:
-            self.record_type = LineRecord
+            if sample > 1:
+                self.record_type = LineWeightRecord
+            else:
+                self.record_type = LineRecord
         else:
             self.record_type = record_type
         self.use_tuple = self.record_type is tuple
 
+    def __dealloc__(self):
+        pikos_sampler_free(&self.sampler)
+
     def enable(self):
         """ Enable the monitor.
 
@@ -51,7 +91,11 @@ cdef class LineMonitor(Monitor):
         """
         if self.call_tracker('ping'):
             self._recorder.prepare(self.record_type)
-            PyEval_SetTrace(<Py_tracefunc>on_line_event, self)
+            pikos_sampler_reset(&self.sampler)
+            self.sampled_codes = []
+            register_fork_handler(self)
+            pikos_set_trace(
+                <Py_tracefunc>on_line_event, self, self.all_threads)
 
     def disable(self):
         """ Disable the monitor.
@@ -61,14 +105,43 @@ cdef class LineMonitor(Monitor):
 
         """
         if self.call_tracker('pong'):
-            PyEval_SetTrace(NULL, None)
+            pikos_unset_trace(self, self.all_threads)
+            unregister_fork_handler(self)
             self._recorder.finalize()
 
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        self.index = 0
+        self.events = 0
+        self.recorded = 0
+        pikos_sampler_reset(&self.sampler)
+        self.sampled_codes = []
+
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        Returns
+        -------
+        stats : dict
+            The number of line ``events`` that have been received and of
+            the records that have been sent to the recorder (``recorded``).
+
+        """
+        return {'events': self.events, 'recorded': self.recorded}
+
     def __call__(self, frame, why, arg):
         # We need to define a callable incase settrace(gettrace()) happens.
         # see http://nedbatchelder.com/text/trace-function.html for more info
         if why[0] == 'l':
+            self.events += 1
             self.record_info(frame)
+        elif self.track_calls:
+            if why == 'call':
+                self.call_event(<PyFrameObject *>frame, PyTrace_CALL)
+            elif why == 'return':
+                self.call_event(<PyFrameObject *>frame, PyTrace_RETURN)
         return self
 
     cdef record_info(self, frame):
@@ -78,12 +151,46 @@ cdef class LineMonitor(Monitor):
         cdef:
             object record
 
+        if self.sample > 1:
+            if not self.sample_line(<PyFrameObject *>frame):
+                return
         record = self.gather_info(frame)
+        if self.sample > 1:
+            record += (self.sample,)
         if not self.use_tuple:
             record = self.record_type(*record)
 
         self._recorder.record(record)
         self.index += 1
+        self.recorded += 1
+
+    cdef int call_event(self, PyFrameObject *_frame, int event) except -1:
+        """ Keep track of the calls.
+
+        Called on the call and return events when `track_calls` is set.
+        When sampling per code object the sampled calls are kept in the
+        sampler and the counted code objects in `sampled_codes`.
+
+        """
+        cdef Py_ssize_t used = self.sampler.counts_used
+
+        if self.sample > 1 and self.sampler.per_code:
+            if event == PyTrace_CALL:
+                pikos_sampler_call(
+                    &self.sampler, _frame, NULL, _frame.f_code, 0)
+                if self.sampler.counts_used > used:
+                    self.sampled_codes.append((<object>_frame).f_code)
+            elif event == PyTrace_RETURN:
+                pikos_sampler_return(&self.sampler, _frame, NULL)
+        return 0
+
+    cdef int sample_line(self, PyFrameObject *_frame) except -1:
+        """ Return 1 if the line event is sampled.
+
+        """
+        if self.sampler.per_code:
+            return pikos_sampler_active(&self.sampler, _frame)
+        return pikos_sampler_tick(&self.sampler, NULL, 0)
 
     cdef object gather_info(self, frame):
         """ Gather info.
@@ -117,5 +224,8 @@ cdef int on_line_event(
     # Make the frame right in case settrace(gettrace()) happens
     frame.f_trace = monitor
     if event == PyTrace_LINE:
+        monitor.events += 1
         monitor.record_info(frame)
+    elif monitor.track_calls:
+        monitor.call_event(_frame, event)
     return 0
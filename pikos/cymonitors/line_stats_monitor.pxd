@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/line_stats_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .code_map cimport pikos_map
+from .monitor cimport Monitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport pikos_stack, pikos_thread_stacks
+
+
+ctypedef struct LineStats:
+    long long hits
+    double time
+
+
+ctypedef struct LineFrameEntry:
+    PyFrameObject *frame
+    Py_ssize_t line
+    double start
+
+
+cdef class LineStatsMonitor(Monitor):
+    cdef public object _recorder
+    cdef public object record_type
+    cdef object _call_tracker
+    cdef int _index
+    cdef bint _use_tuple
+    cdef pikos_map _map
+    cdef list _lines
+    cdef LineStats *_stats
+    cdef Py_ssize_t _stats_size
+    cdef pikos_thread_stacks _stacks
+
+    cdef int _on_line(self, PyFrameObject *_frame, double now) except -1
+    cdef int _on_return(self, PyFrameObject *_frame, double now) except -1
+    cdef LineFrameEntry *_push(
+        self, pikos_stack *frames, PyFrameObject *_frame) except NULL
+    cdef Py_ssize_t _add_line(self, PyFrameObject *_frame) except -1
+    cdef int _record_stats(self) except -1
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/line_stats_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.mem cimport PyMem_Free, PyMem_Realloc
+from cpython.pystate cimport (
+    Py_tracefunc, PyTrace_CALL, PyTrace_LINE, PyTrace_RETURN)
+
+from .code_map cimport (
+    pikos_map_clear, pikos_map_free, pikos_map_get, pikos_map_init,
+    pikos_map_set)
+from .monitor cimport Monitor
+from .hooks cimport pikos_set_trace, pikos_unset_trace
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_entry,
+    pikos_stack_top, pikos_stack_push, pikos_stack_pop)
+from .timers cimport pikos_wall_time
+
+from linecache import getline
+
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos._internal.keep_track import KeepTrack
+from pikos.monitors.records import LineStatsRecord
+
+
+cdef class LineStatsMonitor(Monitor):
+    """ A Cython based monitor aggregating the hits and the time of each
+    executed line.
+
+    The class hooks on the settrace function and for every line event
+    increments the hit counter of the (code object, line) pair in C. The
+    time of a line is the wall time from its line event to the next line
+    event (or the return) of the same frame, so it includes the time spent
+    in the functions that are called from the line. A single record per
+    line is sent to the recorder when the monitor is disabled.
+
+    Private
+    -------
+    _map : pikos_map
+        The C map of the (code object address, line number) pairs to their
+        index in the statistics array.
+
+    _lines : list
+        The (code object, line number) pairs in the order that they were
+        first executed. The list keeps the code objects alive.
+
+    _stats : LineStats *
+        The C array of the per line statistics.
+
+    _stacks : pikos_thread_stacks
+        The C stacks of the executing frames of the threads with their
+        current line and the time of its line event.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_map_init(&self._map)
+        pikos_thread_stacks_init(&self._stacks, sizeof(LineFrameEntry))
+
+    def __init__(self, recorder, record_type=None):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a LineStatsRecord.
+
+        """
+        self._recorder = recorder
+        self._call_tracker = KeepTrack()
+        if record_type is None:
+            self.record_type = LineStatsRecord
+        else:
+            self.record_type = record_type
+        self._use_tuple = self.record_type is tuple
+        self._lines = []
+
+    def __dealloc__(self):
+        pikos_map_free(&self._map)
+        PyMem_Free(self._stats)
+        pikos_thread_stacks_free(&self._stacks)
+
+    def enable(self):
+        """ Enable the monitor.
+
+        The first time the method is called (the context is entered) it will
+        set the settrace hooks and initialize the recorder.
+
+        """
+        if self._call_tracker('ping'):
+            self._recorder.prepare(self.record_type)
+            register_fork_handler(self)
+            pikos_set_trace(
+                <Py_tracefunc>on_line_stats_event, self, self.all_threads)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the settrace hooks, record the line statistics and finalize
+        the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_trace(self, self.all_threads)
+            unregister_fork_handler(self)
+            self._record_stats()
+            self._recorder.finalize()
+
+    def _after_fork(self):
+        """ Reset the statistics in the forked child process.
+
+        """
+        cdef:
+            Py_ssize_t index
+
+        self._index = 0
+        for index in range(len(self._lines)):
+            self._stats[index].hits = 0
+            self._stats[index].time = 0.0
+
+    def __call__(self, frame, why, arg):
+        # The monitor is returned by sys.gettrace() and it needs to be a
+        # callable in case settrace(gettrace()) happens. The events that are
+        # received this way are not aggregated.
+        return self
+
+    cdef int _on_line(self, PyFrameObject *_frame, double now) except -1:
+        """ Count the line and charge the elapsed time to the previous line
+        of the frame.
+
+        """
+        cdef:
+            pikos_stack *frames = pikos_thread_stack(&self._stacks)
+            LineFrameEntry *entry = <LineFrameEntry *>pikos_stack_top(frames)
+            Py_ssize_t index
+
+        if entry != NULL and entry.frame == _frame:
+            if entry.line >= 0:
+                self._stats[entry.line].time += now - entry.start
+        else:
+            # The frame was executing when the monitor was enabled.
+            entry = self._push(frames, _frame)
+        index = pikos_map_get(
+            &self._map, <void *>_frame.f_code, _frame.f_lineno)
+        if index < 0:
+            index = self._add_line(_frame)
+        self._stats[index].hits += 1
+        entry.line = index
+        entry.start = now
+        return 0
+
+    cdef int _on_return(self, PyFrameObject *_frame, double now) except -1:
+        """ Charge the elapsed time to the last line of the frame and pop it
+        from the stack.
+
+        """
+        cdef:
+            pikos_stack *frames = pikos_thread_stack(&self._stacks)
+            LineFrameEntry *entry = <LineFrameEntry *>pikos_stack_top(frames)
+
+        if entry == NULL or entry.frame != _frame:
+            return 0
+        pikos_stack_pop(frames)
+        if entry.line >= 0:
+            self._stats[entry.line].time += now - entry.start
+        return 0
+
+    cdef LineFrameEntry *_push(
+            self, pikos_stack *frames, PyFrameObject *_frame) except NULL:
+        """ Push a new frame in the stack of the thread.
+
+        """
+        cdef:
+            LineFrameEntry *entry
+
+        entry = <LineFrameEntry *>pikos_stack_push(frames)
+        entry.frame = _frame
+        entry.line = -1
+        entry.start = 0.0
+        return entry
+
+    cdef Py_ssize_t _add_line(self, PyFrameObject *_frame) except -1:
+        """ Add the statistics entry of the current line of the frame.
+
+        """
+        cdef:
+            Py_ssize_t index = len(self._lines)
+            Py_ssize_t size
+            LineStats *stats
+
+        if index == self._stats_size:
+            size = 2 * self._stats_size if self._stats_size > 0 else 64
+            stats = <LineStats *>PyMem_Realloc(
+                self._stats, size * sizeof(LineStats))
+            if stats == NULL:
+                raise MemoryError()
+            self._stats = stats
+            self._stats_size = size
+        pikos_map_set(
+            &self._map, <void *>_frame.f_code, _frame.f_lineno, index)
+        self._lines.append(((<object>_frame).f_code, _frame.f_lineno))
+        self._stats[index].hits = 0
+        self._stats[index].time = 0.0
+        return index
+
+    cdef int _record_stats(self) except -1:
+        """ Send a record for each line to the recorder and reset the
+        statistics.
+
+        The lines that are still executing in the frames of the threads are
+        charged the time up to now.
+
+        """
+        cdef:
+            double now = pikos_wall_time()
+            Py_ssize_t index, thread
+            pikos_stack *frames
+            LineFrameEntry *entry
+            LineStats *stats
+            object record
+
+        for thread in range(self._stacks.count):
+            frames = &self._stacks.stacks[thread]
+            for index in range(frames.depth):
+                entry = <LineFrameEntry *>pikos_stack_entry(frames, index)
+                if entry.line >= 0:
+                    self._stats[entry.line].time += now - entry.start
+        lines = sorted(
+            (code.co_filename, code.co_firstlineno, lineno, index, code)
+            for index, (code, lineno) in enumerate(self._lines))
+        for filename, _, lineno, index, code in lines:
+            stats = &self._stats[index]
+            if stats.hits == 0:
+                continue
+            source = getline(filename, lineno)
+            if len(source) == 0:
+                source = '<compiled string>'
+            record = (
+                self._index, code.co_name, lineno, stats.hits, stats.time,
+                source.rstrip(), filename)
+            if not self._use_tuple:
+                record = self.record_type(*record)
+            self._recorder.record(record)
+            self._index += 1
+        pikos_map_clear(&self._map)
+        self._lines = []
+        pikos_thread_stacks_clear(&self._stacks)
+        return 0
+
+
+cdef int on_line_stats_event(
+        LineStatsMonitor monitor,
+        PyFrameObject *_frame, int event, object arg) except -1:
+    """ Tracer function to aggregate the line events.
+
+    """
+    cdef:
+        double now = pikos_wall_time()
+
+    if event == PyTrace_LINE:
+        monitor._on_line(_frame, now)
+    elif event == PyTrace_CALL:
+        monitor._push(pikos_thread_stack(&monitor._stacks), _frame)
+    elif event == PyTrace_RETURN:
+        monitor._on_return(_frame, now)
+    return 0
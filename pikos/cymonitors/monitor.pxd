@@ -8,4 +8,5 @@
 #  All rights reserved.
 #----------------------------------------------------------------------------
 cdef class Monitor:
-    pass
+    cdef public bint all_threads
+    cdef object __weakref__
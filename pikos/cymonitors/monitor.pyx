@@ -12,6 +12,18 @@ from pikos.monitors.monitor import Monitor as PyMonitor
 
 
 cdef class Monitor:
+    """ Base class of the cython monitors.
+
+    The hooks of the cython monitors are installed with the
+    ``PyEval_SetProfile`` and ``PyEval_SetTrace`` functions which only
+    affect the calling thread. When the public `all_threads` attribute is
+    set to True the hooks are installed on every thread that exists when the
+    monitor is enabled (e.g. the workers of a running thread pool server)
+    and removed from them when the monitor is disabled. Threads started
+    while the monitor is enabled are not monitored. The monitors that
+    follow the calls keep a separate C stack for every thread.
+
+    """
 
     def enable(self):
         pass
@@ -19,6 +31,14 @@ cdef class Monitor:
     def disable(self):
         pass
 
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        The default implementation returns an empty dict.
+
+        """
+        return {}
+
     def __enter__(self):
         self.enable()
 
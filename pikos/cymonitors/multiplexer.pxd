@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/multiplexer.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .monitor cimport Monitor
+
+cdef class MonitorMultiplexer(Monitor):
+    cdef public list monitors
+    cdef object _call_tracker
+    cdef tuple _function_monitors
+    cdef tuple _line_monitors
+    cdef bint _enabled
+    cdef bint _profile_installed
+    cdef bint _trace_installed
+
+    cdef _update(self)
+    cdef _install(self)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/multiplexer.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.pystate cimport Py_tracefunc
+
+from .function_monitor cimport (
+    FunctionMonitor, begin_shared_event, end_shared_event)
+from .line_monitor cimport LineMonitor
+from .hooks cimport (
+    pikos_set_profile, pikos_set_trace, pikos_unset_profile,
+    pikos_unset_trace)
+from .pytrace cimport PyFrameObject, PyTrace_LINE
+
+from pikos._internal.keep_track import KeepTrack
+
+
+cdef class MonitorMultiplexer(Monitor):
+    """ Share the setprofile and settrace hooks between several monitors.
+
+    Only one profile and one trace function can be installed by the python
+    interpreter at a time. The multiplexer owns both slots and fans each
+    event out to the registered cython monitors through direct C calls, so
+    combined monitoring costs a single hook dispatch per event. The function
+    name, line number and filename of a profile event are gathered from the
+    frame once and shared between the function monitors.
+
+    Function monitors (subclasses of
+    :class:`~pikos.cymonitors.function_monitor.FunctionMonitor`) receive the
+    profile events and line monitors (subclasses of
+    :class:`~pikos.cymonitors.line_monitor.LineMonitor`) receive the line
+    events. The monitors are called in the order they have been registered.
+
+    Example
+    -------
+
+    ::
+
+        multiplexer = MonitorMultiplexer([
+            FunctionMonitor(recorder),
+            FunctionMemoryStatsMonitor(stats_recorder)])
+        with multiplexer:
+            run()
+
+    """
+
+    def __init__(self, monitors=()):
+        """ Constructor
+
+        Parameters
+        ----------
+        monitors : iterable
+            The cython function and line monitors to register.
+
+        """
+        self.monitors = []
+        self._call_tracker = KeepTrack()
+        self._function_monitors = ()
+        self._line_monitors = ()
+        for monitor in monitors:
+            self.register(monitor)
+
+    def register(self, monitor):
+        """ Register a monitor.
+
+        When the multiplexer is enabled the monitor is enabled as well and
+        starts receiving events immediately.
+
+        Raises
+        ------
+        TypeError :
+            Raised if the monitor is not a cython function or line monitor.
+
+        """
+        if not isinstance(monitor, (FunctionMonitor, LineMonitor)):
+            raise TypeError(
+                'Only cython function and line monitors can be registered '
+                'with a MonitorMultiplexer, got {0!r}'.format(monitor))
+        if monitor in self.monitors:
+            raise ValueError('The monitor is already registered')
+        self.monitors.append(monitor)
+        self._update()
+        if self._enabled:
+            monitor.enable()
+            self._install()
+
+    def unregister(self, monitor):
+        """ Unregister a monitor.
+
+        When the multiplexer is enabled the monitor is disabled.
+
+        """
+        self.monitors.remove(monitor)
+        self._update()
+        if self._enabled:
+            monitor.disable()
+            self._install()
+
+    def enable(self):
+        """ Enable the multiplexer.
+
+        The first time the method is called (the context is entered) it will
+        enable the registered monitors and replace their hooks with the
+        multiplexer hooks.
+
+        """
+        if self._call_tracker('ping'):
+            for monitor in self.monitors:
+                monitor.enable()
+            self._enabled = True
+            self._install()
+
+    def disable(self):
+        """ Disable the multiplexer.
+
+        The last time the method is called (the context is exited) it will
+        unset the hooks that it has installed and disable the registered
+        monitors in reverse order. The hooks of the other tools are left in
+        place.
+
+        """
+        if self._call_tracker('pong'):
+            self._enabled = False
+            if self._profile_installed:
+                pikos_unset_profile(self, self.all_threads)
+                self._profile_installed = False
+            if self._trace_installed:
+                pikos_unset_trace(self, self.all_threads)
+                self._trace_installed = False
+            for monitor in reversed(self.monitors):
+                monitor.disable()
+
+    def __call__(self, frame, why, arg):
+        # We need to define a callable incase settrace(gettrace()) happens.
+        # see http://nedbatchelder.com/text/trace-function.html for more info
+        cdef:
+            LineMonitor monitor
+
+        if why[0] == 'l':
+            for monitor in self._line_monitors:
+                monitor.events += 1
+                monitor.record_info(frame)
+        return self
+
+    cdef _update(self):
+        """ Split the registered monitors by the hook they use.
+
+        """
+        self._function_monitors = tuple(
+            monitor for monitor in self.monitors
+            if isinstance(monitor, FunctionMonitor))
+        self._line_monitors = tuple(
+            monitor for monitor in self.monitors
+            if isinstance(monitor, LineMonitor))
+
+    cdef _install(self):
+        """ Install the hooks that are needed by the registered monitors.
+
+        A hook that is not needed is only removed when it has been
+        installed by the multiplexer.
+
+        """
+        if len(self._function_monitors) > 0:
+            pikos_set_profile(
+                <Py_tracefunc>on_profile_event, self, self.all_threads)
+            self._profile_installed = True
+        elif self._profile_installed:
+            pikos_unset_profile(self, self.all_threads)
+            self._profile_installed = False
+        if len(self._line_monitors) > 0:
+            pikos_set_trace(
+                <Py_tracefunc>on_trace_event, self, self.all_threads)
+            self._trace_installed = True
+        elif self._trace_installed:
+            pikos_unset_trace(self, self.all_threads)
+            self._trace_installed = False
+
+
+cdef int on_profile_event(
+        MonitorMultiplexer multiplexer,
+        PyFrameObject *_frame, int event, object arg) except -1:
+    """ Dispatch the profile event to the registered function monitors.
+
+    """
+    cdef:
+        FunctionMonitor monitor
+
+    begin_shared_event(_frame, event)
+    try:
+        for monitor in multiplexer._function_monitors:
+            monitor.on_function_event(_frame, event, arg)
+    finally:
+        end_shared_event()
+    return 0
+
+
+cdef int on_trace_event(
+        MonitorMultiplexer multiplexer,
+        PyFrameObject *_frame, int event, object arg) except -1:
+    """ Dispatch the trace event to the registered line monitors.
+
+    The call and return events are only needed by the monitors that keep
+    track of the calls.
+
+    """
+    cdef:
+        object frame = <object>_frame
+        LineMonitor monitor
+
+    # Make the frame right in case settrace(gettrace()) happens
+    frame.f_trace = multiplexer
+    if event == PyTrace_LINE:
+        for monitor in multiplexer._line_monitors:
+            monitor.events += 1
+            monitor.record_info(frame)
+    else:
+        for monitor in multiplexer._line_monitors:
+            if monitor.track_calls:
+                monitor.call_event(_frame, event)
+    return 0
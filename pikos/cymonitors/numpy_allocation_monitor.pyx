@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/numpy_allocation_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .monitor cimport Monitor
+from .pytrace cimport PyEval_GetFrame, PyFrameObject
+
+from pikos._internal.keep_track import KeepTrack
+from pikos.monitors.records import NumpyAllocationRecord
+
+ctypedef void (*event_hook)(
+    void *inp, void *outp, size_t size, void *user_data)
+
+cdef extern from "numpy/arrayobject.h":
+    int _import_array() except -1
+    event_hook PyDataMem_SetEventHook(
+        event_hook newhook, void *user_data, void **old_data)
+
+_import_array()
+
+
+cdef class NumpyAllocationMonitor(Monitor):
+    """ A Cython based monitor for the numpy data memory events.
+
+    The class hooks on the numpy data memory event hook (see
+    ``PyDataMem_SetEventHook``) and records the allocation, reallocation and
+    release of the data buffers of numpy arrays along with the python function
+    and line that is executed at the time. A hook that was already set (e.g.
+    by another monitor) is called after every event and is restored when the
+    monitor is disabled.
+
+    Public
+    ------
+    threshold : int
+        The minimum size in bytes of the allocations to record. The release
+        of a memory block is recorded only if its allocation was recorded.
+
+    Private
+    -------
+    _blocks : dict
+        The size of the recorded memory blocks that have not been released
+        yet, keyed by their address.
+
+    _previous_hook : event_hook
+        The numpy event hook that was replaced by the monitor or NULL.
+
+    _previous_data : void *
+        The user data of the previous hook.
+
+    """
+
+    cdef public object _recorder
+    cdef public object record_type
+    cdef public size_t threshold
+    cdef object _call_tracker
+    cdef int _index
+    cdef bint _use_tuple
+    cdef dict _blocks
+    cdef event_hook _previous_hook
+    cdef void *_previous_data
+
+    def __init__(self, recorder, record_type=None, threshold=0):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a NumpyAllocationRecord.
+
+        threshold : int
+            The minimum size in bytes of the allocations to record. Default
+            is to record all allocations.
+
+        """
+        self._recorder = recorder
+        self._call_tracker = KeepTrack()
+        if record_type is None:
+            self.record_type = NumpyAllocationRecord
+        else:
+            self.record_type = record_type
+        self._use_tuple = self.record_type is tuple
+        self.threshold = threshold
+        self._blocks = {}
+
+    def enable(self):
+        """ Enable the monitor.
+
+        The first time the method is called (the context is entered) it will
+        set the numpy event hook and initialize the recorder.
+
+        """
+        if self._call_tracker('ping'):
+            self._recorder.prepare(self.record_type)
+            self._previous_hook = PyDataMem_SetEventHook(
+                on_data_memory_event, <void *>self, &self._previous_data)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        restore the previous numpy event hook and finalize the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            PyDataMem_SetEventHook(
+                self._previous_hook, self._previous_data, NULL)
+            self._previous_hook = NULL
+            self._previous_data = NULL
+            self._blocks.clear()
+            self._recorder.finalize()
+
+    cdef int on_event(
+            self, void *inp, void *outp, size_t size) except -1:
+        """ Record the data memory event if necessary.
+
+        """
+        cdef:
+            object blocks = self._blocks
+            object previous = None
+
+        if inp != NULL and len(blocks) > 0:
+            previous = blocks.pop(<size_t>inp, None)
+        if outp == NULL:
+            if previous is not None:
+                self.record_event('free', previous, <size_t>inp)
+        elif size >= self.threshold or previous is not None:
+            blocks[<size_t>outp] = size
+            if inp == NULL:
+                self.record_event('malloc', size, <size_t>outp)
+            else:
+                self.record_event('realloc', size, <size_t>outp)
+        return 0
+
+    cdef int record_event(
+            self, str event, size_t size, size_t address) except -1:
+        """ Record the event along with the current python frame info.
+
+        """
+        cdef:
+            PyFrameObject *_frame = PyEval_GetFrame()
+            object record
+
+        if _frame == NULL:
+            function, lineno, filename = '<unknown>', 0, '<unknown>'
+        else:
+            frame = <object>_frame
+            code = frame.f_code
+            function = code.co_name
+            lineno = frame.f_lineno
+            filename = code.co_filename
+        record = (
+            self._index, event, size, address, function, lineno, filename)
+        if not self._use_tuple:
+            record = self.record_type(*record)
+        self._recorder.record(record)
+        self._index += 1
+        return 0
+
+
+cdef void on_data_memory_event(
+        void *inp, void *outp, size_t size, void *user_data) with gil:
+    """ The numpy data memory event hook.
+
+    The previous hook is called even when the event cannot be recorded.
+
+    """
+    cdef NumpyAllocationMonitor monitor = <NumpyAllocationMonitor>user_data
+
+    try:
+        monitor.on_event(inp, outp, size)
+    finally:
+        if monitor._previous_hook != NULL:
+            monitor._previous_hook(
+                inp, outp, size, monitor._previous_data)
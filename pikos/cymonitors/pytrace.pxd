@@ -11,13 +11,21 @@ from cpython.pystate cimport (
     Py_tracefunc, PyTrace_CALL, PyTrace_EXCEPTION, PyTrace_LINE,
     PyTrace_RETURN, PyTrace_C_CALL, PyTrace_C_EXCEPTION, PyTrace_C_RETURN,
     PyThreadState)
+from cpython.ref cimport PyObject
 
 cdef extern from "frameobject.h":
 
     ctypedef struct PyFrameObject:
-        pass
+        PyObject *f_code
+        # Up to date on line events.
+        int f_lineno
 
 cdef extern from "Python.h":
 
     cdef void PyEval_SetProfile(Py_tracefunc func, object arg)
     cdef void PyEval_SetTrace(Py_tracefunc func, object arg)
+    cdef PyFrameObject *PyEval_GetFrame()
+
+    # The builtin function object of the c_* profile events.
+    ctypedef struct PyCFunctionObject:
+        void *m_ml
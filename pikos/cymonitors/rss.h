@@ -0,0 +1,108 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/rss.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * Read the resident set size of the process from C. On linux the statm
+ * file of the process is kept open and read again on every call, which
+ * avoids the python objects (and the open) of a psutil call. Other
+ * platforms report PIKOS_RSS_AVAILABLE 0 and the monitors use psutil.
+ */
+#ifndef PIKOS_RSS_H
+#define PIKOS_RSS_H
+
+#include <Python.h>
+
+/* The helpers that a module does not use are fine, see hooks.h. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+#ifdef __linux__
+
+#include <errno.h>
+#include <fcntl.h>
+#include <stdlib.h>
+#include <unistd.h>
+
+#define PIKOS_RSS_AVAILABLE 1
+
+/* Open the statm file of the current process. Return the file descriptor
+ * or -1 (with OSError set). The file belongs to the process that opened
+ * it, so it has to be opened again after a fork. */
+Py_LOCAL_INLINE(int)
+pikos_rss_open(void)
+{
+    int fd = open("/proc/self/statm", O_RDONLY);
+    if (fd < 0)
+        PyErr_SetFromErrno(PyExc_OSError);
+    return fd;
+}
+
+Py_LOCAL_INLINE(void)
+pikos_rss_close(int fd)
+{
+    if (fd >= 0)
+        close(fd);
+}
+
+/* Return the resident set size in bytes or -1 (with OSError set). */
+Py_LOCAL_INLINE(long long)
+pikos_rss_read(int fd)
+{
+    static long page_size = 0;
+    char buffer[128];
+    char *end;
+    ssize_t size;
+    long long pages;
+
+    if (page_size == 0)
+        page_size = sysconf(_SC_PAGESIZE);
+    size = pread(fd, buffer, sizeof(buffer) - 1, 0);
+    if (size < 0) {
+        PyErr_SetFromErrno(PyExc_OSError);
+        return -1;
+    }
+    buffer[size] = '\0';
+    /* The first field is the total size and the second the resident size
+     * in pages. */
+    strtoll(buffer, &end, 10);
+    pages = strtoll(end, NULL, 10);
+    return pages * page_size;
+}
+
+#else
+
+#define PIKOS_RSS_AVAILABLE 0
+
+Py_LOCAL_INLINE(int)
+pikos_rss_open(void)
+{
+    PyErr_SetString(PyExc_NotImplementedError, "statm is not available");
+    return -1;
+}
+
+Py_LOCAL_INLINE(void)
+pikos_rss_close(int fd)
+{
+}
+
+Py_LOCAL_INLINE(long long)
+pikos_rss_read(int fd)
+{
+    PyErr_SetString(PyExc_NotImplementedError, "statm is not available");
+    return -1;
+}
+
+#endif
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif  /* PIKOS_RSS_H */
@@ -0,0 +1,28 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/rusage.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * Select the getrusage target for the cython monitors. The per-thread
+ * counters (RUSAGE_THREAD) are only available on linux, other platforms
+ * fall back to the counters of the whole process.
+ */
+#ifndef PIKOS_RUSAGE_H
+#define PIKOS_RUSAGE_H
+
+#include <sys/time.h>
+#include <sys/resource.h>
+
+#ifdef RUSAGE_THREAD
+#define PIKOS_RUSAGE_WHO RUSAGE_THREAD
+#define PIKOS_RUSAGE_PER_THREAD 1
+#else
+#define PIKOS_RUSAGE_WHO RUSAGE_SELF
+#define PIKOS_RUSAGE_PER_THREAD 0
+#endif
+
+#endif  /* PIKOS_RUSAGE_H */
@@ -0,0 +1,181 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/sampler.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * Deterministic 1-in-N sampling of the calls for the cython monitors. One
+ * in every `rate` calls is sampled, either counting all the calls together
+ * or every code object (builtin function) on its own. The sampled calls are
+ * kept in a stack for every thread so that their return events (and their
+ * line events) are sampled too. The decision is taken on the C structures
+ * of the frame before any python object is created.
+ */
+#ifndef PIKOS_SAMPLER_H
+#define PIKOS_SAMPLER_H
+
+#include <Python.h>
+#include "code_map.h"
+#include "thread_stacks.h"
+
+typedef struct {
+    void *frame;
+    /* The builtin function of a sampled builtin call or NULL. */
+    void *function;
+} pikos_sample_entry;
+
+typedef struct {
+    long rate;
+    int per_code;
+    long count;
+    /* The counters of the code objects when sampling per code. */
+    pikos_map map;
+    long *counts;
+    Py_ssize_t counts_used;
+    Py_ssize_t counts_size;
+    /* The calls that have been sampled and have not returned yet. */
+    pikos_thread_stacks stacks;
+} pikos_sampler;
+
+/* The helpers that a module does not use are fine, see hooks.h. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+Py_LOCAL_INLINE(void)
+pikos_sampler_init(pikos_sampler *sampler, long rate, int per_code)
+{
+    sampler->rate = rate;
+    sampler->per_code = per_code;
+    sampler->count = 0;
+    pikos_map_init(&sampler->map);
+    sampler->counts = NULL;
+    sampler->counts_used = 0;
+    sampler->counts_size = 0;
+    pikos_thread_stacks_init(&sampler->stacks, sizeof(pikos_sample_entry));
+}
+
+Py_LOCAL_INLINE(void)
+pikos_sampler_free(pikos_sampler *sampler)
+{
+    pikos_map_free(&sampler->map);
+    PyMem_Free(sampler->counts);
+    pikos_thread_stacks_free(&sampler->stacks);
+    pikos_sampler_init(sampler, sampler->rate, sampler->per_code);
+}
+
+/* Restart the counters and forget the sampled calls. */
+Py_LOCAL_INLINE(void)
+pikos_sampler_reset(pikos_sampler *sampler)
+{
+    sampler->count = 0;
+    pikos_map_clear(&sampler->map);
+    sampler->counts_used = 0;
+    pikos_thread_stacks_clear(&sampler->stacks);
+}
+
+/* Count a call of the code `key` and return 1 when it is sampled, 0 when
+ * it is not and -1 (with MemoryError set) on failure. */
+Py_LOCAL_INLINE(int)
+pikos_sampler_tick(pikos_sampler *sampler, void *key, long extra)
+{
+    long *counter;
+    long *counts;
+    Py_ssize_t index, size;
+
+    if (sampler->per_code) {
+        index = pikos_map_get(&sampler->map, key, extra);
+        if (index < 0) {
+            if (sampler->counts_used == sampler->counts_size) {
+                size = sampler->counts_size > 0 ?
+                    2 * sampler->counts_size : 64;
+                counts = PyMem_Resize(sampler->counts, long, size);
+                if (counts == NULL) {
+                    PyErr_NoMemory();
+                    return -1;
+                }
+                sampler->counts = counts;
+                sampler->counts_size = size;
+            }
+            index = sampler->counts_used;
+            if (pikos_map_set(&sampler->map, key, extra, index) < 0)
+                return -1;
+            sampler->counts_used += 1;
+            sampler->counts[index] = 0;
+        }
+        counter = &sampler->counts[index];
+    }
+    else {
+        counter = &sampler->count;
+    }
+    *counter += 1;
+    if (*counter < sampler->rate)
+        return 0;
+    *counter = 0;
+    return 1;
+}
+
+/* Sample a call event. A sampled call is pushed on the stack of the thread
+ * until it returns. Returns 1 when the call is sampled, 0 when it is not and
+ * -1 on failure. */
+Py_LOCAL_INLINE(int)
+pikos_sampler_call(pikos_sampler *sampler, void *frame, void *function,
+                   void *key, long extra)
+{
+    pikos_stack *stack;
+    pikos_sample_entry *entry;
+    int sampled = pikos_sampler_tick(sampler, key, extra);
+
+    if (sampled <= 0)
+        return sampled;
+    stack = pikos_thread_stack(&sampler->stacks);
+    if (stack == NULL)
+        return -1;
+    entry = pikos_stack_push(stack);
+    if (entry == NULL)
+        return -1;
+    entry->frame = frame;
+    entry->function = function;
+    return 1;
+}
+
+/* Return 1 (and pop the call) when the returning call was sampled, 0 when
+ * it was not and -1 on failure. */
+Py_LOCAL_INLINE(int)
+pikos_sampler_return(pikos_sampler *sampler, void *frame, void *function)
+{
+    pikos_stack *stack = pikos_thread_stack(&sampler->stacks);
+    pikos_sample_entry *entry;
+
+    if (stack == NULL)
+        return -1;
+    entry = pikos_stack_top(stack);
+    if (entry == NULL || entry->frame != frame || entry->function != function)
+        return 0;
+    pikos_stack_pop(stack);
+    return 1;
+}
+
+/* Return 1 when the frame is executing a sampled python call, 0 when it is
+ * not and -1 on failure. */
+Py_LOCAL_INLINE(int)
+pikos_sampler_active(pikos_sampler *sampler, void *frame)
+{
+    pikos_stack *stack = pikos_thread_stack(&sampler->stacks);
+    pikos_sample_entry *entry;
+
+    if (stack == NULL)
+        return -1;
+    entry = pikos_stack_top(stack);
+    return entry != NULL && entry->frame == frame && entry->function == NULL;
+}
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif /* PIKOS_SAMPLER_H */
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/sampler.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+cdef extern from "sampler.h":
+
+    ctypedef struct pikos_sampler:
+        long rate
+        bint per_code
+        # The number of code objects that have been counted per code.
+        Py_ssize_t counts_used
+
+    # Initialize, release or restart a sampler.
+    void pikos_sampler_init(pikos_sampler *sampler, long rate, bint per_code)
+    void pikos_sampler_free(pikos_sampler *sampler)
+    void pikos_sampler_reset(pikos_sampler *sampler)
+
+    # Count an event (a call of the code `key` when sampling per code) and
+    # return 1 when it is sampled.
+    int pikos_sampler_tick(
+        pikos_sampler *sampler, void *key, long extra) except -1
+
+    # Sample a call event and remember the sampled calls until they return.
+    int pikos_sampler_call(
+        pikos_sampler *sampler, void *frame, void *function, void *key,
+        long extra) except -1
+
+    # Return 1 when the returning call was sampled.
+    int pikos_sampler_return(
+        pikos_sampler *sampler, void *frame, void *function) except -1
+
+    # Return 1 when the frame is executing a sampled python call.
+    int pikos_sampler_active(
+        pikos_sampler *sampler, void *frame) except -1
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/slow_call_monitor.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from .function_monitor cimport FunctionMonitor
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport pikos_thread_stacks
+
+
+ctypedef struct SlowCallEntry:
+    PyFrameObject *frame
+    double start
+    double threshold
+    long context
+
+
+cdef class SlowCallMonitor(FunctionMonitor):
+    cdef public double threshold
+    cdef public bint capture_stack
+    cdef dict _thresholds
+    cdef pikos_thread_stacks _stacks
+
+    cdef int _push(self, PyFrameObject *_frame) except -1
+    cdef int _pop(self, PyFrameObject *_frame) except -1
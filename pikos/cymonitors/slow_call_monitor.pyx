@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/slow_call_monitor.pyx
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+from cpython.pystate cimport PyTrace_CALL, PyTrace_RETURN
+
+from .function_monitor cimport FunctionMonitor
+from .hooks cimport pikos_set_profile, pikos_unset_profile
+from .pytrace cimport PyFrameObject
+from .thread_stacks cimport (
+    pikos_stack, pikos_thread_stacks_init, pikos_thread_stacks_free,
+    pikos_thread_stacks_clear, pikos_thread_stack, pikos_stack_top,
+    pikos_stack_push, pikos_stack_pop)
+from .timers cimport pikos_wall_time
+
+from pikos._internal.fork import unregister_fork_handler
+from pikos.context import _state as _context_state
+from pikos.monitors.records import SlowCallContextRecord, SlowCallRecord
+
+
+cdef class SlowCallMonitor(FunctionMonitor):
+    """ A Cython based monitor recording only the python function calls that
+    take longer than a threshold.
+
+    The class hooks on the setprofile function and keeps the executing
+    python calls of every monitored thread in a C stack along with their
+    start time. A record is sent to the recorder only when a call returns after
+    more than its threshold, so the recorded data is proportional to the
+    number of slow calls rather than the number of calls.
+
+    Public
+    ------
+    threshold : float
+        The global threshold in seconds.
+
+    capture_stack : bool
+        When True the records include the stack of the calling frames.
+
+    Private
+    -------
+    _thresholds : dict
+        The per function thresholds keyed by code object.
+
+    _stacks : pikos_thread_stacks
+        The C stacks of the currently executing function calls of the
+        threads.
+
+    """
+
+    def __cinit__(self, *arguments, **keywords):
+        pikos_thread_stacks_init(&self._stacks, sizeof(SlowCallEntry))
+
+    def __init__(
+            self, recorder, record_type=None, threshold=0.1, thresholds=None,
+            capture_stack=False, context=False):
+        """ Constructor
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder inctance to use.
+
+        record_type :
+            The record type to use. Default is to use a SlowCallRecord (a
+            SlowCallContextRecord when `context` is True).
+
+        threshold : float
+            The wall time in seconds above which a call is recorded. Default
+            is 0.1 seconds.
+
+        thresholds : dict
+            Thresholds in seconds for specific functions that override the
+            global `threshold`. The keys are function or code objects.
+
+        capture_stack : bool
+            Include the stack of the calling frames in the records. Default
+            is False.
+
+        context : bool
+            Add the context id of the thread (see :mod:`pikos.context`) at
+            the call of the function as the last field of the records.
+            Default is False.
+
+        """
+        if record_type is None:
+            if context:
+                record_type = SlowCallContextRecord
+            else:
+                record_type = SlowCallRecord
+        super(SlowCallMonitor, self).__init__(recorder, record_type, context)
+        self.threshold = threshold
+        self.capture_stack = capture_stack
+        self._thresholds = {}
+        if thresholds is not None:
+            for function, value in thresholds.items():
+                code = getattr(function, 'func_code', function)
+                self._thresholds[code] = value
+
+    def __dealloc__(self):
+        pikos_thread_stacks_free(&self._stacks)
+
+    def disable(self):
+        """ Disable the monitor.
+
+        The last time the method is called (the context is exited) it will
+        unset the setprofile hooks and finalize the recorder.
+
+        """
+        if self._call_tracker('pong'):
+            pikos_unset_profile(self, self.all_threads)
+            unregister_fork_handler(self)
+            pikos_thread_stacks_clear(&self._stacks)
+            self._recorder.finalize()
+
+    cdef int on_function_event(
+            self, PyFrameObject *_frame, int event, object arg) except -1:
+        """ Track the python call and return events.
+
+        """
+        self._events += 1
+        if event == PyTrace_CALL:
+            self._push(_frame)
+        elif event == PyTrace_RETURN:
+            self._pop(_frame)
+        return 0
+
+    cdef int _push(self, PyFrameObject *_frame) except -1:
+        """ Push a new function call in the stack of the thread.
+
+        """
+        cdef:
+            SlowCallEntry *entry
+
+        entry = <SlowCallEntry *>pikos_stack_push(
+            pikos_thread_stack(&self._stacks))
+        entry.frame = _frame
+        if len(self._thresholds) > 0:
+            entry.threshold = self._thresholds.get(
+                (<object>_frame).f_code, self.threshold)
+        else:
+            entry.threshold = self.threshold
+        if self._context:
+            entry.context = _context_state.id
+        entry.start = pikos_wall_time()
+        return 0
+
+    cdef int _pop(self, PyFrameObject *_frame) except -1:
+        """ Pop the returning function call from the stack of the thread and
+        record it if it was slow.
+
+        Returns from functions that were called before the monitor was
+        enabled are ignored.
+
+        """
+        cdef:
+            double end = pikos_wall_time()
+            pikos_stack *calls = pikos_thread_stack(&self._stacks)
+            SlowCallEntry *entry = <SlowCallEntry *>pikos_stack_top(calls)
+            object frame
+            object code
+            object stack = None
+            object record
+
+        if entry == NULL or entry.frame != _frame:
+            return 0
+        pikos_stack_pop(calls)
+        if end - entry.start <= entry.threshold:
+            return 0
+        frame = <object>_frame
+        code = frame.f_code
+        if self.capture_stack:
+            stack = []
+            caller = frame.f_back
+            while caller is not None:
+                stack.append('{0}:{1}({2})'.format(
+                    caller.f_code.co_filename, caller.f_lineno,
+                    caller.f_code.co_name))
+                caller = caller.f_back
+            stack = tuple(reversed(stack))
+        record = (
+            self._index, code.co_name, end - entry.start, calls.depth,
+            code.co_firstlineno, code.co_filename, stack)
+        if self._context:
+            record += (entry.context,)
+        if not self._use_tuple:
+            record = self.record_type(*record)
+        self._recorder.record(record)
+        self._index += 1
+        return 0
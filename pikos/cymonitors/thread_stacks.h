@@ -0,0 +1,224 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/thread_stacks.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * The C call stacks of the cython monitors, one for every thread. The
+ * events of the threads interleave when a monitor is installed on all the
+ * threads, so the stack of the thread that receives an event is looked up
+ * by its thread state. There are only a few threads, so the stacks are
+ * kept in an array and the stack of the last event is checked first. The
+ * entries are opaque blocks of `entry_size` bytes.
+ *
+ * The thread state of a thread that has exited is freed and its address
+ * can be reused by a new thread. Every stack keeps a reference to the
+ * thread state dict of its thread, which is unique as long as it is alive,
+ * so the stack of an exited thread is never taken for the stack of a new
+ * thread. The stacks of the exited threads are reused for the new threads.
+ */
+#ifndef PIKOS_THREAD_STACKS_H
+#define PIKOS_THREAD_STACKS_H
+
+#include <Python.h>
+
+typedef struct {
+    PyThreadState *tstate;
+    PyObject *dict;
+    char *entries;
+    Py_ssize_t entry_size;
+    Py_ssize_t depth;
+    Py_ssize_t size;
+} pikos_stack;
+
+typedef struct {
+    Py_ssize_t entry_size;
+    pikos_stack *stacks;
+    Py_ssize_t count;
+    Py_ssize_t size;
+    Py_ssize_t last;
+} pikos_thread_stacks;
+
+/* The helpers that a module does not use are fine, see hooks.h. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+Py_LOCAL_INLINE(void)
+pikos_thread_stacks_init(pikos_thread_stacks *stacks, Py_ssize_t entry_size)
+{
+    stacks->entry_size = entry_size;
+    stacks->stacks = NULL;
+    stacks->count = 0;
+    stacks->size = 0;
+    stacks->last = 0;
+}
+
+/* Forget the stacks of all the threads. */
+Py_LOCAL_INLINE(void)
+pikos_thread_stacks_clear(pikos_thread_stacks *stacks)
+{
+    Py_ssize_t index;
+    for (index = 0; index < stacks->count; index++) {
+        PyMem_Free(stacks->stacks[index].entries);
+        Py_CLEAR(stacks->stacks[index].dict);
+    }
+    stacks->count = 0;
+    stacks->last = 0;
+}
+
+Py_LOCAL_INLINE(void)
+pikos_thread_stacks_free(pikos_thread_stacks *stacks)
+{
+    pikos_thread_stacks_clear(stacks);
+    PyMem_Free(stacks->stacks);
+    pikos_thread_stacks_init(stacks, stacks->entry_size);
+}
+
+/* Return true if the thread of the stack has not exited. */
+Py_LOCAL_INLINE(int)
+pikos_stack_alive(pikos_stack *stack, PyThreadState *current)
+{
+    PyThreadState *tstate;
+
+    tstate = PyInterpreterState_ThreadHead(current->interp);
+    for (; tstate != NULL; tstate = PyThreadState_Next(tstate)) {
+        if (tstate == stack->tstate)
+            return tstate->dict == stack->dict;
+    }
+    return 0;
+}
+
+/* Give the stack to the current thread. Return -1 (with MemoryError set)
+ * on failure. */
+Py_LOCAL_INLINE(int)
+pikos_stack_assign(pikos_stack *stack, PyThreadState *tstate)
+{
+    PyObject *dict = PyThreadState_GetDict();
+
+    if (dict == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    Py_INCREF(dict);
+    Py_XDECREF(stack->dict);
+    stack->tstate = tstate;
+    stack->dict = dict;
+    stack->depth = 0;
+    return 0;
+}
+
+/* Return the stack of the current thread or NULL (with MemoryError set).
+ * The pointer is valid until the stack of a new thread is added. */
+Py_LOCAL_INLINE(pikos_stack *)
+pikos_thread_stack(pikos_thread_stacks *stacks)
+{
+    PyThreadState *tstate = PyThreadState_GET();
+    pikos_stack *stack;
+    Py_ssize_t index, size;
+
+    if (stacks->last < stacks->count) {
+        stack = &stacks->stacks[stacks->last];
+        if (stack->tstate == tstate && stack->dict == tstate->dict)
+            return stack;
+    }
+    for (index = 0; index < stacks->count; index++) {
+        stack = &stacks->stacks[index];
+        if (stack->tstate == tstate) {
+            /* A thread state of an exited thread that has been reused
+             * has a new dict. */
+            if (stack->dict != tstate->dict &&
+                    pikos_stack_assign(stack, tstate) < 0)
+                return NULL;
+            stacks->last = index;
+            return stack;
+        }
+    }
+    for (index = 0; index < stacks->count; index++) {
+        stack = &stacks->stacks[index];
+        if (!pikos_stack_alive(stack, tstate)) {
+            if (pikos_stack_assign(stack, tstate) < 0)
+                return NULL;
+            stacks->last = index;
+            return stack;
+        }
+    }
+    if (stacks->count == stacks->size) {
+        size = stacks->size > 0 ? 2 * stacks->size : 8;
+        stack = PyMem_Resize(stacks->stacks, pikos_stack, size);
+        if (stack == NULL) {
+            PyErr_NoMemory();
+            return NULL;
+        }
+        stacks->stacks = stack;
+        stacks->size = size;
+    }
+    index = stacks->count;
+    stack = &stacks->stacks[index];
+    stack->dict = NULL;
+    stack->entries = NULL;
+    stack->entry_size = stacks->entry_size;
+    stack->size = 0;
+    if (pikos_stack_assign(stack, tstate) < 0)
+        return NULL;
+    stacks->count += 1;
+    stacks->last = index;
+    return stack;
+}
+
+/* Return the entry at `index` (0 is the bottom of the stack). */
+Py_LOCAL_INLINE(void *)
+pikos_stack_entry(pikos_stack *stack, Py_ssize_t index)
+{
+    return stack->entries + index * stack->entry_size;
+}
+
+/* Return the top entry or NULL when the stack is empty. */
+Py_LOCAL_INLINE(void *)
+pikos_stack_top(pikos_stack *stack)
+{
+    if (stack->depth == 0)
+        return NULL;
+    return pikos_stack_entry(stack, stack->depth - 1);
+}
+
+/* Add an entry on the top of the stack and return it or NULL (with
+ * MemoryError set). */
+Py_LOCAL_INLINE(void *)
+pikos_stack_push(pikos_stack *stack)
+{
+    char *entries;
+    Py_ssize_t size;
+
+    if (stack->depth == stack->size) {
+        size = stack->size > 0 ? 2 * stack->size : 64;
+        entries = PyMem_Realloc(stack->entries, size * stack->entry_size);
+        if (entries == NULL) {
+            PyErr_NoMemory();
+            return NULL;
+        }
+        stack->entries = entries;
+        stack->size = size;
+    }
+    stack->depth += 1;
+    return pikos_stack_entry(stack, stack->depth - 1);
+}
+
+/* Remove the top entry and return it. The entry is valid until the next
+ * push. */
+Py_LOCAL_INLINE(void *)
+pikos_stack_pop(pikos_stack *stack)
+{
+    stack->depth -= 1;
+    return pikos_stack_entry(stack, stack->depth);
+}
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif /* PIKOS_THREAD_STACKS_H */
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/thread_stacks.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+cdef extern from "thread_stacks.h":
+
+    ctypedef struct pikos_stack:
+        Py_ssize_t depth
+
+    ctypedef struct pikos_thread_stacks:
+        pikos_stack *stacks
+        Py_ssize_t count
+
+    # Initialize, release or forget the stacks of the threads.
+    void pikos_thread_stacks_init(
+        pikos_thread_stacks *stacks, Py_ssize_t entry_size)
+    void pikos_thread_stacks_free(pikos_thread_stacks *stacks)
+    void pikos_thread_stacks_clear(pikos_thread_stacks *stacks)
+
+    # Return the stack of the current thread.
+    pikos_stack *pikos_thread_stack(pikos_thread_stacks *stacks) except NULL
+
+    # Access the entries of a stack. The top is NULL on an empty stack.
+    void *pikos_stack_entry(pikos_stack *stack, Py_ssize_t index)
+    void *pikos_stack_top(pikos_stack *stack)
+    void *pikos_stack_push(pikos_stack *stack) except NULL
+    void *pikos_stack_pop(pikos_stack *stack)
@@ -0,0 +1,91 @@
+/*----------------------------------------------------------------------------
+ *  Package: Pikos toolkit
+ *  File: cymonitors/timers.h
+ *  License: LICENSE.TXT
+ *
+ *  Copyright (c) 2014, Enthought, Inc.
+ *  All rights reserved.
+ *----------------------------------------------------------------------------
+ *
+ * Wall and per-thread cpu timers for the cython monitors. Both timers return
+ * the time in seconds. The cpu timer returns -1.0 when the platform does not
+ * provide a per-thread cpu clock.
+ */
+#ifndef PIKOS_TIMERS_H
+#define PIKOS_TIMERS_H
+
+#include <Python.h>
+
+/* The helpers that a module does not use are fine, see hooks.h. */
+#ifdef __GNUC__
+#pragma GCC diagnostic push
+#pragma GCC diagnostic ignored "-Wunused-function"
+#endif
+
+#ifdef _WIN32
+
+#include <windows.h>
+
+Py_LOCAL_INLINE(double)
+pikos_wall_time(void)
+{
+    LARGE_INTEGER counter, frequency;
+    QueryPerformanceCounter(&counter);
+    QueryPerformanceFrequency(&frequency);
+    return (double)counter.QuadPart / (double)frequency.QuadPart;
+}
+
+Py_LOCAL_INLINE(double)
+pikos_cpu_time(void)
+{
+    FILETIME creation, exit, kernel, user;
+    ULARGE_INTEGER kernel_time, user_time;
+    if (!GetThreadTimes(
+            GetCurrentThread(), &creation, &exit, &kernel, &user))
+        return -1.0;
+    kernel_time.LowPart = kernel.dwLowDateTime;
+    kernel_time.HighPart = kernel.dwHighDateTime;
+    user_time.LowPart = user.dwLowDateTime;
+    user_time.HighPart = user.dwHighDateTime;
+    /* FILETIME values are in units of 100 ns */
+    return (kernel_time.QuadPart + user_time.QuadPart) * 1e-7;
+}
+
+#else  /* !_WIN32 */
+
+#include <time.h>
+#include <sys/time.h>
+
+Py_LOCAL_INLINE(double)
+pikos_wall_time(void)
+{
+#ifdef CLOCK_MONOTONIC
+    struct timespec ts;
+    if (clock_gettime(CLOCK_MONOTONIC, &ts) == 0)
+        return ts.tv_sec + ts.tv_nsec * 1e-9;
+#endif
+    {
+        struct timeval tv;
+        gettimeofday(&tv, NULL);
+        return tv.tv_sec + tv.tv_usec * 1e-6;
+    }
+}
+
+Py_LOCAL_INLINE(double)
+pikos_cpu_time(void)
+{
+#ifdef CLOCK_THREAD_CPUTIME_ID
+    struct timespec ts;
+    if (clock_gettime(CLOCK_THREAD_CPUTIME_ID, &ts) == 0)
+        return ts.tv_sec + ts.tv_nsec * 1e-9;
+#endif
+    return -1.0;
+}
+
+#endif  /* _WIN32 */
+
+#ifdef __GNUC__
+#pragma GCC diagnostic pop
+#endif
+
+#endif  /* PIKOS_TIMERS_H */
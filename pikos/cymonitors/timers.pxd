@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+#----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: cymonitors/timers.pxd
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#----------------------------------------------------------------------------
+cdef extern from "timers.h":
+
+    # Monotonic wall clock time in seconds.
+    double pikos_wall_time() nogil
+
+    # Cpu time in seconds spent by the current thread (-1.0 if the platform
+    # does not provide a per-thread cpu clock).
+    double pikos_cpu_time() nogil
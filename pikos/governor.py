@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: governor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Keep the overhead of a monitor under a budget.
+
+An :class:`OverheadGovernor` measures the time that a monitor spends in its
+hook and in the recorder and lets the monitor record only one in every
+:attr:`~OverheadGovernor.rate` events. The rate is adjusted once every
+``interval`` seconds so that the measured overhead stays below the
+``budget`` (a fraction of the wall time)::
+
+    from pikos.governor import OverheadGovernor
+    from pikos.monitors.api import FunctionMonitor
+
+    governor = OverheadGovernor(budget=0.02)
+    monitor = FunctionMonitor(recorder, governor=governor)
+
+The monitors that are governed add the rate that was in effect when the
+event was recorded as the ``weight`` field of their records, so counts that
+are computed from the records can be scaled back up. Every adjustment is
+also kept in :attr:`~OverheadGovernor.history`.
+
+Only the events that are recorded are timed. The cost of delivering an
+event to the python hook of the monitor (paid by the skipped events too)
+cannot be timed from inside the hook, so it is estimated by
+:func:`calibrate` and added to the overhead for every event. When the cost
+of the events alone exceeds the budget, or the budget is still exceeded at
+``max_rate``, sampling cannot help and the governor is
+:attr:`~OverheadGovernor.suspended`: the monitor removes its hook until it
+is enabled again.
+
+A governor with a budget of 1 never samples, so it can be used to only
+measure the time spent by the monitor (see :attr:`~OverheadGovernor.time`).
+
+"""
+import math
+import sys
+import threading
+import time
+
+
+def calibrate(events=10000, timer=None):
+    """ Estimate the time in seconds that a python profile hook adds to an
+    event that it skips.
+
+    The hook of the monitors is imitated by a method that counts the event
+    and asks a governor if it should be skipped. It is installed in a new
+    thread, so the hooks of the calling thread are not affected, and the
+    time of calling an empty function with and without the hook is
+    compared.
+
+    """
+    timer = time.time if timer is None else timer
+    result = []
+    thread = threading.Thread(
+        target=_calibrate, args=(events, timer, result),
+        name='pikos-calibrate')
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def _calibrate(events, timer, result):
+    hook = _SkippingHook(OverheadGovernor(event_cost=0.0, timer=timer))
+    hook.governor.rate = 2 * events + 1
+
+    def empty():
+        pass
+
+    def loop():
+        start = timer()
+        for _ in xrange(events):
+            empty()
+        return timer() - start
+
+    sys.setprofile(None)
+    bare = loop()
+    sys.setprofile(hook.on_event)
+    try:
+        hooked = loop()
+    finally:
+        sys.setprofile(None)
+    # Every call of the empty function is a call and a return event.
+    result.append(max(hooked - bare, 0.0) / (2 * events))
+
+
+class _SkippingHook(object):
+    """ A hook that skips every event (see :func:`calibrate`).
+
+    """
+
+    def __init__(self, governor):
+        self.governor = governor
+        self.events = 0
+
+    def on_event(self, frame, event, arg):
+        self.events += 1
+        governor = self.governor
+        if governor is not None:
+            if governor.skip():
+                return
+
+
+class OverheadGovernor(object):
+    """ Adjust the sampling rate of a monitor to an overhead budget.
+
+    Public
+    ------
+    budget : float
+        The fraction of the wall time that the monitor may spend in its hook
+        and in the recorder.
+
+    interval : float
+        The time in seconds between the adjustments of the rate.
+
+    max_rate : int
+        The highest rate. When the budget is still exceeded at this rate
+        the governor is suspended.
+
+    rate : int
+        The current rate; one in every `rate` events is recorded.
+
+    history : list
+        A ``(time, overhead, rate)`` tuple for every adjustment where
+        overhead is the estimated fraction of the last interval.
+
+    time : float
+        The total time in seconds that has been spent on the recorded
+        events.
+
+    event_cost : float
+        The estimated time in seconds that the hook spends on every event,
+        including the skipped ones.
+
+    suspended : bool
+        True when the budget cannot be met by sampling. The monitor removes
+        its hook and records nothing until it is enabled again.
+
+    timer : callable
+        The function that returns the current time in seconds.
+
+    """
+
+    def __init__(self, budget=0.05, interval=1.0, max_rate=10000,
+                 timer=None, event_cost=None):
+        """ Initialize the governor.
+
+        Parameters
+        ----------
+        budget : float
+            The fraction of the wall time that the monitor may spend in its
+            hook and in the recorder. Default is 5%.
+
+        interval : float
+            The time in seconds between the adjustments of the rate.
+
+        max_rate : int
+            The highest rate (i.e. the lowest fraction of the events that
+            is recorded is 1 / max_rate).
+
+        timer : callable
+            The function that returns the current time in seconds. Default
+            is :func:`time.time`.
+
+        event_cost : float
+            The time in seconds that the hook spends on every event. Default
+            is to estimate it with :func:`calibrate`.
+
+        """
+        if budget <= 0:
+            raise ValueError('The budget should be a positive fraction')
+        self.budget = budget
+        self.interval = interval
+        self.max_rate = max_rate
+        self.timer = time.time if timer is None else timer
+        if event_cost is None:
+            event_cost = calibrate(timer=self.timer)
+        self.event_cost = event_cost
+        self.rate = 1
+        self.history = []
+        self.time = 0.0
+        self.suspended = False
+        self._count = 0
+        self._events = 0
+        self._spent = 0.0
+        self._window = None
+
+    def skip(self):
+        """ Return True when the current event should not be recorded.
+
+        """
+        self._events += 1
+        self._count += 1
+        if self._count < self.rate:
+            return True
+        self._count = 0
+        return False
+
+    def ignore(self):
+        """ Count an event that the monitor has filtered out.
+
+        The event is not sampled, but the cost of its delivery to the hook
+        is part of the overhead.
+
+        """
+        self._events += 1
+
+    def account(self, start):
+        """ Add the time since `start` to the overhead of the current
+        interval and adjust the rate at the end of the interval.
+
+        Parameters
+        ----------
+        start : float
+            The value of the :attr:`timer` when the monitor started to
+            handle the event.
+
+        """
+        now = self.timer()
+        self.time += now - start
+        self._spent += now - start
+        if self._window is None:
+            self._window = start
+        elapsed = now - self._window
+        if elapsed >= self.interval:
+            self._adjust(now, elapsed)
+
+    def reset(self):
+        """ Record every event and restart the measurement.
+
+        """
+        self.rate = 1
+        self.history = []
+        self.time = 0.0
+        self.suspended = False
+        self._restart()
+
+    def resume(self):
+        """ Leave the suspended state and restart the measurement with the
+        current rate.
+
+        """
+        self.suspended = False
+        self._restart()
+
+    def _restart(self):
+        self._count = 0
+        self._events = 0
+        self._spent = 0.0
+        self._window = None
+
+    def _adjust(self, now, elapsed):
+        # The cost of delivering the events does not depend on the rate,
+        # only the time spent on the recorded events is proportional to
+        # the recorded fraction of the events.
+        dispatch = self._events * self.event_cost / elapsed
+        recorded = self._spent / elapsed
+        overhead = dispatch + recorded
+        available = self.budget - dispatch
+        rate = self.rate
+        if overhead > self.budget:
+            if available <= 0 or rate >= self.max_rate:
+                self.suspended = True
+            else:
+                rate = int(math.ceil(rate * recorded / available))
+        elif overhead < 0.5 * self.budget:
+            # The rate is lowered at most by half every interval to avoid
+            # oscillating around the budget.
+            needed = int(math.ceil(rate * recorded / available))
+            rate = max(rate // 2, needed)
+        rate = max(1, min(self.max_rate, rate))
+        self.history.append((now, overhead, rate))
+        self.rate = rate
+        self._events = 0
+        self._spent = 0.0
+        self._window = now
@@ -27,15 +27,11 @@ from pikos.monitors.focused_line_monitor import FocusedLineMonitor
 from pikos._internal.monitor_attach import MonitorAttach
 from pikos.monitors.monitor import Monitor
 
-try:
-    import psutil
-except ImportError:
-    import warnings
-    warnings.warn('Could not import psutil. Memory monitors are not available')
-else:
-    from pikos.monitors.function_memory_monitor import FunctionMemoryMonitor
-    from pikos.monitors.line_memory_monitor import LineMemoryMonitor
-    from pikos.monitors.focused_function_memory_monitor import \
-        FocusedFunctionMemoryMonitor
-    from pikos.monitors.focused_line_memory_monitor import \
-        FocusedLineMemoryMonitor
+# The memory monitors import the optional psutil dependency when they are
+# enabled, so it is safe to always expose them.
+from pikos.monitors.function_memory_monitor import FunctionMemoryMonitor
+from pikos.monitors.line_memory_monitor import LineMemoryMonitor
+from pikos.monitors.focused_function_memory_monitor import \
+    FocusedFunctionMemoryMonitor
+from pikos.monitors.focused_line_memory_monitor import \
+    FocusedLineMemoryMonitor
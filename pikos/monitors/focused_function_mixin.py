@@ -55,6 +55,10 @@ class FocusedFunctionMixin(object):
         if self._tracker_check(frame, event):
             super(FocusedFunctionMixin, self).on_function_event(
                 frame, event, arg)
+        else:
+            self._events += 1
+            if self._governor is not None:
+                self._governor.ignore()
 
     def _tracker_check(self, frame, event):
         """ Check if any function tracker is currently active.
@@ -7,6 +7,8 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
+from thread import get_ident
+
 from pikos.monitors.line_memory_monitor import LineMemoryMonitor
 from pikos.monitors.focused_line_mixin import FocusedLineMixin
 
@@ -19,4 +21,24 @@ class FocusedLineMemoryMonitor(FocusedLineMixin, LineMemoryMonitor):
     executed. The events are recorded only when the interpreter is working
     inside the functions that are provided in the `functions` attribute.
 
+    When a `threshold` is set the memory change of the last line of a
+    function is measured up to its return, so the memory allocated by a
+    caller outside of the functions is not attributed to it.
+
     """
+
+    def on_line_event(self, frame, why, arg):
+        """ Record the line event if we are inside the functions.
+
+        """
+        if why == 'return' and frame.f_code in self.functions:
+            previous = self._previous.pop(get_ident(), None)
+            if previous is not None:
+                rss, vms = self._process.memory_info()
+                self._record_delta(previous, rss, vms)
+                caller = frame.f_back
+                if caller is not None and caller.f_code in self.functions:
+                    # The rest of the line of the caller is executed next.
+                    self._set_previous(caller, rss, vms)
+        return super(FocusedLineMemoryMonitor, self).on_line_event(
+            frame, why, arg)
@@ -56,6 +56,10 @@ class FocusedLineMixin(object):
         if code in self.functions:
             event_method = super(FocusedLineMixin, self).on_line_event
             event_method(frame, why, arg)
+        elif why == 'line':
+            self._events += 1
+            if self._governor is not None:
+                self._governor.ignore()
         return self.on_line_event
 
     # Override the default attach method to support arguments.
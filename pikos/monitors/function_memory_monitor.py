@@ -9,8 +9,8 @@
 #------------------------------------------------------------------------------
 import os
 
-import psutil
-
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos.monitors.function_monitor import FunctionMonitor
 from pikos.monitors.records import FunctionMemoryRecord
 
@@ -52,8 +52,10 @@ class FunctionMemoryMonitor(FunctionMonitor):
 
         """
         if self._call_tracker('ping'):
+            import psutil
             self._process = psutil.Process(os.getpid())
             self._recorder.prepare(self._record_type)
+            register_fork_handler(self)
             self._profiler.replace(self.on_function_event)
 
     def disable(self):
@@ -66,9 +68,19 @@ class FunctionMemoryMonitor(FunctionMonitor):
         """
         if self._call_tracker('pong'):
             self._profiler.recover()
+            unregister_fork_handler(self)
             self._recorder.finalize()
             self._process = None
 
+    def _after_fork(self):
+        """ Restart the record index and monitor the memory of the forked
+        child process.
+
+        """
+        super(FunctionMemoryMonitor, self)._after_fork()
+        import psutil
+        self._process = psutil.Process(os.getpid())
+
     def gather_info(self, frame, event, arg):
         """ Gather information for the record.
 
@@ -8,11 +8,16 @@
 #  All rights reserved.
 #------------------------------------------------------------------------------
 from __future__ import absolute_import
+import sys
 
 from pikos._internal.profile_function_manager import ProfileFunctionManager
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos._internal.keep_track import KeepTrack
+from pikos.context import _state as _context_state
 from pikos.monitors.monitor import Monitor
-from pikos.monitors.records import FunctionRecord
+from pikos.monitors.records import (
+    FunctionContextRecord, FunctionRecord, FunctionWeightRecord)
 
 
 class FunctionMonitor(Monitor):
@@ -23,7 +28,8 @@ class FunctionMonitor(Monitor):
 
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __init__(self, recorder, record_type=None, context=False,
+                 governor=None):
         """ Initialize the monitoring class.
 
         Parameters
@@ -34,16 +40,41 @@ class FunctionMonitor(Monitor):
 
         record_type : type
             A class object to be used for records. Default is
-            :class:`~.FunctionRecord`.
+            :class:`~.FunctionRecord` (:class:`~.FunctionContextRecord`
+            when `context` is True and :class:`~.FunctionWeightRecord` when
+            a `governor` is used). A record type is required when both are
+            used.
+
+        context : bool
+            Add the context id of the thread (see :mod:`pikos.context`) as
+            the last field of the records. Default is False.
+
+        governor : OverheadGovernor
+            Record only a sample of the events to keep the overhead under
+            the budget of the governor (see :mod:`pikos.governor`). The
+            sampling rate is added as the last field of the records.
+            Default is None.
 
         """
         self._recorder = recorder
         self._record = recorder.record
         self._profiler = ProfileFunctionManager()
         self._index = 0
+        self._events = 0
         self._call_tracker = KeepTrack()
+        self._context = context
+        self._governor = governor
         if record_type is None:
-            self._record_type = FunctionRecord
+            if context and governor is not None:
+                raise ValueError(
+                    'A record_type is required when both the context and '
+                    'the governor are used')
+            elif context:
+                self._record_type = FunctionContextRecord
+            elif governor is not None:
+                self._record_type = FunctionWeightRecord
+            else:
+                self._record_type = FunctionRecord
         else:
             self._record_type = record_type
         self._use_tuple = self._record_type is tuple
@@ -57,6 +88,9 @@ class FunctionMonitor(Monitor):
         """
         if self._call_tracker('ping'):
             self._recorder.prepare(self._record_type)
+            register_fork_handler(self)
+            if self._governor is not None:
+                self._governor.resume()
             self._profiler.replace(self.on_function_event)
 
     def disable(self):
@@ -68,8 +102,35 @@ class FunctionMonitor(Monitor):
         """
         if self._call_tracker('pong'):
             self._profiler.recover()
+            unregister_fork_handler(self)
             self._recorder.finalize()
 
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        self._index = 0
+        self._events = 0
+        if self._governor is not None:
+            self._governor.reset()
+
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        Returns
+        -------
+        stats : dict
+            The number of profile ``events`` that have been received and of
+            the records that have been sent to the recorder (``recorded``).
+            When a governor is used the total ``time`` in seconds spent on
+            the recorded events is included.
+
+        """
+        stats = {'events': self._events, 'recorded': self._index}
+        if self._governor is not None:
+            stats['time'] = self._governor.time
+        return stats
+
     def on_function_event(self, frame, event, arg):
         """ Record the current function event.
 
@@ -78,11 +139,30 @@ class FunctionMonitor(Monitor):
         recorder.
 
         """
+        self._events += 1
+        governor = self._governor
+        if governor is not None:
+            if governor.suspended:
+                # The threads that got the hook through threading.setprofile
+                # remove it on their first event after the suspension.
+                sys.setprofile(self._profiler.previous)
+                return
+            if governor.skip():
+                return
+            start = governor.timer()
         record = self.gather_info(frame, event, arg)
+        if self._context:
+            record += (_context_state.id,)
+        if governor is not None:
+            record += (governor.rate,)
         if not self._use_tuple:
             record = self._record_type(*record)
         self._record(record)
         self._index += 1
+        if governor is not None:
+            governor.account(start)
+            if governor.suspended:
+                sys.setprofile(self._profiler.previous)
 
     def gather_info(self, frame, event, arg):
         """ Gather information for the record.
@@ -10,11 +10,13 @@
 from __future__ import absolute_import
 import inspect
 import os
+from linecache import getline
+from thread import get_ident
 
-import psutil
-
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos.monitors.line_monitor import LineMonitor
-from pikos.monitors.records import LineMemoryRecord
+from pikos.monitors.records import LineMemoryRecord, LineMemoryDeltaRecord
 
 
 class LineMemoryMonitor(LineMonitor):
@@ -24,9 +26,16 @@ class LineMemoryMonitor(LineMonitor):
     record the current process memory when a line of code is about to be
     executed.
 
+    When a `threshold` is provided the monitor records only the lines that
+    changed the RSS or VMS counters by more than `threshold` bytes. The
+    memory change between two line events is attributed to the first of the
+    two lines (i.e. the line that was executed in between). The line events
+    of the threads interleave, so the previous line and its memory counters
+    are kept for every thread.
+
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __init__(self, recorder, record_type=None, threshold=None):
         """ Initialize the monitoring class.
 
         Parameters
@@ -38,13 +47,24 @@ class LineMemoryMonitor(LineMonitor):
 
         record_type: class object
             A class object to be used for records. Default is
-            :class:`~pikos.monitors.records.LineMemoryMonitor`
+            :class:`~pikos.monitors.records.LineMemoryRecord` or
+            :class:`~pikos.monitors.records.LineMemoryDeltaRecord` when
+            a `threshold` is set.
+
+        threshold : int
+            The change in bytes of the RSS or VMS counters above which a
+            line is recorded. Default is None, record all the lines.
 
         """
         if record_type is None:
-            record_type = LineMemoryRecord
+            if threshold is None:
+                record_type = LineMemoryRecord
+            else:
+                record_type = LineMemoryDeltaRecord
         super(LineMemoryMonitor, self).__init__(recorder, record_type)
         self._process = None
+        self._threshold = threshold
+        self._previous = {}
 
     def enable(self):
         """ Enable the monitor.
@@ -55,8 +75,11 @@ class LineMemoryMonitor(LineMonitor):
 
         """
         if self._call_tracker('ping'):
+            import psutil
             self._process = psutil.Process(os.getpid())
+            self._previous = {}
             self._recorder.prepare(self._record_type)
+            register_fork_handler(self)
             self._tracer.replace(self.on_line_event)
 
     def disable(self):
@@ -69,9 +92,46 @@ class LineMemoryMonitor(LineMonitor):
         """
         if self._call_tracker('pong'):
             self._tracer.recover()
+            unregister_fork_handler(self)
+            if len(self._previous) > 0:
+                rss, vms = self._process.memory_info()
+                for previous in sorted(self._previous.values()):
+                    self._record_delta(previous, rss, vms)
+                self._previous = {}
             self._recorder.finalize()
             self._process = None
 
+    def on_line_event(self, frame, why, arg):
+        """ Record the current line trace event.
+
+        When a `threshold` is set the memory change since the previous line
+        event is checked and the previous line is recorded if necessary.
+
+        """
+        if self._threshold is None:
+            return super(LineMemoryMonitor, self).on_line_event(
+                frame, why, arg)
+        if why == 'line':
+            self._events += 1
+            rss, vms = self._process.memory_info()
+            previous = self._previous.get(get_ident())
+            if previous is not None:
+                self._record_delta(previous, rss, vms)
+            self._set_previous(frame, rss, vms)
+        return self.on_line_event
+
+    def _after_fork(self):
+        """ Restart the record index and monitor the memory of the forked
+        child process.
+
+        """
+        super(LineMemoryMonitor, self)._after_fork()
+        # Only the thread that forked exists in the child.
+        previous = self._previous.get(get_ident())
+        self._previous = {} if previous is None else {get_ident(): previous}
+        import psutil
+        self._process = psutil.Process(os.getpid())
+
     def gather_info(self, frame):
         """ Gather memory information for the line.
         """
@@ -83,3 +143,34 @@ class LineMemoryMonitor(LineMonitor):
         return (
             self._index, function, lineno, rss, vms, line[0].rstrip(),
             filename)
+
+    def _set_previous(self, frame, rss, vms):
+        """ Start measuring the memory change of the current line of the
+        frame.
+
+        """
+        self._previous[get_ident()] = (
+            self._index, frame.f_code, frame.f_lineno, rss, vms)
+        self._index += 1
+
+    def _record_delta(self, previous, rss, vms):
+        """ Record the previous line of a thread if it has changed the
+        memory counters more than the threshold.
+
+        """
+        index, code, lineno, previous_rss, previous_vms = previous
+        delta_rss = rss - previous_rss
+        delta_vms = vms - previous_vms
+        threshold = self._threshold
+        if abs(delta_rss) > threshold or abs(delta_vms) > threshold:
+            filename = code.co_filename
+            line = getline(filename, lineno)
+            if len(line) == 0:
+                line = '<compiled string>'
+            record = (
+                index, code.co_name, lineno, rss, vms, delta_rss, delta_vms,
+                line.rstrip(), filename)
+            if not self._use_tuple:
+                record = self._record_type(*record)
+            self._recorder.record(record)
+            self._recorded += 1
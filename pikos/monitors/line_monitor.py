@@ -9,11 +9,14 @@
 #------------------------------------------------------------------------------
 from __future__ import absolute_import
 import inspect
+import sys
 
 from pikos._internal.trace_function_manager import TraceFunctionManager
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos._internal.keep_track import KeepTrack
 from pikos.monitors.monitor import Monitor
-from pikos.monitors.records import LineRecord
+from pikos.monitors.records import LineRecord, LineWeightRecord
 
 
 class LineMonitor(Monitor):
@@ -24,7 +27,7 @@ class LineMonitor(Monitor):
 
     """
 
-    def __init__(self, recorder, record_type=None):
+    def __init__(self, recorder, record_type=None, governor=None):
         """ Initialize the monitoring class.
 
         Parameters
@@ -37,14 +40,28 @@ class LineMonitor(Monitor):
         record_type: class object
             A class object to be used for records. Default is
             :class:`~pikos.monitors.records.LineMonitor`
+            (:class:`~pikos.monitors.records.LineWeightRecord` when a
+            `governor` is used).
+
+        governor : OverheadGovernor
+            Record only a sample of the line events to keep the overhead
+            under the budget of the governor (see :mod:`pikos.governor`).
+            The sampling rate is added as the last field of the records.
+            Default is None.
 
         """
         self._recorder = recorder
         self._tracer = TraceFunctionManager()
         self._index = 0
+        self._events = 0
+        self._recorded = 0
         self._call_tracker = KeepTrack()
+        self._governor = governor
         if record_type is None:
-            self._record_type = LineRecord
+            if governor is None:
+                self._record_type = LineRecord
+            else:
+                self._record_type = LineWeightRecord
         else:
             self._record_type = record_type
         self._use_tuple = self._record_type is tuple
@@ -58,6 +75,9 @@ class LineMonitor(Monitor):
         """
         if self._call_tracker('ping'):
             self._recorder.prepare(self._record_type)
+            register_fork_handler(self)
+            if self._governor is not None:
+                self._governor.resume()
             self._tracer.replace(self.on_line_event)
 
     def disable(self):
@@ -69,8 +89,36 @@ class LineMonitor(Monitor):
         """
         if self._call_tracker('pong'):
             self._tracer.recover()
+            unregister_fork_handler(self)
             self._recorder.finalize()
 
+    def _after_fork(self):
+        """ Restart the record index in the forked child process.
+
+        """
+        self._index = 0
+        self._events = 0
+        self._recorded = 0
+        if self._governor is not None:
+            self._governor.reset()
+
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        Returns
+        -------
+        stats : dict
+            The number of line ``events`` that have been received and of
+            the records that have been sent to the recorder (``recorded``).
+            When a governor is used the total ``time`` in seconds spent on
+            the recorded events is included.
+
+        """
+        stats = {'events': self._events, 'recorded': self._recorded}
+        if self._governor is not None:
+            stats['time'] = self._governor.time
+        return stats
+
     def on_line_event(self, frame, why, arg):
         """ Record the current line trace event.
 
@@ -80,11 +128,28 @@ class LineMonitor(Monitor):
 
         """
         if why == 'line':
-            record = self.gather_info(frame)
+            self._events += 1
+            governor = self._governor
+            if governor is None:
+                record = self.gather_info(frame)
+            elif governor.suspended:
+                # The frames that were entered before the suspension keep
+                # their local trace function.
+                return self.on_line_event
+            elif governor.skip():
+                return self.on_line_event
+            else:
+                start = governor.timer()
+                record = self.gather_info(frame) + (governor.rate,)
             if not self._use_tuple:
                 record = self._record_type(*record)
             self._recorder.record(record)
             self._index += 1
+            self._recorded += 1
+            if governor is not None:
+                governor.account(start)
+                if governor.suspended:
+                    sys.settrace(self._tracer.previous)
         return self.on_line_event
 
     def gather_info(self, frame):
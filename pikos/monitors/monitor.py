@@ -33,6 +33,19 @@ class Monitor(object):
 
         """
 
+    def stats(self):
+        """ Return the internal counters of the monitor.
+
+        Returns
+        -------
+        stats : dict
+            The counters of the monitor, e.g. the number of hook ``events``
+            and of the records sent to the recorder (``recorded``). The
+            default implementation returns an empty dict.
+
+        """
+        return {}
+
     def __enter__(self):
         """ The entry point of the context manager.
 
@@ -12,6 +12,13 @@ from collections import namedtuple
 FUNCTION_RECORD = ('index', 'type', 'function', 'lineNo', 'filename')
 FUNCTION_RECORD_TEMPLATE = u'{:<8} {:<11} {:<30} {:<5} {}'
 
+FUNCTION_TIME_RECORD = (
+    'index', 'type', 'function', 'wallTime', 'cpuTime', 'lineNo', 'filename')
+FUNCTION_TIME_RECORD_TEMPLATE = (
+    u'{:>8} | {:<11} | {:<30} | {:>15.6f} | {:>15.6f} | {:>6} | {}')
+FUNCTION_TIME_HEADER_TEMPLATE = (
+    u'{:<8} | {:<11} | {:<30} | {:<15} | {:<15} | {:>6} | {}')
+
 LINE_RECORD = ('index', 'function', 'lineNo', 'line', 'filename')
 LINE_RECORD_TEMPLATE = u'{:<12} {:<50} {:<7} {} -- {}'
 
@@ -29,6 +36,108 @@ LINE_MEMORY_RECORD_TEMPLATE = (
 LINE_MEMORY_HEADER_TEMPLATE = (
     u'{:^12} | {:^30} | {:^7} | {:^15} | {:^15} | {} {}')
 
+FUNCTION_MEMORY_STATS_RECORD = (
+    'index', 'function', 'calls', 'netRSS', 'peakRSS', 'lineNo', 'filename')
+FUNCTION_MEMORY_STATS_RECORD_TEMPLATE = (
+    u'{:>8} | {:<30} | {:>8} | {:>+15} | {:>15} | {:>6} | {}')
+FUNCTION_MEMORY_STATS_HEADER_TEMPLATE = (
+    u'{:<8} | {:<30} | {:<8} | {:<15} | {:<15} | {:>6} | {}')
+
+NUMPY_ALLOCATION_RECORD = (
+    'index', 'type', 'size', 'address', 'function', 'lineNo', 'filename')
+NUMPY_ALLOCATION_RECORD_TEMPLATE = (
+    u'{:>8} | {:<7} | {:>15} | {:>#18x} | {:<30} | {:>6} | {}')
+NUMPY_ALLOCATION_HEADER_TEMPLATE = (
+    u'{:<8} | {:<7} | {:<15} | {:<18} | {:<30} | {:>6} | {}')
+
+BLOCKING_STATS_RECORD = (
+    'index', 'function', 'category', 'calls', 'blockedTime', 'lineNo',
+    'filename')
+BLOCKING_STATS_RECORD_TEMPLATE = (
+    u'{:>8} | {:<30} | {:<8} | {:>8} | {:>15.6f} | {:>6} | {}')
+BLOCKING_STATS_HEADER_TEMPLATE = (
+    u'{:<8} | {:<30} | {:<8} | {:<8} | {:<15} | {:>6} | {}')
+
+FUNCTION_RUSAGE_RECORD = (
+    'index', 'function', 'calls', 'minorFaults', 'majorFaults',
+    'voluntarySwitches', 'involuntarySwitches', 'blockInput', 'blockOutput',
+    'lineNo', 'filename')
+FUNCTION_RUSAGE_RECORD_TEMPLATE = (
+    u'{:>8} | {:<30} | {:>8} | {:>10} | {:>10} | {:>10} | {:>10} | {:>10} | '
+    u'{:>10} | {:>6} | {}')
+FUNCTION_RUSAGE_HEADER_TEMPLATE = (
+    u'{:<8} | {:<30} | {:<8} | {:<10} | {:<10} | {:<10} | {:<10} | {:<10} | '
+    u'{:<10} | {:>6} | {}')
+
+SLOW_CALL_RECORD = (
+    'index', 'function', 'duration', 'depth', 'lineNo', 'filename', 'stack')
+SLOW_CALL_RECORD_TEMPLATE = (
+    u'{:>8} | {:<30} | {:>12.6f} | {:>6} | {:>6} | {} | {}')
+SLOW_CALL_HEADER_TEMPLATE = (
+    u'{:<8} | {:<30} | {:<12} | {:<6} | {:>6} | {} | {}')
+
+LINE_MEMORY_DELTA_RECORD = (
+    'index', 'function', 'lineNo', 'RSS', 'VMS', 'deltaRSS', 'deltaVMS',
+    'line', 'filename')
+LINE_MEMORY_DELTA_RECORD_TEMPLATE = (
+    u'{:<12} | {:<30} | {:<7} | {:>15} | {:>15} | {:>+15} | {:>+15} | {} {}')
+LINE_MEMORY_DELTA_HEADER_TEMPLATE = (
+    u'{:^12} | {:^30} | {:^7} | {:^15} | {:^15} | {:^15} | {:^15} | {} {}')
+CALL_COUNT_RECORD = ('index', 'function', 'calls', 'lineNo', 'filename')
+CALL_COUNT_RECORD_TEMPLATE = u'{:>8} | {:<30} | {:>10} | {:>6} | {}'
+CALL_COUNT_HEADER_TEMPLATE = u'{:<8} | {:<30} | {:<10} | {:>6} | {}'
+LINE_STATS_RECORD = (
+    'index', 'function', 'lineNo', 'hits', 'time', 'source', 'filename')
+LINE_STATS_RECORD_TEMPLATE = (
+    u'{:>8} | {:<30} | {:>7} | {:>10} | {:>12.6f} | {} -- {}')
+LINE_STATS_HEADER_TEMPLATE = (
+    u'{:<8} | {:<30} | {:>7} | {:<10} | {:<12} | {} -- {}')
+LINE_LOOP_RECORD = (
+    'index', 'function', 'lineNo', 'lines', 'iterations', 'minRSS', 'maxRSS',
+    'source', 'filename')
+LINE_LOOP_RECORD_TEMPLATE = (
+    u'{:<12} | {:<30} | {:<7} | {} | {:>8} | {} | {} | {} {}')
+
+FUNCTION_CONTEXT_RECORD = FUNCTION_RECORD + ('context',)
+FUNCTION_CONTEXT_RECORD_TEMPLATE = u'{:<8} {:<11} {:<30} {:<5} {} {:>8}'
+
+FUNCTION_TIME_CONTEXT_RECORD = FUNCTION_TIME_RECORD + ('context',)
+FUNCTION_TIME_CONTEXT_RECORD_TEMPLATE = (
+    FUNCTION_TIME_RECORD_TEMPLATE + u' | {:>8}')
+FUNCTION_TIME_CONTEXT_HEADER_TEMPLATE = (
+    FUNCTION_TIME_HEADER_TEMPLATE + u' | {:>8}')
+
+SLOW_CALL_CONTEXT_RECORD = SLOW_CALL_RECORD + ('context',)
+SLOW_CALL_CONTEXT_RECORD_TEMPLATE = SLOW_CALL_RECORD_TEMPLATE + u' | {:>8}'
+SLOW_CALL_CONTEXT_HEADER_TEMPLATE = SLOW_CALL_HEADER_TEMPLATE + u' | {:>8}'
+
+STATS_RECORD = (
+    'component', 'events', 'recorded', 'filtered', 'time', 'bytes', 'queued',
+    'dropped')
+STATS_RECORD_TEMPLATE = (
+    u'{:<24} | {!s:>10} | {!s:>10} | {!s:>10} | {!s:>12} | {!s:>12} | '
+    u'{!s:>8} | {!s:>8}')
+STATS_HEADER_TEMPLATE = (
+    u'{:<24} | {:<10} | {:<10} | {:<10} | {:<12} | {:<12} | {:<8} | {:<8}')
+
+FUNCTION_WEIGHT_RECORD = FUNCTION_RECORD + ('weight',)
+FUNCTION_WEIGHT_RECORD_TEMPLATE = u'{:<8} {:<11} {:<30} {:<5} {} {:>6}'
+
+LINE_WEIGHT_RECORD = LINE_RECORD + ('weight',)
+LINE_WEIGHT_RECORD_TEMPLATE = u'{:<12} {:<50} {:<7} {} -- {} {:>6}'
+
+FUNCTION_TIME_WEIGHT_RECORD = FUNCTION_TIME_RECORD + ('weight',)
+FUNCTION_TIME_WEIGHT_RECORD_TEMPLATE = (
+    FUNCTION_TIME_RECORD_TEMPLATE + u' | {:>6}')
+FUNCTION_TIME_WEIGHT_HEADER_TEMPLATE = (
+    FUNCTION_TIME_HEADER_TEMPLATE + u' | {:>6}')
+
+FUNCTION_MEMORY_WEIGHT_RECORD = FUNCTION_MEMORY_RECORD + ('weight',)
+FUNCTION_MEMORY_WEIGHT_RECORD_TEMPLATE = (
+    FUNCTION_MEMORY_RECORD_TEMPLATE + u' | {:>6}')
+FUNCTION_MEMORY_WEIGHT_HEADER_TEMPLATE = (
+    FUNCTION_MEMORY_HEADER_TEMPLATE + u' | {:>6}')
+
 
 class FunctionRecord(namedtuple('FunctionRecord', FUNCTION_RECORD)):
     """ The record tuple for function events.
@@ -116,3 +225,465 @@ class LineMemoryRecord(namedtuple('LineMemoryRecord', LINE_MEMORY_RECORD)):
 
     header = LINE_MEMORY_HEADER_TEMPLATE
     line = LINE_MEMORY_RECORD_TEMPLATE
+
+
+class LineMemoryDeltaRecord(
+        namedtuple('LineMemoryDeltaRecord', LINE_MEMORY_DELTA_RECORD)):
+    """ The record tuple for memory changes on line events.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The index of the line event.
+    `function` The name of the function
+    `lineNo`   The line number of the line that changed the memory.
+    `RSS`      The resident memory counter after the line.
+    `VMS`      The virtual memory counter after the line.
+    `deltaRSS` The change of the resident memory counter.
+    `deltaVMS` The change of the virtual memory counter.
+    `line`     The line that changed the memory.
+    `filename` The filename where the function is defined.
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = LINE_MEMORY_DELTA_HEADER_TEMPLATE
+    line = LINE_MEMORY_DELTA_RECORD_TEMPLATE
+
+
+class FunctionMemoryStatsRecord(
+        namedtuple('FunctionMemoryStatsRecord', FUNCTION_MEMORY_STATS_RECORD)):
+    """ The record tuple for the memory statistics of a function.
+
+    ========== ===================================================
+    Field      Description
+    ========== ===================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `calls`    The number of calls to the function.
+    `netRSS`   The total change of the resident memory counter
+               between the call and return of the function.
+    `peakRSS`  The largest increase of the resident memory counter
+               above its value at the call of the function.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    ========== ===================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_MEMORY_STATS_HEADER_TEMPLATE
+    line = FUNCTION_MEMORY_STATS_RECORD_TEMPLATE
+
+
+class NumpyAllocationRecord(
+        namedtuple('NumpyAllocationRecord', NUMPY_ALLOCATION_RECORD)):
+    """ The record tuple for numpy data memory events.
+
+    ========== ===================================================
+    Field      Description
+    ========== ===================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (malloc, realloc or free).
+    `size`     The size in bytes of the memory block.
+    `address`  The address of the memory block.
+    `function` The name of the python function executing.
+    `lineNo`   The line number that is executed.
+    `filename` The filename where the function is defined.
+    ========== ===================================================
+
+    """
+
+    __slots__ = ()
+
+    header = NUMPY_ALLOCATION_HEADER_TEMPLATE
+    line = NUMPY_ALLOCATION_RECORD_TEMPLATE
+
+
+class FunctionTimeRecord(
+        namedtuple('FunctionTimeRecord', FUNCTION_TIME_RECORD)):
+    """ The record tuple for wall and cpu time on function events.
+
+    The time values are timestamps in seconds. The off-cpu time of a
+    function call is the difference between the wall and cpu time spent
+    from the `call` to the `return` event.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `wallTime` The monotonic wall clock time.
+    `cpuTime`  The cpu time used by the current thread.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_TIME_HEADER_TEMPLATE
+    line = FUNCTION_TIME_RECORD_TEMPLATE
+
+
+class BlockingStatsRecord(
+        namedtuple('BlockingStatsRecord', BLOCKING_STATS_RECORD)):
+    """ The record tuple for the time spent in blocking calls per function.
+
+    ============= ===================================================
+    Field         Description
+    ============= ===================================================
+    `index`       The current index of the record.
+    `function`    The name of the calling python function.
+    `category`    The category of the blocking calls (e.g. io).
+    `calls`       The number of blocking calls.
+    `blockedTime` The wall time in seconds spent in the calls.
+    `lineNo`      The line number where the function is defined.
+    `filename`    The filename where the function is defined.
+    ============= ===================================================
+
+    """
+
+    __slots__ = ()
+
+    header = BLOCKING_STATS_HEADER_TEMPLATE
+    line = BLOCKING_STATS_RECORD_TEMPLATE
+
+
+class FunctionRusageRecord(
+        namedtuple('FunctionRusageRecord', FUNCTION_RUSAGE_RECORD)):
+    """ The record tuple for the resource usage counters per function.
+
+    The counters are the total change of the getrusage values between the
+    call and return events of the function (including the sub-calls).
+
+    ===================== =================================================
+    Field                 Description
+    ===================== =================================================
+    `index`               The current index of the record.
+    `function`            The name of the function.
+    `calls`               The number of calls.
+    `minorFaults`         The page faults serviced without io.
+    `majorFaults`         The page faults that required io.
+    `voluntarySwitches`   The voluntary context switches.
+    `involuntarySwitches` The involuntary context switches.
+    `blockInput`          The block input operations.
+    `blockOutput`         The block output operations.
+    `lineNo`              The line number where the function is defined.
+    `filename`            The filename where the function is defined.
+    ===================== =================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_RUSAGE_HEADER_TEMPLATE
+    line = FUNCTION_RUSAGE_RECORD_TEMPLATE
+
+
+class SlowCallRecord(namedtuple('SlowCallRecord', SLOW_CALL_RECORD)):
+    """ The record tuple for function calls that exceeded a time threshold.
+
+    ========== ========================================================
+    Field      Description
+    ========== ========================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `duration` The wall time in seconds from the call to the return.
+    `depth`    The call depth relative to the outermost monitored call.
+    `lineNo`   The line number where the function is defined.
+    `filename` The filename where the function is defined.
+    `stack`    A tuple of ``filename:lineNo(function)`` strings of the
+               calling frames (outermost first) or None.
+    ========== ========================================================
+
+    """
+
+    __slots__ = ()
+
+    header = SLOW_CALL_HEADER_TEMPLATE
+    line = SLOW_CALL_RECORD_TEMPLATE
+
+
+class CallCountRecord(namedtuple('CallCountRecord', CALL_COUNT_RECORD)):
+    """ The record tuple for the number of calls of a function.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `calls`    The number of calls to the function.
+    `lineNo`   The line number where the function is defined.
+    `filename` The filename where the function is defined.
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = CALL_COUNT_HEADER_TEMPLATE
+    line = CALL_COUNT_RECORD_TEMPLATE
+
+
+class LineStatsRecord(namedtuple('LineStatsRecord', LINE_STATS_RECORD)):
+    """ The record tuple for the hits and time spent on a line.
+
+    ========== ========================================================
+    Field      Description
+    ========== ========================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `lineNo`   The line number.
+    `hits`     The number of times that the line was executed.
+    `time`     The wall time in seconds from the start of the line to
+               the next line event (or return) of the same frame.
+    `source`   The source code of the line.
+    `filename` The filename where the function is defined.
+    ========== ========================================================
+
+    """
+
+    __slots__ = ()
+
+    header = LINE_STATS_HEADER_TEMPLATE
+    line = LINE_STATS_RECORD_TEMPLATE
+
+
+class LineLoopRecord(namedtuple('LineLoopRecord', LINE_LOOP_RECORD)):
+    """ The record tuple for a sequence of line events that was repeated.
+
+    A line that is not part of a repeated sequence is recorded with one
+    line and one iteration.
+
+    ============ =====================================================
+    Field        Description
+    ============ =====================================================
+    `index`      The index of the first line event of the sequence.
+    `function`   The name of the function of the first line.
+    `lineNo`     The line number of the first line.
+    `lines`      The tuple of the line numbers of one iteration.
+    `iterations` The number of times that the sequence was repeated.
+    `minRSS`     The smallest resident memory counter of the line
+                 events or None if the records have no memory counter.
+    `maxRSS`     The largest resident memory counter or None.
+    `source`     The source code of the first line.
+    `filename`   The filename of the first line.
+    ============ =====================================================
+
+    """
+
+    __slots__ = ()
+
+    header = LINE_LOOP_RECORD_TEMPLATE
+    line = LINE_LOOP_RECORD_TEMPLATE
+
+
+class FunctionContextRecord(
+        namedtuple('FunctionContextRecord', FUNCTION_CONTEXT_RECORD)):
+    """ The record tuple for function events tagged with the context id.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    `context`  The context id of the thread (see
+               :mod:`pikos.context`).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_CONTEXT_RECORD_TEMPLATE
+    line = FUNCTION_CONTEXT_RECORD_TEMPLATE
+
+
+class FunctionTimeContextRecord(
+        namedtuple('FunctionTimeContextRecord', FUNCTION_TIME_CONTEXT_RECORD)):
+    """ The record tuple for wall and cpu time on function events tagged
+    with the context id.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `wallTime` The monotonic wall clock time.
+    `cpuTime`  The cpu time used by the current thread.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    `context`  The context id of the thread (see
+               :mod:`pikos.context`).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_TIME_CONTEXT_HEADER_TEMPLATE
+    line = FUNCTION_TIME_CONTEXT_RECORD_TEMPLATE
+
+
+class SlowCallContextRecord(
+        namedtuple('SlowCallContextRecord', SLOW_CALL_CONTEXT_RECORD)):
+    """ The record tuple for slow function calls tagged with the context id
+    that was active when the function was called.
+
+    ========== ========================================================
+    Field      Description
+    ========== ========================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `duration` The wall time in seconds from the call to the return.
+    `depth`    The call depth relative to the outermost monitored call.
+    `lineNo`   The line number where the function is defined.
+    `filename` The filename where the function is defined.
+    `stack`    A tuple of ``filename:lineNo(function)`` strings of the
+               calling frames (outermost first) or None.
+    `context`  The context id of the thread at the call (see
+               :mod:`pikos.context`).
+    ========== ========================================================
+
+    """
+
+    __slots__ = ()
+
+    header = SLOW_CALL_CONTEXT_HEADER_TEMPLATE
+    line = SLOW_CALL_CONTEXT_RECORD_TEMPLATE
+
+
+class FunctionWeightRecord(
+        namedtuple('FunctionWeightRecord', FUNCTION_WEIGHT_RECORD)):
+    """ The record tuple for sampled function events.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    `weight`   The number of events that the record stands for
+               (one in `weight` events was recorded).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_WEIGHT_RECORD_TEMPLATE
+    line = FUNCTION_WEIGHT_RECORD_TEMPLATE
+
+
+class LineWeightRecord(namedtuple('LineWeightRecord', LINE_WEIGHT_RECORD)):
+    """ The record for sampled line trace events.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `function` The name of the function.
+    `lineNo`   The line number when the function is defined.
+    `line`     The line that is going to be executed.
+    `filename` The filename where the function is defined.
+    `weight`   The number of events that the record stands for
+               (one in `weight` events was recorded).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = LINE_WEIGHT_RECORD_TEMPLATE
+    line = LINE_WEIGHT_RECORD_TEMPLATE
+
+
+class FunctionTimeWeightRecord(
+        namedtuple('FunctionTimeWeightRecord', FUNCTION_TIME_WEIGHT_RECORD)):
+    """ The record tuple for wall and cpu time on sampled function events.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `wallTime` The monotonic wall clock time.
+    `cpuTime`  The cpu time used by the current thread.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    `weight`   The number of events that the record stands for
+               (one in `weight` events was recorded).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_TIME_WEIGHT_HEADER_TEMPLATE
+    line = FUNCTION_TIME_WEIGHT_RECORD_TEMPLATE
+
+
+class FunctionMemoryWeightRecord(
+        namedtuple(
+            'FunctionMemoryWeightRecord', FUNCTION_MEMORY_WEIGHT_RECORD)):
+    """ The record tuple for memory usage on sampled function events.
+
+    ========== ================================================
+    Field      Description
+    ========== ================================================
+    `index`    The current index of the record.
+    `type`     The type of the event (see Python trace method).
+    `function` The name of the function.
+    `RSS`      The resident memory counter.
+    `VMS`      The virtual memory counter.
+    `lineNo`   The line number when the function is defined.
+    `filename` The filename where the function is defined.
+    `weight`   The number of events that the record stands for
+               (one in `weight` events was recorded).
+    ========== ================================================
+
+    """
+
+    __slots__ = ()
+
+    header = FUNCTION_MEMORY_WEIGHT_HEADER_TEMPLATE
+    line = FUNCTION_MEMORY_WEIGHT_RECORD_TEMPLATE
+
+
+class StatsRecord(namedtuple('StatsRecord', STATS_RECORD)):
+    """ The record tuple for the internal counters of a monitor or recorder.
+
+    The counters that do not apply to the component are None.
+
+    =========== =======================================================
+    Field       Description
+    =========== =======================================================
+    `component` The class name of the monitor or recorder.
+    `events`    The number of events (or records) that were received.
+    `recorded`  The number of records that were sent (or stored).
+    `filtered`  The number of records that were rejected by the filter.
+    `time`      The time in seconds spent in the hook of the monitor.
+    `bytes`     The size of the output.
+    `queued`    The number of records that wait to be written.
+    `dropped`   The number of records that have been lost.
+    =========== =======================================================
+
+    """
+
+    __slots__ = ()
+
+    header = STATS_HEADER_TEMPLATE
+    line = STATS_RECORD_TEMPLATE
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: pool.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Monitor the worker processes of a multiprocessing pool.
+
+The :class:`MonitoredPool` is a drop-in replacement of
+:class:`multiprocessing.pool.Pool` that enables a pikos monitor in every
+worker process. Each worker writes its records to a binary file (see
+:class:`~pikos.recorders.pickle_file_recorder.PickleFileRecorder`) and the
+files are merged into one csv file with the pid of the worker as the first
+column when the pool is joined::
+
+    from pikos.pool import MonitoredPool
+
+    pool = MonitoredPool(4, output='pool_records.csv')
+    pool.map(work, items)
+    pool.close()
+    pool.join()
+
+The worker files are written when the worker processes exit, so the pool
+needs to be closed (and not terminated) for the records to be complete.
+
+"""
+import csv
+import glob
+import os
+import shutil
+import tempfile
+from multiprocessing.pool import Pool
+from multiprocessing.util import Finalize
+
+from pikos.recorders.pickle_file_recorder import (
+    PickleFileRecorder, read_records)
+
+#: The name of the record file of a worker in the pool directory.
+WORKER_FILENAME = 'worker.{pid}.pikos'
+
+
+def _start_worker(monitor_factory, directory, filter_, initializer,
+                  initargs):
+    """ Initialize a worker process and enable the monitor.
+
+    """
+    filename = os.path.join(directory, WORKER_FILENAME.format(pid=os.getpid()))
+    recorder = PickleFileRecorder(filename, filter_=filter_)
+    monitor = monitor_factory(recorder)
+    # Disable the monitor (and close the file) when the worker exits.
+    Finalize(None, monitor.disable, exitpriority=100)
+    if initializer is not None:
+        initializer(*initargs)
+    monitor.enable()
+
+
+def merge_records(filenames, output):
+    """ Merge the record files of the workers into one csv file.
+
+    Parameters
+    ----------
+    filenames : list
+        The files written by
+        :class:`~pikos.recorders.pickle_file_recorder.PickleFileRecorder`.
+
+    output : string
+        The path of the csv file. The first column is the pid of the worker
+        that created the record.
+
+    Returns
+    -------
+    count : int
+        The number of records that have been merged.
+
+    """
+    count = 0
+    header_written = False
+    with open(output, 'wb') as handle:
+        writer = csv.writer(handle)
+        for filename in sorted(filenames):
+            pid, fields, records = read_records(filename)
+            if not header_written and fields is not None:
+                writer.writerow(('pid',) + tuple(fields))
+                header_written = True
+            for record in records:
+                writer.writerow((pid,) + record)
+            count += len(records)
+    return count
+
+
+class MonitoredPool(Pool):
+    """ A process pool that monitors the workers and merges their records.
+
+    Public
+    ------
+    output : string
+        The path of the merged csv file.
+
+    directory : string
+        The temporary directory of the worker files.
+
+    """
+
+    def __init__(self, processes=None, initializer=None, initargs=(),
+                 maxtasksperchild=None, monitor_factory=None,
+                 output='pikos_pool.csv', filter_=None,
+                 keep_worker_files=False):
+        """ Initialize the pool.
+
+        Parameters
+        ----------
+        processes, initializer, initargs, maxtasksperchild :
+            See :class:`multiprocessing.pool.Pool`.
+
+        monitor_factory : callable
+            A callable that accepts the recorder of the worker and returns
+            the monitor to enable (e.g. a monitor class). Default is the
+            :class:`~pikos.monitors.function_monitor.FunctionMonitor`.
+
+        output : string
+            The path of the merged csv file.
+
+        filter_ : callable
+            A callable function that accepts a record and returns True if
+            the record should be kept. Default is to keep all the records.
+
+        keep_worker_files : bool
+            Keep the directory of the worker files after the merge. Default
+            is False.
+
+        """
+        if monitor_factory is None:
+            from pikos.monitors.function_monitor import FunctionMonitor
+            monitor_factory = FunctionMonitor
+        self.output = output
+        self.directory = tempfile.mkdtemp(prefix='pikos-pool-')
+        self._keep_worker_files = keep_worker_files
+        self._merged = False
+        Pool.__init__(
+            self, processes, _start_worker,
+            (monitor_factory, self.directory, filter_, initializer,
+             initargs),
+            maxtasksperchild)
+
+    def join(self):
+        """ Wait for the workers to exit and merge their records.
+
+        """
+        Pool.join(self)
+        if not self._merged:
+            self.merge()
+
+    def merge(self):
+        """ Merge the worker files into the output file.
+
+        Returns
+        -------
+        count : int
+            The number of records that have been merged.
+
+        """
+        pattern = os.path.join(self.directory, WORKER_FILENAME.format(pid='*'))
+        count = merge_records(glob.glob(pattern), self.output)
+        self._merged = True
+        if not self._keep_worker_files:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        return count
@@ -25,6 +25,11 @@ class AbstractRecorder(object):
 
     __metaclass__ = abc.ABCMeta
 
+    # The number of records that have been passed to the recorder and the
+    # number of them that have been accepted by the filter (see stats).
+    _events = 0
+    _recorded = 0
+
     @abc.abstractmethod
     def prepare(self, record):
         """ Perform any setup required before the recorder is used.
@@ -53,3 +58,29 @@ class AbstractRecorder(object):
             An instance of the record class that is going to be used.
 
         """
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        Returns
+        -------
+        stats : dict
+            The number of records that have been passed to the recorder
+            (``events``), stored (``recorded``) and rejected by the filter
+            (``filtered``). Recorders add their own counters where they
+            apply: the size of the output in ``bytes``, the records that are
+            waiting to be written (``queued``) and the records that have
+            been lost (``dropped``).
+
+        """
+        return {
+            'events': self._events,
+            'recorded': self._recorded,
+            'filtered': self._events - self._recorded}
+
+    def _reset_stats(self):
+        """ Restart the counters (e.g. in a forked child process).
+
+        """
+        self._events = 0
+        self._recorded = 0
@@ -12,10 +12,18 @@ __all__ = [
     'TextFileRecorder',
     'CSVFileRecorder',
     'CSVRecorder',
+    'FlightRecorder',
+    'LineLoopRecorder',
+    'PickleFileRecorder',
+    'SummaryRecorder',
     'TextStreamRecorder',
 ]
 from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_file_recorder import TextFileRecorder
 from pikos.recorders.csv_file_recorder import CSVFileRecorder
 from pikos.recorders.csv_recorder import CSVRecorder
+from pikos.recorders.flight_recorder import FlightRecorder
+from pikos.recorders.line_loop_recorder import LineLoopRecorder
+from pikos.recorders.pickle_file_recorder import PickleFileRecorder
+from pikos.recorders.summary_recorder import SummaryRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
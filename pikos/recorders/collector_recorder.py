@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: recorders/collector_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+import os
+
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.recorders.abstract_recorder import AbstractRecorder, RecorderError
+
+
+class CollectorRecorder(AbstractRecorder):
+    """ A recorder that pushes the records to a local collector process.
+
+    The records are sent in batches on a 0MQ PUSH socket that connects to
+    the :class:`~pikos.collector.Collector` (see :mod:`pikos.collector`).
+    Unlike the :class:`~pikos.recorders.zeromq_recorder.ZeroMQRecorder`
+    the recorder does not bind a socket, so any number of processes can
+    record at the same time.
+
+    The records are sent with :mod:`marshal` (see :mod:`pikos.collector`),
+    so their values should be plain python values (numbers, strings, None
+    and containers of them).
+
+    The recorder never blocks the monitored process. When the collector is
+    not running (or cannot keep up) and the send queue is full the batch is
+    dropped and counted in :attr:`dropped`.
+
+    Public
+    ------
+    endpoint : string
+        The endpoint of the collector.
+
+    dropped : int
+        The number of records that could not be sent.
+
+    Private
+    -------
+    _filter : callable
+        Used to check if the data entry should be recorded.
+
+    _batch : list
+        The records waiting to be sent.
+
+    _ready : bool
+        Signify that the Recorder is ready to accept data.
+
+    Notes
+    -----
+    When the process forks while the recorder is active the child connects
+    a new socket to the collector and its records are collected as a new
+    stream.
+
+    """
+
+    def __init__(self, endpoint=None, filter_=None, batch_size=32,
+                 high_water_mark=1000):
+        """ Class initialization.
+
+        Parameters
+        ----------
+        endpoint : string
+            The endpoint of the collector. Default is the default endpoint
+            of :class:`~pikos.collector.Collector`.
+
+        filter_ : callable
+            A callable function that accepts a data tuple and returns True
+            if the input should be recorded. Default is None.
+
+        batch_size : int
+            The number of records to send in one message. The remaining
+            records are sent when the recorder is finalized.
+
+        high_water_mark : int
+            The number of messages to queue while the collector is not
+            receiving them.
+
+        """
+        if endpoint is None:
+            from pikos.collector import default_endpoint
+            endpoint = default_endpoint()
+        self.endpoint = endpoint
+        self.dropped = 0
+        self._bytes = 0
+        self._filter = (lambda x: True) if filter_ is None else filter_
+        self._batch_size = batch_size
+        self._high_water_mark = high_water_mark
+        self._batch = []
+        self._fields = None
+        self._context = None
+        self._socket = None
+        self._ready = False
+
+    @property
+    def ready(self):
+        """ Is the recorder ready to accept data?
+
+        """
+        return self._ready
+
+    def prepare(self, record):
+        """ Connect to the collector and send the header of the stream.
+
+        Parameters
+        ----------
+        record : NamedTuple
+            The record class that is going to be used.
+
+        """
+        if not self._ready:
+            self._fields = getattr(record, '_fields', None)
+            self._connect()
+            self._ready = True
+            register_fork_handler(self)
+
+    def finalize(self):
+        """ Send the remaining records and close the connection.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if not self._ready:
+            msg = 'Method called while recorder has not been prepared yet'
+            raise RecorderError(msg)
+        unregister_fork_handler(self)
+        self.flush()
+        self._send(('stop', os.getpid(), None))
+        # Give the collector some time to receive the queued messages.
+        self._socket.close(linger=1000)
+        self._context.term()
+        self._socket = self._context = None
+        self._ready = False
+
+    def record(self, data):
+        """ Queue the data entry when the filter function returns True.
+
+        Parameters
+        ----------
+        data : NamedTuple
+            The record entry.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if self._ready:
+            self._events += 1
+            if self._filter(data):
+                self._recorded += 1
+                batch = self._batch
+                batch.append(tuple(data))
+                if len(batch) >= self._batch_size:
+                    self.flush()
+        else:
+            msg = 'Method called while recorder is not ready to record'
+            raise RecorderError(msg)
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``bytes`` counter is the size of the messages that have been
+        queued on the socket, ``queued`` is the number of records that wait
+        for the next batch and ``dropped`` is :attr:`dropped`.
+
+        """
+        stats = super(CollectorRecorder, self).stats()
+        stats['bytes'] = self._bytes
+        stats['queued'] = len(self._batch)
+        stats['dropped'] = self.dropped
+        return stats
+
+    def flush(self):
+        """ Send the queued records to the collector.
+
+        """
+        if len(self._batch) > 0:
+            batch, self._batch = self._batch, []
+            if not self._send(('records', os.getpid(), batch)):
+                self.dropped += len(batch)
+
+    def _connect(self):
+        import marshal
+        import zmq
+        self._dumps = marshal.dumps
+        self._noblock = zmq.NOBLOCK
+        self._again = zmq.Again
+        self._context = zmq.Context()
+        self._socket = self._context.socket(zmq.PUSH)
+        self._socket.setsockopt(zmq.SNDHWM, self._high_water_mark)
+        self._socket.connect(self.endpoint)
+        self._send(('header', os.getpid(), self._fields))
+
+    def _send(self, message):
+        data = self._dumps(message, 2)
+        try:
+            self._socket.send(data, self._noblock)
+        except self._again:
+            return False
+        self._bytes += len(data)
+        return True
+
+    def _before_fork(self):
+        self.flush()
+
+    def _after_fork(self):
+        """ Connect a new socket to the collector in the forked child.
+
+        The 0MQ context of the parent cannot be used in the child and it is
+        dropped without closing it.
+
+        """
+        self._batch = []
+        self.dropped = 0
+        self._reset_stats()
+        self._bytes = 0
+        self._connect()
@@ -8,7 +8,11 @@
 #  All rights reserved.
 #------------------------------------------------------------------------------
 import csv
+from StringIO import StringIO
 
+from pikos._internal.fork import (
+    DeferredFile, pid_filename, register_fork_handler,
+    unregister_fork_handler)
 from pikos.recorders.csv_recorder import CSVRecorder
 
 
@@ -32,9 +36,19 @@ class CSVFileRecorder(CSVRecorder):
     _filename : string
         The name and path of the file to be used for output.
 
-    _file : file
+    _handle : file
         The file object where records are stored.
 
+    _record_type : class
+        The record class that the recorder has been prepared with.
+
+    Notes
+    -----
+    When the process forks while the recorder is active, the child writes
+    its records to a new file with the pid of the child inserted before the
+    extension (e.g. ``records.1234.csv``). The file is only created if the
+    child records something.
+
     """
 
     def __init__(self, filename, filter_=None, **csv_kwargs):
@@ -58,6 +72,8 @@ class CSVFileRecorder(CSVRecorder):
         self._csv_kwargs = csv_kwargs
         self._handle = None
         self._writer = None
+        self._record_type = None
+        self._bytes = 0
         self._ready = False
 
     def prepare(self, record):
@@ -67,7 +83,9 @@ class CSVFileRecorder(CSVRecorder):
         if not self._ready:
             self._handle = open(self._filename, 'wb')
             self._writer = csv.writer(self._handle, **self._csv_kwargs)
+            self._record_type = record
             super(CSVFileRecorder, self).prepare(record)
+            register_fork_handler(self)
 
     def finalize(self):
         """ Finalize the recorder.
@@ -80,6 +98,43 @@ class CSVFileRecorder(CSVRecorder):
 
         """
         super(CSVFileRecorder, self).finalize()
+        unregister_fork_handler(self)
         if not self._handle.closed:
             self._handle.flush()
+            self._bytes = self._handle.tell()
             self._handle.close()
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``bytes`` counter is the size of the file.
+
+        """
+        stats = super(CSVFileRecorder, self).stats()
+        if self._handle is not None and not self._handle.closed:
+            self._bytes = self._handle.tell()
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _before_fork(self):
+        """ Flush the file so that the buffered records are not written
+        again by the forked child.
+
+        """
+        self._handle.flush()
+
+    def _after_fork(self):
+        """ Write the records of the forked child to a new file.
+
+        """
+        # The file has been flushed before the fork.
+        self._handle.close()
+        self._reset_stats()
+        self._bytes = 0
+        header = StringIO()
+        if hasattr(self._record_type, '_fields'):
+            csv.writer(header, **self._csv_kwargs).writerow(
+                self._record_type._fields)
+        self._handle = DeferredFile(
+            pid_filename(self._filename), 'wb', header.getvalue())
+        self._writer = csv.writer(self._handle, **self._csv_kwargs)
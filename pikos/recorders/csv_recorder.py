@@ -91,8 +91,10 @@ class CSVRecorder(AbstractRecorder):
 
         """
         if self._ready:
+            self._events += 1
             if self._filter(data):
                 self._writer.writerow(data)
+                self._recorded += 1
         else:
             msg = 'Method called while recorder is not ready to record'
             raise RecorderError(msg)
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: recorders/flight_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+import os
+import signal
+import sys
+import warnings
+
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.recorders.abstract_recorder import AbstractRecorder, RecorderError
+from pikos.recorders.text_stream_recorder import TextStreamRecorder
+
+
+class FlightRecorder(AbstractRecorder):
+    """ A recorder that keeps the last records in a fixed size ring buffer
+    and writes them to a file only when a trigger fires.
+
+    The available triggers are:
+
+    - an exception that propagates out of the ``with`` block of the
+      recorder (e.g. ``with recorder, monitor:``).
+    - an uncaught exception of the main thread while the recorder is
+      prepared when `dump_on_exception` is set (e.g. a monitor that is left
+      enabled or is switched on by :mod:`pikos.control`).
+    - the `dump_signal` (SIGUSR2 by default) sent to the process.
+    - the RSS of the process exceeding `rss_limit` bytes.
+    - an explicit call to :meth:`dump`.
+
+    The ring buffer is allocated when the recorder is created so the memory
+    used while recording is bounded and no io takes place unless a trigger
+    fires. When the process forks while the recorder is active the ring of
+    the child starts empty (use the ``{pid}`` field in the `filename` to
+    keep the dumps of the processes apart).
+
+    Public
+    ------
+    dumps : list
+        The filenames of the dumps that have been written.
+
+    Private
+    -------
+    _ring : list
+        The preallocated ring buffer of records.
+
+    _position : int
+        The position in the ring where the next record will be stored.
+
+    _count : int
+        The number of records that have been stored in the ring.
+
+    _dumping : bool
+        Set while a dump is written so that records that are created by the
+        dump itself are ignored.
+
+    _previous_excepthook : callable
+        The :func:`sys.excepthook` that was replaced by the exception
+        trigger or None when the trigger is not installed. The trigger
+        stays in place when another hook has been installed on top of it.
+
+    """
+
+    def __init__(self, filename, size=10000, filter_=None,
+                 dump_signal=getattr(signal, 'SIGUSR2', None),
+                 rss_limit=None, check_interval=1000, formatted=True,
+                 dump_on_exception=False):
+        """ Class initialization.
+
+        Parameters
+        ----------
+        filename : string
+            The file path of the dumps. The path can contain the ``{index}``,
+            ``{pid}`` and ``{reason}`` replacement fields which are replaced
+            with the zero based dump index, the process id and the trigger
+            name respectively.
+
+        size : int
+            The number of records to keep. Default is 10000.
+
+        filter_ : callable
+            A callable function that accepts a data tuple and returns True
+            if the input should be kept.
+
+        dump_signal : int
+            The signal number that triggers a dump. Default is SIGUSR2 (when
+            available). Set to None to disable the signal trigger.
+
+        rss_limit : int
+            The process RSS in bytes above which a dump is triggered. Default
+            is None (disabled).
+
+        check_interval : int
+            The number of records between RSS checks. Default is 1000.
+
+        formatted : bool
+            Use the predefined formatting of the records in the dump.
+            Default is True.
+
+        dump_on_exception : bool
+            Dump the ring on an uncaught exception. The hook is installed
+            when the recorder is prepared and the previous hook is restored
+            when it is finalized. An exception that exits the monitor
+            reaches :func:`sys.excepthook` after the monitor has been
+            disabled, use the recorder as a context manager (``with
+            recorder, monitor:``) to dump the ring in that case. Default is
+            False.
+
+        """
+        if size < 1:
+            raise ValueError('The ring size should be a positive integer')
+        if check_interval < 1:
+            raise ValueError(
+                'The check interval should be a positive integer')
+        self._filename = filename
+        self._size = size
+        self._filter = (lambda x: True) if filter_ is None else filter_
+        self._dump_signal = dump_signal
+        self._rss_limit = rss_limit
+        self._check_interval = check_interval
+        self._formatted = formatted
+        self._dump_on_exception = dump_on_exception
+        self._ring = [None] * size
+        self._position = 0
+        self._count = 0
+        self._record_type = None
+        self._process = None
+        self._rss_exceeded = False
+        self._previous_handler = None
+        self._previous_excepthook = None
+        self._dumping = False
+        self._ready = False
+        self.dumps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """ Dump the ring if an exception propagates out of the block.
+
+        """
+        if exc_type is not None:
+            self.dump('exception')
+
+    @property
+    def ready(self):
+        """ Is the recorder ready to accept data?
+
+        """
+        return self._ready
+
+    @property
+    def records(self):
+        """ The records in the ring buffer, from the oldest to the newest.
+
+        """
+        if self._count < self._size:
+            return self._ring[:self._count]
+        else:
+            position = self._position
+            return self._ring[position:] + self._ring[:position]
+
+    def prepare(self, record):
+        """ Prepare the recorder to accept data and install the triggers.
+
+        Parameters
+        ----------
+        record : NamedTuple
+            The record class that is going to be used.
+
+        """
+        if not self._ready:
+            self._record_type = record
+            if self._rss_limit is not None:
+                import psutil
+                self._process = psutil.Process(os.getpid())
+            if self._dump_signal is not None:
+                self._install_signal_handler()
+            if (self._dump_on_exception and
+                    self._previous_excepthook is None):
+                self._previous_excepthook = sys.excepthook
+                sys.excepthook = self._on_exception
+            self._ready = True
+            register_fork_handler(self)
+
+    def finalize(self):
+        """ Finalize the recorder and remove the signal and exception
+        triggers.
+
+        The records are kept so that a dump can still be triggered by an
+        exception that causes the monitor to exit (see :meth:`__exit__`) or
+        by an explicit call to :meth:`dump`.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if not self._ready:
+            msg = 'Method called while recorder has not been prepared yet'
+            raise RecorderError(msg)
+        if self._previous_handler is not None:
+            signal.signal(self._dump_signal, self._previous_handler)
+            self._previous_handler = None
+        if (self._previous_excepthook is not None and
+                sys.excepthook == self._on_exception):
+            sys.excepthook = self._previous_excepthook
+            self._previous_excepthook = None
+        unregister_fork_handler(self)
+        self._process = None
+        self._ready = False
+
+    def record(self, data):
+        """ Store the data entry in the ring when the filter function returns
+        True.
+
+        Parameters
+        ----------
+        data : NamedTuple
+            The record entry.
+
+        """
+        if self._ready and not self._dumping:
+            self._events += 1
+            if not self._filter(data):
+                return
+            self._recorded += 1
+            self._ring[self._position] = data
+            self._position = (self._position + 1) % self._size
+            self._count += 1
+            if (self._process is not None and
+                    self._count % self._check_interval == 0):
+                self._check_memory()
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``queued`` counter is the number of records in the ring and
+        ``dropped`` is the number of records that have been overwritten.
+
+        """
+        stats = super(FlightRecorder, self).stats()
+        queued = min(self._count, self._size)
+        stats['queued'] = queued
+        stats['dropped'] = self._count - queued
+        return stats
+
+    def dump(self, reason='manual'):
+        """ Write the records of the ring buffer to a new dump file.
+
+        Parameters
+        ----------
+        reason : string
+            The name of the trigger.
+
+        Returns
+        -------
+        filename : string
+            The path of the dump file or None if there are no records.
+
+        """
+        if self._dumping or self._count == 0:
+            return None
+        self._dumping = True
+        try:
+            records = self.records
+            filename = self._filename.format(
+                index=len(self.dumps), pid=os.getpid(), reason=reason)
+            with open(filename, 'w') as handle:
+                recorder = TextStreamRecorder(
+                    handle, formatted=self._formatted)
+                recorder.prepare(self._record_type or type(records[0]))
+                for record in records:
+                    recorder.record(record)
+                recorder.finalize()
+            self.dumps.append(filename)
+            return filename
+        finally:
+            self._dumping = False
+
+    def _after_fork(self):
+        """ Empty the ring and monitor the memory of the forked child.
+
+        """
+        self._ring = [None] * self._size
+        self._position = 0
+        self._count = 0
+        self._rss_exceeded = False
+        self.dumps = []
+        self._reset_stats()
+        if self._process is not None:
+            import psutil
+            self._process = psutil.Process(os.getpid())
+
+    def _check_memory(self):
+        """ Dump the ring when the RSS crosses the limit.
+
+        """
+        rss = self._process.memory_info()[0]
+        if rss > self._rss_limit:
+            if not self._rss_exceeded:
+                self._rss_exceeded = True
+                self.dump('rss')
+        else:
+            self._rss_exceeded = False
+
+    def _install_signal_handler(self):
+        """ Install the signal handler that dumps the ring.
+
+        """
+        try:
+            previous = signal.signal(self._dump_signal, self._on_signal)
+        except ValueError:
+            warnings.warn(
+                'The flight recorder signal trigger can only be installed '
+                'from the main thread')
+        else:
+            self._previous_handler = (
+                signal.SIG_DFL if previous is None else previous)
+
+    def _on_signal(self, signum, frame):
+        self.dump('signal')
+
+    def _on_exception(self, exc_type, exc_value, exc_tb):
+        try:
+            if self._ready:
+                self.dump('exception')
+        finally:
+            self._previous_excepthook(exc_type, exc_value, exc_tb)
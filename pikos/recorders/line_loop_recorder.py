@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: recorders/line_loop_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
+from pikos.monitors.records import LINE_RECORD, LineLoopRecord
+from pikos.recorders.abstract_recorder import AbstractRecorder, RecorderError
+
+
+class LineLoopRecorder(AbstractRecorder):
+    """ A recorder wrapper that compresses the repeated sequences of line
+    events.
+
+    The line records (e.g. of the
+    :class:`~pikos.monitors.line_monitor.LineMonitor` or the
+    :class:`~pikos.monitors.line_memory_monitor.LineMemoryMonitor`) are
+    compared as they arrive. A sequence of up to `max_period` lines that is
+    executed again and again (e.g. the body of a loop) is sent to the
+    wrapped recorder as a single :class:`~.LineLoopRecord` with the number
+    of iterations and the range of the resident memory. The other lines are
+    sent as records of a single line, so the order of execution is kept.
+
+    Two line events are the same when their function, line number and
+    filename are equal.
+
+    Private
+    -------
+    _pending : list
+        The line records that are not part of a loop yet.
+
+    _cycle : list
+        The line records of the first iteration of the current loop or None.
+
+    _position : int
+        The position of the next expected line in the current loop.
+
+    _partial : list
+        The line records of the incomplete iteration of the current loop.
+
+    """
+
+    def __init__(self, recorder, max_period=16, record_type=None):
+        """ Class initialization.
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder to send the compressed records to.
+
+        max_period : int
+            The largest number of line events in one iteration of a loop
+            that is detected.
+
+        record_type : type
+            The record class to send. Default is :class:`~.LineLoopRecord`.
+
+        """
+        self._recorder = recorder
+        self._max_period = max_period
+        self._record_type = \
+            LineLoopRecord if record_type is None else record_type
+        self._use_tuple = self._record_type is tuple
+        self._key = None
+        self._rss = None
+        self._reset()
+
+    @property
+    def ready(self):
+        """ Is the recorder ready to accept data?
+
+        """
+        return getattr(self._recorder, 'ready', True)
+
+    def prepare(self, record):
+        """ Prepare the wrapped recorder.
+
+        Parameters
+        ----------
+        record : NamedTuple
+            The line record class that is going to be used.
+
+        """
+        fields = getattr(record, '_fields', LINE_RECORD)
+        positions = [
+            fields.index(name) for name in ('function', 'lineNo', 'filename')]
+        self._key = lambda data: tuple(data[index] for index in positions)
+        self._index = fields.index('index')
+        self._source = fields.index('line')
+        self._rss = fields.index('RSS') if 'RSS' in fields else None
+        self._recorder.prepare(self._record_type)
+        register_fork_handler(self)
+
+    def finalize(self):
+        """ Send the pending records and finalize the wrapped recorder.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if self._key is None:
+            msg = 'Method called while recorder has not been prepared yet'
+            raise RecorderError(msg)
+        unregister_fork_handler(self)
+        self.flush()
+        self._key = None
+        self._recorder.finalize()
+
+    def record(self, data):
+        """ Compress a line record.
+
+        Parameters
+        ----------
+        data : NamedTuple
+            The line record.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if self._key is None:
+            msg = 'Method called while recorder is not ready to record'
+            raise RecorderError(msg)
+        self._events += 1
+        key = self._key(data)
+        cycle = self._cycle
+        if cycle is not None:
+            if key == self._cycle_keys[self._position]:
+                self._partial.append(data)
+                self._position += 1
+                if self._position == len(cycle):
+                    self._update_rss(self._partial)
+                    self._iterations += 1
+                    self._position = 0
+                    self._partial = []
+                return
+            # The loop has ended.
+            partial = self._partial
+            self._send_loop()
+            for item in partial:
+                self._append(item, self._key(item))
+        self._append(data, key)
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``recorded`` counter is the number of compressed records that
+        have been sent to the wrapped recorder and ``queued`` is the number
+        of line records that wait to be compressed.
+
+        """
+        stats = super(LineLoopRecorder, self).stats()
+        stats['filtered'] = 0
+        stats['queued'] = len(self._pending) + len(self._partial)
+        return stats
+
+    def flush(self):
+        """ Send the current loop and the pending records.
+
+        """
+        if self._cycle is not None:
+            partial = self._partial
+            self._send_loop()
+            self._pending.extend(partial)
+        for data in self._pending:
+            self._send_single(data)
+        self._pending = []
+        self._pending_keys = []
+
+    def _append(self, data, key):
+        pending = self._pending
+        keys = self._pending_keys
+        pending.append(data)
+        keys.append(key)
+        size = len(keys)
+        for period in range(1, min(self._max_period, size // 2) + 1):
+            if keys[-1] == keys[-1 - period] and \
+                    keys[-period:] == keys[-2 * period:-period]:
+                for item in pending[:-2 * period]:
+                    self._send_single(item)
+                self._cycle = pending[-2 * period:-period]
+                self._cycle_keys = keys[-period:]
+                self._iterations = 2
+                self._position = 0
+                self._partial = []
+                self._min_rss = self._max_rss = None
+                self._update_rss(pending[-2 * period:])
+                self._pending = []
+                self._pending_keys = []
+                return
+        if size > 2 * self._max_period:
+            self._send_single(pending.pop(0))
+            keys.pop(0)
+
+    def _update_rss(self, records):
+        rss = self._rss
+        if rss is None:
+            return
+        values = [data[rss] for data in records]
+        low = min(values)
+        high = max(values)
+        if self._min_rss is None or low < self._min_rss:
+            self._min_rss = low
+        if self._max_rss is None or high > self._max_rss:
+            self._max_rss = high
+
+    def _send_single(self, data):
+        rss = None if self._rss is None else data[self._rss]
+        function, lineno, filename = self._key(data)
+        self._send((
+            data[self._index], function, lineno, (lineno,), 1, rss, rss,
+            data[self._source], filename))
+
+    def _send_loop(self):
+        first = self._cycle[0]
+        function, lineno, filename = self._key(first)
+        lines = tuple(key[1] for key in self._cycle_keys)
+        self._send((
+            first[self._index], function, lineno, lines, self._iterations,
+            self._min_rss, self._max_rss, first[self._source], filename))
+        self._cycle = None
+        self._partial = []
+
+    def _send(self, record):
+        if not self._use_tuple:
+            record = self._record_type(*record)
+        self._recorder.record(record)
+        self._recorded += 1
+
+    def _reset(self):
+        self._pending = []
+        self._pending_keys = []
+        self._cycle = None
+        self._cycle_keys = None
+        self._position = 0
+        self._partial = []
+        self._iterations = 0
+        self._min_rss = None
+        self._max_rss = None
+
+    def _after_fork(self):
+        """ Drop the records of the parent in the forked child process.
+
+        """
+        self._reset()
+        self._reset_stats()
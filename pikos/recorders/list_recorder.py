@@ -7,6 +7,8 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos.recorders.abstract_recorder import AbstractRecorder
 
 
@@ -19,6 +21,8 @@ class ListRecorder(AbstractRecorder):
     records : list
         List of records. The Recorder assumes that the record method is
         provided with a tuple and accumulates all the records in a list.
+        When the process forks while the recorder is active the list of the
+        child starts empty.
 
     Private
     -------
@@ -49,7 +53,7 @@ class ListRecorder(AbstractRecorder):
         .. note:: nothing to do for the ListRecorder.
 
         """
-        pass
+        register_fork_handler(self)
 
     def finalize(self):
         """ Finalize the recorder.
@@ -59,7 +63,11 @@ class ListRecorder(AbstractRecorder):
             nothing to do for the ListRecorder.
 
         """
-        pass
+        unregister_fork_handler(self)
+
+    def _after_fork(self):
+        self.records = []
+        self._reset_stats()
 
     @property
     def ready(self):
@@ -77,5 +85,8 @@ class ListRecorder(AbstractRecorder):
             The record entry.
 
         """
-        if self.ready and self._filter(data):
-            self.records.append(data)
+        if self.ready:
+            self._events += 1
+            if self._filter(data):
+                self.records.append(data)
+                self._recorded += 1
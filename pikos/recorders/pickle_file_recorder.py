@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: recorders/pickle_file_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+import os
+
+from pikos._internal.fork import (
+    DeferredFile, pid_filename, register_fork_handler,
+    unregister_fork_handler)
+from pikos.recorders.abstract_recorder import AbstractRecorder, RecorderError
+
+
+class PickleFileRecorder(AbstractRecorder):
+    """ A recorder that writes the records to a binary file.
+
+    The file is a stream of pickled objects. The first object is the header
+    tuple ``(pid, fields)`` with the process id and the field names of the
+    record class (None for plain tuples) and it is followed by one plain
+    tuple per record. Use :func:`read_records` to load the file.
+
+    Writing pickled tuples is cheaper than formatting text and the records
+    keep their python types.
+
+    Private
+    -------
+    _filter : callable
+        Used to check if the data entry should be recorded.
+
+    _handle : file
+        The binary file where the records are stored.
+
+    _pickler : Pickler
+        The pickler that writes to the file.
+
+    _header : tuple
+        The header of the file.
+
+    _ready : bool
+        Signify that the Recorder is ready to accept data.
+
+    Notes
+    -----
+    When the process forks while the recorder is active the child writes its
+    records to a new file with the pid of the child inserted before the
+    extension. The file is only created if the child records something.
+
+    """
+
+    def __init__(self, filename, filter_=None, protocol=2):
+        """ Class initialization.
+
+        Parameters
+        ----------
+        filename : string
+            The file path to use.
+
+        filter_ : callable
+            A callable function that accepts a data tuple and returns True
+            if the input should be recorded. Default is None.
+
+        protocol : int
+            The pickle protocol to use. Default is 2.
+
+        """
+        self._filename = filename
+        self._filter = (lambda x: True) if filter_ is None else filter_
+        self._protocol = protocol
+        self._handle = None
+        self._pickler = None
+        self._header = None
+        self._bytes = 0
+        self._ready = False
+
+    @property
+    def ready(self):
+        """ Is the recorder ready to accept data?
+
+        """
+        return self._ready
+
+    def prepare(self, record):
+        """ Open the file and write the header.
+
+        Parameters
+        ----------
+        record : NamedTuple
+            The record class that is going to be used.
+
+        """
+        if not self._ready:
+            self._header = (os.getpid(), getattr(record, '_fields', None))
+            self._open(open(self._filename, 'wb'))
+            self._pickler.dump(self._header)
+            self._ready = True
+            register_fork_handler(self)
+
+    def finalize(self):
+        """ Close the file.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if not self._ready:
+            msg = 'Method called while recorder has not been prepared yet'
+            raise RecorderError(msg)
+        unregister_fork_handler(self)
+        self._bytes = self._handle.tell()
+        self._handle.close()
+        self._pickler = None
+        self._ready = False
+
+    def record(self, data):
+        """ Write the data entry when the filter function returns True.
+
+        Parameters
+        ----------
+        data : NamedTuple
+            The record entry.
+
+        Raises
+        ------
+        RecorderError :
+            Raised if the method is called without the recorder been ready to
+            accept data.
+
+        """
+        if self._ready:
+            self._events += 1
+            if self._filter(data):
+                self._pickler.dump(tuple(data))
+                self._recorded += 1
+        else:
+            msg = 'Method called while recorder is not ready to record'
+            raise RecorderError(msg)
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``bytes`` counter is the size of the file.
+
+        """
+        stats = super(PickleFileRecorder, self).stats()
+        if self._ready:
+            self._bytes = self._handle.tell()
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _open(self, handle):
+        import cPickle
+        self._handle = handle
+        self._pickler = cPickle.Pickler(handle, self._protocol)
+        # Do not keep a reference to every object that has been written.
+        self._pickler.fast = True
+
+    def _before_fork(self):
+        self._handle.flush()
+
+    def _after_fork(self):
+        """ Write the records of the forked child to a new file.
+
+        """
+        import cPickle
+        # The file has been flushed before the fork.
+        self._handle.close()
+        self._reset_stats()
+        self._bytes = 0
+        self._header = (os.getpid(), self._header[1])
+        header = cPickle.dumps(self._header, self._protocol)
+        self._open(DeferredFile(pid_filename(self._filename), 'wb', header))
+
+
+def read_records(filename):
+    """ Load the records of a file written by a :class:`PickleFileRecorder`.
+
+    A truncated file (e.g. the process was killed while recording) is read
+    up to the last complete record.
+
+    Returns
+    -------
+    pid : int
+        The id of the process that wrote the file.
+
+    fields : tuple
+        The field names of the records or None.
+
+    records : list
+        The records as plain tuples.
+
+    """
+    import cPickle
+    records = []
+    with open(filename, 'rb') as handle:
+        unpickler = cPickle.Unpickler(handle)
+        pid, fields = unpickler.load()
+        while True:
+            try:
+                records.append(unpickler.load())
+            except (EOFError, cPickle.UnpicklingError, ValueError):
+                break
+    return pid, fields, records
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: recorders/summary_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+from pikos.monitors.records import STATS_RECORD, StatsRecord
+from pikos.recorders.abstract_recorder import AbstractRecorder
+
+
+class SummaryRecorder(AbstractRecorder):
+    """ A recorder wrapper that appends the internal counters of the monitor
+    and of the wrapped recorder to the records when it is finalized.
+
+    The records are passed straight to the wrapped recorder, so the wrapper
+    does not add to the cost of recording. When the recorder is finalized
+    (i.e. the monitor is disabled) one :class:`~.StatsRecord` with the
+    :meth:`stats` of the monitor (when set) and one with the stats of the
+    wrapped recorder are recorded before the wrapped recorder is
+    finalized::
+
+        recorder = SummaryRecorder(TextStreamRecorder(sys.stdout))
+        monitor = FunctionMonitor(recorder)
+        recorder.monitor = monitor
+
+    The summary records go through the filter of the wrapped recorder, so the
+    filter needs to accept them.
+
+    Public
+    ------
+    monitor : Monitor
+        The monitor whose counters are recorded or None.
+
+    """
+
+    def __init__(self, recorder, monitor=None, record_type=None):
+        """ Class initialization.
+
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder to wrap.
+
+        monitor : Monitor
+            The monitor whose counters are recorded. It can also be set
+            after the monitor has been created.
+
+        record_type : type
+            The record class of the summary. Default is
+            :class:`~.StatsRecord`.
+
+        """
+        self._recorder = recorder
+        self.monitor = monitor
+        self._record_type = \
+            StatsRecord if record_type is None else record_type
+        self._use_tuple = self._record_type is tuple
+        # Send the records to the wrapped recorder without an extra call.
+        self.record = recorder.record
+
+    @property
+    def ready(self):
+        """ Is the recorder ready to accept data?
+
+        """
+        return getattr(self._recorder, 'ready', True)
+
+    def prepare(self, record):
+        """ Prepare the wrapped recorder.
+
+        """
+        self._recorder.prepare(record)
+
+    def finalize(self):
+        """ Record the summary and finalize the wrapped recorder.
+
+        """
+        recorder = self._recorder
+        summary = []
+        if self.monitor is not None:
+            summary.append(self._summary(self.monitor))
+        # The stats of the recorder are taken before the summary is
+        # recorded.
+        summary.append(self._summary(recorder))
+        for record in summary:
+            recorder.record(record)
+        recorder.finalize()
+
+    def record(self, data):
+        """ Record the data entry with the wrapped recorder.
+
+        """
+        self._recorder.record(data)
+
+    def stats(self):
+        """ Return the internal counters of the wrapped recorder.
+
+        """
+        return self._recorder.stats()
+
+    def _summary(self, component):
+        stats = component.stats()
+        record = (type(component).__name__,) + tuple(
+            stats.get(name) for name in STATS_RECORD[1:])
+        if not self._use_tuple:
+            record = self._record_type(*record)
+        return record
@@ -7,6 +7,9 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
+from StringIO import StringIO
+
+from pikos._internal.fork import DeferredFile, pid_filename
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 
 
@@ -39,6 +42,16 @@ class TextFileRecorder(TextStreamRecorder):
     _filename : string
         The name and path of the file to be used for output.
 
+    _record_type : class
+        The record class that the recorder has been prepared with.
+
+    Notes
+    -----
+    When the process forks while the recorder is active, the child writes
+    its records to a new file with the pid of the child inserted before the
+    extension (e.g. ``records.1234.log``). The file is only created if the
+    child records something.
+
     """
     def __init__(
             self, filename, filter_=None, formatted=False, auto_flush=False):
@@ -67,6 +80,8 @@ class TextFileRecorder(TextStreamRecorder):
         self._formatted = formatted
         self._auto_flush = auto_flush
         self._stream = None
+        self._record_type = None
+        self._bytes = 0
         self._ready = False
 
     def prepare(self, record):
@@ -74,6 +89,7 @@ class TextFileRecorder(TextStreamRecorder):
         """
         if not self._ready:
             self._stream = open(self._filename, 'w')
+            self._record_type = record
             super(TextFileRecorder, self).prepare(record)
 
     def finalize(self):
@@ -90,3 +106,18 @@ class TextFileRecorder(TextStreamRecorder):
         if not self._stream.closed:
             self._stream.flush()
             self._stream.close()
+
+    def _after_fork(self):
+        """ Write the records of the forked child to a new file.
+
+        """
+        # The stream has been flushed before the fork.
+        self._stream.close()
+        self._reset_stats()
+        self._bytes = 0
+        header = StringIO()
+        if hasattr(self._record_type, '_fields'):
+            self._stream = header
+            self._writeheader(self._record_type)
+        self._stream = DeferredFile(
+            pid_filename(self._filename), 'w', header.getvalue())
@@ -7,6 +7,8 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos.recorders.abstract_recorder import AbstractRecorder, RecorderError
 
 
@@ -65,6 +67,7 @@ class TextStreamRecorder(AbstractRecorder):
         self._stream = text_stream
         self._formatted = formatted
         self._auto_flush = auto_flush
+        self._bytes = 0
         self._ready = False
 
     def prepare(self, record):
@@ -81,6 +84,7 @@ class TextStreamRecorder(AbstractRecorder):
             if hasattr(record, '_fields'):
                 self._writeheader(record)
             self._ready = True
+            register_fork_handler(self)
 
     def finalize(self):
         """ Finalize the recorder
@@ -97,6 +101,7 @@ class TextStreamRecorder(AbstractRecorder):
         if not self._ready:
             msg = 'Method called while recorder has not been prepared yet'
             raise RecorderError(msg)
+        unregister_fork_handler(self)
 
     def record(self, data):
         """ Rerord the data entry when the filter function returns True.
@@ -120,15 +125,36 @@ class TextStreamRecorder(AbstractRecorder):
 
         """
         if self._ready:
+            self._events += 1
             if self._filter(data):
                 line = self._format(data)
                 self._stream.write(line)
+                self._recorded += 1
+                self._bytes += len(line)
                 if self._auto_flush:
                     self._stream.flush()
         else:
             msg = 'Method called while recorder is not ready to record'
             raise RecorderError(msg)
 
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``bytes`` counter is the number of characters that have been
+        written to the stream.
+
+        """
+        stats = super(TextStreamRecorder, self).stats()
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _before_fork(self):
+        """ Flush the stream so that the buffered records are not written
+        again by the forked child.
+
+        """
+        self._stream.flush()
+
     def _writeheader(self, record):
         """ Write the header to the stream.
 
@@ -150,6 +176,7 @@ class TextStreamRecorder(AbstractRecorder):
         separator = u'-' * (len(header) - 1) + u'\n'
         self._stream.write(header)
         self._stream.write(separator)
+        self._bytes += len(header) + len(separator)
         if self._auto_flush:
             self._stream.flush()
 
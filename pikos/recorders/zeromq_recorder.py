@@ -7,11 +7,10 @@
 #  Copyright (c) 2012, Enthought, Inc.
 #  All rights reserved.
 #------------------------------------------------------------------------------
-import cPickle as pickle
 import os
 
-import zmq
-
+from pikos._internal.fork import (
+    register_fork_handler, unregister_fork_handler)
 from pikos.recorders.abstract_recorder import AbstractRecorder
 
 
@@ -23,6 +22,15 @@ class ZeroMQRecorder(AbstractRecorder):
     """ The ZeroMQ Recorder is a recorder that publishes each set of
     values on a 0MQ publish socket.
 
+    When the process forks while the recorder is active, the child creates
+    a new 0MQ context and publishes its records on a new socket that is
+    bound to a random port of the same host.
+
+    Public
+    ------
+    endpoint : string
+        The address of the publish socket.
+
     Private
     -------
     _filter : callable
@@ -47,9 +55,15 @@ class ZeroMQRecorder(AbstractRecorder):
             if the input sould be recorded.
 
         """
+        import cPickle
+        import zmq
+        self._dumps = cPickle.dumps
+        self._loads = cPickle.loads
+        self._host = zmq_host
+        self.endpoint = 'tcp://{0}:{1}'.format(zmq_host, zmq_port)
         self._context = zmq.Context()
         self._socket = self._context.socket(zmq.PUB)
-        self._socket.bind('tcp://{0}:{1}'.format(zmq_host, zmq_port))
+        self._socket.bind(self.endpoint)
         if wait_for_ready:
             self._prepare_socket = self._context.socket(zmq.REQ)
             self._prepare_socket.connect('tcp://{0}:{1}'.format(
@@ -57,17 +71,19 @@ class ZeroMQRecorder(AbstractRecorder):
         else:
             self._prepare_socket = None
         self._filter = (lambda x: True) if filter_ is None else filter_
+        self._bytes = 0
         self._ready = not wait_for_ready
 
     def prepare(self, record):
         """ Write the header in the csv file the first time it is called. """
+        register_fork_handler(self)
         if not self._ready:
             ready = False
-            handshake_message = pickle.dumps(
+            handshake_message = self._dumps(
                 (os.getpid(), "Memory", record._fields))
             while not ready:
                 self._prepare_socket.send(handshake_message)
-                ready = pickle.loads(self._prepare_socket.recv()) is True
+                ready = self._loads(self._prepare_socket.recv()) is True
             self._ready = True
             self._prepare_socket.close()
             self._prepare_socket = None
@@ -75,8 +91,9 @@ class ZeroMQRecorder(AbstractRecorder):
     def finalize(self):
         """ Signal that recording has ended.
         """
+        unregister_fork_handler(self)
         if self._ready:
-            self._socket.send(pickle.dumps(RecordingStopped()))
+            self._socket.send(self._dumps(RecordingStopped()))
 
     @property
     def ready(self):
@@ -85,6 +102,37 @@ class ZeroMQRecorder(AbstractRecorder):
 
     def record(self, record):
         """ Rerord entry onlty when the filter function returns True. """
-        if self._ready and self._filter(record):
-            message = (os.getpid(), record)
-            self._socket.send(pickle.dumps(message))
+        if self._ready:
+            self._events += 1
+            if self._filter(record):
+                data = self._dumps((os.getpid(), record))
+                self._socket.send(data)
+                self._recorded += 1
+                self._bytes += len(data)
+
+    def stats(self):
+        """ Return the internal counters of the recorder.
+
+        The ``bytes`` counter is the size of the published messages.
+
+        """
+        stats = super(ZeroMQRecorder, self).stats()
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _after_fork(self):
+        """ Publish the records of the forked child on a new socket.
+
+        The 0MQ context of the parent cannot be used in the child. The old
+        context and sockets are dropped without closing them (pyzmq does
+        not terminate a context that was created by another process).
+
+        """
+        import zmq
+        self._context = zmq.Context()
+        self._socket = self._context.socket(zmq.PUB)
+        address = 'tcp://{0}'.format(self._host)
+        port = self._socket.bind_to_random_port(address)
+        self.endpoint = '{0}:{1}'.format(address, port)
+        self._reset_stats()
+        self._bytes = 0
@@ -103,3 +103,57 @@ class MonitoringHelper(object):
 
         boo()
         return container(12, 3)
+
+    def run_on_allocating_function(self, size=64 * 1024 ** 2):
+        """ Run a function that allocates and releases a large block of
+        memory under the monitor decorator.
+
+        """
+        monitor = self.monitor
+
+        @monitor.attach
+        def allocate(size):
+            data = '1' * size
+            length = len(data)
+            del data
+            return length
+
+        return allocate(size)
+
+    def run_on_running_thread(self):
+        """ Run a function in a thread that was started before the monitor
+        was enabled.
+
+        Returns the result of the function and the profile and trace
+        functions of the thread after the monitor has been disabled.
+
+        """
+        import sys
+        import threading
+
+        monitor = self.monitor
+        start = threading.Event()
+        done = threading.Event()
+        stop = threading.Event()
+        output = []
+
+        def gcd(x, y):
+            while x > 0:
+                x, y = y % x, x
+            return y
+
+        def worker():
+            start.wait()
+            output.append(gcd(12, 3))
+            done.set()
+            stop.wait()
+            output.append((sys.getprofile(), sys.gettrace()))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        with monitor:
+            start.set()
+            done.wait()
+        stop.set()
+        thread.join()
+        return output
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cblocking_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import socket
+import sys
+import threading
+import time
+import unittest
+
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+class TestCBlockingMonitor(TestCase):
+    """ Test for the cython BlockingMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.blocking_monitor import BlockingMonitor
+        except ImportError:
+            self.skipTest('Cython BlockingMonitor is not available')
+        self.maxDiff = None
+        self.recorder = ListRecorder()
+        self.monitor = BlockingMonitor(self.recorder)
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_sleep(self):
+
+        @self.monitor.attach
+        def wait():
+            for _ in range(3):
+                time.sleep(0.01)
+            return 1
+
+        result = wait()
+        self.assertEqual(result, 1)
+        records = self.recorder.records
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(
+            (record.index, record.function, record.category, record.calls),
+            (0, 'wait', 'sleep', 3))
+        self.assertTrue(record.blockedTime >= 0.025)
+        self.assertEqual(record.filename, __file__.replace('.pyc', '.py'))
+
+    def test_io_and_lock(self):
+        lock = threading.Lock()
+
+        def read(connection):
+            return connection.recv(5)
+
+        @self.monitor.attach
+        def run():
+            server, client = socket.socketpair()
+            try:
+                client.sendall('hello')
+                data = read(server)
+            finally:
+                server.close()
+                client.close()
+            with lock:
+                pass
+            lock.acquire()
+            lock.release()
+            return data
+
+        result = run()
+        self.assertEqual(result, 'hello')
+        self.assertEqual(
+            sorted(
+                (record.function, record.category, record.calls)
+                for record in self.recorder.records),
+            [('read', 'io', 1), ('run', 'io', 1), ('run', 'lock', 1)])
+
+    def test_custom_table(self):
+        from pikos.cymonitors.blocking_monitor import BlockingMonitor
+        monitor = BlockingMonitor(
+            self.recorder, table={'__builtin__.len': 'custom'})
+
+        @monitor.attach
+        def run():
+            time.sleep(0.001)
+            return len('abc')
+
+        result = run()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [(record.function, record.category, record.calls)
+             for record in self.recorder.records],
+            [('run', 'custom', 1)])
+
+    def test_reset_after_disable(self):
+
+        @self.monitor.attach
+        def wait():
+            time.sleep(0.001)
+
+        wait()
+        wait()
+        self.assertEqual(
+            [record[1:4] for record in self.recorder.records],
+            [('wait', 'sleep', 1), ('wait', 'sleep', 1)])
+
+    def test_reset_after_fork(self):
+
+        def wait():
+            time.sleep(0.001)
+
+        with self.monitor:
+            wait()
+            wait()
+            # The statistics of the parent are not reported by the child.
+            self.monitor._after_fork()
+            wait()
+        self.assertEqual(
+            [record[1:4] for record in self.recorder.records],
+            [('wait', 'sleep', 1)])
+
+    def test_using_tuples(self):
+        from pikos.cymonitors.blocking_monitor import BlockingMonitor
+        recorder = ListRecorder()
+        monitor = BlockingMonitor(recorder, record_type=tuple)
+
+        @monitor.attach
+        def wait():
+            time.sleep(0.001)
+
+        wait()
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertEqual(type(records[0]), tuple)
+        self.assertEqual(records[0][1:4], ('wait', 'sleep', 1))
+
+    def test_all_threads(self):
+        start = threading.Event()
+
+        def worker():
+            start.wait()
+            for _ in range(3):
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        self.monitor.all_threads = True
+        try:
+            with self.monitor:
+                start.set()
+                for thread in threads:
+                    thread.join()
+        finally:
+            start.set()
+        # The sleeps of the threads overlap but every thread has its own
+        # stack.
+        records = [
+            record for record in self.recorder.records
+            if record.function == 'worker']
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 9)
+        self.assertTrue(records[0].blockedTime >= 0.15)
+
+    def test_builtin_name(self):
+        from pikos.cymonitors.blocking_monitor import builtin_name
+        lock = threading.Lock()
+        self.assertEqual(builtin_name(time.sleep), 'time.sleep')
+        self.assertEqual(builtin_name(lock.acquire), 'thread.lock.acquire')
+
+
+if __name__ == '__main__':
+    unittest.main()
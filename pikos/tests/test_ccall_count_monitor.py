@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_ccall_count_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import unittest
+
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+def fibonacci(n):
+    if n < 2:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+
+
+def square(x):
+    return x * x
+
+
+def run():
+    return fibonacci(10) + sum(square(x) for x in range(5))
+
+
+class TestCCallCountMonitor(TestCase):
+    """ Test for the cython CallCountMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.call_count_monitor import (
+                CallCountMonitor)
+        except ImportError:
+            self.skipTest('Cython CallCountMonitor is not available')
+        self.monitor_type = CallCountMonitor
+        self.maxDiff = None
+        self.recorder = ListRecorder()
+        self.filename = __file__.replace('.pyc', '.py')
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def counts(self):
+        return dict(
+            (record.function, (record.calls, record.lineNo))
+            for record in self.recorder.records
+            if record.filename == self.filename)
+
+    def test_counts(self):
+        monitor = self.monitor_type(self.recorder)
+        with monitor:
+            result = run()
+        self.assertEqual(result, 85)
+        counts = self.counts()
+        self.assertEqual(counts['fibonacci'], (177, 17))
+        self.assertEqual(counts['square'], (5, 23))
+        self.assertEqual(counts['run'], (1, 27))
+        indices = [record.index for record in self.recorder.records]
+        self.assertEqual(indices, range(len(indices)))
+
+    def test_snapshot(self):
+        monitor = self.monitor_type(self.recorder)
+        with monitor:
+            square(1)
+            self.assertTrue(monitor.snapshot(reset=True) > 0)
+            self.assertEqual(self.counts()['square'], (1, 23))
+            self.recorder.records[:] = []
+            square(2)
+            square(3)
+            monitor.snapshot()
+            self.assertEqual(self.counts()['square'], (2, 23))
+            self.recorder.records[:] = []
+        # The counts are not reset by a snapshot without reset.
+        self.assertEqual(self.counts()['square'], (2, 23))
+
+    def test_many_functions(self):
+        namespace = {}
+        for index in range(200):
+            exec 'def f{0}(): pass'.format(index) in namespace
+        functions = [namespace['f{0}'.format(index)] for index in range(200)]
+        monitor = self.monitor_type(self.recorder)
+        with monitor:
+            for _ in range(3):
+                for function in functions:
+                    function()
+        counts = dict(
+            (record.function, record.calls)
+            for record in self.recorder.records)
+        for index in range(200):
+            self.assertEqual(counts['f{0}'.format(index)], 3)
+
+    def test_using_tuples(self):
+        monitor = self.monitor_type(self.recorder, record_type=tuple)
+        with monitor:
+            square(2)
+        records = [
+            record for record in self.recorder.records
+            if record[1] == 'square']
+        self.assertEqual(records[0][2:], (1, 23, self.filename))
+        self.assertEqual(type(records[0]), tuple)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,6 +62,32 @@ class TestCFunctionMemoryMonitor(TestCase):
             "1 return gcd 32 {0}"]
         self.check_records(template, recorder)
 
+    def test_sample(self):
+        from pikos.cymonitors.function_memory_monitor import (
+            FunctionMemoryMonitor)
+        from pikos.monitors.records import FunctionMemoryWeightRecord
+        recorder = ListRecorder(filter_=OnValue('function', 'f'))
+        monitor = FunctionMemoryMonitor(recorder, sample=4, per_code=True)
+        self.assertIs(monitor.record_type, FunctionMemoryWeightRecord)
+
+        def f():
+            pass
+
+        def g():
+            pass
+
+        monitor.enable()
+        for _ in range(8):
+            f()
+            g()
+        monitor.disable()
+        # One in every four calls of f is recorded with its return event.
+        self.assertEqual(
+            [(record.type, record.function, record.weight)
+             for record in recorder.records],
+            [('call', 'f', 4), ('return', 'f', 4)] * 2)
+        self.assertTrue(all(record.RSS > 0 for record in recorder.records))
+
     def test_recursive(self):
         result = self.helper.run_on_recursive_function()
         self.assertEqual(result, 1)
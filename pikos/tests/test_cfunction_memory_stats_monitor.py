@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cfunction_memory_stats_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import unittest
+
+from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+class TestCFunctionMemoryStatsMonitor(TestCase):
+    """ Test for the cython FunctionMemoryStatsMonitor.
+    """
+
+    def setUp(self):
+        self.check_for_psutils()
+        try:
+            from pikos.cymonitors.function_memory_stats_monitor import (
+                FunctionMemoryStatsMonitor)
+        except ImportError:
+            self.skipTest('Cython FunctionMemoryStatsMonitor is not available')
+        self.maxDiff = None
+        self.helper = MonitoringHelper()
+        self.filename = self.helper.filename
+        self.recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.monitor = FunctionMemoryStatsMonitor(self.recorder)
+        self.helper.monitor = self.monitor
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_function(self):
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(self.get_records(self.recorder), ["gcd 1 28"])
+
+    def test_recursive(self):
+        result = self.helper.run_on_recursive_function()
+        self.assertEqual(result, 1)
+        self.assertEqual(self.get_records(self.recorder), ["gcd 6 48"])
+
+    def test_generator(self):
+        result = self.helper.run_on_generator()
+        output = (0, 1, 1, 2, 3, 5, 8, 13, 21, 34)
+        self.assertSequenceEqual(result, output)
+        # The monitor is enabled and disabled around every step of the
+        # generator so a summary is recorded for each step.
+        self.assertEqual(
+            self.get_records(self.recorder), ["fibonacci 1 63"] * 11)
+
+    def test_memory(self):
+        size = 64 * 1024 ** 2
+        result = self.helper.run_on_allocating_function(size)
+        self.assertEqual(result, size)
+        records = self.recorder.records
+        self.assertEqual(len(records), 1)
+        record = records[0]
+        self.assertEqual(record.function, 'allocate')
+        self.assertEqual(record.calls, 1)
+        self.assertTrue(record.peakRSS >= size)
+        self.assertTrue(abs(record.netRSS) < size // 4)
+
+    def test_memory_of_recursive_function(self):
+        from pikos.cymonitors.function_memory_stats_monitor import (
+            FunctionMemoryStatsMonitor)
+        recorder = ListRecorder(filter_=OnValue('function', 'grow'))
+        monitor = FunctionMemoryStatsMonitor(recorder)
+        size = 16 * 1024 ** 2
+        blocks = []
+
+        def grow(depth):
+            blocks.append('1' * size)
+            if depth > 0:
+                grow(depth - 1)
+
+        with monitor:
+            grow(3)
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 4)
+        # Only the outermost call is accounted, the nested calls would add
+        # their part again.
+        self.assertTrue(records[0].netRSS >= 3 * size)
+        self.assertTrue(records[0].netRSS < 6 * size)
+
+    def test_using_tuples(self):
+        from pikos.cymonitors.function_memory_stats_monitor import (
+            FunctionMemoryStatsMonitor)
+        recorder = ListRecorder(filter_=lambda x: x[-1] == self.filename)
+        monitor = FunctionMemoryStatsMonitor(recorder, record_type=tuple)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_recursive_function()
+        self.assertEqual(result, 1)
+        self.assertEqual(self.get_records(recorder), ["gcd 6 48"])
+
+    def test_reset_after_disable(self):
+        self.helper.run_on_function()
+        self.helper.run_on_function()
+        self.assertEqual(
+            self.get_records(self.recorder), ["gcd 1 28", "gcd 1 28"])
+
+    def check_for_psutils(self):
+        try:
+            import psutil  # noqa
+        except ImportError:
+            self.skipTest('Could not import psutils, skipping test.')
+
+    def get_records(self, recorder):
+        """ Keep the function, calls and lineNo fields.
+        """
+        return [
+            ' '.join(str(item) for item in (record[1], record[2], record[5]))
+            for record in recorder.records]
+
+
+if __name__ == '__main__':
+    unittest.main()
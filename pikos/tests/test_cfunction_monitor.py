@@ -11,7 +11,9 @@ import sys
 import StringIO
 import unittest
 
+from pikos import context
 from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.monitoring_helper import MonitoringHelper
@@ -139,6 +141,164 @@ class TestCFunctionMonitor(TestCase):
             u"62 return fibonacci 68 {0}"]
         self.check_records(template, self.stream)
 
+    def test_running_thread(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        self.helper.monitor = self.monitor.__class__(recorder)
+        self.helper.monitor.all_threads = True
+        result, hooks = self.helper.run_on_running_thread()
+        self.assertEqual(result, 3)
+        self.assertIsNone(hooks[0])
+        self.assertEqual(
+            [record[1:4] for record in recorder.records],
+            [('call', 'gcd', 140), ('return', 'gcd', 143)])
+
+    def test_running_thread_not_monitored_by_default(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        self.helper.monitor = self.monitor.__class__(recorder)
+        result, hooks = self.helper.run_on_running_thread()
+        self.assertEqual(result, 3)
+        self.assertEqual(recorder.records, [])
+
+    def test_context(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        self.helper.monitor = self.monitor.__class__(recorder, context=True)
+        with context.tag(request_id='cfunction-monitor') as identifier:
+            result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [(record.type, record.context) for record in recorder.records],
+            [('call', identifier), ('return', identifier)])
+
+    def test_stats(self):
+        recorder = ListRecorder()
+        self.helper.monitor = monitor = self.monitor.__class__(recorder)
+        self.assertEqual(monitor.stats(), {'events': 0, 'recorded': 0})
+        self.helper.run_on_function()
+        stats = monitor.stats()
+        self.assertGreater(stats['events'], 0)
+        self.assertEqual(stats['events'], len(recorder.records))
+        self.assertEqual(stats['recorded'], len(recorder.records))
+
+    def test_sample(self):
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        from pikos.monitors.records import FunctionWeightRecord
+        recorder = ListRecorder()
+        monitor = FunctionMonitor(recorder, sample=4)
+        self.assertIs(monitor.record_type, FunctionWeightRecord)
+        records = self.run_sampled(monitor, recorder)
+        # One in every four calls is recorded with its return event.
+        self.assertEqual(
+            records,
+            [('call', 'g', 4), ('return', 'g', 4)] * 4)
+        stats = monitor.stats()
+        self.assertEqual(stats['recorded'], 8)
+        self.assertGreater(stats['events'], 32)
+
+    def test_sample_per_code(self):
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        recorder = ListRecorder()
+        monitor = FunctionMonitor(recorder, sample=4, per_code=True)
+        records = self.run_sampled(monitor, recorder)
+        self.assertEqual(
+            records,
+            [('call', 'f', 4), ('return', 'f', 4),
+             ('call', 'g', 4), ('return', 'g', 4)] * 2)
+
+    def test_sample_builtin_calls(self):
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        recorder = ListRecorder()
+        monitor = FunctionMonitor(recorder, sample=2, per_code=True)
+        values = range(4)
+        monitor.enable()
+        for value in values:
+            len(values)
+            abs(value)
+        monitor.disable()
+        records = [
+            (record.type, record.function, record.weight)
+            for record in recorder.records]
+        self.assertEqual(
+            records,
+            [('c_call', 'len', 2), ('c_return', 'len', 2),
+             ('c_call', 'abs', 2), ('c_return', 'abs', 2)] * 2)
+
+    def test_sample_new_code_objects(self):
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        recorder = ListRecorder()
+        monitor = FunctionMonitor(recorder, sample=2, per_code=True)
+        monitor.enable()
+        for _ in range(20):
+            # Every call runs a new code object that is freed right after,
+            # so its address can be reused by the next one.
+            namespace = {}
+            exec compile('def h():\n    pass\n', '<h>', 'exec') in namespace
+            namespace['h']()
+            del namespace
+        monitor.disable()
+        records = [
+            record for record in recorder.records if record.function == 'h']
+        self.assertEqual(records, [])
+
+    def test_sample_arguments(self):
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        recorder = ListRecorder()
+        with self.assertRaises(ValueError):
+            FunctionMonitor(recorder, sample=0)
+        with self.assertRaises(ValueError):
+            FunctionMonitor(recorder, context=True, sample=2)
+        monitor = FunctionMonitor(recorder, record_type=tuple, sample=2)
+        self.assertIs(monitor.record_type, tuple)
+
+    def test_sample_all_threads(self):
+        import threading
+        import time
+        from pikos.cymonitors.function_monitor import FunctionMonitor
+        recorder = ListRecorder(filter_=OnValue('function', 'f'))
+        monitor = FunctionMonitor(recorder, sample=4, per_code=True)
+        monitor.all_threads = True
+        start = threading.Event()
+
+        def f():
+            time.sleep(0.001)
+
+        def worker():
+            start.wait()
+            for _ in range(8):
+                f()
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            with monitor:
+                start.set()
+                for thread in threads:
+                    thread.join()
+        finally:
+            start.set()
+        # Every sampled call is recorded with its return although the
+        # calls of the threads overlap.
+        types = [record.type for record in recorder.records]
+        self.assertEqual(types.count('call'), 6)
+        self.assertEqual(types.count('return'), 6)
+
+    def run_sampled(self, monitor, recorder):
+        def f():
+            pass
+
+        def g():
+            pass
+
+        values = range(8)
+        monitor.enable()
+        for _ in values:
+            f()
+            g()
+        monitor.disable()
+        return [
+            (record.type, record.function, record.weight)
+            for record in recorder.records]
+
     def check_records(self, template, stream):
         expected = [line.format(self.filename) for line in template]
         records = ''.join(stream.buflist).splitlines()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cfunction_rusage_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import mmap
+import sys
+import threading
+import time
+import unittest
+
+from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+class TestCFunctionRusageMonitor(TestCase):
+    """ Test for the cython FunctionRusageMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.function_rusage_monitor import (
+                FunctionRusageMonitor)
+        except ImportError:
+            self.skipTest('Cython FunctionRusageMonitor is not available')
+        self.maxDiff = None
+        self.helper = MonitoringHelper()
+        self.filename = self.helper.filename
+        self.recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.monitor = FunctionRusageMonitor(self.recorder)
+        self.helper.monitor = self.monitor
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_function(self):
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(self.get_records(self.recorder), ["gcd 1 28"])
+
+    def test_recursive(self):
+        result = self.helper.run_on_recursive_function()
+        self.assertEqual(result, 1)
+        self.assertEqual(self.get_records(self.recorder), ["gcd 6 48"])
+
+    def test_page_faults(self):
+        size = 16 * 1024 ** 2
+        recorder = ListRecorder(filter_=OnValue('function', 'touch'))
+        self.monitor._recorder = recorder
+
+        @self.monitor.attach
+        def touch():
+            memory = mmap.mmap(-1, size)
+            try:
+                for offset in xrange(0, size, mmap.PAGESIZE):
+                    memory[offset] = '1'
+            finally:
+                memory.close()
+
+        touch()
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertTrue(records[0].minorFaults >= size // mmap.PAGESIZE // 2)
+
+    def test_context_switches(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'wait'))
+        self.monitor._recorder = recorder
+
+        @self.monitor.attach
+        def wait():
+            for _ in range(5):
+                time.sleep(0.001)
+
+        wait()
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertTrue(records[0].voluntarySwitches >= 5)
+
+    def test_all_threads(self):
+        size = 8 * 1024 ** 2
+        recorder = ListRecorder(filter_=OnValue('function', 'touch'))
+        self.monitor._recorder = recorder
+        self.monitor.all_threads = True
+        start = threading.Event()
+        touched = threading.Event()
+        finish = threading.Event()
+
+        def touch(wait):
+            memory = mmap.mmap(-1, size)
+            try:
+                for offset in xrange(0, size, mmap.PAGESIZE):
+                    memory[offset] = '1'
+            finally:
+                memory.close()
+            if wait:
+                touched.set()
+                finish.wait()
+
+        def worker():
+            start.wait()
+            touch(True)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            with self.monitor:
+                start.set()
+                touched.wait()
+                # The call in the main thread overlaps the call in the
+                # worker and returns first.
+                touch(False)
+                finish.set()
+                thread.join()
+        finally:
+            start.set()
+            finish.set()
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 2)
+        # Every call touches all the pages of its own mapping.
+        pages = size // mmap.PAGESIZE
+        self.assertTrue(records[0].minorFaults >= 3 * pages // 2)
+
+    def test_reset_after_fork(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'wait'))
+        self.monitor._recorder = recorder
+
+        def wait():
+            time.sleep(0.001)
+
+        with self.monitor:
+            wait()
+            wait()
+            # The statistics of the parent are not reported by the child.
+            self.monitor._after_fork()
+            wait()
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].calls, 1)
+
+    def test_using_tuples(self):
+        from pikos.cymonitors.function_rusage_monitor import (
+            FunctionRusageMonitor)
+        recorder = ListRecorder(filter_=lambda x: x[-1] == self.filename)
+        monitor = FunctionRusageMonitor(recorder, record_type=tuple)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_recursive_function()
+        self.assertEqual(result, 1)
+        self.assertEqual(self.get_records(recorder), ["gcd 6 48"])
+
+    def get_records(self, recorder):
+        """ Keep the function, calls and lineNo fields.
+        """
+        return [
+            ' '.join(str(item) for item in (record[1], record[2], record[-2]))
+            for record in recorder.records]
+
+
+if __name__ == '__main__':
+    unittest.main()
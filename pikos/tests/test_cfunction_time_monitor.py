@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cfunction_time_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import time
+import unittest
+
+from pikos import context
+from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+class TestCFunctionTimeMonitor(TestCase):
+    """ Test for the cython FunctionTimeMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.function_time_monitor import (
+                FunctionTimeMonitor)
+        except ImportError:
+            self.skipTest('Cython FunctionTimeMonitor is not available')
+        self.maxDiff = None
+        self.helper = MonitoringHelper()
+        self.filename = self.helper.filename
+        self.recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.monitor = FunctionTimeMonitor(self.recorder)
+        self.helper.monitor = self.monitor
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_function(self):
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        records = self.recorder.records
+        self.assertEqual(
+            [(record.index, record.type, record.function, record.lineNo)
+             for record in records],
+            [(0, 'call', 'gcd', 28), (1, 'return', 'gcd', 32)])
+        call, return_ = records
+        self.assertTrue(return_.wallTime >= call.wallTime)
+        self.assertTrue(return_.cpuTime >= call.cpuTime)
+
+    def test_function_using_tuples(self):
+        from pikos.cymonitors.function_time_monitor import (
+            FunctionTimeMonitor)
+        recorder = ListRecorder(filter_=lambda x: x[-1] == self.filename)
+        monitor = FunctionTimeMonitor(recorder, record_type=tuple)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [record[:3] + record[-2:-1] for record in recorder.records],
+            [(0, 'call', 'gcd', 28), (1, 'return', 'gcd', 32)])
+
+    def test_sample(self):
+        from pikos.cymonitors.function_time_monitor import (
+            FunctionTimeMonitor)
+        from pikos.monitors.records import FunctionTimeWeightRecord
+        recorder = ListRecorder(filter_=OnValue('function', 'f'))
+        monitor = FunctionTimeMonitor(recorder, sample=4, per_code=True)
+        self.assertIs(monitor.record_type, FunctionTimeWeightRecord)
+
+        def f():
+            pass
+
+        def g():
+            pass
+
+        monitor.enable()
+        for _ in range(8):
+            f()
+            g()
+        monitor.disable()
+        # One in every four calls of f is recorded with its return event.
+        self.assertEqual(
+            [(record.type, record.function, record.weight)
+             for record in recorder.records],
+            [('call', 'f', 4), ('return', 'f', 4)] * 2)
+        call, return_ = recorder.records[:2]
+        self.assertTrue(return_.wallTime >= call.wallTime)
+
+    def test_off_cpu_time(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'sleep'))
+        self.monitor._recorder = recorder
+
+        @self.monitor.attach
+        def wait():
+            time.sleep(0.05)
+
+        wait()
+        call, return_ = recorder.records
+        self.assertEqual(call.type, 'c_call')
+        self.assertEqual(return_.type, 'c_return')
+        self.check_cpu_clock(call)
+        wall = return_.wallTime - call.wallTime
+        cpu = return_.cpuTime - call.cpuTime
+        self.assertTrue(wall >= 0.04)
+        self.assertTrue(cpu < wall / 2)
+
+    def test_on_cpu_time(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'busy'))
+        self.monitor._recorder = recorder
+
+        def busy():
+            start = time.time()
+            while time.time() - start < 0.05:
+                pass
+
+        @self.monitor.attach
+        def run():
+            busy()
+
+        run()
+        call, return_ = recorder.records
+        self.check_cpu_clock(call)
+        wall = return_.wallTime - call.wallTime
+        cpu = return_.cpuTime - call.cpuTime
+        self.assertTrue(wall >= 0.04)
+        self.assertTrue(cpu > wall / 2)
+
+    def test_context(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        self.helper.monitor = self.monitor.__class__(recorder, context=True)
+        with context.tag(request_id='cfunction-time-monitor') as identifier:
+            result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [(record.type, record.context) for record in recorder.records],
+            [('call', identifier), ('return', identifier)])
+        self.assertEqual(recorder.records[0]._fields[-1], 'context')
+
+    def check_cpu_clock(self, record):
+        if record.cpuTime < 0:
+            self.skipTest('Per-thread cpu time is not available')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -118,6 +118,37 @@ class TestLineMemoryMonitor(TestCase):
             "5 gcd 32             return y {0}"]
         self.check_records(template, recorder)
 
+    def test_threshold(self):
+        from pikos.cymonitors.line_memory_monitor import LineMemoryMonitor
+        size = 64 * 1024 ** 2
+        recorder = ListRecorder(filter_=OnValue('filename', self.filename))
+        monitor = LineMemoryMonitor(recorder, threshold=size // 4)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_allocating_function(size)
+        self.assertEqual(result, size)
+
+        # Only the lines that allocate and release the memory are recorded.
+        records = recorder.records
+        self.assertEqual(len(records), 2)
+        allocate, release = records
+        # The `line` field is shadowed by the record format template.
+        self.assertEqual(allocate[-2].strip(), "data = '1' * size")
+        self.assertEqual(release[-2].strip(), "del data")
+        self.assertEqual(release.index - allocate.index, 2)
+        self.assertTrue(allocate.deltaRSS >= size)
+        self.assertTrue(release.deltaRSS <= -size)
+
+    def test_threshold_on_all_threads(self):
+        from pikos.cymonitors.line_memory_monitor import LineMemoryMonitor
+        monitor = LineMemoryMonitor(ListRecorder(), threshold=1024)
+        monitor.all_threads = True
+        with self.assertRaises(ValueError):
+            monitor.enable()
+        # The monitor can be enabled once the option is removed.
+        monitor.all_threads = False
+        monitor.enable()
+        monitor.disable()
+
     def test_issue2(self):
         """ Test for issue #2.
 
@@ -2,6 +2,7 @@ import StringIO
 import unittest
 
 from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.monitoring_helper import MonitoringHelper
@@ -119,6 +120,19 @@ class TestCLineMonitor(TestCase):
             "6 gcd 32             return y {0}"]
         self.check_records(template, self.stream)
 
+    def test_running_thread(self):
+        from pikos.cymonitors.line_monitor import LineMonitor
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        monitor = LineMonitor(recorder)
+        monitor.all_threads = True
+        helper = MonitoringHelper(monitor)
+        result, hooks = helper.run_on_running_thread()
+        self.assertEqual(result, 3)
+        self.assertIsNone(hooks[1])
+        self.assertEqual(
+            [record.lineNo for record in recorder.records],
+            [141, 142, 141, 142, 141, 143])
+
     def test_issue2(self):
         """ Test for issue #2.
 
@@ -148,6 +162,52 @@ foo()
                    " on code compiled from a string -- exists.")
             self.fail(msg)
 
+    def test_stats(self):
+        recorder = ListRecorder()
+        monitor = self.monitor.__class__(recorder)
+        helper = MonitoringHelper(monitor)
+        helper.run_on_function()
+        stats = monitor.stats()
+        self.assertGreater(stats['events'], 0)
+        self.assertEqual(stats['events'], len(recorder.records))
+        self.assertEqual(stats['recorded'], len(recorder.records))
+
+    def test_sample(self):
+        from pikos.monitors.records import LineWeightRecord
+        recorder = ListRecorder()
+        monitor = self.monitor.__class__(recorder, sample=4)
+        self.assertIs(monitor.record_type, LineWeightRecord)
+        helper = MonitoringHelper(monitor)
+        helper.run_on_function()
+        stats = monitor.stats()
+        self.assertGreater(stats['recorded'], 0)
+        self.assertEqual(stats['recorded'], stats['events'] // 4)
+        self.assertEqual(stats['recorded'], len(recorder.records))
+        self.assertTrue(
+            all(record.weight == 4 for record in recorder.records))
+
+    def test_sample_per_code(self):
+        def f(value):
+            value += 1
+            return value
+
+        recorder = ListRecorder(filter_=OnValue('function', 'f'))
+        monitor = self.monitor.__class__(recorder, sample=4, per_code=True)
+        values = range(8)
+        monitor.enable()
+        for value in values:
+            f(value)
+        monitor.disable()
+        # All the lines of the 4th and 8th calls are recorded.
+        self.assertEqual(
+            [(record[3].strip(), record.weight)
+             for record in recorder.records],
+            [('value += 1', 4), ('return value', 4)] * 2)
+
+    def test_sample_arguments(self):
+        with self.assertRaises(ValueError):
+            self.monitor.__class__(ListRecorder(), sample=0)
+
     def check_records(self, template, stream):
         expected = [line.format(self.filename) for line in template]
         records = ''.join(stream.buflist).splitlines()
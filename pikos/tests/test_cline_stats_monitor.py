@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cline_stats_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import time
+import unittest
+
+from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+def gcd(x, y):
+    while x > 0:
+        x, y = y % x, x
+    return y
+
+
+def sleeper():
+    time.sleep(0.02)
+    return gcd(12, 3)
+
+
+class TestCLineStatsMonitor(TestCase):
+    """ Test for the cython LineStatsMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.line_stats_monitor import (
+                LineStatsMonitor)
+        except ImportError:
+            self.skipTest('Cython LineStatsMonitor is not available')
+        self.monitor_type = LineStatsMonitor
+        self.maxDiff = None
+        self.filename = __file__.replace('.pyc', '.py')
+        self.recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+
+    def tearDown(self):
+        sys.settrace(None)
+
+    def test_hits(self):
+        monitor = self.monitor_type(self.recorder)
+
+        @monitor.attach
+        def run():
+            return gcd(12, 3) + gcd(7, 5)
+
+        result = run()
+        self.assertEqual(result, 4)
+        records = [
+            record for record in self.recorder.records
+            if record.function == 'gcd']
+        self.assertEqual(
+            [(record.lineNo, record.hits, record.source)
+             for record in records],
+            [(20, 8, '    while x > 0:'),
+             (21, 6, '        x, y = y % x, x'),
+             (22, 2, '    return y')])
+        indices = [record.index for record in self.recorder.records]
+        self.assertEqual(
+            indices, range(indices[0], indices[0] + len(indices)))
+
+    def test_time(self):
+        monitor = self.monitor_type(self.recorder)
+
+        @monitor.attach
+        def run():
+            return sleeper()
+
+        self.assertEqual(run(), 3)
+        times = dict(
+            ((record.function, record.lineNo), record.time)
+            for record in self.recorder.records)
+        # The time of the sleep is charged to its line and the calling line.
+        self.assertTrue(times[('sleeper', 26)] >= 0.015)
+        self.assertTrue(times[('sleeper', 27)] < times[('sleeper', 26)])
+        self.assertTrue(
+            sum(value for (function, _), value in times.items()
+                if function == 'run') >= 0.015)
+
+    def test_time_of_open_lines(self):
+        monitor = self.monitor_type(self.recorder)
+
+        def sleep_and_disable():
+            time.sleep(0.02)
+            monitor.disable()
+
+        def run():
+            monitor.enable()
+            sleep_and_disable()
+
+        run()
+        times = dict(
+            ((record.function, record.lineNo), record.time)
+            for record in self.recorder.records)
+        # The calling line has not finished when the monitor is disabled.
+        self.assertTrue(times[('run', 98)] >= 0.015)
+
+    def test_one_record_per_line(self):
+        monitor = self.monitor_type(self.recorder)
+
+        @monitor.attach
+        def run():
+            total = 0
+            for index in range(10000):
+                total += index
+            return total
+
+        run()
+        records = self.recorder.records
+        self.assertEqual(len(records), 4)
+        self.assertEqual(
+            [record.hits for record in records], [1, 10001, 10000, 1])
+
+    def test_using_tuples(self):
+        recorder = ListRecorder(
+            filter_=lambda record: record[-1] == self.filename)
+        monitor = self.monitor_type(recorder, record_type=tuple)
+        with monitor:
+            gcd(12, 3)
+        records = [
+            record for record in recorder.records if record[1] == 'gcd']
+        self.assertEqual(len(records), 3)
+        self.assertEqual(type(records[0]), tuple)
+
+
+if __name__ == '__main__':
+    unittest.main()
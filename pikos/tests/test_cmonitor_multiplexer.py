@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cmonitor_multiplexer.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import unittest
+
+from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+class TestCMonitorMultiplexer(TestCase):
+    """ Test for the cython MonitorMultiplexer.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.multiplexer import MonitorMultiplexer
+            from pikos.cymonitors.function_monitor import FunctionMonitor
+            from pikos.cymonitors.function_time_monitor import (
+                FunctionTimeMonitor)
+            from pikos.cymonitors.line_monitor import LineMonitor
+        except ImportError:
+            self.skipTest('Cython MonitorMultiplexer is not available')
+        self.maxDiff = None
+        self.helper = MonitoringHelper()
+        self.filename = self.helper.filename
+        self.function_recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.time_recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.line_recorder = ListRecorder(
+            filter_=OnValue('filename', self.filename))
+        self.function_monitor = FunctionMonitor(self.function_recorder)
+        self.time_monitor = FunctionTimeMonitor(self.time_recorder)
+        self.line_monitor = LineMonitor(self.line_recorder)
+        self.monitor = MonitorMultiplexer(
+            [self.function_monitor, self.time_monitor, self.line_monitor])
+        self.helper.monitor = self.monitor
+
+    def tearDown(self):
+        sys.setprofile(None)
+        sys.settrace(None)
+
+    def test_function(self):
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [record[1:] for record in self.function_recorder.records],
+            [('call', 'gcd', 28, self.filename),
+             ('return', 'gcd', 32, self.filename)])
+        records = self.time_recorder.records
+        self.assertEqual(
+            [(record.type, record.function, record.lineNo)
+             for record in records],
+            [('call', 'gcd', 28), ('return', 'gcd', 32)])
+        self.assertTrue(records[0].wallTime <= records[1].wallTime)
+        self.assertEqual(
+            [record.lineNo for record in self.line_recorder.records],
+            [30, 31, 30, 31, 30, 32])
+
+    def test_recursive(self):
+        result = self.helper.run_on_recursive_function()
+        self.assertEqual(result, 1)
+        self.assertEqual(
+            [record.type for record in self.function_recorder.records],
+            ['call'] * 6 + ['return'] * 6)
+        self.assertEqual(len(self.time_recorder.records), 12)
+        self.assertEqual(len(self.line_recorder.records), 6)
+
+    def test_single_hook(self):
+        monitor = self.monitor
+        with monitor:
+            profile = sys.getprofile()
+            trace = sys.gettrace()
+        self.assertIs(profile, monitor)
+        self.assertIs(trace, monitor)
+        self.assertIsNone(sys.getprofile())
+        self.assertIsNone(sys.gettrace())
+
+    def test_only_function_monitors(self):
+        from pikos.cymonitors.multiplexer import MonitorMultiplexer
+        monitor = MonitorMultiplexer([self.function_monitor])
+        with monitor:
+            trace = sys.gettrace()
+        self.assertIsNone(trace)
+
+    def test_keep_foreign_trace(self):
+        from pikos.cymonitors.multiplexer import MonitorMultiplexer
+
+        def tracer(frame, event, arg):
+            return tracer
+
+        monitor = MonitorMultiplexer([self.function_monitor])
+        sys.settrace(tracer)
+        try:
+            with monitor:
+                inside = sys.gettrace()
+            after = sys.gettrace()
+        finally:
+            sys.settrace(None)
+        self.assertIs(inside, tracer)
+        self.assertIs(after, tracer)
+
+    def test_keep_foreign_profile(self):
+        from pikos.cymonitors.multiplexer import MonitorMultiplexer
+
+        def profiler(frame, event, arg):
+            pass
+
+        monitor = MonitorMultiplexer([self.line_monitor])
+        with monitor:
+            sys.setprofile(profiler)
+        after = sys.getprofile()
+        sys.setprofile(None)
+        self.assertIs(after, profiler)
+
+    def test_register_while_enabled(self):
+        from pikos.cymonitors.multiplexer import MonitorMultiplexer
+        filename = __file__.replace('.pyc', '.py')
+        self.function_recorder._filter = OnValue('filename', filename)
+        self.time_recorder._filter = OnValue('filename', filename)
+
+        def gcd(x, y):
+            while x > 0:
+                x, y = y % x, x
+            return y
+
+        monitor = MonitorMultiplexer([self.function_monitor])
+        with monitor:
+            gcd(12, 3)
+            monitor.register(self.time_monitor)
+            gcd(12, 3)
+            monitor.unregister(self.function_monitor)
+            gcd(12, 3)
+        # The first gcd call is recorded only by the function monitor and
+        # the last one only by the time monitor.
+        self.assertEqual(
+            [record.type for record in self.function_recorder.records
+             if record.function == 'gcd'],
+            ['call', 'return', 'call', 'return'])
+        self.assertEqual(
+            [record.type for record in self.time_recorder.records
+             if record.function == 'gcd'],
+            ['call', 'return', 'call', 'return'])
+
+    def test_invalid_monitor(self):
+        from pikos.cymonitors.multiplexer import MonitorMultiplexer
+        from pikos.monitors.function_monitor import FunctionMonitor
+        with self.assertRaises(TypeError):
+            MonitorMultiplexer([FunctionMonitor(self.function_recorder)])
+        with self.assertRaises(ValueError):
+            MonitorMultiplexer([self.function_monitor, self.function_monitor])
+
+
+if __name__ == '__main__':
+    unittest.main()
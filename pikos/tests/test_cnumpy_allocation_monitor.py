@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cnumpy_allocation_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+class TestCNumpyAllocationMonitor(TestCase):
+    """ Test for the cython NumpyAllocationMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.numpy_allocation_monitor import (
+                NumpyAllocationMonitor)
+        except ImportError:
+            self.skipTest('Cython NumpyAllocationMonitor is not available')
+        self.maxDiff = None
+        self.recorder = ListRecorder()
+        self.monitor = NumpyAllocationMonitor(
+            self.recorder, threshold=1024 ** 2)
+
+    def test_allocation(self):
+        import numpy
+
+        def allocate(size):
+            data = numpy.ones(size, dtype=numpy.uint8)
+            total = data.sum()
+            del data
+            return total
+
+        size = 8 * 1024 ** 2
+        with self.monitor:
+            result = allocate(size)
+        self.assertEqual(result, size)
+        records = self.recorder.records
+        self.assertEqual(len(records), 2)
+        malloc, free = records
+        self.assertEqual(malloc.type, 'malloc')
+        self.assertEqual(malloc.size, size)
+        self.assertEqual(malloc.function, 'ones')
+        self.assertEqual(free.type, 'free')
+        self.assertEqual(free.size, size)
+        self.assertEqual(free.address, malloc.address)
+        self.assertEqual(free.function, 'allocate')
+        self.assertEqual(free.filename, __file__.replace('.pyc', '.py'))
+        self.assertEqual([record.index for record in records], [0, 1])
+
+    def test_threshold(self):
+        import numpy
+
+        def allocate():
+            small = [numpy.ones(1024) for _ in range(10)]
+            del small
+            return 1
+
+        with self.monitor:
+            result = allocate()
+        self.assertEqual(result, 1)
+        self.assertEqual(self.recorder.records, [])
+
+    def test_realloc(self):
+        import numpy
+
+        def resize(size):
+            data = numpy.zeros(size, dtype=numpy.uint8)
+            data.resize(2 * size, refcheck=False)
+            return len(data)
+
+        size = 2 * 1024 ** 2
+        with self.monitor:
+            result = resize(size)
+        self.assertEqual(result, 2 * size)
+        self.assertEqual(
+            [(record.type, record.size) for record in self.recorder.records],
+            [('malloc', size), ('realloc', 2 * size), ('free', 2 * size)])
+
+    def test_using_tuples(self):
+        import numpy
+        from pikos.cymonitors.numpy_allocation_monitor import (
+            NumpyAllocationMonitor)
+        recorder = ListRecorder()
+        monitor = NumpyAllocationMonitor(
+            recorder, record_type=tuple, threshold=1024 ** 2)
+
+        def allocate(size):
+            return len(numpy.empty(size, dtype=numpy.uint8))
+
+        size = 4 * 1024 ** 2
+        with monitor:
+            result = allocate(size)
+        self.assertEqual(result, size)
+        self.assertEqual(
+            [record[1:3] for record in recorder.records],
+            [('malloc', size), ('free', size)])
+        self.assertEqual(type(recorder.records[0]), tuple)
+
+    def test_previous_hook(self):
+        import numpy
+
+        def allocate(size):
+            data = numpy.ones(size, dtype=numpy.uint8)
+            del data
+
+        size = 2 * 1024 ** 2
+        recorder = ListRecorder()
+        monitor = type(self.monitor)(recorder, threshold=1024 ** 2)
+        with self.monitor:
+            with monitor:
+                allocate(size)
+            # The hook of the outer monitor has been restored.
+            allocate(size)
+        allocate(size)
+        self.assertEqual(
+            [record.type for record in recorder.records], ['malloc', 'free'])
+        self.assertEqual(
+            [record.type for record in self.recorder.records],
+            ['malloc', 'free'] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
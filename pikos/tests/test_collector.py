@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_collector.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import cPickle
+import marshal
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+import warnings
+
+from pikos.collector import (
+    Collector, StreamStarted, StreamStopped, STREAM_FILENAME)
+from pikos.recorders.pickle_file_recorder import read_records
+from pikos.tests.compat import TestCase
+from pikos.tests.dummy_record import DummyRecord
+
+try:
+    import zmq
+except ImportError:
+    zmq = None
+else:
+    from pikos.recorders.collector_recorder import CollectorRecorder
+
+
+class TestCollector(TestCase):
+
+    def setUp(self):
+        if zmq is None:
+            self.skipTest('The collector requires pyzmq')
+        self.directory = tempfile.mkdtemp()
+        self.endpoint = 'ipc://' + os.path.join(self.directory, 'test.ipc')
+        self.collector = Collector(
+            endpoint=self.endpoint, directory=self.directory)
+
+    def tearDown(self):
+        self.collector.close()
+        shutil.rmtree(self.directory)
+
+    def collect(self, pids, timeout=5.0):
+        """ Poll the collector until the streams of the pids have stopped.
+
+        """
+        start = time.time()
+        stopped = set()
+
+        def handle(message, handle=self.collector.handle):
+            if message[0] == 'stop':
+                stopped.add(message[1])
+            handle(message)
+
+        self.collector.handle = handle
+        while not set(pids).issubset(stopped):
+            self.collector.poll(100)
+            if time.time() - start > timeout:
+                self.fail('The streams have not been collected')
+
+    def stream_filename(self, pid):
+        return os.path.join(self.directory, STREAM_FILENAME.format(pid=pid))
+
+    def test_collect_records(self):
+        self.collector.start()
+        recorder = CollectorRecorder(self.endpoint, batch_size=2)
+        recorder.prepare(DummyRecord)
+        for index in range(5):
+            recorder.record(DummyRecord(index, 'name', index * 0.5))
+        recorder.finalize()
+        self.collect([os.getpid()])
+        pid, fields, records = read_records(
+            self.stream_filename(os.getpid()))
+        self.assertEqual(pid, os.getpid())
+        self.assertEqual(fields, DummyRecord._fields)
+        self.assertEqual(
+            records, [(index, 'name', index * 0.5) for index in range(5)])
+        self.assertEqual(self.collector.count, 5)
+        self.assertEqual(self.collector.streams, {})
+        self.assertEqual(recorder.dropped, 0)
+
+    def test_filter(self):
+        self.collector.start()
+        recorder = CollectorRecorder(
+            self.endpoint, filter_=lambda record: record[0] % 2 == 0)
+        recorder.prepare(DummyRecord)
+        for index in range(5):
+            recorder.record(DummyRecord(index, 'name', 0.0))
+        recorder.finalize()
+        self.collect([os.getpid()])
+        _, _, records = read_records(self.stream_filename(os.getpid()))
+        self.assertEqual([record[0] for record in records], [0, 2, 4])
+
+    def test_many_processes(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('The test requires os.fork')
+        self.collector.start()
+        pids = []
+        for value in range(3):
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    recorder = CollectorRecorder(self.endpoint)
+                    recorder.prepare(DummyRecord)
+                    recorder.record(DummyRecord(value, 'child', 0.0))
+                    recorder.finalize()
+                    status = 0
+                finally:
+                    os._exit(status)
+            pids.append(pid)
+        for pid in pids:
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(status, 0)
+        self.collect(pids)
+        for value, pid in enumerate(pids):
+            _, _, records = read_records(self.stream_filename(pid))
+            self.assertEqual(records, [(value, 'child', 0.0)])
+
+    def test_rotation(self):
+        collector = Collector(
+            endpoint=self.endpoint, directory=self.directory, max_bytes=1,
+            backup_count=2)
+        collector.handle(('header', 10, None))
+        for index in range(4):
+            collector.handle(('records', 10, [(index,)]))
+        collector.handle(('stop', 10, None))
+        filename = self.stream_filename(10)
+        self.assertEqual(read_records(filename), (10, None, []))
+        self.assertEqual(read_records(filename + '.1'), (10, None, [(3,)]))
+        self.assertEqual(read_records(filename + '.2'), (10, None, [(2,)]))
+        self.assertFalse(os.path.exists(filename + '.3'))
+
+    def test_records_without_header(self):
+        self.collector.handle(('records', 10, [(1,), (2,)]))
+        self.collector.close()
+        self.assertEqual(
+            read_records(self.stream_filename(10)), (10, None, [(1,), (2,)]))
+
+    def test_publish(self):
+        publish = 'ipc://' + os.path.join(self.directory, 'publish.ipc')
+        collector = Collector(
+            endpoint=self.endpoint, directory=self.directory,
+            publish=publish)
+        context = zmq.Context()
+        subscriber = context.socket(zmq.SUB)
+        subscriber.setsockopt(zmq.SUBSCRIBE, '')
+        thread = threading.Thread(target=collector.serve_forever)
+        try:
+            collector.start()
+            subscriber.connect(publish)
+            # Wait for the subscription to reach the publisher.
+            time.sleep(0.2)
+            thread.start()
+            recorder = CollectorRecorder(self.endpoint)
+            recorder.prepare(DummyRecord)
+            recorder.record(DummyRecord(1, 'name', 0.0))
+            recorder.finalize()
+            messages = []
+            while subscriber.poll(5000):
+                messages.append(cPickle.loads(subscriber.recv()))
+                if isinstance(messages[-1], StreamStopped):
+                    break
+        finally:
+            collector.stop()
+            if thread.is_alive():
+                thread.join()
+            subscriber.close(linger=0)
+            context.term()
+        self.assertEqual(len(messages), 3)
+        self.assertIsInstance(messages[0], StreamStarted)
+        self.assertEqual(messages[0].pid, os.getpid())
+        self.assertEqual(messages[0].fields, DummyRecord._fields)
+        self.assertEqual(messages[1], (os.getpid(), (1, 'name', 0.0)))
+        self.assertEqual(messages[2].pid, os.getpid())
+
+    def test_malformed_messages(self):
+        self.collector.start()
+        context = zmq.Context()
+        socket = context.socket(zmq.PUSH)
+        try:
+            socket.connect(self.endpoint)
+            # A pickle could run code in the collector, it is not accepted.
+            socket.send(cPickle.dumps(('header', 10, None), 2))
+            socket.send(marshal.dumps(('header', '../10', None)))
+            socket.send(marshal.dumps(('records', 10, 'data')))
+            socket.send(marshal.dumps(('unknown', 10, None)))
+            socket.send(marshal.dumps(('records', 10, [(1,)])))
+            with warnings.catch_warnings(record=True):
+                warnings.simplefilter('always')
+                handled = 0
+                start = time.time()
+                while handled < 5 and time.time() - start < 5.0:
+                    handled += self.collector.poll(100)
+        finally:
+            socket.close(linger=0)
+            context.term()
+        self.assertEqual(self.collector.rejected, 4)
+        self.assertEqual(self.collector.count, 1)
+        self.assertEqual(self.collector.streams.keys(), [10])
+
+    def test_private_endpoint(self):
+        if not hasattr(os, 'getuid'):
+            self.skipTest('The test requires unix permissions')
+        path = self.endpoint[len('ipc://'):]
+        self.collector.start()
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_fork(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('The test requires os.fork')
+        self.collector.start()
+        recorder = CollectorRecorder(self.endpoint)
+        recorder.prepare(DummyRecord)
+        recorder.record(DummyRecord(0, 'parent', 0.0))
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                recorder.record(DummyRecord(1, 'child', 0.0))
+                recorder.finalize()
+                status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        recorder.finalize()
+        self.collect([os.getpid(), pid])
+        _, _, records = read_records(self.stream_filename(os.getpid()))
+        self.assertEqual(records, [(0, 'parent', 0.0)])
+        _, _, records = read_records(self.stream_filename(pid))
+        self.assertEqual(records, [(1, 'child', 0.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
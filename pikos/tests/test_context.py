@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_context.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import threading
+import unittest
+
+from pikos import context
+from pikos.tests.compat import TestCase
+
+
+class TestContext(TestCase):
+
+    def setUp(self):
+        self.max_contexts = context.max_contexts
+
+    def tearDown(self):
+        context.max_contexts = self.max_contexts
+        context.activate(0)
+
+    def test_default_context(self):
+        self.assertEqual(context.current(), 0)
+        self.assertEqual(context.lookup(0), {})
+
+    def test_tag(self):
+        with context.tag(request_id=1, endpoint='/index') as identifier:
+            self.assertEqual(context.current(), identifier)
+            self.assertEqual(
+                context.lookup(identifier),
+                {'request_id': 1, 'endpoint': '/index'})
+        self.assertNotEqual(identifier, 0)
+        self.assertEqual(context.current(), 0)
+        self.assertEqual(context.contexts()[identifier],
+                         {'request_id': 1, 'endpoint': '/index'})
+
+    def test_same_tags_same_id(self):
+        with context.tag(endpoint='/same') as first:
+            pass
+        with context.tag(endpoint='/same') as second:
+            pass
+        self.assertEqual(first, second)
+        self.assertEqual(context.context_id(endpoint='/same'), first)
+        self.assertNotEqual(context.context_id(endpoint='/other'), first)
+
+    def test_nested_tags(self):
+        with context.tag(endpoint='/nested') as outer:
+            with context.tag(request_id=2) as inner:
+                self.assertEqual(
+                    context.lookup(inner),
+                    {'endpoint': '/nested', 'request_id': 2})
+            self.assertEqual(context.current(), outer)
+        self.assertEqual(context.current(), 0)
+
+    def test_restore_on_exception(self):
+        with self.assertRaises(ValueError):
+            with context.tag(request_id=3):
+                raise ValueError()
+        self.assertEqual(context.current(), 0)
+
+    def test_activate(self):
+        identifier = context.context_id(request_id=4)
+        previous = context.activate(identifier)
+        self.assertEqual(previous, 0)
+        self.assertEqual(context.current(), identifier)
+        self.assertEqual(context.activate(previous), identifier)
+        self.assertEqual(context.current(), 0)
+
+    def test_per_thread(self):
+        values = []
+
+        def worker():
+            values.append(context.current())
+
+        with context.tag(request_id=5):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        self.assertEqual(values, [0])
+
+    def test_forget_old_contexts(self):
+        context.max_contexts = 2
+        first = context.context_id(request_id='forget-1')
+        context.context_id(request_id='forget-2')
+        third = context.context_id(request_id='forget-3')
+        self.assertEqual(context.lookup(first), {})
+        self.assertEqual(
+            context.lookup(third), {'request_id': 'forget-3'})
+        self.assertEqual(context.lookup(0), {})
+        self.assertNotEqual(
+            context.context_id(request_id='forget-1'), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
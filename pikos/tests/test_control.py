@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_control.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+
+from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.monitors.focused_function_monitor import FocusedFunctionMonitor
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+def gcd(x, y):
+    while x > 0:
+        x, y = y % x, x
+    return y
+
+
+class TestMonitorController(TestCase):
+
+    def setUp(self):
+        if not hasattr(socket, 'AF_UNIX'):
+            self.skipTest('Unix domain sockets are not available')
+        from pikos.control import MonitorController
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'control.sock')
+        self.recorder = ListRecorder()
+        self.monitor = FunctionMonitor(self.recorder)
+        self.controller = MonitorController(self.monitor, path=self.path)
+        self.controller.start()
+
+    def tearDown(self):
+        self.controller.stop()
+        sys.setprofile(None)
+        shutil.rmtree(self.directory)
+
+    def test_enable_disable(self):
+        self.assertEqual(self.command('status'), 'disabled')
+        gcd(12, 3)
+        self.assertEqual(self.recorder.records, [])
+        self.assertEqual(self.command('enable'), 'enabled')
+        self.assertEqual(self.command('status'), 'enabled')
+        gcd(12, 3)
+        self.assertEqual(self.command('disable'), 'disabled')
+        functions = [record.function for record in self.recorder.records]
+        self.assertIn('gcd', functions)
+        count = len(self.recorder.records)
+        gcd(12, 3)
+        self.assertEqual(len(self.recorder.records), count)
+
+    def test_stop_disables_monitor(self):
+        self.command('enable')
+        self.controller.stop()
+        self.assertFalse(self.controller.enabled)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(sys.getprofile())
+
+    def test_snapshot(self):
+        from pikos.control import MonitorController
+        self.controller.stop()
+        controller = MonitorController(
+            self.monitor, path=self.path, snapshot=lambda: 'done')
+        controller.start()
+        try:
+            self.assertEqual(self.command('snapshot'), 'snapshot: done')
+        finally:
+            controller.stop()
+
+    def test_snapshot_not_supported(self):
+        self.assertTrue(self.command('snapshot').startswith('error'))
+
+    def test_focus(self):
+        from pikos.control import MonitorController
+        self.controller.stop()
+        monitor = FocusedFunctionMonitor(self.recorder, functions=[])
+        self.controller = MonitorController(monitor, path=self.path)
+        self.controller.start()
+        name = '{0}.gcd'.format(__name__)
+        self.assertEqual(self.command('focus', 'list'), '')
+        self.assertEqual(self.command('focus', 'add', name), 'ok')
+        self.assertEqual(self.command('focus', 'list'), name)
+        self.assertIn(gcd, monitor.functions)
+        self.assertEqual(self.command('focus', 'remove', name), 'ok')
+        self.assertNotIn(gcd, monitor.functions)
+
+    def test_focus_not_supported(self):
+        self.assertTrue(self.command('focus', 'list').startswith('error'))
+
+    def test_private_socket(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_default_path_is_private(self):
+        from pikos.control import MonitorController
+        controller = MonitorController(FunctionMonitor(ListRecorder()))
+        controller.start()
+        try:
+            path = controller.path
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            self.assertEqual(
+                stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode), 0o700)
+        finally:
+            controller.stop()
+
+    def test_unknown_command(self):
+        self.assertEqual(
+            self.command('restart'), "error: unknown command 'restart'")
+
+    def test_status_without_signal(self):
+        from pikos.control import send_command
+        # The main thread is blocked in the socket call, so the reply
+        # cannot come from the signal handler.
+        self.assertEqual(send_command(self.path, ['status']), 'disabled')
+
+    def test_cython_monitor_without_signal(self):
+        try:
+            from pikos.cymonitors.function_monitor import (
+                FunctionMonitor as CFunctionMonitor)
+        except ImportError:
+            self.skipTest('Cython FunctionMonitor is not available')
+        from pikos.control import MonitorController, send_command
+        self.controller.stop()
+        monitor = CFunctionMonitor(self.recorder)
+        self.controller = MonitorController(monitor, path=self.path)
+        self.controller.start()
+        self.assertTrue(monitor.all_threads)
+        self.assertEqual(send_command(self.path, ['enable']), 'enabled')
+        self.assertIs(sys.getprofile(), monitor)
+        gcd(12, 3)
+        self.assertEqual(send_command(self.path, ['disable']), 'disabled')
+        self.assertIsNone(sys.getprofile())
+        functions = [record.function for record in self.recorder.records]
+        self.assertIn('gcd', functions)
+        # The server thread is not monitored.
+        self.assertNotIn('execute', functions)
+
+    def test_stop_while_serving(self):
+        # stop() can run while the server thread is between two accepts.
+        for _ in range(10):
+            self.command('status')
+        self.controller.stop()
+        self.assertIsNone(self.controller._socket)
+        self.assertFalse(self.controller._thread.is_alive())
+
+    def command(self, *arguments):
+        """ Send the command from a separate thread while the main thread
+        executes python code so that the signal handler can run.
+
+        """
+        from pikos.control import send_command
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(
+                send_command(self.path, arguments)))
+        thread.start()
+        while thread.is_alive():
+            thread.join(0.01)
+        return result[0]
+
+
+class TestMain(TestCase):
+
+    def test_default_path(self):
+        from pikos._internal.util import user_directory
+        from pikos.control import default_path
+        self.assertEqual(
+            default_path(42),
+            os.path.join(user_directory(), 'control-42.sock'))
+
+
+if __name__ == '__main__':
+    unittest.main()
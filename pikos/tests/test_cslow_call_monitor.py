@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_cslow_call_monitor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import time
+import unittest
+
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+def fast():
+    return 1
+
+
+def slow():
+    time.sleep(0.03)
+    return 2
+
+
+def run():
+    return fast() + slow() + fast()
+
+
+class TestCSlowCallMonitor(TestCase):
+    """ Test for the cython SlowCallMonitor.
+    """
+
+    def setUp(self):
+        try:
+            from pikos.cymonitors.slow_call_monitor import SlowCallMonitor
+        except ImportError:
+            self.skipTest('Cython SlowCallMonitor is not available')
+        self.monitor_type = SlowCallMonitor
+        self.maxDiff = None
+        self.recorder = ListRecorder()
+        self.filename = __file__.replace('.pyc', '.py')
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_global_threshold(self):
+        monitor = self.monitor_type(self.recorder, threshold=0.02)
+        with monitor:
+            result = run()
+        self.assertEqual(result, 4)
+        records = self.recorder.records
+        self.assertEqual(
+            [(record.index, record.function, record.depth, record.lineNo,
+              record.filename, record.stack) for record in records],
+            [(0, 'slow', 1, 23, self.filename, None),
+             (1, 'run', 0, 28, self.filename, None)])
+        self.assertTrue(records[0].duration >= 0.025)
+        self.assertTrue(records[1].duration >= records[0].duration)
+
+    def test_per_function_threshold(self):
+        monitor = self.monitor_type(
+            self.recorder, threshold=0.02,
+            thresholds={slow: 1.0, fast.func_code: 0.0})
+        with monitor:
+            result = run()
+        self.assertEqual(result, 4)
+        self.assertEqual(
+            [record.function for record in self.recorder.records],
+            ['fast', 'fast', 'run'])
+
+    def test_capture_stack(self):
+        monitor = self.monitor_type(
+            self.recorder, threshold=0.02, capture_stack=True)
+        with monitor:
+            run()
+        record = self.recorder.records[0]
+        self.assertEqual(record.function, 'slow')
+        self.assertEqual(
+            record.stack[-1], '{0}:29({1})'.format(self.filename, 'run'))
+        self.assertTrue(
+            record.stack[-2].endswith('(test_capture_stack)'))
+
+    def test_attach(self):
+        monitor = self.monitor_type(self.recorder, threshold=0.02)
+        helper = MonitoringHelper(monitor)
+        helper.run_on_function()
+        self.assertEqual(self.recorder.records, [])
+
+    def test_using_tuples(self):
+        monitor = self.monitor_type(
+            self.recorder, record_type=tuple, threshold=0.02)
+        with monitor:
+            run()
+        self.assertEqual(
+            [record[1] for record in self.recorder.records], ['slow', 'run'])
+        self.assertEqual(type(self.recorder.records[0]), tuple)
+
+    def test_context(self):
+        from pikos import context
+        monitor = self.monitor_type(
+            self.recorder, threshold=0.02, context=True)
+
+        def request():
+            with context.tag(request_id='slow-call') as identifier:
+                run()
+            return identifier
+
+        with monitor:
+            identifier = request()
+        self.assertEqual(
+            [(record.function, record.context)
+             for record in self.recorder.records],
+            [('slow', identifier), ('run', identifier), ('request', 0)])
+
+    def test_all_threads(self):
+        import threading
+        monitor = self.monitor_type(self.recorder, threshold=0.02)
+        monitor.all_threads = True
+        start = threading.Event()
+
+        def worker():
+            start.wait()
+            for _ in range(3):
+                slow()
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            with monitor:
+                start.set()
+                for thread in threads:
+                    thread.join()
+        finally:
+            start.set()
+        # The calls of the threads interleave but every thread has its own
+        # stack.
+        records = [
+            record for record in self.recorder.records
+            if record.function == 'slow']
+        self.assertEqual(len(records), 9)
+        self.assertTrue(
+            all(record.duration >= 0.025 for record in records))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_flight_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import unittest
+
+from pikos.recorders.flight_recorder import FlightRecorder
+from pikos.recorders.abstract_recorder import RecorderError
+from pikos.tests.compat import TestCase
+from pikos.tests.dummy_record import DummyRecord
+
+
+class TestFlightRecorder(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'dump-{index}-{reason}')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_ring(self):
+        recorder = FlightRecorder(self.filename, size=3, dump_signal=None)
+        recorder.prepare(DummyRecord)
+        self.assertEqual(recorder.records, [])
+        for index in range(2):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        self.assertEqual(
+            [record.one for record in recorder.records], [0, 1])
+        for index in range(2, 7):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        self.assertEqual(
+            [record.one for record in recorder.records], [4, 5, 6])
+        recorder.finalize()
+        self.assertEqual(recorder.dumps, [])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_filter(self):
+        recorder = FlightRecorder(
+            self.filename, size=3, dump_signal=None,
+            filter_=lambda record: record.one % 2 == 0)
+        recorder.prepare(DummyRecord)
+        for index in range(10):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        recorder.finalize()
+        self.assertEqual(
+            [record.one for record in recorder.records], [4, 6, 8])
+        self.assertEqual(
+            recorder.stats(),
+            {'events': 10, 'recorded': 5, 'filtered': 5, 'queued': 3,
+             'dropped': 2})
+
+    def test_dump(self):
+        recorder = FlightRecorder(
+            self.filename, size=2, dump_signal=None, formatted=False)
+        recorder.prepare(DummyRecord)
+        for index in range(3):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        filename = recorder.dump()
+        recorder.finalize()
+        self.assertEqual(
+            filename, os.path.join(self.directory, 'dump-0-manual'))
+        self.assertEqual(recorder.dumps, [filename])
+        with open(filename) as handle:
+            self.assertMultiLineEqual(
+                handle.read(),
+                'one two three\n-------------\n1 a b\n2 a b\n')
+
+    def test_dump_without_records(self):
+        recorder = FlightRecorder(self.filename, dump_signal=None)
+        recorder.prepare(DummyRecord)
+        self.assertIsNone(recorder.dump())
+        recorder.finalize()
+
+    def test_dump_on_exception(self):
+        recorder = FlightRecorder(self.filename, dump_signal=None)
+        with self.assertRaises(ZeroDivisionError):
+            with recorder:
+                recorder.prepare(DummyRecord)
+                recorder.record(DummyRecord(0, 'a', 'b'))
+                recorder.finalize()
+                1 / 0
+        self.assertEqual(
+            recorder.dumps,
+            [os.path.join(self.directory, 'dump-0-exception')])
+
+    def test_no_dump_without_exception(self):
+        recorder = FlightRecorder(self.filename, dump_signal=None)
+        with recorder:
+            recorder.prepare(DummyRecord)
+            recorder.record(DummyRecord(0, 'a', 'b'))
+            recorder.finalize()
+        self.assertEqual(recorder.dumps, [])
+
+    def test_dump_on_signal(self):
+        if not hasattr(signal, 'SIGUSR2'):
+            self.skipTest('SIGUSR2 is not available')
+        previous = signal.getsignal(signal.SIGUSR2)
+        recorder = FlightRecorder(self.filename)
+        recorder.prepare(DummyRecord)
+        recorder.record(DummyRecord(0, 'a', 'b'))
+        os.kill(os.getpid(), signal.SIGUSR2)
+        recorder.finalize()
+        self.assertEqual(
+            recorder.dumps, [os.path.join(self.directory, 'dump-0-signal')])
+        self.assertEqual(signal.getsignal(signal.SIGUSR2), previous)
+
+    def test_dump_on_rss_limit(self):
+        try:
+            import psutil  # noqa
+        except ImportError:
+            self.skipTest('Could not import psutils, skipping test.')
+        recorder = FlightRecorder(
+            self.filename, dump_signal=None, rss_limit=1, check_interval=2)
+        recorder.prepare(DummyRecord)
+        for index in range(10):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        recorder.finalize()
+        # A single dump while the limit is exceeded.
+        self.assertEqual(
+            recorder.dumps, [os.path.join(self.directory, 'dump-0-rss')])
+
+    def test_finalize_without_prepare(self):
+        recorder = FlightRecorder(self.filename, dump_signal=None)
+        with self.assertRaises(RecorderError):
+            recorder.finalize()
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            FlightRecorder(self.filename, size=0)
+
+    def test_invalid_check_interval(self):
+        with self.assertRaises(ValueError):
+            FlightRecorder(self.filename, rss_limit=1, check_interval=0)
+
+    def test_dump_on_uncaught_exception(self):
+        from pikos.monitors.function_monitor import FunctionMonitor
+        calls = []
+        previous = sys.excepthook
+        hook = lambda *arguments: calls.append(arguments[0])
+        sys.excepthook = hook
+        try:
+            recorder = FlightRecorder(
+                self.filename, size=20, dump_signal=None,
+                dump_on_exception=True)
+            monitor = FunctionMonitor(recorder)
+
+            def fail():
+                raise RuntimeError()
+
+            # The monitor is left enabled when the exception is uncaught.
+            monitor.enable()
+            try:
+                fail()
+            except RuntimeError:
+                sys.excepthook(*sys.exc_info())
+            finally:
+                monitor.disable()
+            self.assertIs(sys.excepthook, hook)
+        finally:
+            sys.excepthook = previous
+        self.assertEqual(
+            recorder.dumps,
+            [os.path.join(self.directory, 'dump-0-exception')])
+        self.assertEqual(calls, [RuntimeError])
+
+    def test_finalize_restores_excepthook(self):
+        previous = sys.excepthook
+        hook = lambda *arguments: None
+        sys.excepthook = hook
+        try:
+            recorder = FlightRecorder(
+                self.filename, dump_signal=None, dump_on_exception=True)
+            for _ in range(2):
+                recorder.prepare(DummyRecord)
+                self.assertEqual(sys.excepthook, recorder._on_exception)
+                recorder.finalize()
+                self.assertIs(sys.excepthook, hook)
+        finally:
+            sys.excepthook = previous
+
+    def test_with_monitor(self):
+        from pikos.monitors.function_monitor import FunctionMonitor
+        recorder = FlightRecorder(self.filename, size=20, dump_signal=None)
+        monitor = FunctionMonitor(recorder)
+
+        def fail():
+            raise RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            with recorder, monitor:
+                fail()
+        self.assertEqual(len(recorder.dumps), 1)
+        self.assertTrue(
+            any(record.function == 'fail' for record in recorder.records))
+
+
+if __name__ == '__main__':
+    unittest.main()
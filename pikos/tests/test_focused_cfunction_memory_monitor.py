@@ -8,6 +8,7 @@
 #  All rights reserved.
 # -----------------------------------------------------------------------------
 import sys
+import threading
 import unittest
 
 from pikos.filters.on_value import OnValue
@@ -172,6 +173,44 @@ class TestFocusedCFunctionMemoryMonitor(TestCase):
         self.check_records(template, recorder)
         self.assertEqual(helper.monitor._code_trackers, {})
 
+    def test_focus_on_all_threads(self):
+        from pikos.cymonitors.focused_function_memory_monitor import (
+            FocusedFunctionMemoryMonitor)
+        start = threading.Event()
+        finish = threading.Event()
+
+        def unrelated():
+            pass
+
+        def worker():
+            start.wait()
+            unrelated()
+            finish.set()
+
+        def focus():
+            start.set()
+            finish.wait()
+
+        recorder = ListRecorder(
+            filter_=lambda record: record.function in (
+                'focus', 'unrelated', 'worker'))
+        monitor = FocusedFunctionMemoryMonitor([focus], recorder)
+        monitor.all_threads = True
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            with monitor:
+                # The worker runs while the main thread is inside focus.
+                focus()
+                thread.join()
+        finally:
+            start.set()
+            finish.set()
+        self.assertEqual(
+            [(record.type, record.function) for record in recorder.records],
+            [('call', 'focus'), ('return', 'focus')])
+        self.assertEqual(monitor._code_trackers, {})
+
     def get_records(self, recorder):
         """ Remove the memory related fields.
         """
@@ -9,9 +9,11 @@
 # -----------------------------------------------------------------------------
 import sys
 import StringIO
+import threading
 import unittest
 
 from pikos.filters.on_value import OnValue
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.focused_monitoring_helper import FocusedMonitoringHelper
@@ -185,6 +187,159 @@ class TestFocusedCFunctionMonitor(TestCase):
         self.check_records(template, self.stream)
         self.assertEqual(helper.monitor._code_trackers, {})
 
+    def test_stats(self):
+        self.helper.run_on_function()
+        stats = self.helper.monitor.stats()
+        self.assertEqual(stats['recorded'], 10)
+        self.assertGreater(stats['events'], stats['recorded'])
+
+    def test_sample(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+
+        def monitor_factory(functions=[]):
+            return FocusedFunctionMonitor(
+                functions=functions, recorder=self.recorder, sample=2)
+
+        helper = FocusedMonitoringHelper(monitor_factory)
+        helper.run_on_function()
+        # Only the calls inside the focused function are sampled.
+        template = [
+            "index type function lineNo filename weight",
+            "------------------------------------------",
+            "0 call internal 40 {0} 2",
+            "1 return internal 42 {0} 2",
+            "2 call internal 40 {0} 2",
+            "3 return internal 42 {0} 2"]
+        self.check_records(template, self.stream)
+
+    def test_focus_with_max_depth(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+
+        def monitor_factory(functions=[]):
+            return FocusedFunctionMonitor(
+                functions=functions, recorder=self.recorder, max_depth=1)
+
+        helper = FocusedMonitoringHelper(monitor_factory)
+        result = helper.run_on_function()
+        self.assertEqual(result, 3)
+        # The calls of boo are two levels below gcd.
+        template = [
+            "index type function lineNo filename",
+            "-----------------------------------",
+            "0 call gcd 33 {0}",
+            "1 call internal 40 {0}",
+            "2 return internal 42 {0}",
+            "3 call internal 40 {0}",
+            "4 return internal 42 {0}",
+            "5 return gcd 36 {0}"]
+        self.check_records(template, self.stream)
+        self.assertEqual(helper.monitor._code_trackers, {})
+
+    def test_focus_with_zero_max_depth(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+
+        def monitor_factory(functions=[]):
+            return FocusedFunctionMonitor(
+                functions=functions, recorder=self.recorder, max_depth=0)
+
+        helper = FocusedMonitoringHelper(monitor_factory)
+        helper.run_on_recursive_function()
+        # The recursive calls are below the outermost call.
+        lines = ''.join(self.stream.buflist).splitlines()
+        self.assertEqual(
+            [line.split()[1:3] for line in lines[2:]],
+            [['call', 'gcd'], ['return', 'gcd']])
+
+    def test_focus_on_all_threads(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+        start = threading.Event()
+        finish = threading.Event()
+
+        def unrelated():
+            pass
+
+        def worker():
+            start.wait()
+            unrelated()
+            finish.set()
+
+        def focus():
+            start.set()
+            finish.wait()
+
+        recorder = ListRecorder(
+            filter_=lambda record: record.function in (
+                'focus', 'unrelated', 'worker'))
+        monitor = FocusedFunctionMonitor([focus], recorder)
+        monitor.all_threads = True
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            with monitor:
+                # The worker runs while the main thread is inside focus.
+                focus()
+                thread.join()
+        finally:
+            start.set()
+            finish.set()
+        self.assertEqual(
+            [(record.type, record.function) for record in recorder.records],
+            [('call', 'focus'), ('return', 'focus')])
+        self.assertEqual(monitor._code_trackers, {})
+
+    def test_max_depth_on_all_threads(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+        start = threading.Event()
+        entered = threading.Event()
+        finish = threading.Event()
+
+        def other():
+            entered.set()
+            finish.wait()
+
+        def worker():
+            start.wait()
+            other()
+
+        def inner():
+            start.set()
+            entered.wait()
+
+        def focus():
+            inner()
+
+        recorder = ListRecorder(
+            filter_=lambda record: record.function in ('focus', 'inner'))
+        monitor = FocusedFunctionMonitor([focus], recorder, max_depth=1)
+        monitor.all_threads = True
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            with monitor:
+                # The call of other is open in the worker when inner
+                # returns.
+                focus()
+                finish.set()
+                thread.join()
+        finally:
+            start.set()
+            finish.set()
+        self.assertEqual(
+            [(record.type, record.function) for record in recorder.records],
+            [('call', 'focus'), ('call', 'inner'), ('return', 'inner'),
+             ('return', 'focus')])
+
+    def test_negative_max_depth(self):
+        from pikos.cymonitors.focused_function_monitor import (
+            FocusedFunctionMonitor)
+        with self.assertRaises(ValueError):
+            FocusedFunctionMonitor([], self.recorder, max_depth=-1)
+
     def check_records(self, template, stream):
         expected = [line.format(self.filename) for line in template]
         records = ''.join(stream.buflist).splitlines()
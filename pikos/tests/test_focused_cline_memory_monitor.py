@@ -120,6 +120,33 @@ class TestFocusedLineMemoryMonitor(TestCase):
             "5 gcd 36             return y {0}"]
         self.check_records(template, recorder)
 
+    def test_threshold_outside_of_focus(self):
+        from pikos.cymonitors.focused_line_memory_monitor import (
+            FocusedLineMemoryMonitor)
+        size = 64 * 1024 ** 2
+
+        def allocate(size):
+            data = '1' * size
+            return data
+
+        def run(size):
+            data = allocate(size)
+            copy = data + '2'
+            del data, copy
+
+        recorder = ListRecorder()
+        monitor = FocusedLineMemoryMonitor(
+            functions=[allocate], recorder=recorder, threshold=size // 4)
+        with monitor:
+            run(size)
+        # The memory that is allocated and released by the caller is not
+        # attributed to the last line of the function.
+        records = recorder.records
+        self.assertEqual(len(records), 1)
+        # The `line` field is shadowed by the record format template.
+        self.assertEqual(records[0][-2].strip(), "data = '1' * size")
+        self.assertTrue(records[0].deltaRSS >= size)
+
     def get_records(self, recorder):
         """ Remove the memory related fields.
         """
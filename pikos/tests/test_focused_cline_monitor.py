@@ -8,8 +8,10 @@
 #  All rights reserved.
 # -----------------------------------------------------------------------------
 import StringIO
+import threading
 import unittest
 
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.focused_monitoring_helper import FocusedMonitoringHelper
@@ -132,6 +134,78 @@ class TestFocusedLineMonitor(TestCase):
             "5 gcd 36             return y {0}"]
         self.check_records(template, self.stream)
 
+    def test_focus_with_max_depth(self):
+        from pikos.cymonitors.focused_line_monitor import FocusedLineMonitor
+
+        def monitor_factory(functions=[]):
+            return FocusedLineMonitor(
+                functions=functions, recorder=self.recorder, max_depth=1)
+
+        helper = FocusedMonitoringHelper(monitor_factory)
+        result = helper.run_on_function()
+        self.assertEqual(result, 3)
+        # The lines of boo are two levels below gcd.
+        template = [
+            "index function lineNo line filename",
+            "-----------------------------------",
+            "0 gcd 34             while x > 0: {0}",
+            "1 gcd 35                 x, y = internal(x, y) {0}",
+            "2 internal 41             boo() {0}",
+            "3 internal 42             return y % x, x {0}",
+            "4 gcd 34             while x > 0: {0}",
+            "5 gcd 35                 x, y = internal(x, y) {0}",
+            "6 internal 41             boo() {0}",
+            "7 internal 42             return y % x, x {0}",
+            "8 gcd 34             while x > 0: {0}",
+            "9 gcd 36             return y {0}"]
+        self.check_records(template, self.stream)
+
+    def test_max_depth_on_all_threads(self):
+        from pikos.cymonitors.focused_line_monitor import FocusedLineMonitor
+        start = threading.Event()
+        entered = threading.Event()
+        finish = threading.Event()
+
+        def other():
+            entered.set()
+            finish.wait()
+
+        def worker():
+            start.wait()
+            other()
+
+        def focus():
+            start.set()
+            entered.wait()
+            value = 1
+            return value
+
+        recorder = ListRecorder(
+            filter_=lambda record: record.function == 'focus')
+        monitor = FocusedLineMonitor([focus], recorder, max_depth=0)
+        monitor.all_threads = True
+        thread = threading.Thread(target=worker)
+        thread.start()
+        try:
+            with monitor:
+                # The call of other is open in the worker while the last
+                # lines of focus are executed.
+                focus()
+                finish.set()
+                thread.join()
+        finally:
+            start.set()
+            finish.set()
+        # The line field of the LineRecord is shadowed by the template.
+        self.assertEqual(
+            [record[3].strip() for record in recorder.records],
+            ['start.set()', 'entered.wait()', 'value = 1', 'return value'])
+
+    def test_negative_max_depth(self):
+        from pikos.cymonitors.focused_line_monitor import FocusedLineMonitor
+        with self.assertRaises(ValueError):
+            FocusedLineMonitor([], self.recorder, max_depth=-1)
+
     def check_records(self, template, stream):
         template = [line.format(self.filename) for line in template]
         records = ''.join(stream.buflist).splitlines()
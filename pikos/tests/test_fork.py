@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_fork.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import weakref
+
+from pikos._internal.fork import (
+    DeferredFile, pid_filename, register_fork_handler,
+    unregister_fork_handler)
+from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.monitors.records import FunctionRecord
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.recorders.text_file_recorder import TextFileRecorder
+from pikos.tests.compat import TestCase
+
+
+class Handler(object):
+
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def _before_fork(self):
+        self.calls.append(('before', self.name))
+
+    def _after_fork(self):
+        self.calls.append(('after', self.name))
+
+
+def run_in_child(function):
+    """ Fork, execute the function in the child and return the json
+    decoded result in the parent.
+
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_end)
+            with os.fdopen(write_end, 'w') as handle:
+                json.dump(function(), handle)
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write_end)
+    with os.fdopen(read_end) as handle:
+        output = handle.read()
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise RuntimeError('The child process failed')
+    return pid, json.loads(output)
+
+
+class TestFork(TestCase):
+
+    def setUp(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('os.fork is not available')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pid_filename(self):
+        self.assertEqual(
+            pid_filename('/tmp/records.log', 12), '/tmp/records.12.log')
+        self.assertEqual(pid_filename('records', 12), 'records.12')
+        self.assertEqual(
+            pid_filename('records.log'),
+            'records.{0}.log'.format(os.getpid()))
+
+    def test_handlers(self):
+        calls = []
+        first = Handler('first', calls)
+        second = Handler('second', calls)
+        register_fork_handler(first)
+        register_fork_handler(second)
+        register_fork_handler(first)
+        try:
+            _, child_calls = run_in_child(lambda: calls)
+        finally:
+            unregister_fork_handler(first)
+            unregister_fork_handler(second)
+        self.assertEqual(calls, [('before', 'second'), ('before', 'first')])
+        self.assertEqual(
+            [tuple(call) for call in child_calls],
+            [('before', 'second'), ('before', 'first'),
+             ('after', 'first'), ('after', 'second')])
+
+    def test_unregister(self):
+        calls = []
+        handler = Handler('handler', calls)
+        register_fork_handler(handler)
+        unregister_fork_handler(handler)
+        unregister_fork_handler(handler)
+        run_in_child(lambda: None)
+        self.assertEqual(calls, [])
+
+    def test_garbage_collected_handler(self):
+        calls = []
+        handler = Handler('handler', calls)
+        register_fork_handler(handler)
+        reference = weakref.ref(handler)
+        del handler
+        gc.collect()
+        self.assertIsNone(reference())
+        run_in_child(lambda: None)
+        self.assertEqual(calls, [])
+
+    def test_subprocess(self):
+        directory = self.directory
+
+        class ChildHandler(object):
+
+            def _after_fork(self):
+                open(os.path.join(directory, str(os.getpid())), 'w').close()
+
+        handler = ChildHandler()
+        register_fork_handler(handler)
+        try:
+            subprocess.check_call([sys.executable, '-c', 'pass'])
+        finally:
+            unregister_fork_handler(handler)
+        # The child of subprocess calls exec right after the fork.
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_monitor_and_list_recorder(self):
+        recorder = ListRecorder()
+        monitor = FunctionMonitor(recorder)
+
+        @monitor.attach
+        def gcd(x, y):
+            while x > 0:
+                x, y = y % x, x
+            return y
+
+        def child():
+            gcd(12, 3)
+            return [record[:3] for record in recorder.records]
+
+        @monitor.attach
+        def parent():
+            gcd(12, 3)
+            return run_in_child(child)
+
+        _, child_records = parent()
+        # The child starts with an empty list and the index is restarted.
+        self.assertTrue(child_records[-1][0] < recorder.records[-1][0])
+        self.assertEqual(
+            [tuple(record[1:]) for record in child_records
+             if record[2] == 'gcd'],
+            [('call', 'gcd'), ('return', 'gcd')])
+        self.assertEqual(
+            [record[1:3] for record in recorder.records
+             if record[2] == 'gcd'],
+            [('call', 'gcd'), ('return', 'gcd')])
+
+    def test_text_file_recorder(self):
+        filename = os.path.join(self.directory, 'records.log')
+        recorder = TextFileRecorder(filename)
+        recorder.prepare(FunctionRecord)
+        recorder.record(FunctionRecord(0, 'call', 'parent', 1, 'file'))
+
+        def child():
+            recorder.record(FunctionRecord(0, 'call', 'child', 1, 'file'))
+            recorder.finalize()
+
+        try:
+            pid, _ = run_in_child(child)
+        finally:
+            recorder.finalize()
+        with open(filename) as handle:
+            parent_lines = handle.read().splitlines()
+        with open(pid_filename(filename, pid)) as handle:
+            child_lines = handle.read().splitlines()
+        self.assertEqual(parent_lines[2:], ['0 call parent 1 file'])
+        self.assertEqual(child_lines[0], parent_lines[0])
+        self.assertEqual(child_lines[2:], ['0 call child 1 file'])
+
+    def test_text_file_recorder_child_without_records(self):
+        filename = os.path.join(self.directory, 'records.log')
+        recorder = TextFileRecorder(filename)
+        recorder.prepare(FunctionRecord)
+        try:
+            pid, _ = run_in_child(recorder.finalize)
+        finally:
+            recorder.finalize()
+        self.assertFalse(os.path.exists(pid_filename(filename, pid)))
+
+    def test_deferred_file(self):
+        filename = os.path.join(self.directory, 'deferred.txt')
+        handle = DeferredFile(filename, header='header\n')
+        handle.flush()
+        self.assertFalse(os.path.exists(filename))
+        handle.write('line\n')
+        handle.close()
+        self.assertTrue(handle.closed)
+        with open(filename) as handle:
+            self.assertEqual(handle.read(), 'header\nline\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
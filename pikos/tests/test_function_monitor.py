@@ -1,8 +1,12 @@
 import StringIO
+import threading
 import unittest
 
+from pikos import context
 from pikos.filters.on_value import OnValue
+from pikos.governor import OverheadGovernor
 from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.monitoring_helper import MonitoringHelper
@@ -86,6 +90,92 @@ class TestFunctionMonitor(TestCase):
             "155 return fibonacci 68 {0}"]
         self.check_records(template, self.stream)
 
+    def test_context(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        self.helper.monitor = FunctionMonitor(recorder, context=True)
+        with context.tag(request_id='function-monitor') as identifier:
+            result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [(record.type, record.context) for record in recorder.records],
+            [('call', identifier), ('return', identifier)])
+
+    def test_governor(self):
+        recorder = ListRecorder(filter_=OnValue('function', 'gcd'))
+        governor = OverheadGovernor(interval=1e9)
+        self.helper.monitor = FunctionMonitor(recorder, governor=governor)
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        self.assertEqual(
+            [(record.type, record.weight) for record in recorder.records],
+            [('call', 1), ('return', 1)])
+
+    def test_governor_sampling(self):
+        recorder = ListRecorder()
+        governor = OverheadGovernor(interval=1e9)
+        governor.rate = 2
+        self.helper.monitor = FunctionMonitor(recorder, governor=governor)
+        result = self.helper.run_on_function()
+        self.assertEqual(result, 3)
+        records = recorder.records
+        self.assertEqual(
+            [record.index for record in records], range(len(records)))
+        self.assertEqual(set(record.weight for record in records), set([2]))
+        # The call and the return of gcd are consecutive events.
+        self.assertEqual(
+            len([record for record in records if record.function == 'gcd']),
+            1)
+
+    def test_governor_suspended_in_threads(self):
+        recorder = ListRecorder(
+            filter_=lambda record: record.function in ('run', 'gcd'))
+        governor = OverheadGovernor(interval=1e9)
+        monitor = FunctionMonitor(recorder, governor=governor)
+
+        def gcd(x, y):
+            while x > 0:
+                x, y = y % x, x
+            return y
+
+        with monitor:
+            governor.suspended = True
+            thread = threading.Thread(target=gcd, args=(12, 3))
+            thread.start()
+            thread.join()
+        self.assertEqual(recorder.records, [])
+
+    def test_stats(self):
+        recorder = ListRecorder()
+        self.helper.monitor = monitor = FunctionMonitor(recorder)
+        self.helper.run_on_function()
+        stats = monitor.stats()
+        self.assertGreater(stats['events'], 0)
+        self.assertEqual(stats['events'], len(recorder.records))
+        self.assertEqual(stats['recorded'], len(recorder.records))
+        self.assertNotIn('time', stats)
+
+    def test_stats_with_governor(self):
+        recorder = ListRecorder()
+        governor = OverheadGovernor(interval=1e9)
+        governor.rate = 2
+        self.helper.monitor = monitor = FunctionMonitor(
+            recorder, governor=governor)
+        self.helper.run_on_function()
+        stats = monitor.stats()
+        self.assertEqual(stats['recorded'], len(recorder.records))
+        self.assertEqual(stats['events'] // 2, stats['recorded'])
+        self.assertEqual(stats['time'], governor.time)
+        self.assertGreaterEqual(stats['time'], 0.0)
+
+    def test_governor_with_context(self):
+        with self.assertRaises(ValueError):
+            FunctionMonitor(
+                self.recorder, context=True, governor=OverheadGovernor())
+        monitor = FunctionMonitor(
+            self.recorder, record_type=tuple, context=True,
+            governor=OverheadGovernor())
+        self.assertIs(monitor._record_type, tuple)
+
     def check_records(self, template, stream):
         expected = [line.format(self.filename) for line in template]
         records = ''.join(stream.buflist).splitlines()
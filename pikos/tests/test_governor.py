@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_governor.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import time
+import unittest
+
+from pikos.governor import OverheadGovernor, calibrate
+from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+def leaf(value):
+    return value
+
+
+def work(calls):
+    total = 0
+    for value in xrange(calls):
+        total += leaf(value)
+    return total
+
+
+class FakeTimer(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestOverheadGovernor(TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.governor = OverheadGovernor(
+            budget=0.125, interval=1.0, max_rate=100, timer=self.timer,
+            event_cost=0.0)
+
+    def spend(self, duration, idle=0.0):
+        """ Account for an event that took `duration` seconds after `idle`
+        seconds without events.
+
+        """
+        self.timer.now += idle
+        start = self.timer.now
+        self.timer.now += duration
+        self.governor.account(start)
+
+    def test_record_every_event_by_default(self):
+        self.assertEqual(self.governor.rate, 1)
+        self.assertEqual(
+            [self.governor.skip() for _ in range(3)], [False] * 3)
+
+    def test_skip(self):
+        self.governor.rate = 3
+        self.assertEqual(
+            [self.governor.skip() for _ in range(6)],
+            [True, True, False, True, True, False])
+
+    def test_raise_rate_over_budget(self):
+        # 50% overhead with a 12.5% budget.
+        self.spend(0.25)
+        self.assertEqual(self.governor.history, [])
+        self.spend(0.25, idle=0.5)
+        self.assertEqual(self.governor.history, [(1.0, 0.5, 4)])
+        self.assertEqual(self.governor.rate, 4)
+
+    def test_keep_rate_within_budget(self):
+        self.governor.rate = 4
+        self.spend(0.08, idle=1.0)
+        self.spend(0.0, idle=0.0)
+        self.assertEqual(self.governor.rate, 4)
+
+    def test_lower_rate_at_most_by_half(self):
+        self.governor.rate = 64
+        self.spend(0.0)
+        self.spend(0.0, idle=1.0)
+        self.assertEqual(self.governor.rate, 32)
+        self.spend(0.0, idle=1.0)
+        self.assertEqual(self.governor.rate, 16)
+
+    def test_max_rate(self):
+        self.governor.max_rate = 5
+        self.spend(0.5)
+        self.spend(0.5)
+        self.assertEqual(self.governor.rate, 5)
+
+    def test_count_skipped_events(self):
+        # 100 events of 1ms each and one recorded event of 25ms take 12.5%
+        # of the interval.
+        self.governor.event_cost = 0.001
+        self.governor.rate = 4
+        for _ in range(99):
+            self.governor.skip()
+        self.governor.ignore()
+        self.spend(0.025)
+        self.spend(0.0, idle=0.975)
+        self.assertEqual(self.governor.history, [(1.0, 0.125, 4)])
+        self.assertFalse(self.governor.suspended)
+
+    def test_rate_for_the_remaining_budget(self):
+        # The events take 6.25% and the recorded events 25% of the
+        # interval, the recorded events need to be sampled to the remaining
+        # 6.25%.
+        self.governor.event_cost = 0.0625 / 10
+        for _ in range(10):
+            self.governor.skip()
+        self.spend(0.125)
+        self.spend(0.125, idle=0.75)
+        self.assertEqual(self.governor.rate, 4)
+        self.assertFalse(self.governor.suspended)
+
+    def test_suspend_when_events_exceed_budget(self):
+        self.governor.event_cost = 0.015
+        for _ in range(10):
+            self.governor.skip()
+        self.spend(0.0)
+        self.spend(0.0, idle=1.0)
+        self.assertTrue(self.governor.suspended)
+
+    def test_suspend_at_max_rate(self):
+        self.governor.rate = self.governor.max_rate
+        self.spend(0.5)
+        self.spend(0.5)
+        self.assertTrue(self.governor.suspended)
+        self.assertEqual(self.governor.rate, self.governor.max_rate)
+
+    def test_resume(self):
+        self.governor.rate = self.governor.max_rate
+        self.spend(0.5)
+        self.spend(0.5)
+        self.governor.resume()
+        self.assertFalse(self.governor.suspended)
+        self.assertEqual(self.governor.rate, self.governor.max_rate)
+        self.assertEqual(len(self.governor.history), 1)
+
+    def test_reset(self):
+        self.spend(0.5)
+        self.spend(0.5)
+        self.governor.skip()
+        self.governor.reset()
+        self.assertEqual(self.governor.rate, 1)
+        self.assertEqual(self.governor.history, [])
+        self.assertFalse(self.governor.skip())
+
+    def test_invalid_budget(self):
+        with self.assertRaises(ValueError):
+            OverheadGovernor(budget=0)
+
+    def test_calibrate(self):
+        cost = calibrate(events=1000)
+        self.assertGreater(cost, 0.0)
+        self.assertLess(cost, 0.001)
+        self.assertIsNone(sys.getprofile())
+
+
+class TestSlowdown(TestCase):
+    """ Measure the slowdown of a governed monitor on a function that is
+    much more expensive to profile than to execute.
+
+    """
+
+    calls = 500000
+
+    def tearDown(self):
+        sys.setprofile(None)
+
+    def test_slowdown(self):
+        budget = 0.25
+        governor = OverheadGovernor(budget=budget, interval=0.01)
+        monitor = FunctionMonitor(ListRecorder(), governor=governor)
+        ungoverned = FunctionMonitor(ListRecorder())
+        baseline = self.measure(work)
+        slowdown = self.measure(monitor.attach(work)) / baseline
+        unbounded = self.measure(ungoverned.attach(work)) / baseline
+        # The events alone cost more than the budget, so the governor
+        # removes the hook of the monitor.
+        self.assertTrue(governor.suspended)
+        self.assertGreater(unbounded, 3.0)
+        # The measurements are noisy, half the budget is added as a margin.
+        self.assertLess(slowdown, 1.0 / (1.0 - budget) + 0.5 * budget)
+
+    def measure(self, function):
+        durations = []
+        for _ in range(3):
+            start = time.time()
+            function(self.calls)
+            durations.append(time.time() - start)
+        return min(durations)
+
+
+if __name__ == '__main__':
+    unittest.main()
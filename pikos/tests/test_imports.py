@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_imports.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import subprocess
+import sys
+import unittest
+
+from pikos.tests.compat import TestCase
+
+SCRIPT = """
+import sys
+import pikos.api, pikos.runner, pikos.monitors.api, pikos.recorders.api
+pikos.api.monitor_functions(recorder=pikos.recorders.api.ListRecorder())
+pikos.api.monitor_lines(recorder=pikos.recorders.api.ListRecorder())
+sys.stdout.write(' '.join(
+    name for name in ('psutil', 'zmq', 'cPickle')
+    if sys.modules.get(name) is not None))
+"""
+
+
+class TestImports(TestCase):
+
+    def test_optional_dependencies_are_not_imported(self):
+        process = subprocess.Popen(
+            [sys.executable, '-c', SCRIPT], stdout=subprocess.PIPE)
+        output, _ = process.communicate()
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(output, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
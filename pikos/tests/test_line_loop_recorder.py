@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_line_loop_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import sys
+import unittest
+
+from pikos.monitors.line_monitor import LineMonitor
+from pikos.monitors.records import (
+    LineLoopRecord, LineMemoryRecord, LineRecord)
+from pikos.recorders.abstract_recorder import RecorderError
+from pikos.recorders.line_loop_recorder import LineLoopRecorder
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.tests.compat import TestCase
+
+
+def line_records(lines):
+    return [
+        LineRecord(index, 'f', lineno, 'line {0}'.format(lineno), 'file')
+        for index, lineno in enumerate(lines)]
+
+
+def compress(records, **keywords):
+    output = ListRecorder()
+    recorder = LineLoopRecorder(output, **keywords)
+    recorder.prepare(type(records[0]))
+    for record in records:
+        recorder.record(record)
+    recorder.finalize()
+    return output.records
+
+
+class TestLineLoopRecorder(TestCase):
+
+    def test_no_repetition(self):
+        records = compress(line_records([1, 2, 3]))
+        self.assertEqual(
+            records,
+            [LineLoopRecord(0, 'f', 1, (1,), 1, None, None, 'line 1', 'file'),
+             LineLoopRecord(1, 'f', 2, (2,), 1, None, None, 'line 2', 'file'),
+             LineLoopRecord(2, 'f', 3, (3,), 1, None, None, 'line 3', 'file')])
+
+    def test_loop(self):
+        lines = [1] + [2, 3, 4] * 100 + [2, 5]
+        records = compress(line_records(lines))
+        self.assertEqual(
+            [(record.index, record.lineNo, record.lines, record.iterations)
+             for record in records],
+            [(0, 1, (1,), 1),
+             (1, 2, (2, 3, 4), 100),
+             (301, 2, (2,), 1),
+             (302, 5, (5,), 1)])
+
+    def test_consecutive_loops(self):
+        lines = [1, 2] * 5 + [3] * 4 + [1, 2, 4]
+        records = compress(line_records(lines))
+        self.assertEqual(
+            [(record.lines, record.iterations) for record in records],
+            [((1, 2), 5), ((3,), 4), ((1,), 1), ((2,), 1), ((4,), 1)])
+
+    def test_max_period(self):
+        lines = [1, 2, 3] * 4
+        records = compress(line_records(lines), max_period=2)
+        self.assertEqual(len(records), 12)
+        records = compress(line_records(lines), max_period=3)
+        self.assertEqual(
+            [(record.lines, record.iterations) for record in records],
+            [((1, 2, 3), 4)])
+
+    def test_memory_range(self):
+        records = [
+            LineMemoryRecord(
+                index, 'f', lineno, 100 + index, 200, 'line', 'file')
+            for index, lineno in enumerate([1, 2, 1, 2, 1, 2, 3])]
+        compressed = compress(records)
+        self.assertEqual(
+            [(record.lines, record.iterations, record.minRSS,
+              record.maxRSS) for record in compressed],
+            [((1, 2), 3, 100, 105), ((3,), 1, 106, 106)])
+
+    def test_finalize_without_prepare(self):
+        recorder = LineLoopRecorder(ListRecorder())
+        with self.assertRaises(RecorderError):
+            recorder.finalize()
+
+    def test_line_monitor(self):
+        filename = __file__.replace('.pyc', '.py')
+        output = ListRecorder(
+            filter_=lambda record: record.filename == filename)
+        monitor = LineMonitor(LineLoopRecorder(output))
+
+        @monitor.attach
+        def loop():
+            total = 0
+            for index in range(1000):
+                total += index
+            return total
+
+        try:
+            self.assertEqual(loop(), 499500)
+        finally:
+            sys.settrace(None)
+        self.assertEqual(
+            [(record.lines, record.iterations) for record in output.records],
+            [((99,), 1),
+             ((100, 101), 1000),
+             ((100,), 1),
+             ((102,), 1)])
+
+
+    def test_record_without_prepare(self):
+        recorder = LineLoopRecorder(ListRecorder())
+        with self.assertRaises(RecorderError):
+            recorder.record(line_records([1])[0])
+
+    def test_finalize_twice(self):
+        recorder = LineLoopRecorder(ListRecorder())
+        recorder.prepare(LineRecord)
+        recorder.finalize()
+        with self.assertRaises(RecorderError):
+            recorder.finalize()
+        with self.assertRaises(RecorderError):
+            recorder.record(line_records([1])[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@
 #  Copyright (c) 2014, Enthought, Inc.
 #  All rights reserved.
 # -----------------------------------------------------------------------------
+import threading
 import unittest
 
 from pikos.filters.on_value import OnValue
@@ -113,6 +114,53 @@ class TestLineMemoryMonitor(TestCase):
             "5 gcd 32             return y {0}"]
         self.check_records(template, recorder)
 
+    def test_threshold(self):
+        from pikos.monitors.line_memory_monitor import LineMemoryMonitor
+        size = 64 * 1024 ** 2
+        recorder = ListRecorder(filter_=OnValue('filename', self.filename))
+        monitor = LineMemoryMonitor(recorder, threshold=size // 4)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_allocating_function(size)
+        self.assertEqual(result, size)
+
+        # Only the lines that allocate and release the memory are recorded.
+        records = recorder.records
+        self.assertEqual(len(records), 2)
+        allocate, release = records
+        # The `line` field is shadowed by the record format template.
+        self.assertEqual(allocate[-2].strip(), "data = '1' * size")
+        self.assertEqual(release[-2].strip(), "del data")
+        self.assertEqual(release.index - allocate.index, 2)
+        self.assertTrue(allocate.deltaRSS >= size)
+        self.assertTrue(release.deltaRSS <= -size)
+
+    def test_threshold_with_threads(self):
+        from pikos.monitors.line_memory_monitor import LineMemoryMonitor
+        size = 64 * 1024 ** 2
+        filename = __file__.replace('.pyc', '.py')
+        recorder = ListRecorder(filter_=OnValue('filename', filename))
+        monitor = LineMemoryMonitor(recorder, threshold=size // 4)
+        lock = threading.Lock()
+        blocks = []
+
+        def allocate():
+            # Wait for the main thread and allocate in the same line.
+            lock.acquire(); blocks.append('1' * size)  # noqa
+            lock.release()
+
+        lock.acquire()
+        with monitor:
+            thread = threading.Thread(target=allocate)
+            thread.start()
+            # The main thread has line events while the thread waits in
+            # the middle of the allocating line.
+            lock.release()
+            thread.join()
+        records = [
+            record for record in recorder.records if record.deltaRSS >= size]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].function, 'allocate')
+
     def test_issue2(self):
         """ Test for issue #2.
 
@@ -2,7 +2,9 @@ import StringIO
 import unittest
 
 from pikos.filters.on_value import OnValue
+from pikos.governor import OverheadGovernor
 from pikos.monitors.line_monitor import LineMonitor
+from pikos.recorders.list_recorder import ListRecorder
 from pikos.recorders.text_stream_recorder import TextStreamRecorder
 from pikos.tests.compat import TestCase
 from pikos.tests.monitoring_helper import MonitoringHelper
@@ -115,6 +117,23 @@ class TestLineMonitor(TestCase):
             "5 gcd 32             return y {0}"]
         self.check_records(template, self.stream)
 
+    def test_governor_sampling(self):
+        recorder = ListRecorder()
+        governor = OverheadGovernor(interval=1e9)
+        governor.rate = 2
+        monitor = LineMonitor(recorder, governor=governor)
+        helper = MonitoringHelper(monitor)
+        result = helper.run_on_function()
+        self.assertEqual(result, 3)
+        records = recorder.records
+        self.assertEqual(
+            [record.index for record in records], range(len(records)))
+        self.assertEqual(set(record.weight for record in records), set([2]))
+        # The six lines of gcd are consecutive events.
+        self.assertEqual(
+            len([record for record in records if record.function == 'gcd']),
+            3)
+
     def test_issue2(self):
         """ Test for issue #2.
 
@@ -44,6 +44,8 @@ class TestListRecorder(TestCase):
         for record in records:
             recorder.record(record)
         self.assertSequenceEqual(recorder.records, output)
+        self.assertEqual(
+            recorder.stats(), {'events': 2, 'recorded': 1, 'filtered': 1})
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_lsprof_rt.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import threading
+import time
+import unittest
+
+from pikos.tests.compat import TestCase
+
+try:
+    import zmq
+    from pikos._internal import _lsprof_rt
+except ImportError:
+    _lsprof_rt = None
+
+
+def busy(duration):
+    start = time.time()
+    total = 0
+    while time.time() - start < duration:
+        total += 1
+    return total
+
+
+def sleeper(duration):
+    time.sleep(duration)
+
+
+class TestLsprofRt(TestCase):
+
+    def setUp(self):
+        if _lsprof_rt is None:
+            self.skipTest('The real time lsprof requires pyzmq and libzmq')
+        # The profiler sends a handshake to the collector when it is
+        # created and waits for the reply.
+        self.context = zmq.Context()
+        self.socket = self.context.socket(zmq.REP)
+        self.socket.bind('tcp://127.0.0.1:9002')
+
+    def tearDown(self):
+        self.socket.close()
+        self.context.term()
+
+    def profiler(self, **keywords):
+        def reply():
+            self.socket.recv()
+            self.socket.send('')
+
+        thread = threading.Thread(target=reply)
+        thread.start()
+        try:
+            return _lsprof_rt.Profiler(**keywords)
+        finally:
+            thread.join()
+
+    def stats(self, profiler):
+        return dict(
+            (entry.code.co_name, entry) for entry in profiler.getstats()
+            if hasattr(entry.code, 'co_name'))
+
+    def test_cputime(self):
+        profiler = self.profiler(cputime=True)
+        profiler.enable()
+        busy(0.1)
+        sleeper(0.1)
+        profiler.disable()
+        stats = self.stats(profiler)
+        # The cpu time of the busy loop is close to its wall time.
+        entry = stats['busy']
+        self.assertTrue(entry.totaltime >= 0.09)
+        self.assertTrue(entry.totalcputime >= 0.5 * entry.totaltime)
+        # The cpu time excludes the sleep.
+        entry = stats['sleeper']
+        self.assertTrue(entry.totaltime >= 0.09)
+        self.assertTrue(entry.totalcputime < 0.05)
+        self.assertTrue(entry.inlinecputime <= entry.totalcputime)
+        # The entries keep the tuple length of the lsprof entries.
+        self.assertEqual(len(entry), 6)
+
+    def test_without_cputime(self):
+        profiler = self.profiler()
+        profiler.enable()
+        sleeper(0.01)
+        profiler.disable()
+        stats = self.stats(profiler)
+        self.assertIsNone(stats['sleeper'].totalcputime)
+        self.assertIsNone(stats['sleeper'].inlinecputime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_pickle_file_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+
+from pikos.recorders.abstract_recorder import RecorderError
+from pikos.recorders.pickle_file_recorder import (
+    PickleFileRecorder, read_records)
+from pikos.tests.compat import TestCase
+from pikos.tests.dummy_record import DummyRecord
+
+
+class TestPickleFileRecorder(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'mylog')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_prepare(self):
+        recorder = PickleFileRecorder(filename=self.filename)
+        recorder.prepare(DummyRecord)
+        self.assertTrue(recorder.ready)
+        recorder.finalize()
+        self.assertFalse(recorder.ready)
+        pid, fields, records = read_records(self.filename)
+        self.assertEqual(pid, os.getpid())
+        self.assertEqual(fields, DummyRecord._fields)
+        self.assertEqual(records, [])
+
+    def test_record(self):
+        record = DummyRecord(5, 'pikos', 'apikos')
+        recorder = PickleFileRecorder(filename=self.filename)
+        recorder.prepare(DummyRecord)
+        recorder.record(record)
+        recorder.record(record)
+        recorder.finalize()
+        _, _, records = read_records(self.filename)
+        self.assertEqual(records, [(5, 'pikos', 'apikos')] * 2)
+
+    def test_filter(self):
+        recorder = PickleFileRecorder(
+            filename=self.filename, filter_=lambda record: record[0] > 1)
+        recorder.prepare(DummyRecord)
+        recorder.record(DummyRecord(1, 'pikos', 'apikos'))
+        recorder.record(DummyRecord(2, 'pikos', 'apikos'))
+        recorder.finalize()
+        _, _, records = read_records(self.filename)
+        self.assertEqual(records, [(2, 'pikos', 'apikos')])
+        self.assertEqual(
+            recorder.stats(),
+            {'events': 2, 'recorded': 1, 'filtered': 1,
+             'bytes': os.path.getsize(self.filename)})
+
+    def test_tuple_records(self):
+        recorder = PickleFileRecorder(filename=self.filename)
+        recorder.prepare(tuple)
+        recorder.record((1, 2))
+        recorder.finalize()
+        _, fields, records = read_records(self.filename)
+        self.assertIsNone(fields)
+        self.assertEqual(records, [(1, 2)])
+
+    def test_truncated_file(self):
+        recorder = PickleFileRecorder(filename=self.filename)
+        recorder.prepare(DummyRecord)
+        recorder.record(DummyRecord(1, 'pikos', 'apikos'))
+        recorder.record(DummyRecord(2, 'pikos', 'apikos'))
+        recorder.finalize()
+        with open(self.filename, 'rb') as handle:
+            data = handle.read()
+        with open(self.filename, 'wb') as handle:
+            handle.write(data[:-3])
+        _, _, records = read_records(self.filename)
+        self.assertEqual(records, [(1, 'pikos', 'apikos')])
+
+    def test_exception_when_no_prepare(self):
+        recorder = PickleFileRecorder(filename=self.filename)
+        with self.assertRaises(RecorderError):
+            recorder.record(DummyRecord(1, 'pikos', 'apikos'))
+        with self.assertRaises(RecorderError):
+            recorder.finalize()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,7 @@ import tempfile
 import sys
 
 from pikos.recorders.api import (
-    TextStreamRecorder, TextFileRecorder, CSVFileRecorder)
+    TextStreamRecorder, TextFileRecorder, CSVFileRecorder, FlightRecorder)
 from pikos.tests import compat
 
 
@@ -66,6 +66,27 @@ class TestPikosRecorderFactories(compat.TestCase):
         self.assertEqual(recorder._filename, self.filename)
         self.assertIs(recorder._filter, my_filter)
 
+    def test_flightrecorder(self):
+        from pikos.api import flightrecorder
+
+        # default usage
+        recorder = flightrecorder()
+        self.assertIsInstance(recorder, FlightRecorder)
+        self.assertEqual(
+            recorder._filename, 'monitor_records_{pid}_{index}.log')
+        self.assertEqual(len(recorder._ring), 10000)
+        self.assertIsNone(recorder._rss_limit)
+        self.assertTrue(recorder._dump_on_exception)
+
+        # with a filter
+        recorder = flightrecorder(
+            self.filename, size=10, filter_=my_filter, rss_limit=2 ** 30)
+        self.assertIsInstance(recorder, FlightRecorder)
+        self.assertEqual(recorder._filename, self.filename)
+        self.assertEqual(len(recorder._ring), 10)
+        self.assertEqual(recorder._rss_limit, 2 ** 30)
+        self.assertIs(recorder._filter, my_filter)
+
 
 if __name__ == '__main__':
     import unittest
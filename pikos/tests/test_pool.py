@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_pool.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from pikos.filters.on_value import OnValue
+from pikos.pool import MonitoredPool, merge_records
+from pikos.recorders.pickle_file_recorder import PickleFileRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.dummy_record import DummyRecord
+
+
+def gcd(x, y):
+    while x > 0:
+        x, y = y % x, x
+    return y
+
+
+def work(value):
+    return gcd(value, 12)
+
+
+class TestMonitoredPool(TestCase):
+
+    def setUp(self):
+        if not hasattr(os, 'fork'):
+            self.skipTest('The pool test requires os.fork')
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'pool.csv')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_pool(self):
+        pool = MonitoredPool(
+            2, output=self.output, filter_=OnValue('function', 'gcd'))
+        result = pool.map(work, range(8), chunksize=1)
+        pool.close()
+        pool.join()
+        self.assertEqual(result, [12, 1, 2, 3, 4, 1, 6, 1])
+        self.assertFalse(os.path.exists(pool.directory))
+        with open(self.output, 'rb') as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(
+            rows[0], ['pid', 'index', 'type', 'function', 'lineNo',
+                      'filename'])
+        self.assertEqual(len(rows), 17)
+        self.assertEqual(
+            sorted(row[2] for row in rows[1:]), ['call'] * 8 + ['return'] * 8)
+        pids = set(row[0] for row in rows[1:])
+        self.assertTrue(1 <= len(pids) <= 2)
+        self.assertNotIn(str(os.getpid()), pids)
+
+    def test_keep_worker_files(self):
+        pool = MonitoredPool(
+            1, output=self.output, filter_=OnValue('function', 'gcd'),
+            keep_worker_files=True)
+        pool.map(work, range(2))
+        pool.close()
+        pool.join()
+        try:
+            self.assertEqual(len(os.listdir(pool.directory)), 1)
+        finally:
+            shutil.rmtree(pool.directory)
+
+    def test_merge_records(self):
+        filenames = []
+        for index in (2, 1):
+            filename = os.path.join(self.directory, 'worker{0}'.format(index))
+            recorder = PickleFileRecorder(filename)
+            recorder.prepare(DummyRecord)
+            recorder.record(DummyRecord(index, 'pikos', 'apikos'))
+            recorder.finalize()
+            filenames.append(filename)
+        count = merge_records(filenames, self.output)
+        self.assertEqual(count, 2)
+        with open(self.output, 'rb') as handle:
+            rows = list(csv.reader(handle))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0], ['pid', 'one', 'two', 'three'])
+        # The files are merged in the order of their names.
+        self.assertEqual(
+            rows[1:], [[str(os.getpid()), '1', 'pikos', 'apikos'],
+                       [str(os.getpid()), '2', 'pikos', 'apikos']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_summary_recorder.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import StringIO
+import unittest
+
+from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.monitors.records import StatsRecord
+from pikos.recorders.list_recorder import ListRecorder
+from pikos.recorders.summary_recorder import SummaryRecorder
+from pikos.recorders.text_stream_recorder import TextStreamRecorder
+from pikos.tests.compat import TestCase
+from pikos.tests.dummy_record import DummyRecord
+from pikos.tests.monitoring_helper import MonitoringHelper
+
+
+class TestSummaryRecorder(TestCase):
+
+    def test_recorder_summary(self):
+        output = ListRecorder(filter_=lambda record: record[0] != 1)
+        recorder = SummaryRecorder(output)
+        recorder.prepare(DummyRecord)
+        for index in range(3):
+            recorder.record(DummyRecord(index, 'a', 'b'))
+        recorder.finalize()
+        self.assertEqual(
+            output.records,
+            [DummyRecord(0, 'a', 'b'), DummyRecord(2, 'a', 'b'),
+             StatsRecord(
+                 'ListRecorder', 3, 2, 1, None, None, None, None)])
+
+    def test_records_are_sent_directly(self):
+        output = ListRecorder()
+        recorder = SummaryRecorder(output)
+        self.assertEqual(recorder.record, output.record)
+        self.assertEqual(recorder.stats(), output.stats())
+
+    def test_monitor_summary(self):
+        output = ListRecorder()
+        recorder = SummaryRecorder(output)
+        monitor = FunctionMonitor(recorder)
+        recorder.monitor = monitor
+        MonitoringHelper(monitor).run_on_function()
+        events = len(output.records) - 2
+        self.assertEqual(
+            output.records[-2:],
+            [StatsRecord(
+                'FunctionMonitor', events, events, None, None, None, None,
+                None),
+             StatsRecord(
+                 'ListRecorder', events, events, 0, None, None, None,
+                 None)])
+
+    def test_formatted_summary(self):
+        stream = StringIO.StringIO()
+        recorder = SummaryRecorder(TextStreamRecorder(stream, formatted=True))
+        recorder.prepare(DummyRecord)
+        size = len(stream.getvalue())
+        recorder.finalize()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(
+            lines[-1],
+            StatsRecord.line.format(
+                'TextStreamRecorder', 0, 0, 0, None, size, None, None))
+
+if __name__ == '__main__':
+    unittest.main()
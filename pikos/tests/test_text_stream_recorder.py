@@ -60,6 +60,10 @@ class TestTextStreamRecorder(TestCase):
         for record in records:
             recorder.record(record)
         self.assertMultiLineEqual(self.temp.getvalue(), output)
+        self.assertEqual(
+            recorder.stats(),
+            {'events': 2, 'recorded': 1, 'filtered': 1,
+             'bytes': len(output)})
 
     def test_exceptions(self):
         record = DummyRecord(5, 'pikos', 'apikos')
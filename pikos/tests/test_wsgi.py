@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: tests/test_wsgi.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from wsgiref.util import setup_testing_defaults
+
+from pikos import context
+from pikos.monitors.function_monitor import FunctionMonitor
+from pikos.recorders.pickle_file_recorder import read_records
+from pikos.tests.compat import TestCase
+
+
+def gcd(x, y):
+    while x > 0:
+        x, y = y % x, x
+    return y
+
+
+def application(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(gcd(12, 3))]
+
+
+def failing_application(environ, start_response):
+    raise ValueError()
+
+
+class TestProfilingMiddleware(TestCase):
+
+    def setUp(self):
+        from pikos.wsgi import ProfilingMiddleware
+        self.middleware_type = ProfilingMiddleware
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def request(self, middleware, headers=None):
+        environ = {}
+        setup_testing_defaults(environ)
+        environ.update(headers or {})
+        response = middleware(environ, lambda status, headers: None)
+        try:
+            body = ''.join(response)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return body
+
+    def test_sample_all_requests(self):
+        middleware = self.middleware_type(
+            application, sample_rate=1.0, directory=self.directory)
+        self.assertEqual(self.request(middleware), '3')
+        self.assertEqual(self.request(middleware), '3')
+        self.assertEqual(len(middleware.files), 2)
+        for filename in middleware.files:
+            _, _, records = read_records(filename)
+            self.assertEqual(
+                [record[1] for record in records if record[2] == 'gcd'],
+                ['call', 'return'])
+
+    def test_no_sampling(self):
+        middleware = self.middleware_type(
+            application, sample_rate=0.0, directory=self.directory)
+        self.assertEqual(self.request(middleware), '3')
+        self.assertEqual(len(middleware.files), 0)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_header(self):
+        middleware = self.middleware_type(
+            application, sample_rate=0.0, header='X-Pikos-Profile',
+            directory=self.directory)
+        self.request(middleware)
+        self.assertEqual(len(middleware.files), 0)
+        self.request(middleware, {'HTTP_X_PIKOS_PROFILE': '1'})
+        self.assertEqual(len(middleware.files), 1)
+        for value in ('', '0', 'false', 'Off'):
+            self.request(middleware, {'HTTP_X_PIKOS_PROFILE': value})
+        self.assertEqual(len(middleware.files), 1)
+
+    def test_max_files(self):
+        middleware = self.middleware_type(
+            application, sample_rate=1.0, directory=self.directory,
+            max_files=2)
+        for _ in range(4):
+            self.request(middleware)
+        self.assertEqual(len(middleware.files), 2)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(os.path.basename(path) for path in middleware.files))
+
+    def test_request_context(self):
+        middleware = self.middleware_type(
+            application, sample_rate=1.0, directory=self.directory,
+            monitor_factory=lambda recorder: FunctionMonitor(
+                recorder, context=True))
+        self.request(middleware, {'PATH_INFO': '/gcd'})
+        _, fields, records = read_records(middleware.files[0])
+        self.assertEqual(fields[-1], 'context')
+        contexts = set(
+            record[-1] for record in records if record[2] == 'gcd')
+        self.assertEqual(len(contexts), 1)
+        self.assertEqual(
+            context.lookup(contexts.pop()), {'method': 'GET', 'path': '/gcd'})
+        self.assertEqual(context.current(), 0)
+
+    def test_application_error(self):
+        middleware = self.middleware_type(
+            failing_application, sample_rate=1.0, directory=self.directory)
+        with self.assertRaises(ValueError):
+            self.request(middleware)
+        # The monitor has been disabled and the next request is sampled.
+        middleware.application = application
+        self.request(middleware)
+        self.assertEqual(len(middleware.files), 2)
+
+    def test_response_not_iterable(self):
+        closed = []
+
+        class Response(object):
+
+            def __iter__(self):
+                raise ValueError()
+
+            def close(self):
+                closed.append(True)
+
+        middleware = self.middleware_type(
+            lambda environ, start_response: Response(), sample_rate=1.0,
+            directory=self.directory)
+        with self.assertRaises(ValueError):
+            self.request(middleware)
+        self.assertEqual(closed, [True])
+        # The monitor has been disabled and the next request is sampled.
+        middleware.application = application
+        self.request(middleware)
+        self.assertEqual(len(middleware.files), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
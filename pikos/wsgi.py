@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+#------------------------------------------------------------------------------
+#  Package: Pikos toolkit
+#  File: wsgi.py
+#  License: LICENSE.TXT
+#
+#  Copyright (c) 2014, Enthought, Inc.
+#  All rights reserved.
+#------------------------------------------------------------------------------
+""" Profile a sampled fraction of the requests of a WSGI application.
+
+The :class:`ProfilingMiddleware` wraps a WSGI application and enables a pikos
+monitor for a random fraction of the requests and for the requests that
+carry a trigger header. The records of every profiled request are written
+to their own file and only the files of the most recent requests are kept,
+so the overhead and the disk usage are bounded::
+
+    from pikos.wsgi import ProfilingMiddleware
+    from pikos.cymonitors.api import FunctionTimeMonitor
+
+    application = ProfilingMiddleware(
+        application, monitor_factory=FunctionTimeMonitor, sample_rate=0.01,
+        header='X-Pikos-Profile', directory='/var/tmp/pikos')
+
+A request is monitored from the call of the application until the response
+iterable is closed. The monitor hooks and the request tag belong to the
+thread that calls the application, so the server must close the response on
+that same thread (as the WSGI servers that run a request on one thread do).
+At most one request is profiled at a time; the requests that arrive while
+another one is profiled are not sampled. The request is tagged with its
+method and path (see :mod:`pikos.context`), so monitors that are created with
+``context=True`` can be used to tell the requests apart.
+
+"""
+import collections
+import os
+import random
+import threading
+
+from pikos import context
+
+#: The name of the record file of a request in the middleware directory.
+REQUEST_FILENAME = 'request.{pid}.{index}.pikos'
+
+#: The values of the trigger header that do not request profiling.
+FALSE_VALUES = frozenset(['', '0', 'false', 'no', 'off'])
+
+
+class ProfilingMiddleware(object):
+    """ A WSGI middleware that monitors a sample of the requests.
+
+    Public
+    ------
+    application : callable
+        The wrapped WSGI application.
+
+    directory : string
+        The directory of the request files.
+
+    files : deque
+        The paths of the most recent request files (oldest first).
+
+    Private
+    -------
+    _lock : Lock
+        Held while a request is profiled.
+
+    """
+
+    def __init__(self, application, monitor_factory=None, sample_rate=0.01,
+                 header=None, directory='.', max_files=100,
+                 recorder_factory=None):
+        """ Initialize the middleware.
+
+        Parameters
+        ----------
+        application : callable
+            The WSGI application to wrap.
+
+        monitor_factory : callable
+            A callable that accepts the recorder of the request and returns
+            the monitor to enable (e.g. a monitor class). Default is the
+            :class:`~pikos.monitors.function_monitor.FunctionMonitor`.
+
+        sample_rate : float
+            The fraction of the requests to profile (between 0 and 1).
+
+        header : string
+            The name of an http header (e.g. ``X-Pikos-Profile``) that
+            requests profiling of the request regardless of the sample rate
+            when its value is not empty, ``0``, ``false``, ``no`` or ``off``.
+            Default is None.
+
+        directory : string
+            The directory of the request files.
+
+        max_files : int
+            The number of request files to keep. The file of the oldest
+            request is removed when a new one is written.
+
+        recorder_factory : callable
+            A callable that accepts the file path of the request and returns
+            the recorder. Default is the
+            :class:`~pikos.recorders.pickle_file_recorder.PickleFileRecorder`.
+
+        """
+        if monitor_factory is None:
+            from pikos.monitors.function_monitor import FunctionMonitor
+            monitor_factory = FunctionMonitor
+        if recorder_factory is None:
+            from pikos.recorders.pickle_file_recorder import (
+                PickleFileRecorder)
+            recorder_factory = PickleFileRecorder
+        self.application = application
+        self.directory = directory
+        self.files = collections.deque()
+        self._monitor_factory = monitor_factory
+        self._recorder_factory = recorder_factory
+        self._sample_rate = sample_rate
+        if header is None:
+            self._environ_key = None
+        else:
+            self._environ_key = 'HTTP_' + header.upper().replace('-', '_')
+        self._max_files = max_files
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self._sample(environ) or not self._lock.acquire(False):
+            return self.application(environ, start_response)
+        try:
+            monitor = self._start()
+        except:
+            self._lock.release()
+            raise
+        tag = context.tag(
+            method=environ.get('REQUEST_METHOD'),
+            path=environ.get('PATH_INFO'))
+        tag.__enter__()
+        try:
+            result = self.application(environ, start_response)
+            return _ClosingIterator(
+                result, lambda: self._finish(monitor, tag))
+        except:
+            self._finish(monitor, tag)
+            raise
+
+    def _sample(self, environ):
+        if self._environ_key is not None:
+            value = environ.get(self._environ_key, '').strip().lower()
+            if value not in FALSE_VALUES:
+                return True
+        return self._sample_rate > 0 and random.random() < self._sample_rate
+
+    def _start(self):
+        filename = os.path.join(
+            self.directory,
+            REQUEST_FILENAME.format(pid=os.getpid(), index=self._index))
+        self._index += 1
+        monitor = self._monitor_factory(self._recorder_factory(filename))
+        monitor.enable()
+        self.files.append(filename)
+        while len(self.files) > self._max_files:
+            old = self.files.popleft()
+            if os.path.exists(old):
+                os.remove(old)
+        return monitor
+
+    def _finish(self, monitor, tag):
+        try:
+            tag.__exit__(None, None, None)
+            monitor.disable()
+        finally:
+            self._lock.release()
+
+
+class _ClosingIterator(object):
+    """ Iterate over the response of the application and call a callback
+    when the response is closed.
+
+    The response is closed when it cannot be iterated, the caller is then
+    responsible for the callback.
+
+    """
+
+    def __init__(self, iterable, callback):
+        self._iterable = iterable
+        try:
+            self._iterator = iter(iterable)
+        except:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+            raise
+        self._callback = callback
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return next(self._iterator)
+
+    def close(self):
+        try:
+            close = getattr(self._iterable, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            callback, self._callback = self._callback, None
+            if callback is not None:
+                callback()
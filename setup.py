@@ -20,6 +20,11 @@ else:
     CAN_BUILD_CYTHON_MONITORS = platform.python_implementation() == 'CPython'
     cmdclass = {'build_ext': build_ext}
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 try:
     import unittest2
 except ImportError:
@@ -47,46 +52,116 @@ real_time_lsprof = Feature(
 
 features = {'real-time-lsprof': real_time_lsprof}
 
-cython_monitors = Feature(
-    description='optional compile additional cython monitors',
-    standard=CAN_BUILD_CYTHON_MONITORS,
-    ext_modules=[
-        Extension(
-            'pikos.cymonitors.monitor',
-            sources=['pikos/cymonitors/monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.function_monitor',
-            sources=[
-                'pikos/cymonitors/function_monitor.pyx']),
+cython_extensions = [
+    Extension(
+        'pikos.cymonitors.monitor',
+        sources=['pikos/cymonitors/monitor.pyx']),
+    Extension(
+        'pikos.cymonitors.function_monitor',
+        sources=[
+            'pikos/cymonitors/function_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/hooks.h', 'pikos/cymonitors/code_map.h',
+            'pikos/cymonitors/sampler.h', 'pikos/cymonitors/thread_stacks.h']),
+    Extension(
+        'pikos.cymonitors.line_monitor',
+        sources=[
+            'pikos/cymonitors/line_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/hooks.h', 'pikos/cymonitors/code_map.h',
+            'pikos/cymonitors/sampler.h', 'pikos/cymonitors/thread_stacks.h']),
+    Extension(
+        'pikos.cymonitors.focused_function_monitor',
+        sources=[
+            'pikos/cymonitors/focused_function_monitor.pyx'],
+        depends=['pikos/cymonitors/thread_stacks.h']),
+    Extension(
+        'pikos.cymonitors.focused_line_monitor',
+        sources=[
+            'pikos/cymonitors/focused_line_monitor.pyx'],
+        depends=['pikos/cymonitors/thread_stacks.h']),
+    Extension(
+        'pikos.cymonitors.function_memory_monitor',
+        sources=[
+            'pikos/cymonitors/function_memory_monitor.pyx'],
+        depends=['pikos/cymonitors/hooks.h']),
+    Extension(
+        'pikos.cymonitors.function_memory_stats_monitor',
+        sources=[
+            'pikos/cymonitors/function_memory_stats_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/code_map.h', 'pikos/cymonitors/hooks.h',
+            'pikos/cymonitors/rss.h', 'pikos/cymonitors/thread_stacks.h']),
+    Extension(
+        'pikos.cymonitors.function_time_monitor',
+        sources=[
+            'pikos/cymonitors/function_time_monitor.pyx'],
+        depends=['pikos/cymonitors/timers.h']),
+    Extension(
+        'pikos.cymonitors.blocking_monitor',
+        sources=[
+            'pikos/cymonitors/blocking_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/hooks.h', 'pikos/cymonitors/thread_stacks.h',
+            'pikos/cymonitors/timers.h']),
+    Extension(
+        'pikos.cymonitors.slow_call_monitor',
+        sources=[
+            'pikos/cymonitors/slow_call_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/hooks.h', 'pikos/cymonitors/thread_stacks.h',
+            'pikos/cymonitors/timers.h']),
+    Extension(
+        'pikos.cymonitors.focused_function_memory_monitor',
+        sources=[
+            'pikos/cymonitors/focused_function_memory_monitor.pyx']),
+    Extension(
+        'pikos.cymonitors.line_memory_monitor',
+        sources=[
+            'pikos/cymonitors/line_memory_monitor.pyx'],
+        depends=['pikos/cymonitors/hooks.h']),
+    Extension(
+        'pikos.cymonitors.focused_line_memory_monitor',
+        sources=[
+            'pikos/cymonitors/focused_line_memory_monitor.pyx']),
+    Extension(
+        'pikos.cymonitors.call_count_monitor',
+        sources=[
+            'pikos/cymonitors/call_count_monitor.pyx'],
+        depends=['pikos/cymonitors/hooks.h', 'pikos/cymonitors/code_map.h']),
+    Extension(
+        'pikos.cymonitors.line_stats_monitor',
+        sources=[
+            'pikos/cymonitors/line_stats_monitor.pyx'],
+        depends=[
+            'pikos/cymonitors/hooks.h', 'pikos/cymonitors/code_map.h',
+            'pikos/cymonitors/thread_stacks.h', 'pikos/cymonitors/timers.h']),
+    Extension(
+        'pikos.cymonitors.multiplexer',
+        sources=[
+            'pikos/cymonitors/multiplexer.pyx'],
+        depends=['pikos/cymonitors/hooks.h'])]
+
+if platform.system() != 'Windows':
+    cython_extensions.append(
         Extension(
-            'pikos.cymonitors.line_monitor',
-            sources=[
-                'pikos/cymonitors/line_monitor.pyx']),
+            'pikos.cymonitors.function_rusage_monitor',
+            sources=['pikos/cymonitors/function_rusage_monitor.pyx'],
+            depends=[
+                'pikos/cymonitors/hooks.h', 'pikos/cymonitors/rusage.h',
+                'pikos/cymonitors/thread_stacks.h']))
+
+if numpy is not None:
+    cython_extensions.append(
         Extension(
-            'pikos.cymonitors.focused_function_monitor',
-            sources=[
-                'pikos/cymonitors/focused_function_monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.focused_line_monitor',
-            sources=[
-                'pikos/cymonitors/focused_line_monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.function_memory_monitor',
-            sources=[
-                'pikos/cymonitors/function_memory_monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.focused_function_memory_monitor',
-            sources=[
-                'pikos/cymonitors/focused_function_memory_monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.line_memory_monitor',
-            sources=[
-                'pikos/cymonitors/line_memory_monitor.pyx']),
-        Extension(
-            'pikos.cymonitors.focused_line_memory_monitor',
-            sources=[
-                'pikos/cymonitors/focused_line_memory_monitor.pyx'])])
+            'pikos.cymonitors.numpy_allocation_monitor',
+            sources=['pikos/cymonitors/numpy_allocation_monitor.pyx'],
+            include_dirs=[numpy.get_include()]))
 
+cython_monitors = Feature(
+    description='optional compile additional cython monitors',
+    standard=CAN_BUILD_CYTHON_MONITORS,
+    ext_modules=cython_extensions)
 
 features['cython-monitors'] = cython_monitors
 
@@ -130,6 +205,9 @@ setup(
     packages=find_packages(),
     test_suite=test_suite,
     entry_points=dict(
-        console_scripts=['pikos-run = pikos.runner:main']),
+        console_scripts=[
+            'pikos-run = pikos.runner:main',
+            'pikos-control = pikos.control:main',
+            'pikos-collector = pikos.collector:main']),
     cmdclass=cmdclass,
     features=features)